@@ -5,7 +5,13 @@ from .models import (
     RegistroUnicoDesaparecidos,
     PerfilPersona,
     AparecidosVivosNoRegistrados,
-    Funcionario
+    Funcionario,
+    CheckpointCarga,
+    EjecucionCarga,
+    CambioComponente,
+    EstadisticaComponente,
+    EstadisticaComunidad,
+    DIMENSIONES_CONSOLIDADO
 )
 
 # Register your models here.
@@ -13,8 +19,10 @@ from .models import (
 @admin.register(ConsolidadoSpoa)
 class ConsolidadoSpoaAdmin(admin.ModelAdmin):
     list_display = ('nunc', 'delito', 'fecha_hechos', 'fecha_denuncia','unidad', 'fuente', 'etapa', 'estado')
-    list_filter = ('fuente', 'seccional', 'unidad', 'grupo_delito')
-    search_fields = ('nunc', 'nombre_completo', 'delito', 'relato', 'numero_documento')
+    list_select_related = ('delito_dim', 'unidad_dim', 'fuente_dim', 'etapa_dim', 'estado_dim')
+    list_filter = ('fuente_dim', 'seccional_dim', 'unidad_dim', 'grupo_delito_dim')
+    search_fields = ('nunc', 'nombre_completo', 'delito_dim__nombre', 'relato', 'numero_documento')
+    raw_id_fields = tuple(f"{campo}_dim" for campo in DIMENSIONES_CONSOLIDADO)
     date_hierarchy = 'fecha_hechos'
     list_per_page = 20
 
@@ -54,4 +62,56 @@ class FuncionarioAdmin(admin.ModelAdmin):
     list_filter = ('estado', 'seccional', 'nom_cargo', 'fuente')
     search_fields = ('numero_documento', 'nombres_apellidos', 'nom_cargo', 'nom_dependencia')
     list_per_page = 20
-    date_hierarchy = 'fecha_registro'
\ No newline at end of file
+    date_hierarchy = 'fecha_registro'
+
+@admin.register(CheckpointCarga)
+class CheckpointCargaAdmin(admin.ModelAdmin):
+    list_display = ('modelo', 'archivo', 'chunks_cargados', 'filas_cargadas', 'completado', 'fecha_actualizacion')
+    list_filter = ('modelo', 'completado')
+    search_fields = ('archivo', 'modelo')
+    readonly_fields = ('fecha_actualizacion',)
+    list_per_page = 20
+
+@admin.register(EjecucionCarga)
+class EjecucionCargaAdmin(admin.ModelAdmin):
+    list_display = ('fecha_inicio', 'comando', 'conjunto', 'estado', 'filas_cargadas', 'filas_rechazadas', 'duracion', 'filas_por_segundo', 'rss_pico_mb', 'version_datos')
+    list_filter = ('comando', 'conjunto', 'estado')
+    search_fields = ('archivo', 'checksum_archivo')
+    readonly_fields = ('fecha_inicio', 'fecha_fin')
+    date_hierarchy = 'fecha_inicio'
+    list_per_page = 20
+
+@admin.register(CambioComponente)
+class CambioComponenteAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'componente_anterior', 'componente_nueva', 'tipo', 'nodos_compartidos', 'tamano_anterior', 'tamano_nuevo', 'ejecucion')
+    list_filter = ('tipo',)
+    search_fields = ('componente_anterior', 'componente_nueva')
+    list_select_related = ('ejecucion',)
+    readonly_fields = ('fecha',)
+    list_per_page = 20
+
+
+@admin.register(EstadisticaComponente)
+class EstadisticaComponenteAdmin(admin.ModelAdmin):
+    list_display = ('componente', 'componente_id', 'tamano', 'nodos_nunc', 'nodos_persona', 'enlaces', 'densidad', 'diametro', 'diametro_exacto', 'fecha')
+    list_filter = ('diametro_exacto',)
+    search_fields = ('componente_id',)
+    readonly_fields = ('fecha',)
+    list_per_page = 20
+
+
+@admin.register(EstadisticaComunidad)
+class EstadisticaComunidadAdmin(admin.ModelAdmin):
+    list_display = ('comunidad', 'componente_id', 'tamano', 'nodos_nunc', 'nodos_persona', 'enlaces_internos', 'enlaces_externos', 'densidad', 'fecha')
+    search_fields = ('comunidad', 'componente_id')
+    readonly_fields = ('fecha',)
+    list_per_page = 20
+
+
+class DimensionAdmin(admin.ModelAdmin):
+    list_display = ('nombre',)
+    search_fields = ('nombre',)
+    list_per_page = 50
+
+for modelo_dimension in DIMENSIONES_CONSOLIDADO.values():
+    admin.site.register(modelo_dimension, DimensionAdmin)
@@ -0,0 +1,200 @@
+import json
+import os
+import platform
+import subprocess
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import pandas as pd
+import django
+from django.db import connections
+from django.utils import timezone
+from .. import utils
+from ..models import (
+    ConsolidadoSpoa,
+    PersonasDf,
+    RegistroUnicoDesaparecidos,
+    AparecidosVivosNoRegistrados,
+    Funcionario
+)
+from ..utils_postgres import indices_diferidos
+from ..utils_archivos import resolver_archivo_entrada
+from ..utils_ejecuciones import rss_pico_mb
+
+
+# Conjunto -> (nombre de la función cargar_* en dashboard.utils, modelo destino)
+CARGADORES = {
+    'consolidado': ('cargar_consolidado_spoa', ConsolidadoSpoa),
+    'personas': ('cargar_personas_df', PersonasDf),
+    'rud': ('cargar_rud', RegistroUnicoDesaparecidos),
+    'aparecidos': ('cargar_aparecidos_vivos_no_registrados', AparecidosVivosNoRegistrados),
+    'funcionarios': ('cargar_funcionarios', Funcionario),
+}
+
+# Etapas medidas en cada carga. Las cuatro primeras son las que registra
+# _cargar_csv en metricas['etapas'] (las mismas de EjecucionCarga.etapas);
+# 'otros' es el tiempo que no cae en ninguna (transacciones, checkpoints, etc.)
+ETAPAS = ('lectura', 'transformacion', 'insercion', 'delta', 'indices', 'otros')
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def vaciar_tabla(modelo, using='default'):
+    """
+    Elimina todas las filas del modelo (TRUNCATE en PostgreSQL)
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE TABLE {connection.ops.quote_name(modelo._meta.db_table)}")
+    else:
+        modelo.objects.using(using).all().delete()
+
+
+def medir_carga(conjunto, ruta_archivo, modo='orm', diferir_indices=True, vaciar=False, opciones_carga=None):
+    """
+    Ejecuta un cargar_* midiendo el tiempo de cada etapa. Las etapas de la carga
+    son las que la función registra en metricas (ver utils._cargar_csv).
+
+    Args:
+        conjunto: Clave de CARGADORES (ej. 'consolidado')
+        ruta_archivo: Archivo a cargar
+        modo: 'orm' o 'copy'
+        diferir_indices: En PostgreSQL, eliminar los índices del modelo antes de la
+                         carga y medir su reconstrucción como etapa 'indices'
+        vaciar: Vaciar la tabla destino antes de cargar
+        opciones_carga: Argumentos adicionales para la función cargar_*
+
+    Returns:
+        dict: Filas leídas y cargadas (insertadas o actualizadas), segundos, filas
+              leídas por segundo, tiempo por etapa y memoria pico
+    """
+    nombre_funcion, modelo = CARGADORES[conjunto]
+    if vaciar:
+        vaciar_tabla(modelo)
+
+    postgres = connections['default'].vendor == 'postgresql'
+    diferir = diferir_indices and postgres and bool(modelo._meta.indexes)
+    metricas = {}
+
+    inicio = time.perf_counter()
+    with (indices_diferidos(modelo) if diferir else nullcontext({})) as tiempos_indices:
+        resultado = getattr(utils, nombre_funcion)(ruta_archivo, modo=modo, metricas=metricas,
+                                                   **(opciones_carga or {}))
+    total = time.perf_counter() - inicio
+
+    tiempos = defaultdict(float, metricas.get('etapas', {}))
+    tiempos['indices'] = tiempos_indices.get('indices', 0.0)
+    tiempos['otros'] = max(0.0, total - sum(tiempos[etapa] for etapa in ETAPAS if etapa != 'otros'))
+    filas = resultado if isinstance(resultado, int) else resultado['insertados'] + resultado['actualizados']
+    filas_leidas = metricas.get('filas_leidas', 0)
+
+    return {
+        'conjunto': conjunto,
+        'modelo': modelo.__name__,
+        'archivo': os.path.basename(ruta_archivo),
+        'bytes': os.path.getsize(ruta_archivo),
+        'filas_leidas': filas_leidas,
+        'filas': filas,
+        'segundos': round(total, 3),
+        'filas_por_segundo': round(filas_leidas / total, 1) if total else None,
+        'etapas': {etapa: round(tiempos[etapa], 3) for etapa in ETAPAS},
+        'rss_pico_mb': round(rss_pico_mb(), 1),
+    }
+
+
+def _medir_en_proceso(conjunto, ruta_archivo, kwargs):
+    """
+    Cada carga corre en un proceso nuevo para que la memoria pico sea solo la suya
+    """
+    rss_inicial = rss_pico_mb()
+    medicion = medir_carga(conjunto, ruta_archivo, **kwargs)
+    medicion['rss_inicial_mb'] = round(rss_inicial, 1)
+    connections.close_all()
+    return medicion
+
+
+def ejecutar_benchmark(carpeta, conjuntos=None, modo='orm', diferir_indices=True, vaciar=False,
+                       opciones_carga=None, aislar=True):
+    """
+    Mide la carga de cada conjunto de datos de una carpeta (ver generador.generar_datos).
+
+    Args:
+        carpeta: Carpeta con los archivos de ARCHIVOS_DATOS
+        conjuntos: Lista de conjuntos a medir (por defecto todos los de CARGADORES)
+        modo: 'orm' o 'copy'
+        diferir_indices: Ver medir_carga
+        vaciar: Vaciar cada tabla antes de cargarla, para que las ejecuciones sean comparables
+        opciones_carga: Argumentos adicionales para las funciones cargar_* (ej. {'delta': True})
+        aislar: Medir cada conjunto en un proceso separado
+
+    Returns:
+        dict: Reporte con el entorno y una medición por conjunto
+    """
+    reporte = {
+        'fecha': timezone.now().isoformat(),
+        'commit': _commit_actual(),
+        'modo': modo,
+        'diferir_indices': diferir_indices,
+        'opciones_carga': opciones_carga or {},
+        'entorno': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'pandas': pd.__version__,
+            'base_datos': connections['default'].vendor,
+            'cpus': os.cpu_count(),
+        },
+        'resultados': [],
+    }
+    kwargs = {'modo': modo, 'diferir_indices': diferir_indices, 'vaciar': vaciar, 'opciones_carga': opciones_carga}
+
+    for conjunto in conjuntos or CARGADORES:
+        ruta = resolver_archivo_entrada(os.path.join(carpeta, utils.ARCHIVOS_DATOS[conjunto]))
+        if not os.path.exists(ruta):
+            print(f"{conjunto}: archivo no encontrado ({ruta}), se omite")
+            continue
+
+        print(f"Midiendo la carga de {conjunto} desde {ruta}...")
+        if aislar:
+            # Las conexiones abiertas no se pueden compartir con el proceso hijo
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                medicion = pool.submit(_medir_en_proceso, conjunto, ruta, kwargs).result()
+        else:
+            medicion = medir_carga(conjunto, ruta, **kwargs)
+
+        print(f"{conjunto}: {medicion['filas_leidas']} filas en {medicion['segundos']} s "
+              f"({medicion['filas_por_segundo']} filas/s, pico {medicion['rss_pico_mb']} MB)")
+        reporte['resultados'].append(medicion)
+
+    return reporte
+
+
+def guardar_reporte(reporte, ruta):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+
+def comparar_reportes(actual, anterior):
+    """
+    Compara dos reportes por conjunto de datos.
+
+    Returns:
+        list: Tuplas (conjunto, filas/s anterior, filas/s actual, cambio relativo)
+    """
+    previos = {medicion['conjunto']: medicion for medicion in anterior.get('resultados', [])}
+    comparacion = []
+    for medicion in actual.get('resultados', []):
+        previa = previos.get(medicion['conjunto'])
+        if not previa or not previa.get('filas_por_segundo') or not medicion.get('filas_por_segundo'):
+            continue
+        cambio = medicion['filas_por_segundo'] / previa['filas_por_segundo'] - 1
+        comparacion.append((medicion['conjunto'], previa['filas_por_segundo'], medicion['filas_por_segundo'], cambio))
+    return comparacion
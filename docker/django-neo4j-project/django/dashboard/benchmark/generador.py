@@ -0,0 +1,270 @@
+import os
+import numpy as np
+import pandas as pd
+from ..utils import ARCHIVOS_DATOS
+
+
+# Filas de cada conjunto por cada fila del consolidado (mínimo una fila)
+PROPORCIONES = {
+    'consolidado': 1.0,
+    'personas': 0.3,
+    'rud': 0.05,
+    'aparecidos': 0.02,
+    'funcionarios': 0.01,
+}
+
+# Las personas del consolidado salen de un universo de documentos más pequeño
+# que el número de filas, así un documento aparece en varias noticias
+DOCUMENTOS_POR_FILA = 0.35
+
+# Proporción de celdas "sucias" en las columnas de texto y de fecha
+PROPORCION_NULOS = 0.08
+PROPORCION_ESPACIOS = 0.05
+PROPORCION_FECHAS_INVALIDAS = 0.03
+
+FORMATOS_FECHA_SUCIOS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%d.%m.%Y', '%Y.%m.%d']
+FECHAS_INVALIDAS = ['sin fecha', '31/02/2020', '00/00/0000', 'nan', '2020-13-45', ' ']
+
+NOMBRES = ['JUAN', 'MARIA', 'JOSE', 'LUZ', 'CARLOS', 'ANA', 'LUIS', 'MARTHA', 'JORGE', 'SANDRA',
+           'PEDRO', 'CLAUDIA', 'ANDRES', 'DIANA', 'JAVIER', 'PAOLA', 'DIEGO', 'ANGELA', 'OSCAR', 'LAURA']
+APELLIDOS = ['RODRIGUEZ', 'GOMEZ', 'GONZALEZ', 'MARTINEZ', 'GARCIA', 'LOPEZ', 'HERNANDEZ', 'SANCHEZ',
+             'RAMIREZ', 'PEREZ', 'DIAZ', 'MUÑOZ', 'ROJAS', 'MORENO', 'JIMENEZ', 'CASTRO', 'ORTIZ', 'VARGAS']
+DEPARTAMENTOS = ['ANTIOQUIA', 'BOGOTA D.C.', 'VALLE DEL CAUCA', 'CAUCA', 'NARIÑO', 'META', 'CHOCO',
+                 'NORTE DE SANTANDER', 'CORDOBA', 'PUTUMAYO', 'CAQUETA', 'ARAUCA', 'GUAVIARE', 'TOLIMA']
+GRUPOS_DELITO = ['HOMICIDIO', 'DESAPARICIÓN FORZADA', 'SECUESTRO', 'RECLUTAMIENTO ILÍCITO',
+                 'LESIONES PERSONALES', 'HURTO', 'AMENAZAS', 'DESPLAZAMIENTO FORZADO', 'TORTURA',
+                 'VIOLENCIA INTRAFAMILIAR', 'EXTORSION', 'CONCIERTO PARA DELINQUIR']
+
+
+def _zipf(rng, categorias, tamano, exponente=1.1):
+    """
+    Elige valores de categorias con una distribución sesgada: unos pocos valores
+    concentran la mayoría de las filas, como ocurre con seccionales y delitos.
+    """
+    pesos = 1.0 / np.arange(1, len(categorias) + 1) ** exponente
+    indices = rng.choice(len(categorias), size=tamano, p=pesos / pesos.sum())
+    return np.asarray(categorias, dtype=object)[indices]
+
+
+def _ensuciar(rng, valores):
+    """
+    Agrega nulos, cadenas vacías, el texto 'nan' y espacios alrededor de algunos valores
+    """
+    valores = np.asarray(valores, dtype=object).copy()
+    sorteo = rng.random(len(valores))
+    nulos = sorteo < PROPORCION_NULOS
+    valores[nulos] = rng.choice(np.array(['', 'nan', '  '], dtype=object), size=int(nulos.sum()))
+    espacios = (sorteo >= PROPORCION_NULOS) & (sorteo < PROPORCION_NULOS + PROPORCION_ESPACIOS)
+    valores[espacios] = [f"  {valor} " for valor in valores[espacios]]
+    return valores
+
+
+def _fechas(rng, tamano, desde='2000-01-01', hasta='2025-05-01'):
+    """
+    Fechas en los distintos formatos de FORMATOS_FECHA_SUCIOS (sesgados hacia
+    el primero), con vacíos y valores que no son fechas válidas.
+    """
+    inicio = np.datetime64(desde)
+    dias = (np.datetime64(hasta) - inicio).astype(int)
+    fechas = pd.to_datetime(inicio + rng.integers(0, dias, size=tamano).astype('timedelta64[D]'))
+    formatos = _zipf(rng, FORMATOS_FECHA_SUCIOS, tamano, exponente=1.5)
+
+    valores = np.empty(tamano, dtype=object)
+    for fmt in FORMATOS_FECHA_SUCIOS:
+        seleccion = formatos == fmt
+        if seleccion.any():
+            valores[seleccion] = fechas[seleccion].strftime(fmt)
+
+    sorteo = rng.random(tamano)
+    invalidas = sorteo < PROPORCION_FECHAS_INVALIDAS
+    valores[invalidas] = rng.choice(np.array(FECHAS_INVALIDAS, dtype=object), size=int(invalidas.sum()))
+    vacias = (sorteo >= PROPORCION_FECHAS_INVALIDAS) & (sorteo < PROPORCION_FECHAS_INVALIDAS + PROPORCION_NULOS)
+    valores[vacias] = ''
+    return valores
+
+
+def _nombres(rng, tamano):
+    return (_zipf(rng, NOMBRES, tamano) + ' ' + _zipf(rng, APELLIDOS, tamano) + ' '
+            + _zipf(rng, APELLIDOS, tamano)).astype(object)
+
+
+def _documentos(indices):
+    """
+    Documento sintético (7 a 11 dígitos) de cada índice del universo de personas
+    """
+    return (np.asarray(indices, dtype=np.int64) * 7919 + 1000003).astype(str).astype(object)
+
+
+def _catalogo(prefijo, cantidad):
+    return [f"{prefijo} {i + 1}" for i in range(cantidad)]
+
+
+def _bloque_consolidado(rng, inicio, tamano, universo_documentos):
+    # Cada noticia (nunc) agrupa en promedio tres vínculos consecutivos
+    nunc = (inicio + np.arange(tamano)) // 3
+    # La mayoría de las personas aparece pocas veces; una minoría (sesgo zipf)
+    # aparece en muchas noticias
+    indices_documento = rng.integers(0, universo_documentos, size=tamano)
+    frecuentes = rng.random(tamano) < 0.2
+    populares = np.minimum(rng.zipf(1.5, size=int(frecuentes.sum())) - 1, universo_documentos - 1)
+    indices_documento[frecuentes] = (populares * 104729) % universo_documentos
+
+    grupos = _zipf(rng, GRUPOS_DELITO, tamano)
+    modalidades = rng.integers(1, 6, size=tamano)
+    return pd.DataFrame({
+        'nunc': [f"{11001600000020 + n:021d}" for n in nunc],
+        'fecha_hechos': _fechas(rng, tamano),
+        'fecha_denuncia': _fechas(rng, tamano),
+        'seccional': _ensuciar(rng, _zipf(rng, _catalogo('SECCIONAL', 35), tamano)),
+        'unidad': _ensuciar(rng, _zipf(rng, _catalogo('UNIDAD', 400), tamano)),
+        'despacho': _ensuciar(rng, _zipf(rng, _catalogo('FISCALIA', 4000), tamano)),
+        'numero_documento': _ensuciar(rng, _documentos(indices_documento)),
+        'nombre_completo': _ensuciar(rng, _nombres(rng, tamano)),
+        'relato': _ensuciar(rng, [f"Hechos ocurridos en {d}. Relato número {i}"
+                                  for d, i in zip(_zipf(rng, DEPARTAMENTOS, tamano), inicio + np.arange(tamano))]),
+        'delito': _ensuciar(rng, [f"{grupo} - MODALIDAD {m}" for grupo, m in zip(grupos, modalidades)]),
+        'grupo_delito': _ensuciar(rng, grupos),
+        'necropsia': _ensuciar(rng, _zipf(rng, ['NO', 'SI', 'PENDIENTE'], tamano)),
+        'fuente': _ensuciar(rng, _zipf(rng, ['SPOA', 'SIJUF', 'JYP', 'RUD', 'SIRDEC'], tamano)),
+        'calidad_vinculado': _ensuciar(rng, _zipf(rng, ['VICTIMA', 'INDICIADO', 'DENUNCIANTE', 'TESTIGO',
+                                                        'IMPUTADO'], tamano)),
+        'estado': _ensuciar(rng, _zipf(rng, ['ACTIVO', 'INACTIVO', 'ARCHIVADO', 'SUSPENDIDO'], tamano)),
+        'etapa': _ensuciar(rng, _zipf(rng, ['INDAGACION', 'INVESTIGACION', 'JUICIO', 'EJECUCION DE PENAS',
+                                            'TERMINACION ANTICIPADA', 'QUERELLABLE'], tamano)),
+    })
+
+
+def _bloque_personas(rng, inicio, tamano, universo_documentos):
+    banderas = {columna: (rng.random(tamano) < probabilidad).astype(int)
+                for columna, probabilidad in [('desaparicion_forzada', 0.2), ('homicidio', 0.35),
+                                              ('secuestro', 0.05), ('reclutamiento_ilicito', 0.03),
+                                              ('rud', 0.1), ('1.0', 0.06), ('2.0', 0.03), ('3.0', 0.01),
+                                              ('funcionario', 0.01)]}
+    return pd.DataFrame({
+        'numero_documento': _documentos((inicio + np.arange(tamano)) % universo_documentos),
+        'nombre_completo': _ensuciar(rng, _nombres(rng, tamano)),
+        **banderas,
+    })
+
+
+def _bloque_rud(rng, inicio, tamano, universo_documentos):
+    edades = rng.normal(32, 15, size=tamano).clip(0, 99).round()
+    edades[rng.random(tamano) < PROPORCION_NULOS] = np.nan
+    estaturas = rng.normal(1.65, 0.1, size=tamano).round(2)
+    estaturas[rng.random(tamano) < 0.3] = np.nan
+    return pd.DataFrame({
+        'numero_radicado': [f"RUD-{inicio + i:010d}" for i in range(tamano)],
+        'nombre_completo': _ensuciar(rng, _nombres(rng, tamano)),
+        'tipo_documento': _ensuciar(rng, _zipf(rng, ['CC', 'TI', 'RC', 'CE', 'PA'], tamano, exponente=2)),
+        'numero_documento': _ensuciar(rng, _documentos(rng.integers(0, universo_documentos, size=tamano))),
+        'departamento_desaparicion': _ensuciar(rng, _zipf(rng, DEPARTAMENTOS, tamano)),
+        'municipio_desaparicion': _ensuciar(rng, _zipf(rng, _catalogo('MUNICIPIO', 600), tamano)),
+        'barrio/vereda_desaparicion': _ensuciar(rng, _zipf(rng, _catalogo('VEREDA', 3000), tamano)),
+        'fecha_desaparicion': _fechas(rng, tamano, desde='1985-01-01'),
+        'sexo': _ensuciar(rng, _zipf(rng, ['HOMBRE', 'MUJER', 'INDETERMINADO'], tamano, exponente=2)),
+        'edad_1': edades,
+        'edad_2': edades + rng.integers(0, 5, size=tamano),
+        'estatura_1': estaturas,
+        'estatura_2': estaturas,
+        'ancestro_racial': _ensuciar(rng, _zipf(rng, ['MESTIZO', 'AFRODESCENDIENTE', 'INDIGENA', 'BLANCO'],
+                                                tamano)),
+        'estado_desaparicion': _zipf(rng, ['1.0', '2.0', '3.0'], tamano, exponente=1.5),
+        'senales_particulares': _ensuciar(rng, _zipf(rng, ['CICATRIZ EN EL ROSTRO', 'TATUAJE EN EL BRAZO',
+                                                           'LUNAR EN LA ESPALDA', 'NINGUNA'], tamano)),
+    })
+
+
+def _bloque_aparecidos(rng, inicio, tamano, universo_documentos):
+    departamentos = _zipf(rng, DEPARTAMENTOS, tamano)
+    return pd.DataFrame({
+        'numeroRadicado': [f"AVNR-{inicio + i:010d}" for i in range(tamano)],
+        'entidadradica': _ensuciar(rng, _zipf(rng, ['FISCALIA', 'MEDICINA LEGAL', 'POLICIA', 'PERSONERIA'], tamano)),
+        'nombreRegional': _ensuciar(rng, _zipf(rng, _catalogo('REGIONAL', 8), tamano)),
+        'nombreSeccional': _ensuciar(rng, _zipf(rng, _catalogo('SECCIONAL', 35), tamano)),
+        'nombreUnidadBasica': _ensuciar(rng, _zipf(rng, _catalogo('UNIDAD BASICA', 150), tamano)),
+        'usuarioRegistra': _ensuciar(rng, _zipf(rng, _catalogo('usuario', 300), tamano)),
+        'fechaDesaparicion': _fechas(rng, tamano, desde='1990-01-01'),
+        'desaparecido': _ensuciar(rng, _nombres(rng, tamano)),
+        'nombreDocumento': _ensuciar(rng, _zipf(rng, ['CEDULA DE CIUDADANIA', 'TARJETA DE IDENTIDAD',
+                                                     'REGISTRO CIVIL'], tamano, exponente=2)),
+        'numero_documento': _ensuciar(rng, _documentos(rng.integers(0, universo_documentos, size=tamano))),
+        'paisDesaparicion': _ensuciar(rng, _zipf(rng, ['COLOMBIA', 'VENEZUELA', 'ECUADOR'], tamano, exponente=3)),
+        'departamentoDesaparicion': _ensuciar(rng, departamentos),
+        'municipioDesaparicion': _ensuciar(rng, _zipf(rng, _catalogo('MUNICIPIO', 600), tamano)),
+        'aportanteDatosDesaparecido': _ensuciar(rng, _nombres(rng, tamano)),
+        'paisAportanteDatos': _ensuciar(rng, _zipf(rng, ['COLOMBIA', 'VENEZUELA'], tamano, exponente=3)),
+        'departamentoAportanteDatos': _ensuciar(rng, departamentos),
+        'municipioAportanteDatos': _ensuciar(rng, _zipf(rng, _catalogo('MUNICIPIO', 600), tamano)),
+        'detalleDireccionAportanteDatos': _ensuciar(rng, [f"CALLE {c} # {n} - {m}  " for c, n, m in
+                                                          rng.integers(1, 200, size=(tamano, 3))]),
+        'aportanteDatos': _ensuciar(rng, _zipf(rng, ['FAMILIAR', 'AMIGO', 'VECINO', 'AUTORIDAD'], tamano)),
+    })
+
+
+def _bloque_funcionarios(rng, inicio, tamano, universo_documentos):
+    # Los funcionarios usan el final del universo de documentos para no repetirse
+    indices = (universo_documentos - 1 - inicio - np.arange(tamano)) % universo_documentos
+    return pd.DataFrame({
+        'numero_documento': _documentos(indices),
+        'nombres_apellidos': _ensuciar(rng, _nombres(rng, tamano)),
+        'nom_cargo': _ensuciar(rng, _zipf(rng, ['FISCAL DELEGADO', 'ASISTENTE DE FISCAL', 'INVESTIGADOR',
+                                               'TECNICO', 'PROFESIONAL'], tamano)),
+        'seccional': _ensuciar(rng, _zipf(rng, _catalogo('SECCIONAL', 35), tamano)),
+        'nom_dependencia': _ensuciar(rng, _zipf(rng, _catalogo('DEPENDENCIA', 250), tamano)),
+        'estado': _ensuciar(rng, _zipf(rng, ['ACTIVO', 'RETIRADO'], tamano, exponente=2)),
+        'fuente': _ensuciar(rng, _zipf(rng, ['NOMINA', 'HISTORICO'], tamano)),
+    })
+
+
+GENERADORES = {
+    'consolidado': _bloque_consolidado,
+    'personas': _bloque_personas,
+    'rud': _bloque_rud,
+    'aparecidos': _bloque_aparecidos,
+    'funcionarios': _bloque_funcionarios,
+}
+
+
+def generar_datos(carpeta, filas, conjuntos=None, semilla=0, tamano_bloque=100000):
+    """
+    Escribe archivos sintéticos con las mismas columnas y el mismo separador que
+    los extractos reales, con los nombres que espera cargar_datos.
+
+    Los valores siguen distribuciones sesgadas (pocas seccionales, delitos y
+    documentos concentran la mayoría de las filas) e incluyen nulos, 'nan',
+    espacios sobrantes y fechas en varios formatos o inválidas. Los archivos se
+    escriben por bloques, así que el tamaño no está limitado por la memoria.
+
+    Args:
+        carpeta: Carpeta de destino (se crea si no existe)
+        filas: Filas del consolidado; los demás conjuntos se escalan con PROPORCIONES
+        conjuntos: Lista de conjuntos a generar (por defecto todos los de GENERADORES)
+        semilla: Semilla del generador aleatorio, para archivos reproducibles
+        tamano_bloque: Filas generadas y escritas en cada bloque
+
+    Returns:
+        dict: conjunto -> (ruta del archivo, filas escritas)
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    universo_documentos = max(1, int(filas * DOCUMENTOS_POR_FILA))
+    generados = {}
+
+    for conjunto in conjuntos or GENERADORES:
+        if conjunto not in GENERADORES:
+            raise ValueError(f"Conjunto no soportado: {conjunto}")
+
+        # Una semilla por conjunto: generar solo algunos no cambia los demás
+        rng = np.random.default_rng([semilla, list(GENERADORES).index(conjunto)])
+        total = max(1, int(filas * PROPORCIONES[conjunto]))
+        if conjunto == 'personas':
+            total = min(total, universo_documentos)
+        ruta = os.path.join(carpeta, ARCHIVOS_DATOS[conjunto])
+
+        for inicio in range(0, total, tamano_bloque):
+            bloque = GENERADORES[conjunto](rng, inicio, min(tamano_bloque, total - inicio), universo_documentos)
+            bloque.to_csv(ruta, sep='|', index=False, header=(inicio == 0), mode='w' if inicio == 0 else 'a')
+
+        print(f"{conjunto}: {total} filas escritas en {ruta}")
+        generados[conjunto] = (ruta, total)
+
+    return generados
@@ -0,0 +1,128 @@
+import os
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.utils_ejecuciones import registrar_ejecucion, medir_etapa
+from dashboard.utils_neo4j import guardar_cambios_componentes
+from dashboard.utils_red_incremental import actualizar_red_incremental, guardar_delta_en_neo4j
+from dashboard.utils_snapshots import guardar_snapshot, cargar_snapshot, listar_snapshots
+from dashboard.utils_componentes import (estadisticas_componentes, guardar_estadisticas_componentes,
+                                         guardar_componentes_en_neo4j)
+
+
+class Command(BaseCommand):
+    help = ('Actualiza el snapshot de la red guardado por crear_red_neo4j y Neo4j solo con las filas '
+            'nuevas o modificadas del consolidado, sin reconstruir la red')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archivo',
+            help='Archivo CSV (plano, .gz o .zst) o Parquet con las filas nuevas o modificadas del consolidado',
+        )
+        parser.add_argument(
+            '--chunksize',
+            type=int,
+            default=50000,
+            help='Tamaño del chunk para procesar el archivo (default: 50000)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Tamaño del lote para operaciones en Neo4j (default: 5000)',
+        )
+        parser.add_argument(
+            '--snapshot',
+            default='consolidado',
+            help='Nombre del snapshot de la red a actualizar (default: consolidado)',
+        )
+        parser.add_argument(
+            '--sin-neo4j',
+            action='store_true',
+            help=('Solo guardar una nueva versión del snapshot, sin enviar los cambios a Neo4j '
+                  '(Neo4j queda desactualizado hasta la próxima reconstrucción con crear_red_neo4j)'),
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos para calcular los diámetros de las componentes (default: número de CPUs)',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=5,
+            help='Nodos de mayor grado a guardar en las estadísticas de cada componente (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        nombre = options['snapshot']
+        sin_neo4j = options['sin_neo4j']
+        if not os.path.exists(archivo):
+            raise CommandError(f'El archivo no existe: {archivo}')
+        if not listar_snapshots(nombre):
+            raise CommandError(f'No hay snapshots de la red {nombre}. Primero crea la red con crear_red_neo4j '
+                               '(o convierte una red en pickle con guardar_snapshot_red --pickle)')
+
+        parametros = {'chunksize': options['chunksize'], 'batch_size': options['batch_size'],
+                      'snapshot': nombre, 'sin_neo4j': sin_neo4j, 'procesos': options['procesos'],
+                      'top_k': options['top_k']}
+        with registrar_ejecucion('actualizar_red_neo4j', 'red', archivo, parametros,
+                                 modifica_datos=not sin_neo4j) as ejecucion:
+            with medir_etapa(ejecucion, 'lectura_red'):
+                # Sin mmap: la actualización modifica los arreglos del grafo
+                G, anterior = cargar_snapshot(nombre, mmap=False)
+            self.stdout.write(self.style.SUCCESS(
+                f"Red cargada desde el snapshot {nombre} v{anterior['version']} con "
+                f"{G.number_of_nodes()} nodos y {G.number_of_edges()} enlaces"
+            ))
+
+            with medir_etapa(ejecucion, 'actualizacion'):
+                delta = actualizar_red_incremental(G, archivo, chunksize=options['chunksize'])
+
+            # Solo se recalculan las componentes con nodos del archivo; las absorbidas
+            # por una fusión desaparecen de las estadísticas
+            with medir_etapa(ejecucion, 'estadisticas_componentes'):
+                tocadas = np.unique(G.componente_id[delta['nodos']])
+                anteriores = delta['cambios']['componente_anterior'].dropna().astype('int64').to_numpy()
+                eliminadas = np.setdiff1d(anteriores, G.componente_id)
+                tabla = estadisticas_componentes(G, componentes_id=tocadas, top_k=options['top_k'],
+                                                 procesos=options['procesos'])
+
+            # La nueva versión del snapshot se guarda solo después de aplicar los
+            # cambios en Neo4j: si falla, repetir el comando con el mismo archivo
+            # vuelve a calcular las mismas reetiquetas de componentes
+            if not sin_neo4j:
+                with medir_etapa(ejecucion, 'neo4j'):
+                    guardar_delta_en_neo4j(G, delta, batch_size=options['batch_size'])
+                    guardar_componentes_en_neo4j(tabla, eliminadas, completa=False, batch_size=options['batch_size'])
+
+            with medir_etapa(ejecucion, 'guardado_red'):
+                snapshot = guardar_snapshot(G, nombre, ejecucion)
+            self.stdout.write(self.style.SUCCESS(
+                f"Red guardada en el snapshot {nombre} v{snapshot['version']} ({snapshot['ruta']})"
+            ))
+            guardar_estadisticas_componentes(tabla, ejecucion, eliminadas, completa=False)
+
+            ejecucion.filas_leidas = delta['filas']
+            ejecucion.filas_cargadas = delta['nodos_nuevos'] + delta['enlaces_nuevos']
+            ejecucion.resumen = {
+                'nodos': G.number_of_nodes(),
+                'enlaces': G.number_of_edges(),
+                'nodos_nuevos': delta['nodos_nuevos'],
+                'enlaces_nuevos': delta['enlaces_nuevos'],
+                'nodos_actualizados': len(delta['nodos']),
+                'cambios_componentes': guardar_cambios_componentes(delta['cambios'], ejecucion),
+                'estadisticas_componentes': {'actualizadas': len(tabla), 'eliminadas': len(eliminadas)},
+                'snapshot': {'nombre': nombre, 'version': snapshot['version'], 'anterior': anterior['version']},
+            }
+
+            self.stdout.write(self.style.SUCCESS('='*80))
+            self.stdout.write(self.style.SUCCESS('Resumen de tiempos:'))
+            for etapa, segundos in ejecucion.etapas.items():
+                self.stdout.write(self.style.SUCCESS(f'- {etapa}: {segundos:.2f} segundos'))
+            self.stdout.write(self.style.SUCCESS('='*80))
+            if sin_neo4j:
+                self.stdout.write(self.style.SUCCESS('Proceso finalizado (sin enviar los cambios a Neo4j)'))
+            else:
+                self.stdout.write(self.style.SUCCESS('Proceso completado exitosamente'))
@@ -0,0 +1,122 @@
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.utils import MODOS_CARGA
+from dashboard.benchmark.generador import GENERADORES, generar_datos
+from dashboard.benchmark.ejecutor import ejecutar_benchmark, guardar_reporte, comparar_reportes
+
+
+class Command(BaseCommand):
+    help = ('Mide el rendimiento de los cargar_* por etapa (lectura, transformación, inserción, índices) '
+            'sobre datos sintéticos y guarda un reporte JSON comparable entre commits')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--carpeta',
+            type=str,
+            required=True,
+            help='Carpeta con los archivos a cargar (o donde generarlos con --generar)',
+        )
+
+        parser.add_argument(
+            '--generar',
+            type=int,
+            metavar='FILAS',
+            help='Generar antes archivos sintéticos con este número de filas de consolidado (ej. 10000 a 10000000)',
+        )
+
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=0,
+            help='Semilla de los datos sintéticos',
+        )
+
+        parser.add_argument(
+            '--conjuntos',
+            type=str,
+            help=f'Conjuntos separados por coma (por defecto: {",".join(GENERADORES)})',
+        )
+
+        parser.add_argument(
+            '--modo',
+            type=str,
+            default='orm',
+            choices=MODOS_CARGA,
+            help='Modo de inserción',
+        )
+
+        parser.add_argument(
+            '--delta',
+            action='store_true',
+            help='Medir cargas incrementales (--delta de cargar_datos)',
+        )
+
+        parser.add_argument(
+            '--sin-diferir-indices',
+            action='store_true',
+            help='Mantener los índices durante la carga (la etapa de índices queda en 0)',
+        )
+
+        parser.add_argument(
+            '--vaciar',
+            action='store_true',
+            help='Vaciar (TRUNCATE) cada tabla antes de medirla. Borra los datos cargados: usar solo en una base de pruebas',
+        )
+
+        parser.add_argument(
+            '--salida',
+            type=str,
+            default='benchmark_carga.json',
+            help='Archivo JSON del reporte',
+        )
+
+        parser.add_argument(
+            '--comparar',
+            type=str,
+            help='Reporte JSON anterior con el que comparar las filas por segundo',
+        )
+
+    def handle(self, *args, **options):
+        conjuntos = None
+        if options['conjuntos']:
+            conjuntos = [conjunto.strip() for conjunto in options['conjuntos'].split(',') if conjunto.strip()]
+            desconocidos = set(conjuntos) - set(GENERADORES)
+            if desconocidos:
+                raise CommandError(f'Conjuntos no soportados: {", ".join(sorted(desconocidos))}')
+
+        if options['generar']:
+            self.stdout.write(self.style.WARNING(f'Generando {options["generar"]} filas sintéticas en {options["carpeta"]}...'))
+            generar_datos(options['carpeta'], options['generar'], conjuntos, semilla=options['semilla'])
+        elif not os.path.isdir(options['carpeta']):
+            raise CommandError(f'La carpeta {options["carpeta"]} no existe (use --generar)')
+
+        if not options['vaciar']:
+            self.stdout.write(self.style.WARNING('Sin --vaciar las tablas conservan sus datos y las mediciones '
+                                                 'dependen de lo que ya esté cargado'))
+
+        reporte = ejecutar_benchmark(
+            options['carpeta'],
+            conjuntos,
+            modo=options['modo'],
+            diferir_indices=not options['sin_diferir_indices'],
+            vaciar=options['vaciar'],
+            opciones_carga={'delta': True} if options['delta'] else None,
+        )
+        reporte['filas_generadas'] = options['generar']
+        reporte['semilla'] = options['semilla']
+
+        guardar_reporte(reporte, options['salida'])
+        self.stdout.write(self.style.SUCCESS(f'Reporte guardado en {options["salida"]}'))
+
+        for medicion in reporte['resultados']:
+            etapas = ', '.join(f'{etapa} {segundos:.2f}s' for etapa, segundos in medicion['etapas'].items())
+            self.stdout.write(f"{medicion['conjunto']}: {medicion['filas_por_segundo']} filas/s ({etapas})")
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as f:
+                anterior = json.load(f)
+            self.stdout.write(self.style.WARNING(f'Comparación con {options["comparar"]} (commit {anterior.get("commit")}):'))
+            for conjunto, antes, ahora, cambio in comparar_reportes(reporte, anterior):
+                estilo = self.style.SUCCESS if cambio >= 0 else self.style.ERROR
+                self.stdout.write(estilo(f'{conjunto}: {antes} -> {ahora} filas/s ({cambio:+.1%})'))
@@ -1,5 +1,6 @@
 import os
-from django.core.management.base import BaseCommand
+from contextlib import ExitStack, contextmanager, nullcontext
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from dashboard.utils import (
     cargar_consolidado_spoa,
@@ -7,11 +8,46 @@ from dashboard.utils import (
     cargar_rud,
     cargar_perfiles_personas,
     cargar_aparecidos_vivos_no_registrados,
-    cargar_funcionarios
+    cargar_funcionarios,
+    reiniciar_checkpoints,
+    MODOS_CARGA,
+    ARCHIVOS_DATOS
+)
+from dashboard.utils_paralelo import cargar_en_paralelo, dividir_csv_en_rangos
+from dashboard.utils_archivos import resolver_archivo_entrada, admite_rangos
+from dashboard.utils_postgres import indices_diferidos
+from dashboard.utils_personas import recalcular_banderas_personas
+from dashboard.utils_ejecuciones import registrar_ejecucion
+from dashboard.models import (
+    ConsolidadoSpoa,
+    PersonasDf,
+    RegistroUnicoDesaparecidos,
+    PerfilPersona,
+    AparecidosVivosNoRegistrados,
+    Funcionario
 )
 from django.db import transaction
 
 
+# Conjunto -> (descripción para el mensaje de carga, descripción para el mensaje de error)
+DESCRIPCIONES = {
+    'consolidado': ('datos de consolidado SPOA', 'datos de consolidado'),
+    'personas': ('datos de personas', 'datos de personas'),
+    'rud': ('datos del Registro Unido de Desaparecidos', 'datos del RUD'),
+    'perfiles': ('perfiles de personas', 'perfiles de personas'),
+    'aparecidos': ('datos de aparecidos vivos no registrados', 'datos de aparecidos vivos no registrados'),
+    'funcionarios': ('datos de funcionarios', 'datos de funcionarios'),
+}
+
+# Nombres usados en los mensajes cuando no coinciden con el del modelo
+NOMBRES_MODELO = {
+    'rud': 'RegistroUnidoDesaparecidos',
+}
+
+# Opciones del comando que se guardan con cada EjecucionCarga
+PARAMETROS_REGISTRADOS = ('modo', 'por_chunk', 'delta', 'marcar_ausentes', 'parallel', 'dividir_mb', 'diferir_indices')
+
+
 class Command(BaseCommand):
     help = 'Carga datos desde archivos CSV a los modelos correspondientes'
 
@@ -49,22 +85,174 @@ class Command(BaseCommand):
             action='store_true',
             help='Cargar sólo datos de funcionarios',
         )
+        
+        parser.add_argument(
+            '--modo',
+            choices=MODOS_CARGA,
+            default='orm',
+            help='Modo de inserción: orm (bulk_create) o copy (COPY FROM STDIN, solo PostgreSQL)',
+        )
+        
+        parser.add_argument(
+            '--por-chunk',
+            action='store_true',
+            help='Confirmar cada chunk en su propia transacción y reanudar desde el último checkpoint',
+        )
+        
+        parser.add_argument(
+            '--reiniciar',
+            action='store_true',
+            help='Descartar los checkpoints existentes y cargar desde el inicio',
+        )
+        
+        parser.add_argument(
+            '--delta',
+            action='store_true',
+            help='Carga incremental: insertar filas nuevas, actualizar las modificadas y omitir las que no cambiaron',
+        )
+        
+        parser.add_argument(
+            '--marcar-ausentes',
+            action='store_true',
+            help='Con --delta, marcar los registros que no aparecen en el nuevo extracto',
+        )
+        
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            default=1,
+            help='Número de procesos para cargar los conjuntos de datos en paralelo (cada uno con su propia transacción)',
+        )
+        
+        parser.add_argument(
+            '--dividir-mb',
+            type=int,
+            default=0,
+            help='Con --parallel, dividir en rangos de bytes los CSV de más de N MB (0 = no dividir). '
+                 'Los CSV no deben tener saltos de línea dentro de campos entre comillas',
+        )
+        
+        parser.add_argument(
+            '--diferir-indices',
+            action='store_true',
+            help='Eliminar los índices de ConsolidadoSpoa antes de la carga y reconstruirlos al final (solo PostgreSQL)',
+        )
+        
+        parser.add_argument(
+            '--recalcular-banderas',
+            action='store_true',
+            help='Recalcular las banderas de PersonasDf desde los datos cargados '
+                 '(con --delta solo para los documentos afectados)',
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
+        # Documentos de las filas insertadas o actualizadas en modo delta (ver _reportar)
+        self.documentos_afectados = set()
+        
+        if options['reiniciar']:
+            eliminados = reiniciar_checkpoints()
+            self.stdout.write(self.style.WARNING(f'Se eliminaron {eliminados} checkpoints de carga'))
+        
+        conjuntos = self._conjuntos_seleccionados(options)
+        diferir = options['diferir_indices'] and 'consolidado' in conjuntos
+        if options['diferir_indices'] and not diferir:
+            self.stdout.write(self.style.WARNING('--diferir-indices se ignora: no se carga consolidado'))
+        if diferir and options['delta']:
+            # La carga incremental busca por clave y necesita los índices
+            raise CommandError('--diferir-indices no es compatible con --delta')
+        
+        # En modo por chunk cada cargar_* maneja sus propias transacciones;
+        # una transacción global impediría confirmar los chunks. En paralelo
+        # cada proceso tiene su propia conexión y transacciones.
+        if options['por_chunk'] or options['parallel'] > 1:
+            with self._indices_diferidos() if diferir else nullcontext():
+                self._cargar(options, conjuntos)
+        elif diferir:
+            # Los índices se reconstruyen desde otras conexiones, así que
+            # ConsolidadoSpoa se carga fuera de la transacción global; el resto
+            # de conjuntos conserva la suya
+            with self._indices_diferidos():
+                self._cargar(options, ['consolidado'])
+            resto = [nombre for nombre in conjuntos if nombre != 'consolidado']
+            if resto:
+                with transaction.atomic():
+                    self._cargar(options, resto)
+        else:
+            with transaction.atomic():
+                self._cargar(options, conjuntos)
+        
+        if options['recalcular_banderas']:
+            self._recalcular_banderas(options)
+
+    def _recalcular_banderas(self, options):
+        """Deriva las banderas de PersonasDf de ConsolidadoSpoa, el RUD y Funcionario"""
+        documentos = None
+        if options['delta']:
+            documentos = self.documentos_afectados
+            self.stdout.write(self.style.WARNING(
+                f'Recalculando banderas de {len(documentos)} personas afectadas por la carga...'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING('Recalculando banderas de todas las personas...'))
+        
+        resumen = recalcular_banderas_personas(documentos)
+        self.stdout.write(self.style.SUCCESS(
+            f"PersonasDf: {resumen['creadas']} personas creadas, {resumen['actualizadas']} con banderas actualizadas"
+        ))
+
+    @contextmanager
+    def _indices_diferidos(self):
+        """
+        Carga sin mantener los índices de ConsolidadoSpoa fila a fila: se
+        eliminan al entrar y se reconstruyen (con ANALYZE) al salir
+        """
+        self.stdout.write(self.style.WARNING('Eliminando los índices de ConsolidadoSpoa...'))
+        with indices_diferidos(ConsolidadoSpoa) as tiempos:
+            yield
+        
+        for nombre, duracion in tiempos['por_indice'].items():
+            self.stdout.write(f'  Índice {nombre}: {duracion:.2f} segundos')
+        self.stdout.write(self.style.SUCCESS(
+            f"Tiempo de carga: {tiempos['carga']:.2f} segundos, "
+            f"reconstrucción de índices y ANALYZE: {tiempos['indices']:.2f} segundos"
+        ))
+
+    @staticmethod
+    def _conjuntos_seleccionados(options):
+        """Conjuntos pedidos en la línea de comandos, o todos si no se especificó ninguno"""
+        ninguna_opcion = not any(options[nombre] for nombre in DESCRIPCIONES)
+        return [nombre for nombre in DESCRIPCIONES if options[nombre] or ninguna_opcion]
+
+    def _cargar(self, options, conjuntos):
         # Obtener la ruta base de la app dashboard
         app_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         data_folder = os.path.join(app_path, 'data')
         
         self.stdout.write(self.style.SUCCESS(f'Buscando archivos CSV en: {data_folder}'))
         
-        # Nombres de los archivos
-        consolidado_file = os.path.join(data_folder, "consolidado_df_delitos_relacionados_2025-05-20.csv")
-        personas_file = os.path.join(data_folder, "personas_delitos_2025-05-20.csv")
-        rud_file = os.path.join(data_folder, "rud_dforzada_2025-04-21.csv")
-        perfiles_file = os.path.join(data_folder, "lote_completo_v2.json")
-        aparecidos_file = os.path.join(data_folder, "Reporte_3_Aparecidos_vivos_no_registrados_2025-05-13.csv")
-        funcionarios_file = os.path.join(data_folder, "funcionarios_exfuncionarios.csv")
+        modo = options['modo']
+        por_chunk = options['por_chunk']
+        self.stdout.write(self.style.SUCCESS(f'Modo de inserción: {modo}'))
+        if por_chunk:
+            self.stdout.write(self.style.SUCCESS('Transacciones por chunk con checkpoints habilitadas'))
+        
+        opciones_carga = {
+            'modo': modo,
+            'por_chunk': por_chunk,
+            'delta': options['delta'],
+            'marcar_ausentes': options['marcar_ausentes'],
+        }
+        if options['delta']:
+            self.stdout.write(self.style.SUCCESS('Carga incremental (delta) habilitada'))
+        
+        # Nombres de los archivos (si existe una caché Parquet vigente o un CSV
+        # comprimido, se usa en lugar del CSV, ver convertir_parquet)
+        consolidado_file = resolver_archivo_entrada(os.path.join(data_folder, ARCHIVOS_DATOS['consolidado']))
+        personas_file = resolver_archivo_entrada(os.path.join(data_folder, ARCHIVOS_DATOS['personas']))
+        rud_file = resolver_archivo_entrada(os.path.join(data_folder, ARCHIVOS_DATOS['rud']))
+        perfiles_file = os.path.join(data_folder, ARCHIVOS_DATOS['perfiles'])
+        aparecidos_file = resolver_archivo_entrada(os.path.join(data_folder, ARCHIVOS_DATOS['aparecidos']))
+        funcionarios_file = resolver_archivo_entrada(os.path.join(data_folder, ARCHIVOS_DATOS['funcionarios']))
         
         # Verificar que los archivos existan
         if not os.path.exists(consolidado_file):
@@ -85,66 +273,170 @@ class Command(BaseCommand):
         if not os.path.exists(funcionarios_file):
             self.stdout.write(self.style.ERROR(f'Archivo no encontrado: {funcionarios_file}'))
         
-        # Determinar si no se especificó ninguna opción específica
-        ninguna_opcion = not (options['consolidado'] 
-                              or options['personas'] 
-                              or options['rud'] 
-                              or options['perfiles'] 
-                              or options['aparecidos']
-                              or options['funcionarios'])
+        archivos = {
+            'consolidado': (cargar_consolidado_spoa, consolidado_file, ConsolidadoSpoa),
+            'personas': (cargar_personas_df, personas_file, PersonasDf),
+            'rud': (cargar_rud, rud_file, RegistroUnicoDesaparecidos),
+            'perfiles': (cargar_perfiles_personas, perfiles_file, PerfilPersona),
+            'aparecidos': (cargar_aparecidos_vivos_no_registrados, aparecidos_file, AparecidosVivosNoRegistrados),
+            'funcionarios': (cargar_funcionarios, funcionarios_file, Funcionario),
+        }
+        seleccionados = {nombre: datos for nombre, datos in archivos.items() if nombre in conjuntos}
+        self.parametros = {clave: options[clave] for clave in PARAMETROS_REGISTRADOS}
         
-        # Cargar consolidado SPOA si se solicita o si no se especifica ninguna opción
-        if options['consolidado'] or ninguna_opcion:
-            try:
-                self.stdout.write(self.style.WARNING('Cargando datos de consolidado SPOA...'))
-                contador = cargar_consolidado_spoa(consolidado_file)
-                self.stdout.write(self.style.SUCCESS(f'Se cargaron {contador} registros en ConsolidadoSpoa'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error al cargar datos de consolidado: {str(e)}'))
+        if options['parallel'] > 1:
+            self._cargar_en_paralelo(seleccionados, opciones_carga, options['parallel'], options['dividir_mb'])
+            return
         
-        # Cargar personas si se solicita o si no se especifica ninguna opción
-        if options['personas'] or ninguna_opcion:
-            try:
-                self.stdout.write(self.style.WARNING('Cargando datos de personas...'))
-                contador = cargar_personas_df(personas_file)
-                self.stdout.write(self.style.SUCCESS(f'Se cargaron {contador} registros en PersonasDf'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error al cargar datos de personas: {str(e)}'))
-                
-        # Cargar datos del RUD si se solicita o si no se especifica ninguna opción
-        if options['rud'] or ninguna_opcion:
-            try:
-                self.stdout.write(self.style.WARNING('Cargando datos del Registro Unido de Desaparecidos...'))
-                contador = cargar_rud(rud_file)
-                self.stdout.write(self.style.SUCCESS(f'Se cargaron {contador} registros en RegistroUnidoDesaparecidos'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error al cargar datos del RUD: {str(e)}'))
-                
-        # Cargar perfiles de personas si se solicita o si no se especifica ninguna opción
-        if options['perfiles'] or ninguna_opcion:
+        # Cargar cada conjunto seleccionado, o todos si no se especifica ninguna opción
+        for nombre, (funcion, archivo, modelo) in seleccionados.items():
+            descripcion, descripcion_error = DESCRIPCIONES[nombre]
             try:
-                self.stdout.write(self.style.WARNING('Cargando perfiles de personas...'))
-                contador = cargar_perfiles_personas(perfiles_file)
-                self.stdout.write(self.style.SUCCESS(f'Se cargaron {contador} perfiles en PerfilPersona'))
+                self.stdout.write(self.style.WARNING(f'Cargando {descripcion}...'))
+                contador = self._cargar_conjunto(nombre, funcion, archivo, modelo, opciones_carga)
+                if funcion is cargar_perfiles_personas:
+                    self.stdout.write(self.style.SUCCESS(f'Se cargaron {contador} perfiles en PerfilPersona'))
+                else:
+                    self._reportar(contador, NOMBRES_MODELO.get(nombre, modelo.__name__))
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error al cargar perfiles de personas: {str(e)}'))
+                self.stdout.write(self.style.ERROR(f'Error al cargar {descripcion_error}: {str(e)}'))
         
-        # Cargar datos de aparecidos vivos no registrados si se solicita o si no se especifica ninguna opción
-        if options['aparecidos'] or ninguna_opcion:
-            try:
-                self.stdout.write(self.style.WARNING('Cargando datos de aparecidos vivos no registrados...'))
-                contador = cargar_aparecidos_vivos_no_registrados(aparecidos_file)
-                self.stdout.write(self.style.SUCCESS(f'Se cargaron {contador} registros en AparecidosVivosNoRegistrados'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error al cargar datos de aparecidos vivos no registrados: {str(e)}'))
+        self.stdout.write(self.style.SUCCESS('Proceso de carga de datos completado'))
+
+    def _cargar_conjunto(self, nombre, funcion, archivo, modelo, opciones_carga):
+        """Carga un conjunto de datos y registra la ejecución en EjecucionCarga"""
+        # Los perfiles se cargan desde JSON y solo aceptan el modo de inserción
+        if funcion is cargar_perfiles_personas:
+            kwargs = {'modo': opciones_carga['modo']}
+        else:
+            kwargs = {**opciones_carga, 'metricas': {}}
         
-        #  Cargar datos de funcionarios si se solicita o si no se especifica ninguna opción
-        if options['funcionarios'] or ninguna_opcion:
-            try:
-                self.stdout.write(self.style.WARNING('Cargando datos de funcionarios...'))
-                contador = cargar_funcionarios(funcionarios_file)
-                self.stdout.write(self.style.SUCCESS(f'Se cargaron {contador} registros en Funcionario'))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error al cargar datos de funcionarios: {str(e)}'))
+        # Dentro de la transacción global, un savepoint por conjunto permite
+        # registrar la ejecución fallida aunque se deshaga su carga
+        en_transaccion = transaction.get_connection().in_atomic_block
+        with registrar_ejecucion('cargar_datos', nombre, archivo, self.parametros) as ejecucion:
+            antes = modelo.objects.count()
+            with transaction.atomic() if en_transaccion else nullcontext():
+                resultado = funcion(archivo, **kwargs)
+            self._completar_ejecucion(ejecucion, resultado, kwargs.get('metricas'), modelo.objects.count() - antes)
+        return resultado
+
+    def _completar_ejecucion(self, ejecucion, resultado, metricas, filas_nuevas):
+        """
+        Completa el registro de una carga con las filas leídas, cargadas y
+        rechazadas (duplicados o conflictos que no se insertaron) y las etapas
+        """
+        metricas = metricas or {}
+        ejecucion.etapas.update({etapa: round(segundos, 3) for etapa, segundos in metricas.get('etapas', {}).items()})
+        if 'rss_pico_mb' in metricas:
+            ejecucion.rss_pico_mb = round(metricas['rss_pico_mb'], 1)
         
-        self.stdout.write(self.style.SUCCESS('Proceso de carga de datos completado'))
+        if isinstance(resultado, dict):
+            ejecucion.resumen = {clave: valor for clave, valor in resultado.items() if not isinstance(valor, set)}
+            ejecucion.filas_cargadas = resultado['insertados'] + resultado['actualizados']
+            ejecucion.filas_leidas = metricas.get('filas_leidas')
+            if ejecucion.filas_leidas is not None:
+                procesadas = ejecucion.filas_cargadas + resultado['sin_cambios']
+                ejecucion.filas_rechazadas = max(0, ejecucion.filas_leidas - procesadas)
+        else:
+            ejecucion.filas_cargadas = filas_nuevas
+            ejecucion.filas_leidas = metricas.get('filas_leidas', resultado)
+            ejecucion.filas_rechazadas = max(0, ejecucion.filas_leidas - filas_nuevas)
+
+    def _cargar_en_paralelo(self, archivos, opciones_carga, procesos, dividir_mb):
+        """Carga los conjuntos de datos seleccionados en un pool de procesos"""
+        tareas = []
+        
+        for nombre, (funcion, archivo, modelo) in archivos.items():
+            if not os.path.exists(archivo):
+                continue
+            
+            # Los perfiles se cargan desde JSON y solo aceptan el modo de inserción
+            if funcion is cargar_perfiles_personas:
+                tareas.append((nombre, funcion, (archivo,), {'modo': opciones_carga['modo']}))
+                continue
+            
+            # Solo los CSV sin comprimir se pueden dividir en rangos de bytes
+            if dividir_mb and admite_rangos(archivo) and os.path.getsize(archivo) > dividir_mb * 1024 * 1024:
+                if opciones_carga['marcar_ausentes']:
+                    raise CommandError('--marcar-ausentes no es compatible con --dividir-mb')
+                rangos = dividir_csv_en_rangos(archivo, procesos)
+                self.stdout.write(self.style.WARNING(f'{nombre}: dividido en {len(rangos)} rangos de bytes'))
+                for i, rango in enumerate(rangos):
+                    tareas.append((f'{nombre}#{i}', funcion, (archivo,),
+                                   {**opciones_carga, 'rango_bytes': rango, 'metricas': {}}))
+            else:
+                tareas.append((nombre, funcion, (archivo,), {**opciones_carga, 'metricas': {}}))
+        
+        # Un registro por conjunto, abierto mientras corren todas sus tareas
+        with ExitStack() as registros:
+            ejecuciones = {}
+            for nombre, (_, archivo, modelo) in archivos.items():
+                if os.path.exists(archivo):
+                    ejecuciones[nombre] = registros.enter_context(
+                        registrar_ejecucion('cargar_datos', nombre, archivo, self.parametros)
+                    )
+                    ejecuciones[nombre].resumen['filas_antes'] = modelo.objects.count()
+            
+            self.stdout.write(self.style.WARNING(f'Ejecutando {len(tareas)} tareas de carga con {procesos} procesos...'))
+            resultados = cargar_en_paralelo(tareas, procesos)
+            
+            # Combinar los resultados de los rangos de un mismo archivo
+            for nombre, (_, _, modelo) in archivos.items():
+                parciales = [valor for etiqueta, valor in resultados.items()
+                             if etiqueta == nombre or etiqueta.startswith(f'{nombre}#')]
+                if not parciales:
+                    continue
+                ejecucion = ejecuciones[nombre]
+                filas_antes = ejecucion.resumen.pop('filas_antes')
+                
+                errores = [valor for valor in parciales if isinstance(valor, Exception)]
+                if errores:
+                    for error in errores:
+                        self.stdout.write(self.style.ERROR(f'Error al cargar {nombre}: {str(error)}'))
+                    ejecucion.error = '; '.join(str(error) for error in errores)
+                    continue
+                
+                total = None
+                metricas = {'etapas': {}}
+                for resultado, _, parcial in parciales:
+                    if isinstance(resultado, dict):
+                        total = total or {}
+                        for clave, valor in resultado.items():
+                            if isinstance(valor, set):
+                                total[clave] = total.get(clave, set()) | valor
+                            else:
+                                total[clave] = total.get(clave, 0) + valor
+                    else:
+                        total = (total or 0) + resultado
+                    # Las etapas y filas se suman entre rangos; la memoria es la del proceso más grande
+                    for clave, valor in (parcial or {}).items():
+                        if clave == 'etapas':
+                            for etapa, segundos in valor.items():
+                                metricas['etapas'][etapa] = metricas['etapas'].get(etapa, 0.0) + segundos
+                        elif clave == 'rss_pico_mb':
+                            metricas[clave] = max(metricas.get(clave, 0.0), valor)
+                        else:
+                            metricas[clave] = metricas.get(clave, 0) + valor
+                duracion = max(duracion for _, duracion, _ in parciales)
+                
+                ejecucion.duracion = round(duracion, 3)
+                self._completar_ejecucion(ejecucion, total, metricas, modelo.objects.count() - filas_antes)
+                self._reportar(total, NOMBRES_MODELO.get(nombre, modelo.__name__))
+                self.stdout.write(f'  {nombre}: {duracion:.2f} segundos')
+
+    def _reportar(self, resultado, modelo):
+        """Muestra el número de registros cargados o el resumen de la carga incremental"""
+        if isinstance(resultado, dict):
+            self.documentos_afectados.update(resultado.get('documentos', ()))
+            self.stdout.write(self.style.SUCCESS(
+                f"{modelo}: {resultado['insertados']} insertados, {resultado['actualizados']} actualizados, "
+                f"{resultado['sin_cambios']} sin cambios, {resultado['ausentes']} marcados como ausentes"
+            ))
+            if resultado.get('duplicados'):
+                self.stdout.write(self.style.WARNING(
+                    f"{modelo}: {resultado['duplicados']} filas repiten la clave de otra fila del archivo y "
+                    f"quedaron guardadas como una sola (una carga sin --delta guardaría todas)"
+                ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Se cargaron {resultado} registros en {modelo}'))
@@ -9,10 +9,37 @@ import json
 import requests
 import shutil
 import networkx as nx
+import numpy as np
+import pandas as pd
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from myproject.neo4j_driver import Neo4jConnection
-from dashboard.utils_neo4j import crear_red_desde_consolidado, calcular_metricas_centralidad, crear_red_desde_json
+from dashboard.utils_neo4j import (crear_red_desde_consolidado, calcular_metricas_centralidad, crear_red_desde_json,
+                                  leer_componentes_en_neo4j, registrar_cambios_componentes)
+from dashboard.utils_ejecuciones import registrar_ejecucion, medir_etapa
+from dashboard.utils_grafo import GrafoCompacto
+from dashboard.utils_snapshots import guardar_snapshot
+from dashboard.utils_componentes import estadisticas_componentes, guardar_estadisticas_componentes
+
+# Etiquetas de Neo4j para los tipos de nodo conocidos
+ETIQUETAS_TIPO = {'nunc': 'NUNC', 'persona': 'Persona', 'entidad': 'Entidad'}
+
+# Tipo de las propiedades enteras en el encabezado de neo4j-admin import (sin
+# tipo se importan como texto y no coinciden con los enteros de crear_red_neo4j)
+TIPOS_PROPIEDAD = {'componente': 'int', 'componente_id': 'long', 'grado': 'int'}
+
+
+def _encabezado(propiedad):
+    return f'{propiedad}:{TIPOS_PROPIEDAD[propiedad]}' if propiedad in TIPOS_PROPIEDAD else propiedad
+
+
+def _valor_csv(val):
+    """Convierte un valor a texto para el CSV: None -> '', dict/list -> JSON"""
+    if val is None:
+        return ''
+    if isinstance(val, (dict, list)):
+        return json.dumps(val, ensure_ascii=False)
+    return str(val)
 
 class Command(BaseCommand):
     help = 'Importa una red a Neo4j usando neo4j-admin import, usando el mismo flujo que crear_red_neo4j'
@@ -27,8 +54,23 @@ class Command(BaseCommand):
         parser.add_argument('--archivo-nodos-json', type=str, default=None, help='Ruta al archivo JSON con nodos de entidades')
         parser.add_argument('--archivo-enlaces-json', type=str, default=None, help='Ruta al archivo JSON con enlaces de entidades')
         parser.add_argument('--solo-entidades', action='store_true', help='Cargar solamente la red de entidades (no CSV)')
+        parser.add_argument('--compacto', action='store_true', help='Construir la red como GrafoCompacto (ids enteros y arreglos NumPy) en lugar de networkx')
+        parser.add_argument('--error-centralidad', type=float, default=0.05, help='Error máximo de la betweenness aproximada en componentes grandes (default: 0.05)')
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1, help='Procesos para calcular la centralidad y los diámetros (default: número de CPUs)')
+        parser.add_argument('--top-k', type=int, default=5, help='Nodos de mayor grado a guardar en las estadísticas de cada componente (default: 5)')
     
     def handle(self, *args, **options):
+        parametros = {clave: options.get(clave) for clave in (
+            'delimiter', 'id_type', 'output_dir', 'database', 'sin_metricas',
+            'archivo_nodos_json', 'archivo_enlaces_json', 'solo_entidades', 'compacto', 'error_centralidad', 'procesos',
+            'top_k'
+        )}
+        # El comando solo genera los CSV: los datos de Neo4j no cambian hasta que se importan
+        with registrar_ejecucion('cargar_redn4j_masiva_csv', 'red', options.get('archivo_consolidado'),
+                                 parametros, modifica_datos=False) as self.ejecucion:
+            self._generar_red(options)
+    
+    def _generar_red(self, options):
         # Cerrar la conexión a Neo4j si existe
         self.stdout.write(self.style.WARNING('Cerrando conexiones a Neo4j...'))
         Neo4jConnection.close()
@@ -40,6 +82,10 @@ class Command(BaseCommand):
         archivo_nodos_json = options.get('archivo_nodos_json')
         archivo_enlaces_json = options.get('archivo_enlaces_json')
         solo_entidades = options.get('solo_entidades')
+        compacto = options.get('compacto')
+        error_centralidad = options.get('error_centralidad')
+        procesos = options.get('procesos')
+        top_k = options.get('top_k')
         
         # Variable para almacenar el grafo
         G = None
@@ -92,7 +138,8 @@ class Command(BaseCommand):
                         self.stdout.write(self.style.ERROR("Formato de enlaces JSON no reconocido"))
                 
                 # Crear la red desde los datos JSON
-                G = crear_red_desde_json(nodos_json, enlaces_json)
+                with medir_etapa(self.ejecucion, 'creacion'):
+                    G = crear_red_desde_json(nodos_json, enlaces_json)
                 self.stdout.write(self.style.SUCCESS(
                     f'Red de entidades creada con {G.number_of_nodes()} nodos y {G.number_of_edges()} relaciones'
                 ))
@@ -100,13 +147,15 @@ class Command(BaseCommand):
                 # Si es solo entidades, no continuamos con el CSV
                 if solo_entidades:
                     # Guardar la red para uso futuro
-                    import pickle
-                    with open('red_entidades.pickle', 'wb') as f:
-                        pickle.dump(G, f)
-                    self.stdout.write(self.style.SUCCESS('Red guardada en archivo red_entidades.pickle'))
+                    with medir_etapa(self.ejecucion, 'snapshot'):
+                        snapshot = guardar_snapshot(G, 'entidades', self.ejecucion)
+                    self.ejecucion.resumen['snapshot'] = {'nombre': 'entidades', 'version': snapshot['version']}
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Red guardada en el snapshot entidades v{snapshot['version']} ({snapshot['ruta']})"
+                    ))
                     
                     # Continuar directamente con la exportación a CSV y las instrucciones
-                    nodes_file, rels_file = self._network_to_csv(G, output_dir)
+                    nodes_file, rels_file = self._exportar_csv(G, output_dir)
                     self.stdout.write(self.style.SUCCESS(f'CSVs generados: {nodes_file} y {rels_file}'))
                     
                     # Mostrar instrucciones y terminar
@@ -124,16 +173,19 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.WARNING('Integrando red de entidades con datos del CSV...'))
                     
                 # Pasar el grafo G como argumento a crear_red_desde_consolidado
-                G = crear_red_desde_consolidado(archivo_consolidado, grafo_existente=G)
+                with medir_etapa(self.ejecucion, 'creacion'):
+                    G = crear_red_desde_consolidado(archivo_consolidado, grafo_existente=G, compacto=compacto)
                 self.stdout.write(self.style.SUCCESS(
                     f'Red combinada con {G.number_of_nodes()} nodos y {G.number_of_edges()} relaciones'
                 ))
                 
                 # Guardar la red para uso futuro
-                import pickle
-                with open('red_consolidado.pickle', 'wb') as f:
-                    pickle.dump(G, f)
-                self.stdout.write(self.style.SUCCESS('Red guardada en archivo red_consolidado.pickle'))
+                with medir_etapa(self.ejecucion, 'snapshot'):
+                    snapshot = guardar_snapshot(G, 'consolidado', self.ejecucion)
+                self.ejecucion.resumen['snapshot'] = {'nombre': 'consolidado', 'version': snapshot['version']}
+                self.stdout.write(self.style.SUCCESS(
+                    f"Red guardada en el snapshot consolidado v{snapshot['version']} ({snapshot['ruta']})"
+                ))
             except Exception as e:
                 raise CommandError(f'Error al crear red desde consolidado: {e}')
         
@@ -142,35 +194,66 @@ class Command(BaseCommand):
             tiempo_metricas_inicio = time.time()
             self.stdout.write(self.style.SUCCESS('Calculando métricas de centralidad...'))
             try:
-                # Calcular métricas solo para una muestra si la red es muy grande
-                if len(G) > 100000:
-                    self.stdout.write(self.style.WARNING(
-                        f'Red muy grande ({len(G)} nodos), calculando métricas parciales'
-                    ))
-                    import random
-                    # Tomar una muestra de 50000 nodos o el 10% de la red, lo que sea mayor
-                    sample_size = max(50000, int(len(G) * 0.1))
-                    sample_nodes = random.sample(list(G.nodes()), sample_size)
-                    G_sample = G.subgraph(sample_nodes)
-                    metricas = calcular_metricas_centralidad(G_sample)
-                else:
-                    metricas = calcular_metricas_centralidad(G)
+                # Betweenness y closeness exactas en componentes pequeñas y con
+                # muestreo de fuentes en las grandes, sobre la red completa
+                metricas = calcular_metricas_centralidad(G, error=error_centralidad, procesos=procesos)
+                self.ejecucion.resumen['centralidad'] = {
+                    'aproximado': metricas['aproximado'], 'fuentes': metricas['fuentes'], 'error': error_centralidad,
+                }
                 
                 tiempo_metricas = time.time() - tiempo_metricas_inicio
                 self.stdout.write(self.style.SUCCESS(f'Métricas calculadas en {tiempo_metricas:.2f} segundos'))
+                self.ejecucion.etapas['metricas'] = round(tiempo_metricas, 3)
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'Error al calcular métricas: {str(e)}'))
                 self.stdout.write(self.style.WARNING('Continuando sin métricas...'))
         
         # 3. Generar los archivos CSV para neo4j-admin import
         if G:
-            nodes_file, rels_file = self._network_to_csv(G, output_dir)
+            self._registrar_cambios_componentes(G)
+            self._estadisticas_componentes(G, top_k, procesos)
+            nodes_file, rels_file = self._exportar_csv(G, output_dir)
             self.stdout.write(self.style.SUCCESS(f'CSVs generados: {nodes_file} y {rels_file}'))
             
             # 4. Proporcionar instrucciones para importar
             self._show_import_instructions(nodes_file, rels_file, options)
         else:
             self.stdout.write(self.style.ERROR('No se ha creado ninguna red. Verifica los parámetros.'))
+            self.ejecucion.error = 'No se ha creado ninguna red'
+    
+    def _registrar_cambios_componentes(self, G):
+        """
+        Registra qué componentes cambiaron respecto a la red que sigue en Neo4j
+        hasta que se importen los CSV. Si Neo4j no está disponible se omite.
+        """
+        self.stdout.write(self.style.SUCCESS('Comparando componentes con la red guardada en Neo4j...'))
+        try:
+            with medir_etapa(self.ejecucion, 'componentes'):
+                anterior = leer_componentes_en_neo4j()
+                if len(anterior):
+                    self.ejecucion.resumen['cambios_componentes'] = registrar_cambios_componentes(
+                        G, anterior, self.ejecucion
+                    )
+                else:
+                    self.stdout.write(self.style.WARNING('La red guardada no tiene componente_id, no hay cambios que registrar'))
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'No se pudieron comparar las componentes con Neo4j: {e}'))
+        finally:
+            Neo4jConnection.close()
+    
+    def _estadisticas_componentes(self, G, top_k, procesos):
+        """
+        Guarda en Postgres las estadísticas por componente de la red. Los nodos
+        :Componente de Neo4j se crean después de importar los CSV con el
+        comando estadisticas_componentes.
+        """
+        self.stdout.write(self.style.SUCCESS('Calculando estadísticas por componente...'))
+        with medir_etapa(self.ejecucion, 'estadisticas_componentes'):
+            tabla = estadisticas_componentes(G, top_k=top_k, procesos=procesos)
+            guardar_estadisticas_componentes(tabla, self.ejecucion)
+        self.ejecucion.resumen['estadisticas_componentes'] = {
+            'componentes': len(tabla), 'diametros_aproximados': int((~tabla['diametro_exacto']).sum()),
+        }
     
     def _show_import_instructions(self, nodes_file, rels_file, options):
         """Muestra las instrucciones para importar los CSVs a Neo4j"""
@@ -204,8 +287,22 @@ class Command(BaseCommand):
         self.stdout.write("\n# 5. Inicia Neo4j nuevamente")
         self.stdout.write("docker-compose exec neo4j neo4j start")
         
+        if not options.get('solo_entidades'):
+            self.stdout.write("\n# 6. Crea los nodos Componente con las estadísticas de la red importada")
+            self.stdout.write("docker-compose exec django python manage.py estadisticas_componentes")
+            self.stdout.write("\n# 7. (Opcional) Calcula componentes y centralidad dentro de Neo4j con Graph Data Science")
+            self.stdout.write("docker-compose exec django python manage.py crear_red_neo4j --solo-gds")
+        
         self.stdout.write(self.style.SUCCESS('\nArchivos CSV generados correctamente.'))
     
+    def _exportar_csv(self, G, output_dir=None):
+        """Exporta la red a CSV registrando su tamaño y la duración en la ejecución"""
+        with medir_etapa(self.ejecucion, 'exportacion_csv'):
+            nodes_file, rels_file = self._network_to_csv(G, output_dir)
+        self.ejecucion.resumen.update({'nodos': G.number_of_nodes(), 'enlaces': G.number_of_edges()})
+        self.ejecucion.filas_cargadas = G.number_of_nodes() + G.number_of_edges()
+        return nodes_file, rels_file
+    
     def _network_to_csv(self, G, output_dir=None):
         """Convierte una red NetworkX a CSVs para neo4j-admin import"""
         # Crear directorio para los archivos CSV
@@ -218,6 +315,10 @@ class Command(BaseCommand):
         nodes_file = os.path.join(csv_dir, 'nodes.csv')
         rels_file = os.path.join(csv_dir, 'relationships.csv')
         
+        if isinstance(G, GrafoCompacto):
+            self._grafo_compacto_to_csv(G, nodes_file, rels_file)
+            return nodes_file, rels_file
+        
         # Escribir nodos a CSV
         self.stdout.write('Exportando nodos a CSV...')
         with open(nodes_file, 'w', newline='', encoding='utf-8') as f:
@@ -231,7 +332,7 @@ class Command(BaseCommand):
             clean_props = all_props - props_to_exclude
             
             # Crear encabezados
-            headers = ['id:ID'] + list(clean_props) + [':LABEL']
+            headers = ['id:ID'] + [_encabezado(prop) for prop in clean_props] + [':LABEL']
             writer = csv.writer(f)
             writer.writerow(headers)
             
@@ -335,4 +436,59 @@ class Command(BaseCommand):
                 if count % 10000 == 0:
                     self.stdout.write(f'  Procesadas {count} relaciones')
         
-        return nodes_file, rels_file
\ No newline at end of file
+        return nodes_file, rels_file
+    
+    def _grafo_compacto_to_csv(self, G, nodes_file, rels_file):
+        """
+        Exporta un GrafoCompacto por columnas con pandas, con los mismos
+        encabezados, valores y etiquetas que la exportación de networkx
+        """
+        self.stdout.write('Exportando nodos a CSV...')
+        nodos = G.tabla_nodos()
+        # Componente -1: sin calcular, como un nodo de networkx sin el atributo
+        for columna in ('componente', 'componente_id'):
+            nodos[columna] = nodos[columna].astype(object).where(nodos[columna] >= 0, None)
+        
+        # Determinar el tipo de nodo (etiqueta)
+        # Prioridad: 1. entity_type, 2. tipo, 3. detectar por patrón
+        ids = nodos['id'].astype(str)
+        patron_nunc = ids.str.isdigit() | (ids.str.startswith("'") & ids.str[1:].str.replace('-', '').str.isdigit())
+        etiquetas = pd.Series(np.where(patron_nunc, 'NUNC', 'Nodo'), index=nodos.index, dtype=object)
+        con_tipo = nodos['tipo'].notna()
+        etiquetas[con_tipo] = nodos.loc[con_tipo, 'tipo'].map(
+            lambda tipo: ETIQUETAS_TIPO.get(tipo, str(tipo).capitalize())
+        )
+        if 'entity_type' in nodos.columns:
+            con_entidad = nodos['entity_type'].map(bool)
+            etiquetas[con_entidad] = nodos.loc[con_entidad, 'entity_type'].str.capitalize()
+        
+        # Excluir propiedades problemáticas o que no se necesitan en Neo4j
+        propiedades = [columna for columna in nodos.columns
+                       if columna != 'id' and columna not in ('shape', 'creado_desde_enlace')]
+        tabla = pd.DataFrame({'id:ID': ids})
+        for propiedad in propiedades:
+            tabla[_encabezado(propiedad)] = nodos[propiedad].map(_valor_csv)
+        tabla[':LABEL'] = etiquetas
+        tabla.to_csv(nodes_file, index=False, lineterminator='\r\n')
+        self.stdout.write(f'  Procesados {len(tabla)} nodos')
+        
+        self.stdout.write('Exportando relaciones a CSV...')
+        enlaces = G.tabla_enlaces()
+        
+        # Determinar el tipo de relación desde los atributos
+        # Prioridad: 1. type, 2. tipo, 3. calidad_vinculo, 4. accion, 5. valor predeterminado
+        tipos = pd.Series('RELACIONADO', index=enlaces.index, dtype=object)
+        pendientes = pd.Series(True, index=enlaces.index)
+        for atributo in ('type', 'tipo', 'calidad_vinculo', 'accion'):
+            if atributo not in enlaces.columns:
+                continue
+            usar = pendientes & enlaces[atributo].map(bool)
+            tipos[usar] = enlaces.loc[usar, atributo].str.replace(' ', '_').str.upper()
+            pendientes &= ~usar
+        
+        tabla = pd.DataFrame({':START_ID': enlaces['origen'].astype(str), ':END_ID': enlaces['destino'].astype(str)})
+        for propiedad in enlaces.columns.drop(['origen', 'destino']):
+            tabla[propiedad] = enlaces[propiedad].map(_valor_csv)
+        tabla[':TYPE'] = tipos
+        tabla.to_csv(rels_file, index=False, lineterminator='\r\n')
+        self.stdout.write(f'  Procesadas {len(tabla)} relaciones')
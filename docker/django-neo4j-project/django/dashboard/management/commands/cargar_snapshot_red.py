@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.utils_ejecuciones import registrar_ejecucion, medir_etapa
+from dashboard.utils_neo4j import guardar_red_en_neo4j
+from dashboard.utils_snapshots import cargar_snapshot, listar_snapshots, verificar_snapshot
+
+
+class Command(BaseCommand):
+    help = ('Lista, verifica o carga un snapshot de la red guardado con guardar_snapshot_red, '
+            'crear_red_neo4j o actualizar_red_neo4j, y opcionalmente lo guarda en Neo4j')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nombre',
+            default='consolidado',
+            help='Nombre del snapshot (default: consolidado)',
+        )
+        parser.add_argument(
+            '--numero-version',
+            type=int,
+            help='Versión a cargar (por defecto la más reciente)',
+        )
+        parser.add_argument(
+            '--listar',
+            action='store_true',
+            help='Listar las versiones guardadas del snapshot y terminar',
+        )
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Comprobar el SHA-256 de los archivos con el manifiesto antes de cargar',
+        )
+        parser.add_argument(
+            '--neo4j',
+            action='store_true',
+            help='Reemplazar la red de Neo4j por la del snapshot',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Tamaño del lote para operaciones en Neo4j (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        nombre = options['nombre']
+        version = options['numero_version']
+
+        if options['listar']:
+            manifiestos = listar_snapshots(nombre)
+            if not manifiestos:
+                self.stdout.write(self.style.WARNING(f'No hay snapshots guardados de {nombre}'))
+            for manifiesto in manifiestos:
+                origen = manifiesto['origen']
+                self.stdout.write(
+                    f"v{manifiesto['version']}  {manifiesto['creado']}  {manifiesto['nodos']} nodos  "
+                    f"{manifiesto['enlaces']} enlaces  ejecución {origen['ejecucion']} ({origen['comando']})  "
+                    f"datos v{origen['version_datos']}"
+                )
+            return
+
+        if options['verificar']:
+            try:
+                errores = verificar_snapshot(nombre, version)
+            except FileNotFoundError as e:
+                raise CommandError(str(e))
+            if errores:
+                for error in errores:
+                    self.stdout.write(self.style.ERROR(error))
+                raise CommandError(f'El snapshot {nombre} no coincide con su manifiesto')
+            self.stdout.write(self.style.SUCCESS('Los archivos coinciden con el manifiesto'))
+
+        if not options['neo4j']:
+            try:
+                G, manifiesto = cargar_snapshot(nombre, version)
+            except FileNotFoundError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"Snapshot {nombre} v{manifiesto['version']} cargado con {G.number_of_nodes()} nodos "
+                f"y {G.number_of_edges()} enlaces"
+            ))
+            return
+
+        parametros = {'nombre': nombre, 'version': version, 'batch_size': options['batch_size']}
+        with registrar_ejecucion('cargar_snapshot_red', 'red', None, parametros) as ejecucion:
+            with medir_etapa(ejecucion, 'lectura_red'):
+                try:
+                    G, manifiesto = cargar_snapshot(nombre, version)
+                except FileNotFoundError as e:
+                    raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"Snapshot {nombre} v{manifiesto['version']} cargado con {G.number_of_nodes()} nodos "
+                f"y {G.number_of_edges()} enlaces"
+            ))
+
+            self.stdout.write(self.style.SUCCESS('Guardando red en Neo4j...'))
+            with medir_etapa(ejecucion, 'neo4j'):
+                guardar_red_en_neo4j(G, batch_size=options['batch_size'])
+
+            ejecucion.filas_cargadas = G.number_of_nodes() + G.number_of_edges()
+            ejecucion.resumen = {'nodos': G.number_of_nodes(), 'enlaces': G.number_of_edges(),
+                                 'snapshot': {'nombre': nombre, 'version': manifiesto['version']}}
+            self.stdout.write(self.style.SUCCESS('Proceso completado exitosamente'))
@@ -0,0 +1,73 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.utils import tipos_columnas_archivo
+from dashboard.utils_archivos import EXTENSIONES_CSV, convertir_a_parquet, es_cache_tipada, ruta_parquet
+
+
+class Command(BaseCommand):
+    help = ('Convierte los CSV de entrada en una caché Parquet que usan cargar_datos y la '
+            'construcción de la red en lugar de volver a leer el texto (requiere pyarrow)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archivos',
+            nargs='*',
+            help='CSV a convertir (por defecto todos los CSV de la carpeta data)',
+        )
+
+        parser.add_argument(
+            '--chunksize',
+            type=int,
+            default=100000,
+            help='Filas por chunk al leer el CSV (y por grupo de filas del Parquet)',
+        )
+
+        parser.add_argument(
+            '--compresion',
+            type=str,
+            default='zstd',
+            choices=['zstd', 'snappy', 'gzip', 'none'],
+            help='Códec de compresión del Parquet',
+        )
+
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Convertir aunque ya exista una caché más reciente que el CSV',
+        )
+
+    def handle(self, *args, **options):
+        archivos = options['archivos']
+        if not archivos:
+            app_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            data_folder = os.path.join(app_path, 'data')
+            self.stdout.write(self.style.SUCCESS(f'Buscando archivos CSV en: {data_folder}'))
+            archivos = sorted(
+                os.path.join(data_folder, nombre) for nombre in os.listdir(data_folder)
+                if nombre.lower().endswith(EXTENSIONES_CSV)
+            )
+
+        compresion = None if options['compresion'] == 'none' else options['compresion']
+
+        for archivo in archivos:
+            if not os.path.exists(archivo):
+                raise CommandError(f'Archivo no encontrado: {archivo}')
+
+            destino = ruta_parquet(archivo)
+            # Los conjuntos conocidos se guardan tipados (fechas y números ya convertidos)
+            tipos = tipos_columnas_archivo(archivo)
+            # Una caché sin tipos de un conjunto conocido se regenera aunque esté al día
+            if (not options['forzar'] and os.path.exists(destino)
+                    and os.path.getmtime(destino) >= os.path.getmtime(archivo)
+                    and (tipos is None or es_cache_tipada(destino))):
+                self.stdout.write(self.style.SUCCESS(f'{destino} ya está actualizado'))
+                continue
+
+            self.stdout.write(self.style.WARNING(f'Convirtiendo {archivo}...'))
+            inicio = time.time()
+            destino, filas = convertir_a_parquet(archivo, destino, options['chunksize'], compresion, tipos)
+            self.stdout.write(self.style.SUCCESS(
+                f'{destino}: {filas} filas{"" if tipos is None else " tipadas"} en {time.time() - inicio:.2f} segundos '
+                f'({os.path.getsize(archivo) / 1e6:.1f} MB -> {os.path.getsize(destino) / 1e6:.1f} MB)'
+            ))
@@ -1,6 +1,17 @@
 import os
 from django.core.management.base import BaseCommand
-from dashboard.utils_neo4j import crear_red_desde_consolidado, guardar_red_en_neo4j, calcular_metricas_centralidad
+from dashboard.utils_neo4j import (crear_red_desde_consolidado, guardar_red_en_neo4j, calcular_metricas_centralidad,
+                                  leer_componentes_en_neo4j, registrar_cambios_componentes)
+from dashboard.utils_ejecuciones import registrar_ejecucion, medir_etapa
+from dashboard.utils_snapshots import guardar_snapshot, cargar_snapshot
+from dashboard.utils_componentes import (estadisticas_componentes, guardar_estadisticas_componentes,
+                                         guardar_componentes_en_neo4j)
+from dashboard.utils_proyeccion import (proyectar_personas, guardar_proyeccion_en_neo4j, MAX_PERSONAS_NUNC,
+                                        SNAPSHOT_PROYECCION)
+from dashboard.utils_comunidades import (detectar_comunidades, estadisticas_comunidades,
+                                         guardar_estadisticas_comunidades, guardar_comunidades_en_neo4j)
+from dashboard.utils_grafo import GrafoCompacto
+from dashboard.utils_gds import calcular_metricas_gds, PROPIEDADES_GDS
 
 
 class Command(BaseCommand):
@@ -36,7 +47,65 @@ class Command(BaseCommand):
         parser.add_argument(
             '--solo-guardar',
             action='store_true',
-            help='Solo guardar la red en Neo4j (la red debe existir en memoria)',
+            help='Solo guardar en Neo4j la red del último snapshot consolidado (creado con --solo-red)',
+        )
+        parser.add_argument(
+            '--compacto',
+            action='store_true',
+            help='Construir la red como GrafoCompacto (ids enteros y arreglos NumPy) en lugar de networkx',
+        )
+        parser.add_argument(
+            '--error-centralidad',
+            type=float,
+            default=0.05,
+            help='Error máximo de la betweenness aproximada en componentes grandes (default: 0.05)',
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos para calcular la centralidad y los diámetros (default: número de CPUs)',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=5,
+            help='Nodos de mayor grado a guardar en las estadísticas de cada componente (default: 5)',
+        )
+        parser.add_argument(
+            '--proyeccion-personas',
+            action='store_true',
+            help='Guardar también la proyección Persona-Persona (relaciones COAPARECE_CON y snapshot)',
+        )
+        parser.add_argument(
+            '--max-personas-nunc',
+            type=int,
+            default=MAX_PERSONAS_NUNC,
+            help=f'Omitir de la proyección las NUNC con más personas que esto (default: {MAX_PERSONAS_NUNC})',
+        )
+        parser.add_argument(
+            '--comunidades',
+            action='store_true',
+            help='Detectar comunidades por propagación de etiquetas y guardarlas en Neo4j y Postgres',
+        )
+        parser.add_argument(
+            '--gds',
+            action='store_true',
+            help=('Calcular componentes (WCC), grado, PageRank y betweenness aproximada en Neo4j con Graph '
+                  'Data Science después de guardar la red, en lugar de la centralidad en Python. La red se '
+                  'sigue creando en memoria y las estadísticas por componente (diámetros), la proyección y '
+                  'las comunidades se calculan en Python; solo --solo-gds evita cargar la red en Django'),
+        )
+        parser.add_argument(
+            '--solo-gds',
+            action='store_true',
+            help='Solo calcular las métricas con Graph Data Science sobre la red ya guardada en Neo4j, sin crearla ni cargarla en memoria',
+        )
+        parser.add_argument(
+            '--concurrencia-gds',
+            type=int,
+            default=4,
+            help='Hilos de Graph Data Science para calcular y escribir las métricas (default: 4)',
         )
 
     def handle(self, *args, **options):
@@ -49,6 +118,19 @@ class Command(BaseCommand):
         batch_size = options.get('batch_size')
         solo_red = options.get('solo_red')
         solo_guardar = options.get('solo_guardar')
+        compacto = options.get('compacto')
+        error_centralidad = options.get('error_centralidad')
+        procesos = options.get('procesos')
+        top_k = options.get('top_k')
+        proyeccion_personas = options.get('proyeccion_personas')
+        max_personas_nunc = options.get('max_personas_nunc')
+        comunidades = options.get('comunidades')
+        solo_gds = options.get('solo_gds')
+        gds = options.get('gds') or solo_gds
+        concurrencia_gds = options.get('concurrencia_gds')
+        # Con GDS solo la centralidad pasa a Neo4j; el resto del análisis sigue en Python
+        if gds:
+            calcular_metricas = False
         
         self.stdout.write(self.style.SUCCESS('='*80))
         self.stdout.write(self.style.SUCCESS('Iniciando creación y almacenamiento de red en Neo4j'))
@@ -66,87 +148,188 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f'Tamaño de chunk para CSV: {chunksize}'))
         self.stdout.write(self.style.SUCCESS(f'Tamaño de lote para Neo4j: {batch_size}'))
         
-        if calcular_metricas:
+        if gds:
+            self.stdout.write(self.style.SUCCESS('Se calcularán métricas de centralidad en Neo4j (Graph Data Science)'))
+        elif calcular_metricas:
             self.stdout.write(self.style.SUCCESS('Se calcularán métricas de centralidad'))
         else:
             self.stdout.write(self.style.SUCCESS('No se calcularán métricas de centralidad'))
         
-        try:
-            # Crear la red (a menos que solo estemos guardando)
-            if not solo_guardar:
-                self.stdout.write(self.style.SUCCESS('Creando la red...'))
-                G = crear_red_desde_consolidado(archivo, chunksize=chunksize)
-                tiempo_creacion = time.time() - tiempo_inicio
-                self.stdout.write(self.style.SUCCESS(f'Red creada en {tiempo_creacion:.2f} segundos'))
+        parametros = {'sin_metricas': not calcular_metricas, 'chunksize': chunksize, 'batch_size': batch_size,
+                      'solo_red': solo_red, 'solo_guardar': solo_guardar, 'compacto': compacto,
+                      'error_centralidad': error_centralidad, 'procesos': procesos, 'top_k': top_k,
+                      'proyeccion_personas': proyeccion_personas, 'max_personas_nunc': max_personas_nunc,
+                      'comunidades': comunidades, 'gds': gds, 'solo_gds': solo_gds,
+                      'concurrencia_gds': concurrencia_gds}
+        # Solo crear la red en memoria no cambia los datos que consultan las APIs
+        with registrar_ejecucion('crear_red_neo4j', 'red', archivo, parametros, modifica_datos=not solo_red) as ejecucion:
+            try:
+                # Métricas sobre la red que ya está en Neo4j, sin traerla a Django
+                if solo_gds:
+                    self._metricas_gds(ejecucion, error_centralidad, concurrencia_gds)
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Proceso finalizado (solo GDS) en {time.time() - tiempo_inicio:.2f} segundos'
+                    ))
+                    return
                 
-                # Guardar la red para uso futuro
-                import pickle
-                with open('red_consolidado.pickle', 'wb') as f:
-                    pickle.dump(G, f)
-                self.stdout.write(self.style.SUCCESS('Red guardada en archivo red_consolidado.pickle'))
-            else:
-                # Cargar la red previamente guardada
-                import pickle
-                try:
-                    with open('red_consolidado.pickle', 'rb') as f:
-                        G = pickle.load(f)
-                    self.stdout.write(self.style.SUCCESS('Red cargada desde archivo red_consolidado.pickle'))
-                except FileNotFoundError:
-                    self.stdout.write(self.style.ERROR('No se encontró el archivo red_consolidado.pickle'))
-                    self.stdout.write(self.style.ERROR('Primero debes crear la red con --solo-red'))
+                # Crear la red (a menos que solo estemos guardando)
+                if not solo_guardar:
+                    self.stdout.write(self.style.SUCCESS('Creando la red...'))
+                    G = crear_red_desde_consolidado(archivo, chunksize=chunksize, compacto=compacto)
+                    tiempo_creacion = time.time() - tiempo_inicio
+                    self.stdout.write(self.style.SUCCESS(f'Red creada en {tiempo_creacion:.2f} segundos'))
+                    ejecucion.etapas['creacion'] = round(tiempo_creacion, 3)
+                
+                    # Guardar la red para uso futuro (--solo-guardar, actualizar_red_neo4j)
+                    with medir_etapa(ejecucion, 'snapshot'):
+                        snapshot = guardar_snapshot(G, 'consolidado', ejecucion)
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Red guardada en el snapshot consolidado v{snapshot['version']} ({snapshot['ruta']})"
+                    ))
+                else:
+                    # Cargar la red previamente guardada
+                    try:
+                        with medir_etapa(ejecucion, 'snapshot'):
+                            G, snapshot = cargar_snapshot('consolidado')
+                        self.stdout.write(self.style.SUCCESS(
+                            f"Red cargada desde el snapshot consolidado v{snapshot['version']} ({snapshot['ruta']})"
+                        ))
+                    except FileNotFoundError as e:
+                        self.stdout.write(self.style.ERROR(str(e)))
+                        self.stdout.write(self.style.ERROR('Primero debes crear la red con --solo-red'))
+                        ejecucion.error = str(e)
+                        return
+            
+                ejecucion.resumen = {'nodos': G.number_of_nodes(), 'enlaces': G.number_of_edges(),
+                                     'snapshot': {'nombre': 'consolidado', 'version': snapshot['version']}}
+                ejecucion.filas_cargadas = G.number_of_nodes() + G.number_of_edges()
+            
+                # Si solo queríamos crear la red, terminamos aquí
+                if solo_red:
+                    self.stdout.write(self.style.SUCCESS('Proceso finalizado (solo creación de red)'))
                     return
             
-            # Si solo queríamos crear la red, terminamos aquí
-            if solo_red:
-                self.stdout.write(self.style.SUCCESS('Proceso finalizado (solo creación de red)'))
-                return
+                # Calcular métricas si se solicita
+                if calcular_metricas:
+                    tiempo_metricas_inicio = time.time()
+                    self.stdout.write(self.style.SUCCESS('Calculando métricas de centralidad...'))
+                    try:
+                        # Betweenness y closeness exactas en componentes pequeñas y con
+                        # muestreo de fuentes en las grandes, sobre la red completa
+                        metricas = calcular_metricas_centralidad(G, error=error_centralidad, procesos=procesos)
+                        ejecucion.resumen['centralidad'] = {
+                            'aproximado': metricas['aproximado'], 'fuentes': metricas['fuentes'], 'error': error_centralidad,
+                        }
+                    
+                        tiempo_metricas = time.time() - tiempo_metricas_inicio
+                        self.stdout.write(self.style.SUCCESS(f'Métricas calculadas en {tiempo_metricas:.2f} segundos'))
+                        ejecucion.etapas['metricas'] = round(tiempo_metricas, 3)
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f'Error al calcular métricas: {str(e)}'))
+                        self.stdout.write(self.style.WARNING('Continuando sin métricas...'))
             
-            # Calcular métricas si se solicita
-            if calcular_metricas:
-                tiempo_metricas_inicio = time.time()
-                self.stdout.write(self.style.SUCCESS('Calculando métricas de centralidad...'))
-                try:
-                    # Calcular métricas solo para una muestra si la red es muy grande
-                    if len(G) > 100000:
-                        self.stdout.write(self.style.WARNING(
-                            f'Red muy grande ({len(G)} nodos), calculando métricas parciales'
-                        ))
-                        import random
-                        # Tomar una muestra de 50000 nodos o el 10% de la red, lo que sea mayor
-                        sample_size = max(50000, int(len(G) * 0.1))
-                        sample_nodes = random.sample(list(G.nodes()), sample_size)
-                        G_sample = G.subgraph(sample_nodes)
-                        metricas = calcular_metricas_centralidad(G_sample)
+                # Antes de reemplazar la red en Neo4j, registrar qué componentes
+                # cambiaron respecto a la guardada (las demás conservan su componente_id)
+                self.stdout.write(self.style.SUCCESS('Comparando componentes con la red guardada en Neo4j...'))
+                with medir_etapa(ejecucion, 'componentes'):
+                    anterior = leer_componentes_en_neo4j()
+                    if len(anterior):
+                        ejecucion.resumen['cambios_componentes'] = registrar_cambios_componentes(G, anterior, ejecucion)
                     else:
-                        metricas = calcular_metricas_centralidad(G)
-                    
-                    tiempo_metricas = time.time() - tiempo_metricas_inicio
-                    self.stdout.write(self.style.SUCCESS(f'Métricas calculadas en {tiempo_metricas:.2f} segundos'))
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'Error al calcular métricas: {str(e)}'))
-                    self.stdout.write(self.style.WARNING('Continuando sin métricas...'))
+                        self.stdout.write(self.style.WARNING('La red guardada no tiene componente_id, no hay cambios que registrar'))
             
-            # Guardar en Neo4j
-            tiempo_neo4j_inicio = time.time()
-            self.stdout.write(self.style.SUCCESS('Guardando red en Neo4j...'))
-            guardar_red_en_neo4j(G, batch_size=batch_size)
-            tiempo_neo4j = time.time() - tiempo_neo4j_inicio
+                # Guardar en Neo4j
+                tiempo_neo4j_inicio = time.time()
+                self.stdout.write(self.style.SUCCESS('Guardando red en Neo4j...'))
+                guardar_red_en_neo4j(G, batch_size=batch_size)
+                tiempo_neo4j = time.time() - tiempo_neo4j_inicio
+                ejecucion.etapas['neo4j'] = round(tiempo_neo4j, 3)
+
+                # Componentes y centralidad dentro de Neo4j
+                if gds:
+                    tiempo_metricas = self._metricas_gds(ejecucion, error_centralidad, concurrencia_gds)
+
+                # Estadísticas por componente en Postgres y como nodos :Componente en Neo4j
+                self.stdout.write(self.style.SUCCESS('Calculando estadísticas por componente...'))
+                with medir_etapa(ejecucion, 'estadisticas_componentes'):
+                    tabla = estadisticas_componentes(G, top_k=top_k, procesos=procesos)
+                    guardar_estadisticas_componentes(tabla, ejecucion)
+                    guardar_componentes_en_neo4j(tabla, batch_size=batch_size)
+                ejecucion.resumen['estadisticas_componentes'] = {
+                    'componentes': len(tabla), 'diametros_aproximados': int((~tabla['diametro_exacto']).sum()),
+                }
+
+                # Proyección Persona-Persona, después de guardar la red porque
+                # sus relaciones se crean entre los nodos Persona
+                if proyeccion_personas:
+                    self.stdout.write(self.style.SUCCESS('Proyectando la red sobre las personas...'))
+                    with medir_etapa(ejecucion, 'proyeccion'):
+                        H, resumen_proyeccion = proyectar_personas(G, max_personas_nunc=max_personas_nunc)
+                        proyeccion = guardar_snapshot(H, SNAPSHOT_PROYECCION, ejecucion)
+                        guardar_proyeccion_en_neo4j(H, batch_size=batch_size)
+                    resumen_proyeccion['snapshot'] = proyeccion['version']
+                    ejecucion.resumen['proyeccion'] = resumen_proyeccion
+
+                # Comunidades dentro de las componentes, para visualizar vecindarios acotados
+                if comunidades:
+                    self.stdout.write(self.style.SUCCESS('Detectando comunidades...'))
+                    with medir_etapa(ejecucion, 'comunidades'):
+                        compacta = G if isinstance(G, GrafoCompacto) else GrafoCompacto.desde_networkx(G)
+                        comunidad, resumen_comunidades = detectar_comunidades(compacta, procesos=procesos)
+                        tabla_comunidades = estadisticas_comunidades(compacta, comunidad, top_k=top_k)
+                        guardar_estadisticas_comunidades(tabla_comunidades, ejecucion)
+                        guardar_comunidades_en_neo4j(compacta, comunidad, batch_size=batch_size)
+                    ejecucion.resumen['comunidades'] = resumen_comunidades
             
-            # Tiempo total
-            tiempo_total = time.time() - tiempo_inicio
+                # Tiempo total
+                tiempo_total = time.time() - tiempo_inicio
             
-            self.stdout.write(self.style.SUCCESS('='*80))
-            self.stdout.write(self.style.SUCCESS(f'Resumen de tiempos:'))
-            if not solo_guardar:
-                self.stdout.write(self.style.SUCCESS(f'- Creación de red: {tiempo_creacion:.2f} segundos'))
-            if calcular_metricas and not solo_red:
-                self.stdout.write(self.style.SUCCESS(f'- Cálculo de métricas: {tiempo_metricas:.2f} segundos'))
-            self.stdout.write(self.style.SUCCESS(f'- Guardado en Neo4j: {tiempo_neo4j:.2f} segundos'))
-            self.stdout.write(self.style.SUCCESS(f'- Tiempo total: {tiempo_total:.2f} segundos'))
-            self.stdout.write(self.style.SUCCESS('='*80))
+                self.stdout.write(self.style.SUCCESS('='*80))
+                self.stdout.write(self.style.SUCCESS(f'Resumen de tiempos:'))
+                if not solo_guardar:
+                    self.stdout.write(self.style.SUCCESS(f'- Creación de red: {tiempo_creacion:.2f} segundos'))
+                if (calcular_metricas or gds) and not solo_red:
+                    origen = 'GDS' if gds else 'Python'
+                    self.stdout.write(self.style.SUCCESS(f'- Cálculo de métricas ({origen}): {tiempo_metricas:.2f} segundos'))
+                self.stdout.write(self.style.SUCCESS(f'- Guardado en Neo4j: {tiempo_neo4j:.2f} segundos'))
+                self.stdout.write(self.style.SUCCESS(f'- Tiempo total: {tiempo_total:.2f} segundos'))
+                self.stdout.write(self.style.SUCCESS('='*80))
             
-            self.stdout.write(self.style.SUCCESS('Proceso completado exitosamente'))
+                self.stdout.write(self.style.SUCCESS('Proceso completado exitosamente'))
             
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Error: {str(e)}'))
-            raise
\ No newline at end of file
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error: {str(e)}'))
+                raise
+
+    def _metricas_gds(self, ejecucion, error_centralidad, concurrencia_gds):
+        """
+        Ejecuta calcular_metricas_gds y registra el tiempo de cada algoritmo en
+        ejecucion.etapas (gds_proyeccion, gds_wcc, ...) para compararlo con las
+        etapas del cálculo en Python
+
+        Returns:
+            float: Segundos de todo el cálculo en GDS
+        """
+        self.stdout.write(self.style.SUCCESS('Calculando métricas con Graph Data Science...'))
+        with medir_etapa(ejecucion, 'metricas_gds'):
+            resultados = calcular_metricas_gds(error=error_centralidad, concurrencia=concurrencia_gds)
+        for etapa, datos in resultados.items():
+            ejecucion.etapas[f'gds_{etapa}'] = datos['segundos']
+        ejecucion.resumen = {**(ejecucion.resumen or {}), 'gds': {
+            'nodos': resultados['proyeccion']['nodeCount'],
+            'relaciones': resultados['proyeccion']['relationshipCount'],
+            'componentes': resultados['wcc']['componentCount'],
+            'pagerank_convergio': resultados['pagerank']['didConverge'],
+            'fuentes': resultados['betweenness']['fuentes'],
+            'aproximado': resultados['betweenness']['aproximado'],
+            'error': error_centralidad,
+            'propiedades': PROPIEDADES_GDS,
+            'milisegundos': {etapa: {clave: datos[clave] for clave in ('computeMillis', 'writeMillis', 'projectMillis')
+                                     if clave in datos}
+                             for etapa, datos in resultados.items()},
+        }}
+        self.stdout.write(self.style.SUCCESS(
+            f"Métricas GDS escritas en Neo4j ({resultados['wcc']['componentCount']} componentes) "
+            f"en {ejecucion.etapas['metricas_gds']:.2f} segundos"
+        ))
+        return ejecucion.etapas['metricas_gds']
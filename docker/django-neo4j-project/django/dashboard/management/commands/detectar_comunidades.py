@@ -0,0 +1,125 @@
+import os
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.utils_comunidades import (detectar_comunidades, heredar_comunidades, estadisticas_comunidades,
+                                         guardar_estadisticas_comunidades, guardar_comunidades_en_neo4j,
+                                         MAX_ITERACIONES, METODOS_COMUNIDADES)
+from dashboard.utils_ejecuciones import registrar_ejecucion, medir_etapa
+from dashboard.utils_proyeccion import SNAPSHOT_PROYECCION
+from dashboard.utils_snapshots import cargar_snapshot
+
+
+class Command(BaseCommand):
+    help = ('Detecta comunidades en la red de un snapshot (o en la proyección de personas) y guarda la '
+            'propiedad comunidad en Neo4j y el resumen de cada comunidad en Postgres')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nombre',
+            default='consolidado',
+            help='Nombre del snapshot de la red (default: consolidado)',
+        )
+        parser.add_argument(
+            '--numero-version',
+            type=int,
+            help='Versión del snapshot de la red (por defecto la más reciente)',
+        )
+        parser.add_argument(
+            '--proyeccion',
+            action='store_true',
+            help=(f'Detectar las comunidades en el último snapshot {SNAPSHOT_PROYECCION} (ponderado por peso) '
+                  'y llevarlas a la red: cada NUNC toma la comunidad más frecuente entre sus personas'),
+        )
+        parser.add_argument(
+            '--metodo',
+            choices=METODOS_COMUNIDADES,
+            help='Método de detección (default: propagacion en la red, louvain en la proyección)',
+        )
+        parser.add_argument(
+            '--max-iteraciones',
+            type=int,
+            default=MAX_ITERACIONES,
+            help=f'Iteraciones máximas de la propagación de etiquetas (default: {MAX_ITERACIONES})',
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos entre los que se reparten las componentes (default: número de CPUs)',
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            help='Semilla para obtener las mismas comunidades en cada ejecución',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=5,
+            help='Nodos de mayor grado a guardar por comunidad (default: 5)',
+        )
+        parser.add_argument(
+            '--sin-neo4j',
+            action='store_true',
+            help='Guardar solo el resumen en Postgres, sin escribir la propiedad comunidad en Neo4j',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Tamaño del lote para operaciones en Postgres y Neo4j (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        nombre = options['nombre']
+        proyeccion = options['proyeccion']
+        metodo = options['metodo'] or ('louvain' if proyeccion else 'propagacion')
+        parametros = {clave: options[clave] for clave in (
+            'nombre', 'numero_version', 'proyeccion', 'max_iteraciones', 'procesos', 'semilla', 'top_k',
+            'sin_neo4j', 'batch_size'
+        )}
+        parametros['metodo'] = metodo
+        with registrar_ejecucion('detectar_comunidades', 'red', None, parametros,
+                                 modifica_datos=not options['sin_neo4j']) as ejecucion:
+            with medir_etapa(ejecucion, 'lectura_red'):
+                try:
+                    G, manifiesto = cargar_snapshot(nombre, options['numero_version'])
+                    if proyeccion:
+                        H, manifiesto_proyeccion = cargar_snapshot(SNAPSHOT_PROYECCION)
+                except FileNotFoundError as e:
+                    raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"Snapshot {nombre} v{manifiesto['version']} cargado con {G.number_of_nodes()} nodos "
+                f"y {G.number_of_edges()} enlaces"
+            ))
+
+            with medir_etapa(ejecucion, 'comunidades'):
+                argumentos = {'metodo': metodo, 'max_iteraciones': options['max_iteraciones'],
+                              'procesos': options['procesos'], 'semilla': options['semilla']}
+                if proyeccion:
+                    pesos = H.atributos_enlace['peso'].astype(np.float64)
+                    comunidad_proyeccion, resumen = detectar_comunidades(H, pesos=pesos, **argumentos)
+                    comunidad = heredar_comunidades(G, H, comunidad_proyeccion)
+                else:
+                    comunidad, resumen = detectar_comunidades(G, **argumentos)
+                tabla = estadisticas_comunidades(G, comunidad, top_k=options['top_k'])
+            with medir_etapa(ejecucion, 'postgres'):
+                guardar_estadisticas_comunidades(tabla, ejecucion, batch_size=options['batch_size'])
+            if not options['sin_neo4j']:
+                with medir_etapa(ejecucion, 'neo4j'):
+                    guardar_comunidades_en_neo4j(G, comunidad, batch_size=options['batch_size'])
+
+            resumen['comunidades'] = len(tabla)
+            resumen['metodo'] = metodo
+            ejecucion.filas_cargadas = len(tabla)
+            ejecucion.resumen = {
+                'comunidades': resumen,
+                'snapshot': {'nombre': nombre, 'version': manifiesto['version']},
+            }
+            if proyeccion:
+                ejecucion.resumen['proyeccion'] = {'nombre': SNAPSHOT_PROYECCION,
+                                                   'version': manifiesto_proyeccion['version']}
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(tabla)} comunidades guardadas "
+                f"(la más grande con {int(tabla['tamano'].max()) if len(tabla) else 0} nodos)"
+            ))
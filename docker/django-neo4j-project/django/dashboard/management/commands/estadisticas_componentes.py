@@ -0,0 +1,89 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.utils_componentes import (estadisticas_componentes, guardar_estadisticas_componentes,
+                                         guardar_componentes_en_neo4j)
+from dashboard.utils_ejecuciones import registrar_ejecucion, medir_etapa
+from dashboard.utils_snapshots import cargar_snapshot
+
+
+class Command(BaseCommand):
+    help = ('Calcula las estadísticas de cada componente de un snapshot de la red (tamaño, tipos de nodo, '
+            'enlaces, densidad, diámetro y nodos de mayor grado) y las guarda en Postgres y como nodos '
+            ':Componente en Neo4j')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nombre',
+            default='consolidado',
+            help='Nombre del snapshot (default: consolidado)',
+        )
+        parser.add_argument(
+            '--numero-version',
+            type=int,
+            help='Versión del snapshot (por defecto la más reciente)',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=5,
+            help='Nodos de mayor grado a guardar por componente (default: 5)',
+        )
+        parser.add_argument(
+            '--limite-exacto',
+            type=int,
+            default=500,
+            help='Tamaño máximo de las componentes con diámetro exacto (default: 500)',
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos para calcular los diámetros (default: número de CPUs)',
+        )
+        parser.add_argument(
+            '--sin-neo4j',
+            action='store_true',
+            help='Guardar las estadísticas solo en Postgres, sin crear los nodos :Componente',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Tamaño del lote para operaciones en Postgres y Neo4j (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        nombre = options['nombre']
+        parametros = {clave: options[clave] for clave in (
+            'nombre', 'numero_version', 'top_k', 'limite_exacto', 'procesos', 'sin_neo4j', 'batch_size'
+        )}
+        with registrar_ejecucion('estadisticas_componentes', 'red', None, parametros) as ejecucion:
+            with medir_etapa(ejecucion, 'lectura_red'):
+                try:
+                    G, manifiesto = cargar_snapshot(nombre, options['numero_version'])
+                except FileNotFoundError as e:
+                    raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"Snapshot {nombre} v{manifiesto['version']} cargado con {G.number_of_nodes()} nodos "
+                f"y {G.number_of_edges()} enlaces"
+            ))
+
+            with medir_etapa(ejecucion, 'estadisticas_componentes'):
+                tabla = estadisticas_componentes(G, top_k=options['top_k'], limite_exacto=options['limite_exacto'],
+                                                 procesos=options['procesos'])
+            with medir_etapa(ejecucion, 'postgres'):
+                guardar_estadisticas_componentes(tabla, ejecucion, batch_size=options['batch_size'])
+            if not options['sin_neo4j']:
+                with medir_etapa(ejecucion, 'neo4j'):
+                    guardar_componentes_en_neo4j(tabla, batch_size=options['batch_size'])
+
+            ejecucion.filas_cargadas = len(tabla)
+            ejecucion.resumen = {
+                'componentes': len(tabla),
+                'diametros_aproximados': int((~tabla['diametro_exacto']).sum()),
+                'snapshot': {'nombre': nombre, 'version': manifiesto['version']},
+            }
+            self.stdout.write(self.style.SUCCESS(
+                f"Estadísticas de {len(tabla)} componentes guardadas "
+                f"({ejecucion.resumen['diametros_aproximados']} con diámetro aproximado)"
+            ))
@@ -0,0 +1,66 @@
+import os
+import pickle
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.utils_ejecuciones import registrar_ejecucion, medir_etapa
+from dashboard.utils_neo4j import crear_red_desde_consolidado
+from dashboard.utils_snapshots import guardar_snapshot
+
+
+class Command(BaseCommand):
+    help = ('Guarda la red como una nueva versión de snapshot (Arrow, mapeable en memoria), '
+            'construyéndola desde el consolidado o convirtiendo una red guardada con pickle')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nombre',
+            default='consolidado',
+            help='Nombre del snapshot (default: consolidado)',
+        )
+        parser.add_argument(
+            '--archivo',
+            help='Archivo del consolidado. Si no se proporciona, se usarán los datos de la base de datos.',
+        )
+        parser.add_argument(
+            '--pickle',
+            help='Convertir una red guardada con pickle (ej. red_consolidado.pickle) en lugar de construirla',
+        )
+        parser.add_argument(
+            '--chunksize',
+            type=int,
+            default=50000,
+            help='Tamaño del chunk para procesar el archivo (default: 50000)',
+        )
+
+    def handle(self, *args, **options):
+        nombre = options['nombre']
+        archivo = options['archivo']
+        ruta_pickle = options['pickle']
+        if archivo and ruta_pickle:
+            raise CommandError('Use --archivo o --pickle, no ambos')
+        origen = ruta_pickle or archivo
+        if origen and not os.path.exists(origen):
+            raise CommandError(f'El archivo no existe: {origen}')
+
+        parametros = {'nombre': nombre, 'pickle': bool(ruta_pickle), 'chunksize': options['chunksize']}
+        # Guardar un snapshot no cambia los datos que consultan las APIs
+        with registrar_ejecucion('guardar_snapshot_red', 'red', origen, parametros, modifica_datos=False) as ejecucion:
+            if ruta_pickle:
+                self.stdout.write(self.style.WARNING(f'Cargando la red desde {ruta_pickle}...'))
+                with medir_etapa(ejecucion, 'lectura_red'):
+                    with open(ruta_pickle, 'rb') as f:
+                        G = pickle.load(f)
+            else:
+                self.stdout.write(self.style.WARNING(f"Creando la red desde {archivo or 'la base de datos'}..."))
+                with medir_etapa(ejecucion, 'creacion'):
+                    G = crear_red_desde_consolidado(archivo, chunksize=options['chunksize'], compacto=True)
+
+            with medir_etapa(ejecucion, 'snapshot'):
+                snapshot = guardar_snapshot(G, nombre, ejecucion)
+
+            ejecucion.filas_cargadas = snapshot['nodos'] + snapshot['enlaces']
+            ejecucion.resumen = {'nodos': snapshot['nodos'], 'enlaces': snapshot['enlaces'],
+                                 'snapshot': {'nombre': nombre, 'version': snapshot['version']}}
+            self.stdout.write(self.style.SUCCESS(
+                f"Snapshot {nombre} v{snapshot['version']} guardado en {snapshot['ruta']} "
+                f"con {snapshot['nodos']} nodos y {snapshot['enlaces']} enlaces"
+            ))
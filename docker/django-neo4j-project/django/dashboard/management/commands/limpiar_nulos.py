@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from dashboard.models import (
+    ConsolidadoSpoa,
+    PersonasDf,
+    RegistroUnicoDesaparecidos,
+    AparecidosVivosNoRegistrados,
+    Funcionario,
+    DIMENSIONES_CONSOLIDADO
+)
+from dashboard.utils_limpieza import normalizar_nulos_existentes, normalizar_nulos_dimensiones
+
+
+class Command(BaseCommand):
+    help = 'Reemplaza los textos "nan" y vacíos guardados por cargas anteriores por NULL (o "" en campos obligatorios)'
+
+    def handle(self, *args, **options):
+        modelos = [ConsolidadoSpoa, PersonasDf, RegistroUnicoDesaparecidos, AparecidosVivosNoRegistrados, Funcionario]
+
+        for modelo in modelos:
+            self.stdout.write(self.style.WARNING(f'Normalizando nulos en {modelo.__name__}...'))
+            filas = normalizar_nulos_existentes(modelo)
+            self.stdout.write(self.style.SUCCESS(f'{modelo.__name__}: {filas} filas corregidas'))
+
+        self.stdout.write(self.style.WARNING('Normalizando dimensiones de ConsolidadoSpoa...'))
+        llaves = normalizar_nulos_dimensiones(ConsolidadoSpoa, DIMENSIONES_CONSOLIDADO)
+        self.stdout.write(self.style.SUCCESS(f'ConsolidadoSpoa: {llaves} llaves de dimensión puestas en NULL'))
@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand, CommandError
+from dashboard.utils_ejecuciones import registrar_ejecucion, medir_etapa
+from dashboard.utils_proyeccion import (proyectar_personas, guardar_proyeccion_en_neo4j, MAX_PERSONAS_NUNC,
+                                        PESOS_CALIDAD_VINCULO, SNAPSHOT_PROYECCION)
+from dashboard.utils_snapshots import cargar_snapshot, guardar_snapshot
+
+
+class Command(BaseCommand):
+    help = ('Proyecta la red NUNC-Persona de un snapshot sobre las personas (personas que aparecen juntas '
+            'en una NUNC), la guarda como snapshot y como relaciones COAPARECE_CON en Neo4j')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nombre',
+            default='consolidado',
+            help='Nombre del snapshot de la red a proyectar (default: consolidado)',
+        )
+        parser.add_argument(
+            '--numero-version',
+            type=int,
+            help='Versión del snapshot (por defecto la más reciente)',
+        )
+        parser.add_argument(
+            '--max-personas-nunc',
+            type=int,
+            default=MAX_PERSONAS_NUNC,
+            help=f'Omitir las NUNC con más personas que esto; 0 sin límite (default: {MAX_PERSONAS_NUNC})',
+        )
+        parser.add_argument(
+            '--minimo-nuncs',
+            type=int,
+            default=1,
+            help='Mínimo de NUNC compartidas para enlazar dos personas (default: 1)',
+        )
+        parser.add_argument(
+            '--ponderar-calidad',
+            action='store_true',
+            help='Ponderar los enlaces por la calidad de vínculo (PESOS_CALIDAD_VINCULO) además de contar NUNC',
+        )
+        parser.add_argument(
+            '--sin-neo4j',
+            action='store_true',
+            help='Solo guardar el snapshot de la proyección, sin escribir las relaciones en Neo4j',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Tamaño del lote para operaciones en Neo4j (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        nombre = options['nombre']
+        sin_neo4j = options['sin_neo4j']
+        parametros = {clave: options[clave] for clave in (
+            'nombre', 'numero_version', 'max_personas_nunc', 'minimo_nuncs', 'ponderar_calidad', 'sin_neo4j',
+            'batch_size'
+        )}
+        with registrar_ejecucion('proyectar_personas', 'red', None, parametros,
+                                 modifica_datos=not sin_neo4j) as ejecucion:
+            with medir_etapa(ejecucion, 'lectura_red'):
+                try:
+                    G, manifiesto = cargar_snapshot(nombre, options['numero_version'])
+                except FileNotFoundError as e:
+                    raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"Snapshot {nombre} v{manifiesto['version']} cargado con {G.number_of_nodes()} nodos "
+                f"y {G.number_of_edges()} enlaces"
+            ))
+
+            with medir_etapa(ejecucion, 'proyeccion'):
+                H, resumen = proyectar_personas(
+                    G, max_personas_nunc=options['max_personas_nunc'], minimo_nuncs=options['minimo_nuncs'],
+                    pesos_calidad=PESOS_CALIDAD_VINCULO if options['ponderar_calidad'] else None,
+                )
+            with medir_etapa(ejecucion, 'snapshot'):
+                snapshot = guardar_snapshot(H, SNAPSHOT_PROYECCION, ejecucion)
+            if not sin_neo4j:
+                with medir_etapa(ejecucion, 'neo4j'):
+                    guardar_proyeccion_en_neo4j(H, batch_size=options['batch_size'])
+
+            ejecucion.filas_cargadas = H.number_of_edges()
+            ejecucion.resumen = {
+                'proyeccion': resumen,
+                'snapshot': {'nombre': SNAPSHOT_PROYECCION, 'version': snapshot['version'],
+                             'red': {'nombre': nombre, 'version': manifiesto['version']}},
+            }
+            self.stdout.write(self.style.SUCCESS(
+                f"Proyección con {resumen['personas']} personas y {resumen['enlaces']} enlaces guardada en el "
+                f"snapshot {SNAPSHOT_PROYECCION} v{snapshot['version']}"
+            ))
+            if resumen['nuncs_hub']:
+                self.stdout.write(self.style.WARNING(
+                    f"Se omitieron {resumen['nuncs_hub']} NUNC con más de {options['max_personas_nunc']} personas "
+                    f"({resumen['pares_omitidos']} pares)"
+                ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from dashboard.utils_personas import recalcular_banderas_personas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las banderas de PersonasDf a partir de ConsolidadoSpoa, el RUD y Funcionario'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--documentos',
+            type=str,
+            help='Documentos a recalcular separados por coma (por defecto todos)',
+        )
+        
+        parser.add_argument(
+            '--sin-crear',
+            action='store_true',
+            help='No crear las personas de ConsolidadoSpoa que no existen en PersonasDf',
+        )
+
+    def handle(self, *args, **options):
+        documentos = None
+        if options['documentos']:
+            documentos = [documento.strip() for documento in options['documentos'].split(',') if documento.strip()]
+        
+        self.stdout.write(self.style.WARNING('Recalculando banderas de PersonasDf...'))
+        resumen = recalcular_banderas_personas(documentos, crear_faltantes=not options['sin_crear'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['creadas']} personas creadas, {resumen['actualizadas']} con banderas actualizadas"
+        ))
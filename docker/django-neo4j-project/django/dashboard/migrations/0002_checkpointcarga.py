@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckpointCarga',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(max_length=500)),
+                ('modelo', models.CharField(max_length=100)),
+                ('tamano_archivo', models.BigIntegerField()),
+                ('fecha_modificacion_archivo', models.FloatField()),
+                ('chunksize', models.IntegerField()),
+                ('chunks_cargados', models.IntegerField(default=0)),
+                ('filas_cargadas', models.BigIntegerField(default=0)),
+                ('completado', models.BooleanField(default=False)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de Carga',
+                'verbose_name_plural': 'Checkpoints de Carga',
+                'unique_together': {('archivo', 'modelo')},
+            },
+        ),
+    ]
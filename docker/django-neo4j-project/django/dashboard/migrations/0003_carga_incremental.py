@@ -0,0 +1,63 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_checkpointcarga'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aparecidosvivosnoregistrados',
+            name='ausente_extracto',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='aparecidosvivosnoregistrados',
+            name='hash_contenido',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='ausente_extracto',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='hash_contenido',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='funcionario',
+            name='ausente_extracto',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='funcionario',
+            name='hash_contenido',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='personasdf',
+            name='ausente_extracto',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='personasdf',
+            name='hash_contenido',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='registrounicodesaparecidos',
+            name='ausente_extracto',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='registrounicodesaparecidos',
+            name='hash_contenido',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
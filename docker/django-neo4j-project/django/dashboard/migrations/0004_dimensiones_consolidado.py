@@ -0,0 +1,263 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+DIMENSIONES = {
+    'seccional': 'Seccional',
+    'unidad': 'Unidad',
+    'despacho': 'Despacho',
+    'fuente': 'Fuente',
+    'delito': 'Delito',
+    'grupo_delito': 'GrupoDelito',
+    'necropsia': 'Necropsia',
+    'etapa': 'Etapa',
+    'estado': 'Estado',
+}
+
+
+def _verificar_llaves(schema_editor):
+    # PostgreSQL no permite ALTER TABLE con verificaciones de llaves foráneas pendientes
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+def poblar_dimensiones(apps, schema_editor):
+    """
+    Crea una fila de dimensión por cada texto distinto y apunta las llaves
+    foráneas a ella con un UPDATE por columna
+    """
+    ConsolidadoSpoa = apps.get_model('dashboard', 'ConsolidadoSpoa')
+    for campo, nombre_modelo in DIMENSIONES.items():
+        Dimension = apps.get_model('dashboard', nombre_modelo)
+        nombres = (ConsolidadoSpoa.objects.filter(**{f"{campo}__isnull": False})
+                   .values_list(campo, flat=True).distinct())
+        Dimension.objects.bulk_create([Dimension(nombre=nombre) for nombre in nombres.iterator()],
+                                      batch_size=5000, ignore_conflicts=True)
+        ConsolidadoSpoa.objects.update(**{
+            f"{campo}_dim": Subquery(Dimension.objects.filter(nombre=OuterRef(campo)).values('pk')[:1])
+        })
+    _verificar_llaves(schema_editor)
+
+
+def restaurar_textos(apps, schema_editor):
+    ConsolidadoSpoa = apps.get_model('dashboard', 'ConsolidadoSpoa')
+    for campo, nombre_modelo in DIMENSIONES.items():
+        Dimension = apps.get_model('dashboard', nombre_modelo)
+        ConsolidadoSpoa.objects.update(**{
+            campo: Subquery(Dimension.objects.filter(pk=OuterRef(f"{campo}_dim")).values('nombre')[:1])
+        })
+    _verificar_llaves(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_carga_incremental'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Delito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Despacho',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Estado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Etapa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Fuente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='GrupoDelito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Grupo de delito',
+                'verbose_name_plural': 'Grupos de delito',
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Necropsia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Seccional',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Seccionales',
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Unidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=500, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Unidades',
+                'ordering': ['nombre'],
+                'abstract': False,
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='consolidadospoa',
+            name='dashboard_c_seccion_41b1b6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='consolidadospoa',
+            name='dashboard_c_unidad_1c1283_idx',
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='delito_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.delito'),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='despacho_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.despacho'),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='estado_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.estado'),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='etapa_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.etapa'),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='fuente_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.fuente'),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='grupo_delito_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.grupodelito'),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='necropsia_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.necropsia'),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='seccional_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.seccional'),
+        ),
+        migrations.AddField(
+            model_name='consolidadospoa',
+            name='unidad_dim',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='dashboard.unidad'),
+        ),
+        migrations.RunPython(poblar_dimensiones, restaurar_textos),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='delito',
+        ),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='despacho',
+        ),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='estado',
+        ),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='etapa',
+        ),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='fuente',
+        ),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='grupo_delito',
+        ),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='necropsia',
+        ),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='seccional',
+        ),
+        migrations.RemoveField(
+            model_name='consolidadospoa',
+            name='unidad',
+        ),
+        migrations.AddIndex(
+            model_name='consolidadospoa',
+            index=models.Index(fields=['seccional_dim'], name='dashboard_c_seccion_a27fca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consolidadospoa',
+            index=models.Index(fields=['unidad_dim'], name='dashboard_c_unidad__78c5de_idx'),
+        ),
+    ]
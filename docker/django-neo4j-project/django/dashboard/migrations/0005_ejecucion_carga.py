@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_dimensiones_consolidado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionCarga',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comando', models.CharField(max_length=100)),
+                ('conjunto', models.CharField(max_length=100)),
+                ('archivo', models.CharField(blank=True, max_length=500)),
+                ('tamano_archivo', models.BigIntegerField(blank=True, null=True)),
+                ('checksum_archivo', models.CharField(blank=True, max_length=64)),
+                ('estado', models.CharField(choices=[('en_curso', 'En curso'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='en_curso', max_length=20)),
+                ('filas_leidas', models.BigIntegerField(blank=True, null=True)),
+                ('filas_cargadas', models.BigIntegerField(blank=True, null=True)),
+                ('filas_rechazadas', models.BigIntegerField(blank=True, null=True)),
+                ('etapas', models.JSONField(blank=True, default=dict)),
+                ('duracion', models.FloatField(blank=True, null=True)),
+                ('filas_por_segundo', models.FloatField(blank=True, null=True)),
+                ('rss_pico_mb', models.FloatField(blank=True, null=True)),
+                ('version_datos', models.PositiveBigIntegerField(blank=True, null=True, unique=True)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('resumen', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_inicio', models.DateTimeField(auto_now_add=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Ejecución de Carga',
+                'verbose_name_plural': 'Ejecuciones de Carga',
+                'ordering': ['-fecha_inicio'],
+                'indexes': [models.Index(fields=['conjunto', 'fecha_inicio'], name='dashboard_e_conjunt_6ab9f2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_ejecucion_carga'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioComponente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('componente_anterior', models.BigIntegerField(blank=True, null=True)),
+                ('componente_nueva', models.BigIntegerField(blank=True, null=True)),
+                ('tipo', models.CharField(choices=[('modificada', 'Modificada'), ('renombrada', 'Renombrada'), ('fusion', 'Fusión'), ('division', 'División'), ('reorganizada', 'Fusión y división'), ('nueva', 'Nueva'), ('eliminada', 'Eliminada')], max_length=20)),
+                ('nodos_compartidos', models.BigIntegerField(default=0)),
+                ('tamano_anterior', models.BigIntegerField(blank=True, null=True)),
+                ('tamano_nuevo', models.BigIntegerField(blank=True, null=True)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('ejecucion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cambios_componentes', to='dashboard.ejecucioncarga')),
+            ],
+            options={
+                'verbose_name': 'Cambio de Componente',
+                'verbose_name_plural': 'Cambios de Componentes',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['componente_anterior'], name='dashboard_c_compone_a1749a_idx'), models.Index(fields=['componente_nueva'], name='dashboard_c_compone_8d5e44_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_cambio_componente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaComponente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('componente_id', models.BigIntegerField(unique=True)),
+                ('componente', models.IntegerField()),
+                ('tamano', models.BigIntegerField()),
+                ('nodos_nunc', models.BigIntegerField(default=0)),
+                ('nodos_persona', models.BigIntegerField(default=0)),
+                ('enlaces', models.BigIntegerField(default=0)),
+                ('densidad', models.FloatField(default=0)),
+                ('diametro', models.IntegerField(blank=True, null=True)),
+                ('diametro_exacto', models.BooleanField(default=True)),
+                ('top_nodos', models.JSONField(blank=True, default=list)),
+                ('fecha', models.DateTimeField(auto_now=True)),
+                ('ejecucion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='estadisticas_componentes', to='dashboard.ejecucioncarga')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Componente',
+                'verbose_name_plural': 'Estadísticas de Componentes',
+                'ordering': ['componente'],
+                'indexes': [models.Index(fields=['componente'], name='dashboard_e_compone_0b5903_idx'), models.Index(fields=['tamano'], name='dashboard_e_tamano_6a51fa_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_estadistica_componente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaComunidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comunidad', models.IntegerField(unique=True)),
+                ('componente_id', models.BigIntegerField()),
+                ('tamano', models.BigIntegerField()),
+                ('nodos_nunc', models.BigIntegerField(default=0)),
+                ('nodos_persona', models.BigIntegerField(default=0)),
+                ('enlaces_internos', models.BigIntegerField(default=0)),
+                ('enlaces_externos', models.BigIntegerField(default=0)),
+                ('densidad', models.FloatField(default=0)),
+                ('top_nodos', models.JSONField(blank=True, default=list)),
+                ('fecha', models.DateTimeField(auto_now=True)),
+                ('ejecucion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='estadisticas_comunidades', to='dashboard.ejecucioncarga')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Comunidad',
+                'verbose_name_plural': 'Estadísticas de Comunidades',
+                'ordering': ['comunidad'],
+                'indexes': [models.Index(fields=['componente_id'], name='dashboard_e_compone_971b91_idx'), models.Index(fields=['tamano'], name='dashboard_e_tamano_79f582_idx')],
+            },
+        ),
+    ]
@@ -2,6 +2,131 @@ from django.db import models
 
 # Create your models here
 
+class Dimension(models.Model):
+    """
+    Modelo base de las tablas de dimensión (valores de texto repetidos de ConsolidadoSpoa)
+    """
+    nombre = models.CharField(max_length=500, unique=True)
+    
+    class Meta:
+        abstract = True
+        ordering = ['nombre']
+        
+    def __str__(self):
+        return self.nombre
+
+
+class Seccional(Dimension):
+    class Meta(Dimension.Meta):
+        verbose_name_plural = "Seccionales"
+
+
+class Unidad(Dimension):
+    class Meta(Dimension.Meta):
+        verbose_name_plural = "Unidades"
+
+
+class Despacho(Dimension):
+    pass
+
+
+class Fuente(Dimension):
+    pass
+
+
+class Delito(Dimension):
+    pass
+
+
+class GrupoDelito(Dimension):
+    class Meta(Dimension.Meta):
+        verbose_name = "Grupo de delito"
+        verbose_name_plural = "Grupos de delito"
+
+
+class Necropsia(Dimension):
+    pass
+
+
+class Etapa(Dimension):
+    pass
+
+
+class Estado(Dimension):
+    pass
+
+
+# Campos de ConsolidadoSpoa normalizados en tablas de dimensión: campo -> modelo.
+# Cada uno se guarda en la llave foránea <campo>_dim y se lee con la propiedad <campo>.
+DIMENSIONES_CONSOLIDADO = {
+    'seccional': Seccional,
+    'unidad': Unidad,
+    'despacho': Despacho,
+    'fuente': Fuente,
+    'delito': Delito,
+    'grupo_delito': GrupoDelito,
+    'necropsia': Necropsia,
+    'etapa': Etapa,
+    'estado': Estado,
+}
+
+
+def _nombre_dimension(campo):
+    """
+    Propiedad de solo lectura que devuelve el texto de la dimensión,
+    igual que el antiguo CharField
+    """
+    def obtener(self):
+        dimension = getattr(self, f"{campo}_dim")
+        return dimension.nombre if dimension is not None else None
+    return property(obtener)
+
+
+def _llave_dimension(modelo):
+    # El índice se declara en Meta.indexes (solo para las dimensiones filtradas)
+    return models.ForeignKey(modelo, on_delete=models.PROTECT, null=True, blank=True,
+                             db_index=False, related_name='+')
+
+
+class ConsolidadoSpoaQuerySet(models.QuerySet):
+    def con_dimensiones(self):
+        """
+        Trae las dimensiones en la misma consulta para leer seccional, unidad, etc. sin consultas extra
+        """
+        return self.select_related(*(f"{campo}_dim" for campo in DIMENSIONES_CONSOLIDADO))
+    
+    def filtrar_dimension(self, campo, nombre):
+        """
+        Filtra por el texto de una dimensión, ej. filtrar_dimension('fuente', 'SPOA')
+        """
+        return self.filter(**{f"{campo}_dim__nombre": nombre})
+    
+    def distribucion(self, campo, excluir_vacios=False):
+        """
+        Cuenta los registros por valor de una dimensión.
+        
+        La agrupación se hace sobre la llave entera y los nombres se resuelven
+        después con una consulta a la tabla de dimensión.
+        
+        Args:
+            campo: Campo de DIMENSIONES_CONSOLIDADO (ej. 'seccional')
+            excluir_vacios: Omitir los registros sin valor o con texto vacío
+            
+        Returns:
+            list: Diccionarios {campo: nombre, 'cantidad': n} ordenados de mayor a menor
+        """
+        llave = f"{campo}_dim"
+        consulta = self
+        if excluir_vacios:
+            consulta = consulta.filter(**{f"{llave}__isnull": False}).exclude(**{f"{llave}__nombre": ''})
+        conteos = list(consulta.values(llave).annotate(cantidad=models.Count(llave)).order_by('-cantidad'))
+        
+        nombres = dict(DIMENSIONES_CONSOLIDADO[campo].objects
+                       .filter(pk__in=[fila[llave] for fila in conteos if fila[llave] is not None])
+                       .values_list('pk', 'nombre'))
+        return [{campo: nombres.get(fila[llave]), 'cantidad': fila['cantidad']} for fila in conteos]
+
+
 class ConsolidadoSpoa(models.Model):
     """
     Modelo para almacenar los datos consolidados del SPOA
@@ -10,19 +135,35 @@ class ConsolidadoSpoa(models.Model):
     nunc = models.CharField(max_length=200)  # Aumentado de 100 a 200
     fecha_hechos = models.DateField(null=True, blank=True)
     fecha_denuncia = models.DateField(null=True, blank=True)
-    seccional = models.CharField(max_length=200, null=True, blank=True)  # Aumentado de 100 a 200
-    unidad = models.CharField(max_length=300, null=True, blank=True)  # Aumentado de 100 a 300
-    despacho = models.CharField(max_length=500, null=True, blank=True)  # Aumentado de 200 a 500
+    seccional_dim = _llave_dimension(Seccional)
+    unidad_dim = _llave_dimension(Unidad)
+    despacho_dim = _llave_dimension(Despacho)
     numero_documento = models.CharField(max_length=100, null=True, blank=True)  # Aumentado de 50 a 100
     nombre_completo = models.CharField(max_length=300, null=True, blank=True)  # Aumentado de 200 a 300
     relato = models.TextField(null=True, blank=True)  # TextField no tiene límite
-    delito = models.CharField(max_length=500, null=True, blank=True)  # Aumentado de 200 a 500
-    grupo_delito = models.CharField(max_length=300, null=True, blank=True)  # Aumentado de 200 a 300
-    necropsia = models.CharField(max_length=200, null=True, blank=True)  # Aumentado de 100 a 200
-    fuente = models.CharField(max_length=200, null=True, blank=True)  # Aumentado de 100 a 200
+    delito_dim = _llave_dimension(Delito)
+    grupo_delito_dim = _llave_dimension(GrupoDelito)
+    necropsia_dim = _llave_dimension(Necropsia)
+    fuente_dim = _llave_dimension(Fuente)
     calidad_vinculado = models.CharField(max_length=200, null=True, blank=True)  # Aumentado de 100 a 200
-    etapa = models.CharField(max_length=200, null=True, blank=True)  # Aumentado de 100 a 200
-    estado = models.CharField(max_length=200, null=True, blank=True)  # Aumentado de 100 a 200
+    etapa_dim = _llave_dimension(Etapa)
+    estado_dim = _llave_dimension(Estado)
+    # Control de cargas incrementales (cargar_datos --delta)
+    hash_contenido = models.BigIntegerField(null=True, blank=True)  # Hash de la fila de origen
+    ausente_extracto = models.BooleanField(default=False)  # No apareció en el último extracto
+    
+    # Texto de las dimensiones (compatibilidad con los antiguos CharField)
+    seccional = _nombre_dimension('seccional')
+    unidad = _nombre_dimension('unidad')
+    despacho = _nombre_dimension('despacho')
+    delito = _nombre_dimension('delito')
+    grupo_delito = _nombre_dimension('grupo_delito')
+    necropsia = _nombre_dimension('necropsia')
+    fuente = _nombre_dimension('fuente')
+    etapa = _nombre_dimension('etapa')
+    estado = _nombre_dimension('estado')
+    
+    objects = ConsolidadoSpoaQuerySet.as_manager()
     
     class Meta:
         verbose_name = "Consolidado SPOA"
@@ -34,8 +175,8 @@ class ConsolidadoSpoa(models.Model):
             models.Index(fields=['nunc']),
             models.Index(fields=['numero_documento']),
             models.Index(fields=['fecha_hechos']),
-            models.Index(fields=['seccional']),
-            models.Index(fields=['unidad']),
+            models.Index(fields=['seccional_dim']),
+            models.Index(fields=['unidad_dim']),
         ]
         
     def __str__(self):
@@ -59,6 +200,9 @@ class PersonasDf(models.Model):
     rud_vivo = models.BooleanField(default=False)          # 2.0
     rud_muerto = models.BooleanField(default=False)        # 3.0
     funcionario_FGN = models.BooleanField(default=False)  # Nuevo campo para relacionar si la persona es funcionario de la FGN.
+    # Control de cargas incrementales (cargar_datos --delta)
+    hash_contenido = models.BigIntegerField(null=True, blank=True)  # Hash de la fila de origen
+    ausente_extracto = models.BooleanField(default=False)  # No apareció en el último extracto
     
     class Meta:
         verbose_name = "Persona"
@@ -79,6 +223,9 @@ class Funcionario(models.Model):
     estado = models.CharField(max_length=50, null=True, blank=True)
     fuente = models.CharField(max_length=100, null=True, blank=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    # Control de cargas incrementales (cargar_datos --delta)
+    hash_contenido = models.BigIntegerField(null=True, blank=True)  # Hash de la fila de origen
+    ausente_extracto = models.BooleanField(default=False)  # No apareció en el último extracto
     
     class Meta:
         verbose_name = "Funcionario"
@@ -111,6 +258,9 @@ class RegistroUnicoDesaparecidos(models.Model):
         ("3.0", "Muerto"),
     ])
     senales_particulares = models.TextField(null=True, blank=True)
+    # Control de cargas incrementales (cargar_datos --delta)
+    hash_contenido = models.BigIntegerField(null=True, blank=True)  # Hash de la fila de origen
+    ausente_extracto = models.BooleanField(default=False)  # No apareció en el último extracto
     
     class Meta:
         verbose_name = "Registro Unico de Desaparecidos"
@@ -165,10 +315,184 @@ class AparecidosVivosNoRegistrados(models.Model):
     detalleDireccionAportanteDatos = models.TextField(null=True, blank=True)
     aportanteDatos = models.CharField(max_length=200, null=True, blank=True)
     fecha_registro = models.DateTimeField(auto_now_add=True) # Esta es para tener conocimiento de carga 
+    # Control de cargas incrementales (cargar_datos --delta)
+    hash_contenido = models.BigIntegerField(null=True, blank=True)  # Hash de la fila de origen
+    ausente_extracto = models.BooleanField(default=False)  # No apareció en el último extracto
     
     class Meta:
         verbose_name = "Aparecido Vivo No Registrado"
         verbose_name_plural = "Aparecidos Vivos No Registrados"
         
     def __str__(self):
-        return f"{self.numeroRadicado} - {self.desaparecido}"
\ No newline at end of file
+        return f"{self.numeroRadicado} - {self.desaparecido}"
+
+class CheckpointCarga(models.Model):
+    """
+    Modelo para registrar el avance de las cargas por chunks y poder reanudarlas
+    """
+    archivo = models.CharField(max_length=500)
+    modelo = models.CharField(max_length=100)
+    tamano_archivo = models.BigIntegerField()  # Permite detectar si el archivo cambió
+    fecha_modificacion_archivo = models.FloatField()
+    chunksize = models.IntegerField()
+    chunks_cargados = models.IntegerField(default=0)  # Índice del siguiente chunk a cargar
+    filas_cargadas = models.BigIntegerField(default=0)
+    completado = models.BooleanField(default=False)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Checkpoint de Carga"
+        verbose_name_plural = "Checkpoints de Carga"
+        unique_together = ('archivo', 'modelo')
+        
+    def __str__(self):
+        return f"{self.modelo} - {self.archivo} (chunk {self.chunks_cargados})"
+
+
+class EjecucionCarga(models.Model):
+    """
+    Registro de cada ejecución de carga de datos o de construcción de la red:
+    archivo de origen, filas, duración por etapa, memoria y versión de datos
+    """
+    ESTADOS = [
+        ('en_curso', 'En curso'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    ]
+    
+    comando = models.CharField(max_length=100)  # cargar_datos, crear_red_neo4j, ...
+    conjunto = models.CharField(max_length=100)  # consolidado, personas, red, ...
+    archivo = models.CharField(max_length=500, blank=True)
+    tamano_archivo = models.BigIntegerField(null=True, blank=True)
+    checksum_archivo = models.CharField(max_length=64, blank=True)  # SHA-256 del archivo de origen
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='en_curso')
+    filas_leidas = models.BigIntegerField(null=True, blank=True)
+    filas_cargadas = models.BigIntegerField(null=True, blank=True)
+    filas_rechazadas = models.BigIntegerField(null=True, blank=True)  # Duplicados o conflictos no insertados
+    etapas = models.JSONField(default=dict, blank=True)  # Etapa -> segundos
+    duracion = models.FloatField(null=True, blank=True)  # Segundos
+    filas_por_segundo = models.FloatField(null=True, blank=True)
+    rss_pico_mb = models.FloatField(null=True, blank=True)
+    # Aumenta con cada ejecución completada que modifica datos; sirve para invalidar cachés
+    version_datos = models.PositiveBigIntegerField(null=True, blank=True, unique=True)
+    parametros = models.JSONField(default=dict, blank=True)
+    resumen = models.JSONField(default=dict, blank=True)  # Conteos adicionales (delta, nodos, enlaces, ...)
+    error = models.TextField(blank=True)
+    fecha_inicio = models.DateTimeField(auto_now_add=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Ejecución de Carga"
+        verbose_name_plural = "Ejecuciones de Carga"
+        ordering = ['-fecha_inicio']
+        indexes = [
+            models.Index(fields=['conjunto', 'fecha_inicio']),
+        ]
+        
+    def __str__(self):
+        return f"{self.comando} - {self.conjunto} ({self.estado}, {self.fecha_inicio:%Y-%m-%d %H:%M})"
+
+
+class CambioComponente(models.Model):
+    """
+    Correspondencia entre los identificadores de componente de la red anterior y
+    los de la red reconstruida. Solo se registran las componentes que cambiaron:
+    las cachés indexadas por componente_id deben invalidar las que aparecen aquí
+    para la ejecución y pueden conservar el resto.
+    """
+    TIPOS = [
+        ('modificada', 'Modificada'),  # Mismo identificador, ganó o perdió nodos
+        ('renombrada', 'Renombrada'),  # Cambió el menor miembro y con él el identificador
+        ('fusion', 'Fusión'),  # Varias componentes anteriores quedaron en una
+        ('division', 'División'),  # Una componente anterior quedó repartida en varias
+        ('reorganizada', 'Fusión y división'),
+        ('nueva', 'Nueva'),
+        ('eliminada', 'Eliminada'),
+    ]
+    
+    ejecucion = models.ForeignKey(EjecucionCarga, on_delete=models.CASCADE, null=True, blank=True,
+                                  related_name='cambios_componentes')
+    componente_anterior = models.BigIntegerField(null=True, blank=True)  # None en las nuevas
+    componente_nueva = models.BigIntegerField(null=True, blank=True)  # None en las eliminadas
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    nodos_compartidos = models.BigIntegerField(default=0)
+    tamano_anterior = models.BigIntegerField(null=True, blank=True)
+    tamano_nuevo = models.BigIntegerField(null=True, blank=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Cambio de Componente"
+        verbose_name_plural = "Cambios de Componentes"
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['componente_anterior']),
+            models.Index(fields=['componente_nueva']),
+        ]
+        
+    def __str__(self):
+        return f"{self.componente_anterior} -> {self.componente_nueva} ({self.tipo})"
+
+
+class EstadisticaComponente(models.Model):
+    """
+    Resumen de cada componente conectada de la red actual, calculado al
+    construirla o actualizarla (ver dashboard.utils_componentes): la interfaz
+    de redes y los tableros lo leen en lugar de recorrer la componente en Neo4j.
+    """
+    ejecucion = models.ForeignKey(EjecucionCarga, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='estadisticas_componentes')
+    componente_id = models.BigIntegerField(unique=True)  # Identificador estable (ver identificadores_componente)
+    componente = models.IntegerField()  # Número por tamaño: 0 es la más grande
+    tamano = models.BigIntegerField()
+    nodos_nunc = models.BigIntegerField(default=0)
+    nodos_persona = models.BigIntegerField(default=0)
+    enlaces = models.BigIntegerField(default=0)
+    densidad = models.FloatField(default=0)
+    diametro = models.IntegerField(null=True, blank=True)
+    diametro_exacto = models.BooleanField(default=True)  # False: cota inferior (componentes grandes)
+    top_nodos = models.JSONField(default=list, blank=True)  # Nodos de mayor grado: [{id, tipo, grado}, ...]
+    fecha = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Estadística de Componente"
+        verbose_name_plural = "Estadísticas de Componentes"
+        ordering = ['componente']
+        indexes = [
+            models.Index(fields=['componente']),
+            models.Index(fields=['tamano']),
+        ]
+        
+    def __str__(self):
+        return f"Componente {self.componente} ({self.tamano} nodos)"
+
+
+class EstadisticaComunidad(models.Model):
+    """
+    Resumen de cada comunidad de la red (ver dashboard.utils_comunidades):
+    subconjuntos densos dentro de una componente, que la interfaz de redes usa
+    para mostrar un vecindario acotado en lugar de una componente gigante.
+    """
+    ejecucion = models.ForeignKey(EjecucionCarga, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='estadisticas_comunidades')
+    comunidad = models.IntegerField(unique=True)  # Número por tamaño: 0 es la más grande
+    componente_id = models.BigIntegerField()  # Componente que la contiene
+    tamano = models.BigIntegerField()
+    nodos_nunc = models.BigIntegerField(default=0)
+    nodos_persona = models.BigIntegerField(default=0)
+    enlaces_internos = models.BigIntegerField(default=0)
+    enlaces_externos = models.BigIntegerField(default=0)  # Enlaces hacia otras comunidades
+    densidad = models.FloatField(default=0)
+    top_nodos = models.JSONField(default=list, blank=True)  # Nodos de mayor grado: [{id, tipo, grado}, ...]
+    fecha = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Estadística de Comunidad"
+        verbose_name_plural = "Estadísticas de Comunidades"
+        ordering = ['comunidad']
+        indexes = [
+            models.Index(fields=['componente_id']),
+            models.Index(fields=['tamano']),
+        ]
+        
+    def __str__(self):
+        return f"Comunidad {self.comunidad} ({self.tamano} nodos)"
@@ -1,3 +1,502 @@
-from django.test import TestCase
+import contextlib
+import datetime
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+import networkx as nx
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+from .benchmark.ejecutor import ETAPAS, medir_carga
+from .models import ConsolidadoSpoa, RegistroUnicoDesaparecidos
+from .utils_archivos import convertir_a_parquet, es_cache_tipada, leer_por_chunks
+from .utils_centralidad import calcular_centralidad, diametros_componentes, tamano_muestra
+from .utils_grafo import (GrafoCompacto, arreglos_desde_networkx, calcular_grados, etiquetar_componentes,
+                          identificadores_componente)
+from .utils_comunidades import detectar_comunidades, estadisticas_comunidades, heredar_comunidades
+from .utils_json import iterar_objeto_json
+from .utils_proyeccion import PESOS_CALIDAD_VINCULO, proyectar_personas
+from .utils_snapshots import cargar_snapshot, guardar_snapshot
+from .utils import (ARCHIVOS_DATOS, COLUMNAS_RUD, CLAVES_DELTA, transformar_chunk, tipos_columnas_archivo,
+                    _hash_filas, _buscar_existentes)
 
-# Create your tests here.
+
+def _leer(texto):
+    return pd.read_csv(io.StringIO(texto), sep='|')
+
+
+class HashFilasTests(SimpleTestCase):
+    def _hash_rud(self, chunk):
+        frame = transformar_chunk(chunk, COLUMNAS_RUD, modelo=RegistroUnicoDesaparecidos)
+        return dict(zip(frame['numero_radicado'], _hash_filas(frame)))
+
+    def test_misma_fila_con_distinto_dtype_en_el_chunk(self):
+        # Con un nulo en otra fila pandas lee edad_1 como float64 (34.0); sin él, como int64
+        con_nulo = _leer("numero_radicado|nombre_completo|edad_1\nA1|JUAN|34\nA2|PEDRO|\n")
+        sin_nulo = _leer("numero_radicado|nombre_completo|edad_1\nA1|JUAN|34\nA3|ANA|20\n")
+        self.assertEqual(con_nulo['edad_1'].dtype, 'float64')
+        self.assertEqual(sin_nulo['edad_1'].dtype, 'int64')
+
+        self.assertEqual(self._hash_rud(con_nulo)['A1'], self._hash_rud(sin_nulo)['A1'])
+
+    def test_cambio_de_contenido_cambia_el_hash(self):
+        antes = _leer("numero_radicado|nombre_completo|edad_1\nA1|JUAN|34\n")
+        despues = _leer("numero_radicado|nombre_completo|edad_1\nA1|JUAN|35\n")
+        self.assertNotEqual(self._hash_rud(antes)['A1'], self._hash_rud(despues)['A1'])
+
+    def test_nulo_distinto_de_cero_y_de_texto_vacio(self):
+        frame = pd.DataFrame({'a': [None, 0, '']}, dtype=object)
+        self.assertEqual(len(set(_hash_filas(frame))), 3)
+
+
+class BuscarExistentesTests(SimpleTestCase):
+    def _buscar(self, claves, filas_bd):
+        with mock.patch.object(ConsolidadoSpoa, 'objects') as objects:
+            objects.filter.return_value.values_list.return_value = filas_bd
+            existentes = _buscar_existentes(ConsolidadoSpoa, CLAVES_DELTA[ConsolidadoSpoa], claves)
+        return objects.filter.call_args.args[0], existentes
+
+    def test_clave_con_primer_campo_nulo_se_busca_con_isnull(self):
+        claves = pd.DataFrame({'nunc': [None, 'N1'], 'numero_documento': ['D1', 'D2'],
+                               'delito': ['HURTO', 'HURTO']}, dtype=object)
+        consulta, _ = self._buscar(claves, [])
+        self.assertIn(('nunc__isnull', True), consulta.children)
+        self.assertIn(('nunc__in', ['N1']), consulta.children)
+
+    def test_sin_nulos_no_se_buscan_nulos(self):
+        claves = pd.DataFrame({'nunc': ['N1'], 'numero_documento': ['D1'], 'delito': ['HURTO']}, dtype=object)
+        consulta, _ = self._buscar(claves, [])
+        self.assertNotIn(('nunc__isnull', True), consulta.children)
+
+    def test_fila_existente_con_nulo_empareja_con_la_del_chunk(self):
+        clave = list(CLAVES_DELTA[ConsolidadoSpoa])
+        claves = pd.DataFrame({'nunc': [float('nan')], 'numero_documento': ['D1'], 'delito': [None]},
+                              dtype=object)
+        _, existentes = self._buscar(claves, [(None, 'D1', None, 7, 123, False)])
+        comparacion = claves.merge(existentes, on=clave, how='left')
+        self.assertEqual(comparacion.loc[0, 'pk_existente'], 7)
+
+
+class IterarObjetoJsonTests(SimpleTestCase):
+    TEXTO = (
+        '{"a": 1.5, "b": -12.25e-3, "c": 10, "d": 1E+2, "e": [0.125, 7, {"f": null}],\n'
+        ' "g": "ca\\u00f1a \\"x\\"", "h": true, "i": {}, "j": 3}'
+    )
+
+    def _archivo(self, texto):
+        archivo = tempfile.NamedTemporaryFile('w', suffix='.json', encoding='utf-8', delete=False)
+        with archivo:
+            archivo.write(texto)
+        self.addCleanup(os.remove, archivo.name)
+        return archivo.name
+
+    def test_bloques_pequenos_igual_que_json_load(self):
+        ruta = self._archivo(self.TEXTO)
+        with open(ruta, encoding='utf-8') as archivo:
+            esperado = list(json.load(archivo).items())
+        for tamano_bloque in range(1, 8):
+            with self.subTest(tamano_bloque=tamano_bloque):
+                self.assertEqual(list(iterar_objeto_json(ruta, tamano_bloque=tamano_bloque)), esperado)
+
+    def test_numero_cortado_en_el_punto(self):
+        # Con bloques de 8 caracteres el primer bloque termina justo en '1.'
+        ruta = self._archivo('{"a": 1.5}')
+        self.assertEqual(list(iterar_objeto_json(ruta, tamano_bloque=8)), [('a', 1.5)])
+
+    def test_objeto_vacio(self):
+        ruta = self._archivo(' {} \n')
+        self.assertEqual(list(iterar_objeto_json(ruta, tamano_bloque=1)), [])
+
+    def test_texto_despues_del_objeto(self):
+        ruta = self._archivo('{"a": 1} x')
+        with self.assertRaises(ValueError):
+            list(iterar_objeto_json(ruta, tamano_bloque=2))
+
+
+class MedirCargaTests(SimpleTestCase):
+    def test_etapas_de_la_carga(self):
+        # El benchmark reporta las etapas que registra la propia carga (las de EjecucionCarga)
+        etapas = {'lectura': 0.5, 'transformacion': 1.0, 'insercion': 2.0, 'delta': 3.0}
+
+        def cargar(ruta_archivo, modo, metricas, delta):
+            metricas.update({'filas_leidas': 7, 'etapas': dict(etapas)})
+            return {'insertados': 4, 'actualizados': 1}
+
+        with tempfile.TemporaryDirectory() as carpeta:
+            ruta = os.path.join(carpeta, ARCHIVOS_DATOS['rud'])
+            with open(ruta, 'w') as f:
+                f.write('numero_radicado\n')
+            with mock.patch('dashboard.utils.cargar_rud', side_effect=cargar):
+                medicion = medir_carga('rud', ruta, diferir_indices=False, opciones_carga={'delta': True})
+
+        self.assertEqual(medicion['filas_leidas'], 7)
+        self.assertEqual(medicion['filas'], 5)
+        self.assertEqual(tuple(medicion['etapas']), ETAPAS)
+        self.assertEqual({etapa: medicion['etapas'][etapa] for etapa in etapas}, etapas)
+        self.assertEqual(medicion['etapas']['indices'], 0.0)
+
+
+class CacheParquetTipadaTests(SimpleTestCase):
+    CSV = (
+        "numero_radicado|nombre_completo|numero_documento|fecha_desaparicion|edad_1|estatura_1\n"
+        "A1|JUAN|0123|2020-01-05|34|1.7\n"
+        "A2|ANA||05/02/2019||\n"
+        "A3|PEDRO|456|fecha mala|20|1.6\n"
+    )
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.csv = os.path.join(carpeta.name, ARCHIVOS_DATOS['rud'])
+        with open(self.csv, 'w', encoding='utf-8') as archivo:
+            archivo.write(self.CSV)
+        self.parquet, _ = convertir_a_parquet(self.csv, chunksize=2, tipos=tipos_columnas_archivo(self.csv))
+
+    def _transformar(self, ruta):
+        chunks = [transformar_chunk(chunk, COLUMNAS_RUD, modelo=RegistroUnicoDesaparecidos)
+                  for chunk in leer_por_chunks(ruta, 2)]
+        return pd.concat(chunks)
+
+    def test_esquema_tipado(self):
+        self.assertTrue(es_cache_tipada(self.parquet))
+        chunk = next(iter(leer_por_chunks(self.parquet, 10)))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(chunk['fecha_desaparicion']))
+        self.assertEqual(chunk['edad_1'].dtype, 'float64')
+        self.assertEqual(chunk['numero_documento'].tolist(), ['0123', None, '456'])
+
+    def test_mismas_filas_que_el_csv(self):
+        desde_csv = self._transformar(self.csv)
+        desde_cache = self._transformar(self.parquet)
+        # El CSV infiere numero_documento como número y pierde el cero inicial; la caché guarda el texto
+        self.assertEqual(desde_cache['numero_documento'].tolist(), ['0123', None, '456'])
+        columnas = [columna for columna in desde_csv.columns if columna != 'numero_documento']
+        self.assertEqual(list(_hash_filas(desde_csv[columnas])), list(_hash_filas(desde_cache[columnas])))
+        self.assertEqual(desde_cache['fecha_desaparicion'].tolist(),
+                         [datetime.date(2020, 1, 5), datetime.date(2019, 2, 5), None])
+
+
+def _grafo_aleatorio(n, m, semilla):
+    """Grafo de networkx con identificadores de texto, algunos nodos aislados y un lazo"""
+    G = nx.relabel_nodes(nx.gnm_random_graph(n, m, seed=semilla), lambda i: f"n{(i * 7919) % 1000:03d}")
+    G.add_edge('n000', 'n000')
+    return G
+
+
+def _particion(ids, componente):
+    grupos = {}
+    for nodo, etiqueta in zip(ids, componente):
+        grupos.setdefault(int(etiqueta), set()).add(nodo)
+    return grupos
+
+
+class ComponentesGrafoTests(SimpleTestCase):
+    def _comparar_con_networkx(self, G):
+        nodos, origen, destino = arreglos_desde_networkx(G)
+        componente, tamanos = etiquetar_componentes(len(nodos), origen, destino)
+        esperadas = sorted(nx.connected_components(G), key=len, reverse=True)
+        self.assertEqual(len(tamanos), len(esperadas))
+        self.assertEqual(_particion(nodos, componente), dict(enumerate(esperadas)))
+        self.assertEqual(tamanos.tolist(), [len(c) for c in esperadas])
+        self.assertEqual(calcular_grados(len(nodos), origen, destino).tolist(), [G.degree(nodo) for nodo in nodos])
+
+    def test_componentes_como_networkx(self):
+        for semilla in range(10):
+            with self.subTest(semilla=semilla):
+                self._comparar_con_networkx(_grafo_aleatorio(60, 45 + semilla * 3, semilla))
+
+    def test_componentes_con_union_find(self):
+        # Sin scipy las componentes se calculan con union-find sobre arreglos
+        with mock.patch('dashboard.utils_grafo._importar_csgraph', return_value=(None, None)):
+            for semilla in range(10):
+                with self.subTest(semilla=semilla):
+                    self._comparar_con_networkx(_grafo_aleatorio(60, 45 + semilla * 3, semilla))
+
+    def test_grafo_vacio(self):
+        componente, tamanos = etiquetar_componentes(0, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        self.assertEqual(len(componente), 0)
+        self.assertEqual(len(tamanos), 0)
+
+    def test_actualizacion_incremental_igual_a_recalcular(self):
+        for semilla in range(10):
+            with self.subTest(semilla=semilla):
+                rng = np.random.default_rng(semilla)
+                G = _grafo_aleatorio(80, 70, semilla)
+                nodos = list(G.nodes())
+                enlaces = list(G.edges())
+                rng.shuffle(enlaces)
+                corte_nodos, corte_enlaces = 50, len(enlaces) // 2
+                iniciales = set(nodos[:corte_nodos])
+                primeros = [(u, v) for u, v in enlaces[:corte_enlaces] if u in iniciales and v in iniciales]
+                resto = [enlace for enlace in enlaces if enlace not in primeros]
+
+                H = GrafoCompacto()
+                H.agregar_nodos(nodos[:corte_nodos], tipo='persona')
+                H.agregar_enlaces([u for u, _ in primeros], [v for _, v in primeros])
+                H.calcular_componentes()
+
+                H.agregar_nodos(nodos[corte_nodos:], tipo='persona')
+                m = H.number_of_edges()
+                H.agregar_enlaces([u for u, _ in resto], [v for _, v in resto])
+                cambios, _ = H.actualizar_componentes(H.origen[m:], H.destino[m:])
+
+                completo = GrafoCompacto()
+                completo.agregar_nodos(H.ids, tipo='persona')
+                completo.agregar_enlaces(H.ids[H.origen], H.ids[H.destino])
+                completo.calcular_componentes()
+
+                self.assertEqual(H.componente_id.tolist(), completo.componente_id.tolist())
+                self.assertEqual(sorted(map(frozenset, _particion(H.ids, H.componente).values()), key=sorted),
+                                 sorted(map(frozenset, _particion(H.ids, completo.componente).values()), key=sorted))
+                self.assertEqual(H.componente_id.tolist(),
+                                 identificadores_componente(H.ids, completo.componente).tolist())
+                self.assertTrue(set(cambios['componente_nueva'].dropna()) <= set(H.componente_id.tolist()))
+
+    def test_ida_y_vuelta_networkx(self):
+        G = _grafo_aleatorio(40, 35, 3)
+        for indice, nodo in enumerate(G.nodes()):
+            G.nodes[nodo].update({'tipo': 'nunc' if indice % 2 else 'persona', 'name': nodo.upper()})
+            if indice % 3 == 0:
+                G.nodes[nodo]['necropsia'] = 'SI'
+        for indice, (u, v) in enumerate(G.edges()):
+            G.edges[u, v]['calidad_vinculo'] = 'INDICIADO' if indice % 2 else 'VICTIMA'
+
+        H = GrafoCompacto.desde_networkx(G)
+        self.assertEqual(H.number_of_nodes(), G.number_of_nodes())
+        self.assertEqual(H.number_of_edges(), G.number_of_edges())
+
+        R = H.a_networkx()
+        self.assertEqual(list(R.nodes()), list(G.nodes()))
+        for nodo, datos in G.nodes(data=True):
+            self.assertEqual(R.nodes[nodo], {**datos, 'grado': G.degree(nodo)})
+        self.assertEqual({frozenset((u, v)): d for u, v, d in R.edges(data=True)},
+                         {frozenset((u, v)): d for u, v, d in G.edges(data=True)})
+
+
+class SnapshotTests(SimpleTestCase):
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.enterContext(override_settings(SNAPSHOTS_RED_DIR=carpeta.name))
+        # guardar_snapshot consulta la versión de datos en la base
+        self.enterContext(mock.patch('dashboard.utils_snapshots.version_datos_actual', return_value=3))
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+
+        G = GrafoCompacto()
+        G.agregar_nodos(['N1', 'N2', 'N3'], tipo='nunc', atributos={
+            'color': '#e63946',
+            'necropsia': ['SI', None, 'NO'],
+            'delitos': [['HOMICIDIO', 'SECUESTRO'], None, {'total': 2}],
+            'anio': [2019, None, 2021],
+        })
+        G.agregar_nodos(['P1', 'P2', 'P4'], tipo='persona', atributos={'color': '#26C6DA'})
+        G.agregar_enlaces(['N1', 'N1', 'N3'], ['P1', 'P2', 'P4'],
+                          atributos={'calidad_vinculo': ['INDICIADO', None, 'VICTIMA']})
+        G.calcular_grado()
+        G.calcular_componentes()
+        self.G = G
+        self.manifiesto = guardar_snapshot(G, 'prueba')
+
+    def _comparar(self, H):
+        G = self.G
+        self.assertEqual(H.tipos, G.tipos)
+        self.assertEqual(H.ids.tolist(), G.ids.tolist())
+        for nombre in ('tipo', 'componente', 'componente_id', 'grado', 'origen', 'destino'):
+            np.testing.assert_array_equal(getattr(H, nombre), getattr(G, nombre))
+        np.testing.assert_array_equal(H.union_find.padre, G.union_find.padre)
+        np.testing.assert_array_equal(H.union_find.tamano, G.union_find.tamano)
+        self.assertEqual({nombre: columna.tolist() for nombre, columna in H.atributos.items()},
+                         {nombre: columna.tolist() for nombre, columna in G.atributos.items()})
+        self.assertEqual({nombre: columna.tolist() for nombre, columna in H.atributos_enlace.items()},
+                         {nombre: columna.tolist() for nombre, columna in G.atributos_enlace.items()})
+
+    def test_ida_y_vuelta_con_mmap(self):
+        H, manifiesto = cargar_snapshot('prueba', mmap=True, verificar=True)
+        self._comparar(H)
+        self.assertEqual(manifiesto['columnas_json']['nodos'], ['delitos'])
+        self.assertEqual(manifiesto['origen']['version_datos'], 3)
+        # Con mmap los arreglos numéricos son vistas de solo lectura sobre el archivo
+        for arreglo in (H.tipo, H.componente_id, H.origen, H.union_find.padre):
+            self.assertFalse(arreglo.flags.writeable)
+        with self.assertRaises(ValueError):
+            H.grado[0] = 10
+
+    def test_ida_y_vuelta_sin_mmap(self):
+        H, _ = cargar_snapshot('prueba', mmap=False)
+        self._comparar(H)
+        self.assertTrue(H.grado.flags.writeable)
+        self.assertTrue(H.union_find.padre.flags.writeable)
+
+    def test_verificar_detecta_archivos_alterados(self):
+        ruta = os.path.join(self.manifiesto['ruta'], 'enlaces.arrow')
+        with open(ruta, 'r+b') as archivo:
+            archivo.seek(-1, os.SEEK_END)
+            ultimo = archivo.read(1)
+            archivo.seek(-1, os.SEEK_END)
+            archivo.write(bytes([ultimo[0] ^ 0xFF]))
+        with self.assertRaises(ValueError):
+            cargar_snapshot('prueba', verificar=True)
+
+
+class CentralidadTests(SimpleTestCase):
+    def setUp(self):
+        # Las funciones de centralidad informan su avance con print
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+
+    def _arreglos(self, G):
+        nodos, origen, destino = arreglos_desde_networkx(G)
+        componente, _ = etiquetar_componentes(len(nodos), origen, destino)
+        return nodos, origen, destino, componente
+
+    def test_exacta_igual_a_networkx(self):
+        for semilla in range(5):
+            with self.subTest(semilla=semilla):
+                G = _grafo_aleatorio(70, 80, semilla)
+                nodos, origen, destino, componente = self._arreglos(G)
+                resultado = calcular_centralidad(len(nodos), origen, destino, componente)
+                self.assertFalse(resultado['aproximado'])
+                betweenness = nx.betweenness_centrality(G)
+                closeness = nx.closeness_centrality(G)
+                np.testing.assert_allclose(resultado['betweenness'], [betweenness[v] for v in nodos], atol=1e-12)
+                np.testing.assert_allclose(resultado['closeness'], [closeness[v] for v in nodos], atol=1e-12)
+
+    def test_varios_procesos_igual_a_uno(self):
+        G = _grafo_aleatorio(120, 150, 1)
+        nodos, origen, destino, componente = self._arreglos(G)
+        uno = calcular_centralidad(len(nodos), origen, destino, componente, procesos=1)
+        dos = calcular_centralidad(len(nodos), origen, destino, componente, procesos=2)
+        np.testing.assert_allclose(dos['betweenness'], uno['betweenness'], atol=1e-12)
+        np.testing.assert_allclose(dos['closeness'], uno['closeness'], atol=1e-12)
+
+    def test_muestreo_dentro_del_error(self):
+        G = nx.connected_watts_strogatz_graph(400, 4, 0.1, seed=5)
+        nodos, origen, destino, componente = self._arreglos(G)
+        error = 0.3
+        self.assertLess(tamano_muestra(len(nodos), error), len(nodos))
+        resultado = calcular_centralidad(len(nodos), origen, destino, componente, error=error, semilla=7)
+        self.assertTrue(resultado['aproximado'])
+        exacta = nx.betweenness_centrality(G)
+        diferencia = np.abs(resultado['betweenness'] - np.array([exacta[v] for v in nodos]))
+        self.assertLessEqual(diferencia.max(), error)
+
+    def test_diametros(self):
+        G = _grafo_aleatorio(90, 85, 2)
+        G.remove_edge('n000', 'n000')
+        nodos, origen, destino, componente = self._arreglos(G)
+        esperados = {}
+        for miembros in nx.connected_components(G):
+            etiqueta = int(componente[nodos.index(next(iter(miembros)))])
+            esperados[etiqueta] = nx.diameter(G.subgraph(miembros))
+
+        diametro, exacto = diametros_componentes(len(nodos), origen, destino, componente)
+        self.assertTrue(exacto.all())
+        self.assertEqual(diametro.tolist(), [esperados[c] for c in range(len(esperados))])
+
+        # Con barridos en todas las componentes el diámetro es una cota inferior, exacta cuando se marca así
+        aproximado, exacto = diametros_componentes(len(nodos), origen, destino, componente, limite_exacto=1,
+                                                   semilla=3)
+        for c, valor in esperados.items():
+            self.assertLessEqual(aproximado[c], valor)
+            if exacto[c]:
+                self.assertEqual(aproximado[c], valor)
+
+
+def _red_nunc_persona(vinculos):
+    """GrafoCompacto NUNC-Persona a partir de tuplas (nunc, persona, calidad)"""
+    G = GrafoCompacto()
+    G.agregar_nodos(sorted({nunc for nunc, _, _ in vinculos}), tipo='nunc')
+    G.agregar_nodos(sorted({persona for _, persona, _ in vinculos}), tipo='persona')
+    G.agregar_enlaces([nunc for nunc, _, _ in vinculos], [persona for _, persona, _ in vinculos],
+                      atributos={'calidad_vinculo': [calidad for _, _, calidad in vinculos]})
+    return G
+
+
+class ProyeccionPersonasTests(SimpleTestCase):
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+
+    def _enlaces(self, H):
+        return {frozenset((u, v)): (datos['nuncs'], datos['peso']) for u, v, datos in H.enlaces(data=True)}
+
+    def test_sin_coapariciones(self):
+        G = _red_nunc_persona([('N1', 'P1', 'INDICIADO')])
+        for pesos in (None, PESOS_CALIDAD_VINCULO):
+            with self.subTest(ponderada=pesos is not None):
+                H, resumen = proyectar_personas(G, pesos_calidad=pesos)
+                self.assertEqual(H.number_of_nodes(), 0)
+                self.assertEqual(resumen['enlaces'], 0)
+
+    def test_todas_las_nunc_omitidas_por_el_limite(self):
+        G = _red_nunc_persona([('N1', 'P1', 'INDICIADO'), ('N1', 'P2', 'VICTIMA'), ('N1', 'P3', 'TESTIGO')])
+        H, resumen = proyectar_personas(G, max_personas_nunc=2, pesos_calidad=PESOS_CALIDAD_VINCULO)
+        self.assertEqual(H.number_of_edges(), 0)
+        self.assertEqual(resumen['nuncs_hub'], 1)
+        self.assertEqual(resumen['pares_omitidos'], 3)
+
+    def test_pesos_por_calidad(self):
+        G = _red_nunc_persona([
+            ('N1', 'P1', 'INDICIADO'), ('N1', 'P2', 'victima '),
+            ('N2', 'P1', 'IMPUTADO'), ('N2', 'P2', 'TESTIGO'), ('N2', 'P3', None),
+        ])
+        H, _ = proyectar_personas(G, pesos_calidad=PESOS_CALIDAD_VINCULO)
+        self.assertEqual(self._enlaces(H), {
+            frozenset(('P1', 'P2')): (2, 1.0 * 0.5 + 1.0 * 0.25),
+            frozenset(('P1', 'P3')): (1, 1.0 * 0.5),
+            frozenset(('P2', 'P3')): (1, 0.25 * 0.5),
+        })
+        H, _ = proyectar_personas(G, minimo_nuncs=2)
+        self.assertEqual(self._enlaces(H), {frozenset(('P1', 'P2')): (2, 2.0)})
+
+
+class ComunidadesTests(SimpleTestCase):
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        rng = np.random.default_rng(11)
+        vinculos = []
+        for numero in range(40):
+            for persona in rng.choice(70, size=int(rng.integers(1, 5)), replace=False):
+                vinculos.append((f'N{numero:02d}', f'P{persona:02d}', 'INDICIADO'))
+        self.G = _red_nunc_persona(vinculos)
+        self.G.calcular_grado()
+        self.G.calcular_componentes()
+        self.assertGreater(int(self.G.componente.max()), 0)
+
+    def _verificar(self, comunidad):
+        G = self.G
+        self.assertEqual(len(comunidad), len(G))
+        # Ninguna comunidad cruza componentes
+        por_comunidad = pd.DataFrame({'comunidad': comunidad, 'componente': G.componente}).groupby('comunidad')
+        self.assertEqual(int(por_comunidad['componente'].nunique().max()), 1)
+
+        tabla = estadisticas_comunidades(G, comunidad)
+        self.assertEqual(int(tabla['tamano'].sum()), G.number_of_nodes())
+        self.assertEqual(int(tabla['enlaces_internos'].sum()) + int(tabla['enlaces_externos'].sum()) // 2,
+                         G.number_of_edges())
+        self.assertEqual((tabla['nodos_nunc'] + tabla['nodos_persona']).tolist(), tabla['tamano'].tolist())
+        # Numeradas de mayor a menor tamaño
+        self.assertTrue((np.diff(tabla['tamano'].to_numpy()) <= 0).all())
+
+    def test_metodos(self):
+        for metodo in ('propagacion', 'louvain'):
+            with self.subTest(metodo=metodo):
+                comunidad, resumen = detectar_comunidades(self.G, metodo=metodo, semilla=1)
+                self.assertEqual(resumen['comunidades'], int(comunidad.max()) + 1)
+                self._verificar(comunidad)
+
+    def test_heredadas_de_la_proyeccion(self):
+        H, _ = proyectar_personas(self.G)
+        for metodo in ('propagacion', 'louvain'):
+            with self.subTest(metodo=metodo):
+                comunidad_proyeccion, _ = detectar_comunidades(H, pesos=H.atributos_enlace['peso'],
+                                                               metodo=metodo, semilla=1)
+                comunidad = heredar_comunidades(self.G, H, comunidad_proyeccion)
+                self._verificar(comunidad)
+                # Dos personas en la misma comunidad de la proyección siguen juntas
+                indices = self.G.indice_de(H.ids)
+                pares = pd.DataFrame({'proyeccion': comunidad_proyeccion, 'red': comunidad[indices]})
+                self.assertEqual(int(pares.groupby('proyeccion')['red'].nunique().max()), 1)
+
+    def test_metodo_desconocido(self):
+        with self.assertRaises(ValueError):
+            detectar_comunidades(self.G, metodo='otro')
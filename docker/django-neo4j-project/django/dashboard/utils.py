@@ -1,269 +1,736 @@
 import pandas as pd
+import numpy as np
 import csv
 import os
-import json
-from datetime import datetime
+import time
+from contextlib import contextmanager, nullcontext
 from django.db import transaction, IntegrityError
-from .models import ConsolidadoSpoa, PersonasDf, RegistroUnicoDesaparecidos, PerfilPersona, AparecidosVivosNoRegistrados, Funcionario
+from django.db.models import Q
+from .models import ConsolidadoSpoa, PersonasDf, RegistroUnicoDesaparecidos, PerfilPersona, AparecidosVivosNoRegistrados, Funcionario, CheckpointCarga
+from .utils_postgres import copiar_frame
+from .utils_fechas import parsear_columna_fechas
+from .utils_archivos import leer_por_chunks, tipo_archivo
+from .utils_json import iterar_objeto_json
+from .utils_dimensiones import resolver_dimensiones, ruta_consulta
+from .utils_limpieza import limpiar_texto, rellenar_obligatorios
 
-def parse_date(date_str):
+# Modos de inserción soportados por los cargar_*
+#   'orm':  bulk_create(..., ignore_conflicts=True)
+#   'copy': COPY FROM STDIN a una tabla de staging + INSERT ... ON CONFLICT (solo PostgreSQL)
+MODOS_CARGA = ('orm', 'copy')
+
+# Mapeo campo del modelo -> (columna del CSV, tipo de transformación).
+# Tipos soportados:
+#   'texto':       str(valor).strip(); nulo, vacío o solo espacios -> None
+#   'texto_libre': igual que 'texto' pero sin recortar espacios (relatos, direcciones)
+#   'fecha':       parse_date(valor)
+#   'numero':      valor numérico o None si es nulo
+#   'booleano':    True si el valor es 1, False en otro caso
+# Los campos de DIMENSIONES_CONSOLIDADO se leen como texto y se convierten en
+# llaves de sus tablas de dimensión al insertar (ver utils_dimensiones).
+COLUMNAS_CONSOLIDADO = {
+    'nunc': ('nunc', 'texto'),
+    'fecha_hechos': ('fecha_hechos', 'fecha'),
+    'fecha_denuncia': ('fecha_denuncia', 'fecha'),
+    'seccional': ('seccional', 'texto'),
+    'unidad': ('unidad', 'texto'),
+    'despacho': ('despacho', 'texto'),
+    'numero_documento': ('numero_documento', 'texto'),
+    'nombre_completo': ('nombre_completo', 'texto'),
+    'relato': ('relato', 'texto_libre'),
+    'delito': ('delito', 'texto'),
+    'grupo_delito': ('grupo_delito', 'texto'),
+    'necropsia': ('necropsia', 'texto'),
+    'fuente': ('fuente', 'texto'),
+    'calidad_vinculado': ('calidad_vinculado', 'texto'),
+    'estado': ('estado', 'texto'),
+    'etapa': ('etapa', 'texto'),
+}
+
+COLUMNAS_PERSONAS = {
+    'numero_identificacion': ('numero_documento', 'texto'),
+    'nombre_completo': ('nombre_completo', 'texto'),
+    'desaparcion_forzada': ('desaparicion_forzada', 'booleano'),
+    'homicidio': ('homicidio', 'booleano'),
+    'secuestro': ('secuestro', 'booleano'),
+    'reclutamiento_ilicito': ('reclutamiento_ilicito', 'booleano'),
+    'rud': ('rud', 'booleano'),
+    'rud_desaparecido': ('1.0', 'booleano'),
+    'rud_vivo': ('2.0', 'booleano'),
+    'rud_muerto': ('3.0', 'booleano'),
+    'funcionario_FGN': ('funcionario', 'booleano'),
+}
+
+COLUMNAS_RUD = {
+    'numero_radicado': ('numero_radicado', 'texto'),
+    'nombre_completo': ('nombre_completo', 'texto'),
+    'tipo_documento': ('tipo_documento', 'texto'),
+    'numero_documento': ('numero_documento', 'texto'),
+    'departamento_desaparicion': ('departamento_desaparicion', 'texto'),
+    'municipio_desaparicion': ('municipio_desaparicion', 'texto'),
+    'barrio_vereda_desaparicion': ('barrio/vereda_desaparicion', 'texto'),
+    'fecha_desaparicion': ('fecha_desaparicion', 'fecha'),
+    'sexo': ('sexo', 'texto'),
+    'edad_1': ('edad_1', 'numero'),
+    'edad_2': ('edad_2', 'numero'),
+    'estatura_1': ('estatura_1', 'numero'),
+    'estatura_2': ('estatura_2', 'numero'),
+    'ancestro_racial': ('ancestro_racial', 'texto'),
+    'estado_desaparicion': ('estado_desaparicion', 'texto'),
+    'senales_particulares': ('senales_particulares', 'texto'),
+}
+
+COLUMNAS_APARECIDOS = {
+    'numeroRadicado': ('numeroRadicado', 'texto'),
+    'entidadradica': ('entidadradica', 'texto'),
+    'nombreRegional': ('nombreRegional', 'texto'),
+    'nombreSeccional': ('nombreSeccional', 'texto'),
+    'nombreUnidadBasica': ('nombreUnidadBasica', 'texto'),
+    'usuarioRegistra': ('usuarioRegistra', 'texto'),
+    'fechaDesaparicion': ('fechaDesaparicion', 'fecha'),
+    'desaparecido': ('desaparecido', 'texto'),
+    'nombreDocumento': ('nombreDocumento', 'texto'),
+    'numero': ('numero_documento', 'texto'),
+    'paisDesaparicion': ('paisDesaparicion', 'texto'),
+    'departamentoDesaparicion': ('departamentoDesaparicion', 'texto'),
+    'municipioDesaparicion': ('municipioDesaparicion', 'texto'),
+    'aportanteDatosDesaparecido': ('aportanteDatosDesaparecido', 'texto'),
+    'paisAportanteDatos': ('paisAportanteDatos', 'texto'),
+    'departamentoAportanteDatos': ('departamentoAportanteDatos', 'texto'),
+    'municipioAportanteDatos': ('municipioAportanteDatos', 'texto'),
+    'detalleDireccionAportanteDatos': ('detalleDireccionAportanteDatos', 'texto_libre'),
+    'aportanteDatos': ('aportanteDatos', 'texto'),
+}
+
+COLUMNAS_FUNCIONARIOS = {
+    'numero_documento': ('numero_documento', 'texto'),
+    'nombres_apellidos': ('nombres_apellidos', 'texto'),
+    'nom_cargo': ('nom_cargo', 'texto'),
+    'seccional': ('seccional', 'texto'),
+    'nom_dependencia': ('nom_dependencia', 'texto'),
+    'estado': ('estado', 'texto'),
+    'fuente': ('fuente', 'texto'),
+}
+
+
+# Nombres de los archivos de entrada en la carpeta data (ver cargar_datos)
+ARCHIVOS_DATOS = {
+    'consolidado': 'consolidado_df_delitos_relacionados_2025-05-20.csv',
+    'personas': 'personas_delitos_2025-05-20.csv',
+    'rud': 'rud_dforzada_2025-04-21.csv',
+    'perfiles': 'lote_completo_v2.json',
+    'aparecidos': 'Reporte_3_Aparecidos_vivos_no_registrados_2025-05-13.csv',
+    'funcionarios': 'funcionarios_exfuncionarios.csv',
+}
+
+# Columnas de cada conjunto CSV, usadas para tipar su caché Parquet (ver tipos_columnas_archivo)
+COLUMNAS_ARCHIVOS = {
+    'consolidado': COLUMNAS_CONSOLIDADO,
+    'personas': COLUMNAS_PERSONAS,
+    'rud': COLUMNAS_RUD,
+    'aparecidos': COLUMNAS_APARECIDOS,
+    'funcionarios': COLUMNAS_FUNCIONARIOS,
+}
+
+
+def tipos_columnas_archivo(ruta_csv):
+    """
+    Tipo de cada columna de un CSV de datos (columna_csv -> tipo) según el
+    conjunto al que corresponde su nombre en ARCHIVOS_DATOS
+    
+    Returns:
+        dict o None si el archivo no es uno de los conjuntos conocidos
     """
-    Convierte una cadena de fecha en un objeto datetime
-    Intenta diferentes formatos de fecha
+    nombre = os.path.basename(ruta_csv)
+    for conjunto, columnas in COLUMNAS_ARCHIVOS.items():
+        archivo = ARCHIVOS_DATOS[conjunto]
+        if nombre in (archivo, archivo + '.gz', archivo + '.zst'):
+            return {columna: tipo for columna, tipo in columnas.values()}
+    return None
+
+
+# Clave natural de cada modelo para las cargas incrementales (--delta).
+# ConsolidadoSpoa no tiene llave primaria natural, se usa la combinación
+# que identifica un vínculo persona-noticia-delito. Las filas que repiten
+# una clave se guardan como una sola y se reportan como 'duplicados'.
+CLAVES_DELTA = {
+    ConsolidadoSpoa: ('nunc', 'numero_documento', 'delito'),
+    PersonasDf: ('numero_identificacion',),
+    RegistroUnicoDesaparecidos: ('numero_radicado',),
+    AparecidosVivosNoRegistrados: ('numeroRadicado',),
+    Funcionario: ('numero_documento',),
+}
+
+# Campo con el documento de la persona en los modelos que alimentan las banderas
+# de PersonasDf. En modo delta se reportan los documentos afectados para poder
+# recalcular solo esas personas (ver utils_personas.recalcular_banderas_personas).
+CAMPOS_DOCUMENTO = {
+    ConsolidadoSpoa: 'numero_documento',
+    PersonasDf: 'numero_identificacion',
+    RegistroUnicoDesaparecidos: 'numero_documento',
+    Funcionario: 'numero_documento',
+}
+
+
+def transformar_chunk(chunk, columnas, estadisticas_fechas=None, modelo=None):
     """
-    if not date_str or pd.isna(date_str):
-        return None
+    Prepara un chunk de pandas columna por columna en lugar de fila por fila.
     
-    # Formatos de fecha comunes en datos colombianos
-    formats = [
-        '%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y',
-        '%Y/%m/%d', '%d.%m.%Y', '%Y.%m.%d'
-    ]
+    Args:
+        chunk: DataFrame leído del CSV
+        columnas: Diccionario campo -> (columna_csv, tipo), ver COLUMNAS_CONSOLIDADO
+        estadisticas_fechas: Diccionario opcional campo -> {formato: filas} que se
+                             acumula con los formatos de fecha encontrados
+        modelo: Clase del modelo destino; si se indica, los textos nulos de los
+                campos NOT NULL se guardan como ''
+        
+    Returns:
+        DataFrame: Un DataFrame cuyas columnas son los campos del modelo
+    """
+    datos = {}
+    
+    for campo, (columna, tipo) in columnas.items():
+        presente = columna in chunk.columns
+        if presente:
+            serie = chunk[columna]
+        else:
+            # Equivalente a row.get(columna) cuando la columna no existe
+            serie = pd.Series(None, index=chunk.index, dtype=object)
+        
+        if tipo in ('texto', 'texto_libre'):
+            datos[campo] = limpiar_texto(serie, recortar=(tipo == 'texto'))
+        elif tipo == 'fecha':
+            datos[campo], conteo = parsear_columna_fechas(serie)
+            if estadisticas_fechas is not None:
+                acumulado = estadisticas_fechas.setdefault(campo, {})
+                for fmt, total in conteo.items():
+                    acumulado[fmt] = acumulado.get(fmt, 0) + total
+        elif tipo == 'numero':
+            datos[campo] = serie.astype(object).where(serie.notna(), None)
+        elif tipo == 'booleano':
+            numeros = pd.to_numeric(serie, errors='coerce').fillna(0).astype(int)
+            datos[campo] = numeros == 1
+        else:
+            raise ValueError(f"Tipo de columna no soportado: {tipo}")
+    
+    frame = pd.DataFrame(datos, index=chunk.index)
+    if modelo is not None:
+        frame = rellenar_obligatorios(modelo, frame)
+    return frame
+
+
+def registros_desde_frame(modelo, frame):
+    """
+    Construye las instancias del modelo a partir de un chunk ya transformado
     
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except (ValueError, TypeError):
-            continue
+    Args:
+        modelo: Clase del modelo de Django
+        frame: DataFrame devuelto por transformar_chunk
+        
+    Returns:
+        list: Instancias del modelo (sin guardar)
+    """
+    return [modelo(**fila) for fila in frame.to_dict('records')]
+
+
+def _mostrar_estadisticas_fechas(modelo, estadisticas_fechas):
+    """
+    Imprime cuántas filas coincidieron con cada formato de fecha por columna
+    """
+    for campo, conteo in estadisticas_fechas.items():
+        detalle = ', '.join(f"{fmt}: {total}" for fmt, total in sorted(conteo.items(), key=lambda x: -x[1]))
+        print(f"{modelo.__name__}.{campo} - formatos de fecha: {detalle or 'sin valores'}")
+
+
+def _insertar_frame(modelo, frame, modo='orm'):
+    """
+    Inserta un chunk transformado según el modo de carga
     
-    return None
+    Args:
+        modelo: Clase del modelo de Django
+        frame: DataFrame devuelto por transformar_chunk
+        modo: 'orm' o 'copy'
+    """
+    if modo == 'copy':
+        copiar_frame(modelo, frame)
+    elif modo == 'orm':
+        # Insertar en bulk (mucho más eficiente que uno por uno)
+        # El parámetro ignore_conflicts evita errores por duplicados
+        modelo.objects.bulk_create(registros_desde_frame(modelo, frame), ignore_conflicts=True)
+    else:
+        raise ValueError(f"Modo de carga no soportado: {modo}")
 
-@transaction.atomic
-def cargar_consolidado_spoa(ruta_archivo):
+
+def _obtener_checkpoint(ruta_archivo, modelo, chunksize, rango_bytes=None):
     """
-    Carga datos desde un archivo CSV al modelo ConsolidadoSpoa
+    Obtiene (o crea) el checkpoint de carga de un archivo para un modelo.
+    Si el archivo cambió o el chunksize es distinto, el checkpoint se reinicia.
+    Cada rango de bytes de un archivo dividido tiene su propio checkpoint.
+    """
+    ruta_absoluta = os.path.abspath(ruta_archivo)
+    estado = os.stat(ruta_absoluta)
+    archivo = ruta_absoluta if rango_bytes is None else f"{ruta_absoluta}#{rango_bytes[0]}-{rango_bytes[1]}"
+    
+    checkpoint, _ = CheckpointCarga.objects.get_or_create(
+        archivo=archivo,
+        modelo=modelo.__name__,
+        defaults={
+            'tamano_archivo': estado.st_size,
+            'fecha_modificacion_archivo': estado.st_mtime,
+            'chunksize': chunksize,
+        }
+    )
+    
+    if (checkpoint.tamano_archivo != estado.st_size
+            or checkpoint.fecha_modificacion_archivo != estado.st_mtime
+            or checkpoint.chunksize != chunksize):
+        print(f"El archivo {archivo} cambió desde la última carga, se reinicia el checkpoint")
+        checkpoint.tamano_archivo = estado.st_size
+        checkpoint.fecha_modificacion_archivo = estado.st_mtime
+        checkpoint.chunksize = chunksize
+        checkpoint.chunks_cargados = 0
+        checkpoint.filas_cargadas = 0
+        checkpoint.completado = False
+        checkpoint.save()
+    
+    return checkpoint
+
+
+def reiniciar_checkpoints(modelo=None):
+    """
+    Elimina los checkpoints de carga para forzar una carga desde el inicio
     
     Args:
-        ruta_archivo: Ruta al archivo CSV que contiene los datos
+        modelo: Nombre del modelo (opcional). Si no se indica se eliminan todos.
         
     Returns:
-        int: Número de registros cargados
+        int: Número de checkpoints eliminados
     """
-    # Verificar que el archivo existe
-    if not os.path.exists(ruta_archivo):
-        raise FileNotFoundError(f"El archivo {ruta_archivo} no existe")
-    
-    # Si el archivo es muy grande, usar chunks con pandas
-    chunksize = 10000
-    counter = 0
+    checkpoints = CheckpointCarga.objects.all()
+    if modelo:
+        checkpoints = checkpoints.filter(modelo=modelo)
+    eliminados, _ = checkpoints.delete()
+    return eliminados
+
+
+# Texto de los valores nulos en el hash de las filas (no aparece en los datos)
+NULO_HASH = '\x1e'
+
+
+def _valor_canonico(valor):
+    """
+    Texto de un valor para el hash: 34, 34.0 y np.int64(34) dan el mismo texto
+    """
+    if valor is None or valor is pd.NaT or (isinstance(valor, float) and np.isnan(valor)):
+        return NULO_HASH
+    if isinstance(valor, (bool, np.bool_)):
+        return str(bool(valor))
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        numero = float(valor)
+        return str(int(numero)) if numero.is_integer() else repr(numero)
+    return str(valor)
+
+
+def _hash_filas(frame):
+    """
+    Hash de 64 bits por fila, independiente del orden de las columnas y de su
+    dtype: se calcula sobre los valores ya normalizados por transformar_chunk,
+    de modo que la misma fila da el mismo hash en cualquier chunk aunque pandas
+    infiera float64 en uno (por un nulo en otra fila) e int64 en otro
+    """
+    canonico = pd.DataFrame(
+        {columna: frame[columna].astype(object).map(_valor_canonico) for columna in sorted(frame.columns)},
+        index=frame.index,
+    )
+    return pd.util.hash_pandas_object(canonico, index=False).values.view('int64')
+
+
+def _buscar_existentes(modelo, clave, claves_chunk):
+    """
+    Obtiene de la base de datos los registros cuyas claves aparecen en el chunk
     
-    # Verificar la extensión del archivo
-    _, extension = os.path.splitext(ruta_archivo)
+    Returns:
+        DataFrame: Columnas de la clave más pk, hash_contenido y ausente_extracto
+    """
+    valores = claves_chunk[clave[0]]
+    columnas = [ruta_consulta(modelo, campo) for campo in clave] + ['pk', 'hash_contenido', 'ausente_extracto']
+    
+    consulta = Q(**{f"{clave[0]}__in": valores.dropna().unique().tolist()})
+    if valores.isna().any():
+        # Las filas con el primer campo de la clave nulo también se buscan; si no,
+        # cada carga incremental las insertaría de nuevo. El merge de pandas empareja
+        # los nulos del resto de la clave (None y NaN) entre sí
+        consulta |= Q(**{f"{clave[0]}__isnull": True})
+    
+    existentes = pd.DataFrame(
+        list(modelo.objects.filter(consulta).values_list(*columnas)),
+        columns=[*clave, 'pk_existente', 'hash_anterior', 'ausente_anterior'],
+        dtype=object
+    )
+    # Si hay duplicados en la tabla solo se actualiza uno de ellos
+    return existentes.drop_duplicates(subset=list(clave))
+
+
+def _cargar_chunk_delta(modelo, columnas, chunk, modo, resumen, claves_vistas, estadisticas_fechas=None,
+                        cache_dimensiones=None, etapas=None):
+    """
+    Aplica un chunk en modo incremental: inserta las filas nuevas, actualiza las
+    que cambiaron y omite las que tienen el mismo hash. El hash se calcula sobre
+    los valores transformados, los mismos que se guardan.
     
-    if extension.lower() == '.csv':
-        # Leer el archivo en chunks para manejar archivos grandes
-        for chunk in pd.read_csv(ruta_archivo, chunksize=chunksize, sep="|", dtype={'nunc': str}):
-            registros = []
-            
-            for _, row in chunk.iterrows():
-                # Crear objeto pero no guardar aún (bulk_create es más eficiente)
-                registro = ConsolidadoSpoa(
-                    nunc=str(row.get('nunc', '')).strip(),
-                    fecha_hechos=parse_date(row.get('fecha_hechos')),
-                    fecha_denuncia=parse_date(row.get('fecha_denuncia')),
-                    seccional=str(row.get('seccional', '')).strip(),
-                    unidad=str(row.get('unidad', '')).strip(),
-                    despacho=str(row.get('despacho', '')).strip(),
-                    numero_documento=str(row.get('numero_documento', '')).strip(),
-                    nombre_completo=str(row.get('nombre_completo', '')).strip(),
-                    relato=str(row.get('relato', '')),
-                    delito=str(row.get('delito', '')).strip(),
-                    grupo_delito=str(row.get('grupo_delito', '')).strip(),
-                    necropsia=str(row.get('necropsia', '')).strip(),
-                    fuente=str(row.get('fuente', '')).strip(),
-                    calidad_vinculado=str(row.get('calidad_vinculado', '')).strip(),
-                    estado=str(row.get('estado', '')).strip(),
-                    etapa=str(row.get('etapa', '')).strip()
-                )
-                registros.append(registro)
-                # Intentar guardar el registro
-            
-            # Insertar en bulk (mucho más eficiente que uno por uno)
-            # El parámetro ignore_conflicts evita errores por duplicados
-            ConsolidadoSpoa.objects.bulk_create(registros, ignore_conflicts=True)
-            counter += len(registros)
+    Args:
+        modelo: Clase del modelo de Django
+        columnas: Diccionario campo -> (columna_csv, tipo)
+        chunk: DataFrame leído del CSV
+        modo: 'orm' o 'copy' para las inserciones
+        resumen: Diccionario de conteos que se actualiza
+        claves_vistas: Lista donde se acumulan los hashes de las claves del extracto
+        estadisticas_fechas: Ver transformar_chunk
+        cache_dimensiones: Ver utils_dimensiones.resolver_dimensiones
+        etapas: Diccionario opcional donde se acumulan los segundos de
+                transformacion e insercion (ver _cargar_csv)
+    """
+    clave = CLAVES_DELTA[modelo]
+    etapas = {'transformacion': 0.0, 'insercion': 0.0} if etapas is None else etapas
+    
+    with _medir_etapa(etapas, 'transformacion'):
+        transformado = transformar_chunk(chunk, columnas, estadisticas_fechas, modelo)
+    claves = transformado[list(clave)].copy()
+    claves['hash_contenido'] = _hash_filas(transformado)
+    
+    # Se guardan todas las claves, repetidas incluidas, para contar los duplicados
+    # del extracto (ver _contar_duplicados). Si la clave se repite dentro del
+    # chunk gana la última aparición
+    claves_vistas.append(_hash_filas(claves[list(clave)]))
+    claves = claves[~claves.duplicated(subset=list(clave), keep='last')]
+    
+    comparacion = claves.reset_index().merge(
+        _buscar_existentes(modelo, clave, claves), on=list(clave), how='left'
+    ).set_index('index')
+    
+    nuevos = comparacion['pk_existente'].isna()
+    cambiados = ~nuevos & (comparacion['hash_anterior'] != comparacion['hash_contenido'])
+    sin_cambios = ~nuevos & ~cambiados
+    
+    # Las filas sin cambios no se escriben; solo se reactivan si estaban ausentes
+    reactivar = comparacion.loc[sin_cambios & (comparacion['ausente_anterior'] == True), 'pk_existente']
+    if not reactivar.empty:
+        modelo.objects.filter(pk__in=reactivar.tolist()).update(ausente_extracto=False)
+    
+    a_transformar = comparacion[nuevos | cambiados]
+    if not a_transformar.empty:
+        with _medir_etapa(etapas, 'transformacion'):
+            preparado = resolver_dimensiones(modelo, transformado.loc[a_transformar.index],
+                                             {} if cache_dimensiones is None else cache_dimensiones)
+        preparado['hash_contenido'] = a_transformar['hash_contenido']
+        preparado['ausente_extracto'] = False
+        
+        if modelo in CAMPOS_DOCUMENTO:
+            resumen['documentos'].update(preparado[CAMPOS_DOCUMENTO[modelo]].dropna())
+        
+        with _medir_etapa(etapas, 'insercion'):
+            _insertar_frame(modelo, preparado[nuevos[a_transformar.index]], modo)
             
-        return counter
-    else:
-        raise ValueError(f"Formato de archivo no soportado: {extension}")
+            actualizados = preparado[cambiados[a_transformar.index]].copy()
+            if not actualizados.empty:
+                actualizados['pk'] = a_transformar.loc[actualizados.index, 'pk_existente']
+                campos = [campo for campo in actualizados.columns
+                          if campo != 'pk' and campo != modelo._meta.pk.name]
+                modelo.objects.bulk_update(registros_desde_frame(modelo, actualizados), campos, batch_size=1000)
+    
+    resumen['insertados'] += int(nuevos.sum())
+    resumen['actualizados'] += int(cambiados.sum())
+    resumen['sin_cambios'] += int(sin_cambios.sum())
 
-@transaction.atomic
-def cargar_personas_df(ruta_archivo):
+
+def _contar_duplicados(claves_vistas):
     """
-    Carga datos desde un archivo CSV al modelo PersonasDf
-    Debe ejecutarse ANTES de cargar_consolidado_spoa
+    Filas del extracto cuya clave ya apareció antes (en el mismo chunk o en uno
+    anterior). En modo delta cada repetición reemplaza a la anterior, mientras
+    que una carga completa las guarda todas.
+    """
+    if not claves_vistas:
+        return 0
+    todas = np.concatenate(claves_vistas)
+    return int(len(todas) - len(np.unique(todas)))
+
+
+def _marcar_ausentes(modelo, claves_vistas, tamano_lote=50000):
+    """
+    Marca con ausente_extracto=True los registros cuya clave no apareció en el extracto
+    
+    Returns:
+        int: Número de registros marcados
+    """
+    clave = CLAVES_DELTA[modelo]
+    vistas = np.unique(np.concatenate(claves_vistas)) if claves_vistas else np.array([], dtype='int64')
+    marcados = 0
+    
+    ausentes = []
+    lote = []
+    
+    def procesar(lote):
+        frame = pd.DataFrame(lote, columns=['pk', *clave], dtype=object)
+        return frame.loc[~np.isin(_hash_filas(frame[list(clave)]), vistas), 'pk'].tolist()
+    
+    consulta = (modelo.objects.filter(ausente_extracto=False)
+                .values_list('pk', *(ruta_consulta(modelo, campo) for campo in clave)))
+    for fila in consulta.iterator(chunk_size=tamano_lote):
+        lote.append(fila)
+        if len(lote) >= tamano_lote:
+            ausentes.extend(procesar(lote))
+            lote = []
+    if lote:
+        ausentes.extend(procesar(lote))
+    
+    # Se actualiza después de recorrer la tabla para no modificarla mientras se lee
+    for i in range(0, len(ausentes), tamano_lote):
+        marcados += modelo.objects.filter(pk__in=ausentes[i:i+tamano_lote]).update(ausente_extracto=True)
+    
+    return marcados
+
+
+def _leer_csv_por_chunks(ruta_archivo, chunksize, dtype=None, rango_bytes=None, columnas=None):
+    """
+    Lee el archivo (o solo un rango de bytes de él) en chunks. Acepta CSV plano,
+    comprimido (.gz, .zst) o Parquet; con columnas solo se leen las columnas
+    de origen que usa la especificación (ver COLUMNAS_CONSOLIDADO).
+    """
+    columnas_origen = None
+    if columnas is not None:
+        columnas_origen = [columna for columna, _ in columnas.values()]
+    return leer_por_chunks(ruta_archivo, chunksize, dtype=dtype, columnas=columnas_origen, rango_bytes=rango_bytes)
+
+
+@contextmanager
+def _medir_etapa(etapas, etapa):
+    """
+    Acumula en etapas[etapa] los segundos del bloque
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        etapas[etapa] += time.perf_counter() - inicio
+
+
+def _medir_lectura(chunks, etapas):
+    """
+    Recorre los chunks acumulando en etapas['lectura'] el tiempo de leerlos
+    """
+    iterador = iter(chunks)
+    while True:
+        inicio = time.perf_counter()
+        chunk = next(iterador, None)
+        etapas['lectura'] += time.perf_counter() - inicio
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _cargar_csv(ruta_archivo, modelo, columnas, dtype=None, chunksize=10000, modo='orm', por_chunk=False,
+                delta=False, marcar_ausentes=False, rango_bytes=None, metricas=None):
+    """
+    Flujo común de carga de los CSV: leer por chunks, transformar por columnas
+    e insertar con bulk_create o COPY.
+    
+    Por defecto toda la carga es una sola transacción. Con por_chunk=True cada
+    chunk se confirma en su propia transacción junto con su CheckpointCarga, y
+    una nueva ejecución sobre el mismo archivo continúa desde el último chunk
+    confirmado.
+    
+    Con delta=True la carga es incremental: se calcula un hash por fila y solo
+    se insertan las filas nuevas y se actualizan las que cambiaron.
     
     Args:
-        ruta_archivo: Ruta al archivo CSV que contiene los datos
+        ruta_archivo: Ruta al archivo CSV (plano, .gz o .zst) o Parquet con los datos
+        modelo: Clase del modelo de Django destino
+        columnas: Diccionario campo -> (columna_csv, tipo)
+        dtype: Tipos a forzar al leer el CSV
+        chunksize: Número de filas por chunk
+        modo: 'orm' o 'copy' (ver MODOS_CARGA)
+        por_chunk: Confirmar cada chunk y registrar checkpoints
+        delta: Carga incremental por hash de contenido (ver CLAVES_DELTA)
+        marcar_ausentes: En modo delta, marcar los registros que no vienen en el archivo
+        rango_bytes: Tupla (inicio, fin) para cargar solo una parte del archivo
+                     (ver utils_paralelo.dividir_csv_en_rangos)
+        metricas: Diccionario opcional que se completa con 'filas_leidas' y 'etapas'
+                  (segundos de lectura, transformacion, insercion y delta)
         
     Returns:
-        int: Número de registros cargados
+        int: Número de registros cargados en esta ejecución, o en modo delta un
+             dict con insertados, actualizados, sin_cambios, ausentes, duplicados
+             (filas que repiten la clave de otra del extracto) y el set de
+             documentos de las filas insertadas o actualizadas (ver CAMPOS_DOCUMENTO)
     """
     # Verificar que el archivo existe
     if not os.path.exists(ruta_archivo):
         raise FileNotFoundError(f"El archivo {ruta_archivo} no existe")
     
-    # Si el archivo es muy grande, usar chunks con pandas
-    chunksize = 10000
-    counter = 0
+    # Verificar la extensión del archivo (.csv, .csv.gz, .csv.zst o .parquet)
+    tipo_archivo(ruta_archivo)
     
-    # Verificar la extensión del archivo
-    _, extension = os.path.splitext(ruta_archivo)
+    if marcar_ausentes and (not delta or por_chunk or rango_bytes is not None):
+        # Con checkpoints o rangos no se conocen todas las claves del extracto
+        raise ValueError("marcar_ausentes requiere delta=True y no es compatible con por_chunk ni rango_bytes")
     
-    if extension.lower() == '.csv':
+    counter = 0
+    estadisticas_fechas = {}
+    checkpoint = None
+    chunk_inicial = 0
+    resumen = {'insertados': 0, 'actualizados': 0, 'sin_cambios': 0, 'ausentes': 0, 'duplicados': 0,
+               'documentos': set()}
+    claves_vistas = []
+    # Ids de las tablas de dimensión ya resueltos en esta carga
+    cache_dimensiones = {}
+    etapas = {'lectura': 0.0, 'transformacion': 0.0, 'insercion': 0.0, 'delta': 0.0}
+    
+    if por_chunk:
+        checkpoint = _obtener_checkpoint(ruta_archivo, modelo, chunksize, rango_bytes)
+        if checkpoint.completado:
+            print(f"{modelo.__name__}: el archivo ya fue cargado por completo ({checkpoint.filas_cargadas} filas)")
+            return resumen if delta else 0
+        chunk_inicial = checkpoint.chunks_cargados
+        if chunk_inicial:
+            print(f"{modelo.__name__}: reanudando desde el chunk {chunk_inicial} "
+                  f"({checkpoint.filas_cargadas} filas ya cargadas)")
+    
+    with (nullcontext() if por_chunk else transaction.atomic()):
         # Leer el archivo en chunks para manejar archivos grandes
-        for chunk in pd.read_csv(ruta_archivo, chunksize=chunksize, sep="|"):
-            registros = []
+        chunks = _medir_lectura(_leer_csv_por_chunks(ruta_archivo, chunksize, dtype, rango_bytes, columnas), etapas)
+        for indice, chunk in enumerate(chunks):
+            # Los chunks ya confirmados solo se leen, no se transforman ni insertan
+            if indice < chunk_inicial:
+                continue
             
-            for _, row in chunk.iterrows():
-                # Convertir valores a booleanos correctamente:
-                # Si el valor es 1, debe ser True; si es 0, debe ser False
-                desaparicion = row.get('desaparicion_forzada', 0)
-                homicidio = row.get('homicidio', 0)
-                secuestro = row.get('secuestro', 0)
-                reclutamiento = row.get('reclutamiento_ilicito', 0)
-                rud = row.get('rud', 0)
-                rud_desaparecido = row.get('1.0', 0)
-                rud_vivo = row.get('2.0', 0)
-                rud_muerto = row.get('3.0', 0)
-                funcionario = row.get('funcionario', 0)
-                
-                # Asegurarse de que los valores sean enteros o booleanos antes de la conversión
-                if not pd.isna(desaparicion):
-                    desaparicion = int(desaparicion) == 1
-                else:
-                    desaparicion = False
-                    
-                if not pd.isna(homicidio):
-                    homicidio = int(homicidio) == 1
-                else:
-                    homicidio = False
-                    
-                if not pd.isna(secuestro):
-                    secuestro = int(secuestro) == 1
+            with (transaction.atomic() if por_chunk else nullcontext()):
+                if delta:
+                    # La transformación e inserción del chunk cuentan en sus etapas;
+                    # 'delta' es el resto (hashes, búsqueda y comparación con lo guardado)
+                    inicio = time.perf_counter()
+                    medido = etapas['transformacion'] + etapas['insercion']
+                    _cargar_chunk_delta(modelo, columnas, chunk, modo, resumen, claves_vistas, estadisticas_fechas,
+                                        cache_dimensiones, etapas)
+                    etapas['delta'] += (time.perf_counter() - inicio
+                                        - (etapas['transformacion'] + etapas['insercion'] - medido))
                 else:
-                    secuestro = False
-                    
-                if not pd.isna(reclutamiento):
-                    reclutamiento = int(reclutamiento) == 1
-                else:
-                    reclutamiento = False
-                    
-                if not pd.isna(rud):
-                    rud = int(rud) == 1
-                else:
-                    rud = False
+                    with _medir_etapa(etapas, 'transformacion'):
+                        frame = transformar_chunk(chunk, columnas, estadisticas_fechas, modelo)
+                        frame = resolver_dimensiones(modelo, frame, cache_dimensiones)
+                    with _medir_etapa(etapas, 'insercion'):
+                        _insertar_frame(modelo, frame, modo)
                 
-                if not pd.isna(rud_desaparecido):
-                    rud_desaparecido = int(rud_desaparecido) == 1
-                else:
-                    rud_desaparecido = False
-                    
-                if not pd.isna(rud_vivo):
-                    rud_vivo = int(rud_vivo) == 1
-                else:
-                    rud_vivo = False
-                    
-                if not pd.isna(rud_muerto): 
-                    rud_muerto = int(rud_muerto) == 1
-                else:
-                    rud_muerto = False
-                    
-                if not pd.isna(funcionario): 
-                    funcionario = int(funcionario) == 1
-                else:
-                    funcionario = False
-                
-                registro = PersonasDf(
-                    numero_identificacion=str(row.get('numero_documento', '')).strip(),
-                    nombre_completo=str(row.get('nombre_completo', '')).strip(),
-                    desaparcion_forzada=desaparicion,
-                    homicidio=homicidio,
-                    secuestro=secuestro,
-                    reclutamiento_ilicito=reclutamiento,
-                    rud=rud,
-                    rud_desaparecido=rud_desaparecido,
-                    rud_vivo=rud_vivo,
-                    rud_muerto=rud_muerto,
-                    funcionario_FGN=funcionario
-                )
-                registros.append(registro)
-            
-            # Insertar en bulk (mucho más eficiente que uno por uno)
-            # El parámetro ignore_conflicts evita errores por duplicados
-            PersonasDf.objects.bulk_create(registros, ignore_conflicts=True)
-            counter += len(registros)
+                if por_chunk:
+                    checkpoint.chunks_cargados = indice + 1
+                    checkpoint.filas_cargadas += len(chunk)
+                    checkpoint.save()
             
-        return counter
-    else:
-        raise ValueError(f"Formato de archivo no soportado: {extension}")
+            counter += len(chunk)
+        
+        if delta:
+            resumen['duplicados'] = _contar_duplicados(claves_vistas)
+            if resumen['duplicados']:
+                print(f"ADVERTENCIA: {resumen['duplicados']} filas de {modelo.__name__} repiten la clave "
+                      f"{CLAVES_DELTA[modelo]} y se guardaron sobre la fila anterior con esa clave; "
+                      f"una carga completa (sin --delta) las guardaría todas")
+        
+        if marcar_ausentes:
+            with _medir_etapa(etapas, 'delta'):
+                resumen['ausentes'] = _marcar_ausentes(modelo, claves_vistas)
+    
+    if checkpoint is not None:
+        checkpoint.completado = True
+        checkpoint.save()
+    
+    _mostrar_estadisticas_fechas(modelo, estadisticas_fechas)
+    
+    if metricas is not None:
+        metricas['filas_leidas'] = counter
+        metricas['etapas'] = etapas
+    
+    if delta:
+        return resumen
+    return counter
 
-@transaction.atomic
-def cargar_rud(ruta_archivo):
+def cargar_consolidado_spoa(ruta_archivo, modo='orm', por_chunk=False, delta=False, marcar_ausentes=False,
+                            rango_bytes=None, metricas=None):
     """
-    Carga datos desde un archivo CSV al modelo RegistroUnicoDesaparecidos
+    Carga datos desde un archivo CSV al modelo ConsolidadoSpoa
     
     Args:
         ruta_archivo: Ruta al archivo CSV que contiene los datos
+        modo: 'orm' o 'copy' (ver MODOS_CARGA)
+        por_chunk: Confirmar cada chunk por separado y reanudar desde el último checkpoint
+        delta: Carga incremental por hash de contenido
+        marcar_ausentes: En modo delta, marcar los registros que no vienen en el archivo
+        rango_bytes: Tupla (inicio, fin) para cargar solo una parte del archivo
+        metricas: Diccionario opcional que se completa con las filas leídas y los
+                  segundos de cada etapa (ver _cargar_csv)
         
     Returns:
-        int: Número de registros cargados
+        int: Número de registros cargados (dict con el resumen en modo delta)
     """
-    # Verificar que el archivo existe
-    if not os.path.exists(ruta_archivo):
-        raise FileNotFoundError(f"El archivo {ruta_archivo} no existe")
-    
-    # Si el archivo es muy grande, usar chunks con pandas
-    chunksize = 10000
-    counter = 0
-    
-    # Verificar la extensión del archivo
-    _, extension = os.path.splitext(ruta_archivo)
+    return _cargar_csv(ruta_archivo, ConsolidadoSpoa, COLUMNAS_CONSOLIDADO, dtype={'nunc': str}, modo=modo, por_chunk=por_chunk,
+                       delta=delta, marcar_ausentes=marcar_ausentes, rango_bytes=rango_bytes,
+                       metricas=metricas)
+
+def cargar_personas_df(ruta_archivo, modo='orm', por_chunk=False, delta=False, marcar_ausentes=False,
+                       rango_bytes=None, metricas=None):
+    """
+    Carga datos desde un archivo CSV al modelo PersonasDf
+    Debe ejecutarse ANTES de cargar_consolidado_spoa
     
-    if extension.lower() == '.csv':
-        # Leer el archivo en chunks para manejar archivos grandes
-        for chunk in pd.read_csv(ruta_archivo, chunksize=chunksize, sep="|"):
-            registros = []
-            
-            for _, row in chunk.iterrows():
-                # Crear objeto pero no guardar aún (bulk_create es más eficiente)
-                registro = RegistroUnicoDesaparecidos(
-                    numero_radicado=str(row.get('numero_radicado', '')).strip(),
-                    nombre_completo=str(row.get('nombre_completo', '')).strip(),
-                    tipo_documento=str(row.get('tipo_documento', '')).strip(),
-                    numero_documento=str(row.get('numero_documento', '')).strip(),
-                    departamento_desaparicion=str(row.get('departamento_desaparicion', '')).strip(),
-                    municipio_desaparicion=str(row.get('municipio_desaparicion', '')).strip(),
-                    barrio_vereda_desaparicion=str(row.get('barrio/vereda_desaparicion', '')).strip(),
-                    fecha_desaparicion=parse_date(row.get('fecha_desaparicion')),
-                    sexo=str(row.get('sexo', '')).strip(),
-                    edad_1=row.get('edad_1') if not pd.isna(row.get('edad_1')) else None,
-                    edad_2=row.get('edad_2') if not pd.isna(row.get('edad_2')) else None,
-                    estatura_1=row.get('estatura_1') if not pd.isna(row.get('estatura_1')) else None,
-                    estatura_2=row.get('estatura_2') if not pd.isna(row.get('estatura_2')) else None,
-                    ancestro_racial=str(row.get('ancestro_racial', '')).strip(),
-                    estado_desaparicion=str(row.get('estado_desaparicion', '')).strip(),
-                    senales_particulares=str(row.get('senales_particulares', '')).strip()
-                )
-                registros.append(registro)
-            
-            # Insertar en bulk (mucho más eficiente que uno por uno)
-            # El parámetro ignore_conflicts evita errores por duplicados
-            RegistroUnicoDesaparecidos.objects.bulk_create(registros, ignore_conflicts=True)
-            counter += len(registros)
-            
-        return counter
-    else:
-        raise ValueError(f"Formato de archivo no soportado: {extension}")
+    Args:
+        ruta_archivo: Ruta al archivo CSV que contiene los datos
+        modo: 'orm' o 'copy' (ver MODOS_CARGA)
+        por_chunk: Confirmar cada chunk por separado y reanudar desde el último checkpoint
+        delta: Carga incremental por hash de contenido
+        marcar_ausentes: En modo delta, marcar los registros que no vienen en el archivo
+        rango_bytes: Tupla (inicio, fin) para cargar solo una parte del archivo
+        metricas: Diccionario opcional que se completa con las filas leídas y los
+                  segundos de cada etapa (ver _cargar_csv)
+        
+    Returns:
+        int: Número de registros cargados (dict con el resumen en modo delta)
+    """
+    return _cargar_csv(ruta_archivo, PersonasDf, COLUMNAS_PERSONAS, modo=modo, por_chunk=por_chunk,
+                       delta=delta, marcar_ausentes=marcar_ausentes, rango_bytes=rango_bytes,
+                       metricas=metricas)
 
+def cargar_rud(ruta_archivo, modo='orm', por_chunk=False, delta=False, marcar_ausentes=False,
+               rango_bytes=None, metricas=None):
+    """
+    Carga datos desde un archivo CSV al modelo RegistroUnicoDesaparecidos
+    
+    Args:
+        ruta_archivo: Ruta al archivo CSV que contiene los datos
+        modo: 'orm' o 'copy' (ver MODOS_CARGA)
+        por_chunk: Confirmar cada chunk por separado y reanudar desde el último checkpoint
+        delta: Carga incremental por hash de contenido
+        marcar_ausentes: En modo delta, marcar los registros que no vienen en el archivo
+        rango_bytes: Tupla (inicio, fin) para cargar solo una parte del archivo
+        metricas: Diccionario opcional que se completa con las filas leídas y los
+                  segundos de cada etapa (ver _cargar_csv)
+        
+    Returns:
+        int: Número de registros cargados (dict con el resumen en modo delta)
+    """
+    return _cargar_csv(ruta_archivo, RegistroUnicoDesaparecidos, COLUMNAS_RUD, modo=modo, por_chunk=por_chunk,
+                       delta=delta, marcar_ausentes=marcar_ausentes, rango_bytes=rango_bytes,
+                       metricas=metricas)
 
 @transaction.atomic
-def cargar_perfiles_personas(ruta_archivo):
+def cargar_perfiles_personas(ruta_archivo, modo='orm', tamano_lote=1000):
     """
     Carga perfiles de personas desde un archivo JSON al modelo PerfilPersona
     
+    El archivo se recorre de forma incremental y los perfiles se insertan en
+    lotes de tamano_lote, así la memoria no crece con el tamaño del archivo.
+    
     Args:
         ruta_archivo: Ruta al archivo JSON que contiene los perfiles
+        modo: 'orm' o 'copy' (ver MODOS_CARGA)
+        tamano_lote: Número de perfiles por lote de inserción
         
     Returns:
         int: Número de perfiles cargados
@@ -278,147 +745,89 @@ def cargar_perfiles_personas(ruta_archivo):
     if extension.lower() != '.json':
         raise ValueError(f"El archivo debe ser .json, no {extension}")
     
-    # Leer archivo JSON
-    with open(ruta_archivo, 'r', encoding='utf-8') as file:
-        perfiles_data = json.load(file)
-    
-    # Lista para almacenar los perfiles a crear
+    # Lote de perfiles pendientes de insertar
     perfiles = []
     counter = 0
     
-    # Procesar cada perfil en el JSON
-    for documento, datos in perfiles_data.items():
+    # Procesar cada perfil a medida que se lee del JSON
+    for documento, datos in iterar_objeto_json(ruta_archivo):
         try:
-            perfil = PerfilPersona(
-                documento=documento,
-                nombre=datos.get('nombre', ''),
-                total_casos=datos.get('total_casos', 0),
-                perfil=datos.get('perfil', ''),
-                error=datos.get('error', None),
-                tiempo_generacion=datos.get('tiempo_generacion', None)
-            )
+            perfil = {
+                'documento': documento,
+                'nombre': datos.get('nombre', ''),
+                'total_casos': datos.get('total_casos', 0),
+                'perfil': datos.get('perfil', ''),
+                'error': datos.get('error', None),
+                'tiempo_generacion': datos.get('tiempo_generacion', None)
+            }
             perfiles.append(perfil)
         except Exception as e:
             print(f"Error al procesar perfil {documento}: {str(e)}")
             continue
+        
+        if len(perfiles) >= tamano_lote:
+            counter += _insertar_lote_perfiles(perfiles, modo)
+            perfiles = []
     
-    # Insertar en bulk (mucho más eficiente que uno por uno)
-    # El parámetro ignore_conflicts evita errores por duplicados
-    PerfilPersona.objects.bulk_create(perfiles, ignore_conflicts=True)
-    counter = len(perfiles)
+    if perfiles:
+        counter += _insertar_lote_perfiles(perfiles, modo)
             
     return counter
 
 
-@transaction.atomic
-def cargar_aparecidos_vivos_no_registrados(ruta_archivo):
+def _insertar_lote_perfiles(perfiles, modo):
+    """
+    Inserta un lote de perfiles y devuelve cuántos se procesaron
+    """
+    # dtype=object conserva los None (no los convierte a NaN)
+    _insertar_frame(PerfilPersona, pd.DataFrame(perfiles, dtype=object), modo)
+    return len(perfiles)
+
+
+
+def cargar_aparecidos_vivos_no_registrados(ruta_archivo, modo='orm', por_chunk=False, delta=False, marcar_ausentes=False,
+                                           rango_bytes=None, metricas=None):
     """
     Carga datos desde un archivo CSV al modelo AparecidosVivosNoRegistrados
     
     Args:
         ruta_archivo: Ruta al archivo CSV que contiene los datos
+        modo: 'orm' o 'copy' (ver MODOS_CARGA)
+        por_chunk: Confirmar cada chunk por separado y reanudar desde el último checkpoint
+        delta: Carga incremental por hash de contenido
+        marcar_ausentes: En modo delta, marcar los registros que no vienen en el archivo
+        rango_bytes: Tupla (inicio, fin) para cargar solo una parte del archivo
+        metricas: Diccionario opcional que se completa con las filas leídas y los
+                  segundos de cada etapa (ver _cargar_csv)
         
     Returns:
-        int: Número de registros cargados
+        int: Número de registros cargados (dict con el resumen en modo delta)
     """
-    # Verificar que el archivo existe
-    if not os.path.exists(ruta_archivo):
-        raise FileNotFoundError(f"El archivo {ruta_archivo} no existe")
+    return _cargar_csv(ruta_archivo, AparecidosVivosNoRegistrados, COLUMNAS_APARECIDOS, modo=modo, por_chunk=por_chunk,
+                       delta=delta, marcar_ausentes=marcar_ausentes, rango_bytes=rango_bytes,
+                       metricas=metricas)
     
-    # Si el archivo es muy grande, usar chunks con pandas
-    chunksize = 10000
-    counter = 0
-    
-    # Verificar la extensión del archivo
-    _, extension = os.path.splitext(ruta_archivo)
-    
-    if extension.lower() == '.csv':
-        # Leer el archivo en chunks para manejar archivos grandes
-        for chunk in pd.read_csv(ruta_archivo, chunksize=chunksize, sep="|"):
-            registros = []
-            
-            for _, row in chunk.iterrows():
-                # Crear objeto pero no guardar aún (bulk_create es más eficiente)
-                registro = AparecidosVivosNoRegistrados(
-                    numeroRadicado=str(row.get('numeroRadicado', '')).strip(),
-                    entidadradica=str(row.get('entidadradica', '')).strip(),
-                    nombreRegional=str(row.get('nombreRegional', '')).strip(),
-                    nombreSeccional=str(row.get('nombreSeccional', '')).strip(),
-                    nombreUnidadBasica=str(row.get('nombreUnidadBasica', '')).strip(),
-                    usuarioRegistra=str(row.get('usuarioRegistra', '')).strip(),
-                    fechaDesaparicion=parse_date(row.get('fechaDesaparicion')),
-                    desaparecido=str(row.get('desaparecido', '')).strip(),
-                    nombreDocumento=str(row.get('nombreDocumento', '')).strip(),
-                    numero=str(row.get('numero_documento', '')).strip(),
-                    paisDesaparicion=str(row.get('paisDesaparicion', '')).strip(),
-                    departamentoDesaparicion=str(row.get('departamentoDesaparicion', '')).strip(),
-                    municipioDesaparicion=str(row.get('municipioDesaparicion', '')).strip(),
-                    aportanteDatosDesaparecido=str(row.get('aportanteDatosDesaparecido', '')).strip(),
-                    paisAportanteDatos=str(row.get('paisAportanteDatos', '')).strip(),
-                    departamentoAportanteDatos=str(row.get('departamentoAportanteDatos', '')).strip(),
-                    municipioAportanteDatos=str(row.get('municipioAportanteDatos', '')).strip(),
-                    detalleDireccionAportanteDatos=str(row.get('detalleDireccionAportanteDatos', '')),
-                    aportanteDatos=str(row.get('aportanteDatos', '')).strip()
-                )
-                registros.append(registro)
-            
-            # Insertar en bulk (mucho más eficiente que uno por uno)
-            # El parámetro ignore_conflicts evita errores por duplicados
-            AparecidosVivosNoRegistrados.objects.bulk_create(registros, ignore_conflicts=True)
-            counter += len(registros)
-            
-        return counter
-    else:
-        raise ValueError(f"Formato de archivo no soportado: {extension}")
-    
-@transaction.atomic
-def cargar_funcionarios(ruta_archivo):
+def cargar_funcionarios(ruta_archivo, modo='orm', por_chunk=False, delta=False, marcar_ausentes=False,
+                        rango_bytes=None, metricas=None):
     """
     Carga datos de funcionarios desde un archivo CSV al modelo Funcionario
     
     Args:
         ruta_archivo: Ruta al archivo CSV que contiene los datos
+        modo: 'orm' o 'copy' (ver MODOS_CARGA)
+        por_chunk: Confirmar cada chunk por separado y reanudar desde el último checkpoint
+        delta: Carga incremental por hash de contenido
+        marcar_ausentes: En modo delta, marcar los registros que no vienen en el archivo
+        rango_bytes: Tupla (inicio, fin) para cargar solo una parte del archivo
+        metricas: Diccionario opcional que se completa con las filas leídas y los
+                  segundos de cada etapa (ver _cargar_csv)
         
     Returns:
-        int: Número de registros cargados
+        int: Número de registros cargados (dict con el resumen en modo delta)
     """
-    # Verificar que el archivo existe
-    if not os.path.exists(ruta_archivo):
-        raise FileNotFoundError(f"El archivo {ruta_archivo} no existe")
-    
-    # Si el archivo es muy grande, usar chunks con pandas
-    chunksize = 10000
-    counter = 0
-    
-    # Verificar la extensión del archivo
-    _, extension = os.path.splitext(ruta_archivo)
-    
-    if extension.lower() == '.csv':
-        # Leer el archivo en chunks para manejar archivos grandes
-        for chunk in pd.read_csv(ruta_archivo, chunksize=chunksize, sep="|"):
-            registros = []
-            
-            for _, row in chunk.iterrows():
-                # Crear objeto pero no guardar aún (bulk_create es más eficiente)
-                registro = Funcionario(
-                    numero_documento=str(row.get('numero_documento', '')).strip(),
-                    nombres_apellidos=str(row.get('nombres_apellidos', '')).strip(),
-                    nom_cargo=str(row.get('nom_cargo', '')).strip(),
-                    seccional=str(row.get('seccional', '')).strip(),
-                    nom_dependencia=str(row.get('nom_dependencia', '')).strip(),
-                    estado=str(row.get('estado', '')).strip(),
-                    fuente=str(row.get('fuente', '')).strip()
-                )
-                registros.append(registro)
-            
-            # Insertar en bulk (mucho más eficiente que uno por uno)
-            # El parámetro ignore_conflicts evita errores por duplicados
-            Funcionario.objects.bulk_create(registros, ignore_conflicts=True)
-            counter += len(registros)
-            
-        return counter
-    else:
-        raise ValueError(f"Formato de archivo no soportado: {extension}")
+    return _cargar_csv(ruta_archivo, Funcionario, COLUMNAS_FUNCIONARIOS, modo=modo, por_chunk=por_chunk,
+                       delta=delta, marcar_ausentes=marcar_ausentes, rango_bytes=rango_bytes,
+                       metricas=metricas)
 
 def obtener_distribucion_por_fuente():
     """
@@ -427,10 +836,7 @@ def obtener_distribucion_por_fuente():
     Returns:
         dict: Diccionario con las fuentes como claves y la cantidad como valores
     """
-    from django.db.models import Count
-    return list(ConsolidadoSpoa.objects.values('fuente')
-                .annotate(cantidad=Count('fuente'))
-                .order_by('-cantidad'))
+    return ConsolidadoSpoa.objects.distribucion('fuente')
 
 def obtener_distribucion_por_unidad():
     """
@@ -439,7 +845,4 @@ def obtener_distribucion_por_unidad():
     Returns:
         dict: Diccionario con las unidades como claves y la cantidad como valores
     """
-    from django.db.models import Count
-    return list(ConsolidadoSpoa.objects.values('unidad')
-                .annotate(cantidad=Count('unidad'))
-                .order_by('-cantidad'))
\ No newline at end of file
+    return ConsolidadoSpoa.objects.distribucion('unidad')
\ No newline at end of file
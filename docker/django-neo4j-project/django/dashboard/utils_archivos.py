@@ -0,0 +1,256 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from .utils_fechas import parsear_columna_fechas
+from .utils_paralelo import abrir_rango_csv
+
+
+# Extensiones de entrada soportadas por los cargar_* y el constructor de la red
+EXTENSIONES_CSV = ('.csv', '.csv.gz', '.csv.zst')
+EXTENSION_PARQUET = '.parquet'
+
+SEPARADOR_CSV = '|'
+
+# Clave de los metadatos del esquema Parquet con los tipos de una caché tipada
+CLAVE_TIPOS_PARQUET = b'dforzado.tipos'
+
+
+def _importar_parquet():
+    """
+    pyarrow es opcional: solo se necesita para leer o escribir Parquet
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Para usar archivos Parquet instale pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def tipo_archivo(ruta_archivo):
+    """
+    Devuelve 'csv' o 'parquet' según la extensión del archivo
+
+    Raises:
+        ValueError: Si la extensión no está soportada
+    """
+    nombre = ruta_archivo.lower()
+    if nombre.endswith(EXTENSION_PARQUET):
+        return 'parquet'
+    if nombre.endswith(EXTENSIONES_CSV):
+        return 'csv'
+    _, extension = os.path.splitext(ruta_archivo)
+    raise ValueError(f"Formato de archivo no soportado: {extension}")
+
+
+def admite_rangos(ruta_archivo):
+    """
+    Solo los CSV sin comprimir se pueden dividir en rangos de bytes
+    """
+    return ruta_archivo.lower().endswith('.csv')
+
+
+def ruta_parquet(ruta_csv):
+    """
+    Ruta de la caché Parquet de un CSV (datos.csv.gz -> datos.parquet)
+    """
+    base = ruta_csv
+    for extension in ('.gz', '.zst', '.csv'):
+        if base.lower().endswith(extension):
+            base = base[:-len(extension)]
+    return base + EXTENSION_PARQUET
+
+
+def resolver_archivo_entrada(ruta_csv):
+    """
+    Elige el archivo a leer para un CSV esperado: su caché Parquet si existe y no
+    es más antigua que el CSV, si no el CSV o su versión comprimida.
+
+    Args:
+        ruta_csv: Ruta del CSV original (ej. data/consolidado.csv)
+
+    Returns:
+        str: Ruta del archivo a cargar (puede no existir)
+    """
+    candidatos_csv = [ruta_csv] + [ruta_csv + extension for extension in ('.gz', '.zst')]
+    existentes = [ruta for ruta in candidatos_csv if os.path.exists(ruta)]
+
+    cache = ruta_parquet(ruta_csv)
+    if os.path.exists(cache):
+        if not existentes or os.path.getmtime(cache) >= max(os.path.getmtime(ruta) for ruta in existentes):
+            return cache
+
+    return existentes[0] if existentes else ruta_csv
+
+
+def _tipos_arrow(pa):
+    """
+    Tipo de Arrow de cada tipo de columna de los cargar_* (ver COLUMNAS_CONSOLIDADO);
+    las columnas de texto y las que no tienen tipo se guardan como texto
+    """
+    return {'fecha': pa.date32(), 'numero': pa.float64(), 'booleano': pa.float64()}
+
+
+def _tipar_chunk(chunk, tipos):
+    """
+    Convierte las columnas de fecha y numéricas de un chunk leído como texto.
+    Las fechas pasan por el mismo parseo que usan los cargar_*, así que un valor
+    que no coincide con ningún formato queda nulo igual que en la carga.
+    """
+    for columna, tipo in tipos.items():
+        if columna not in chunk.columns:
+            continue
+        if tipo == 'fecha':
+            chunk[columna], _ = parsear_columna_fechas(chunk[columna])
+        elif tipo in ('numero', 'booleano'):
+            chunk[columna] = pd.to_numeric(chunk[columna], errors='coerce')
+    return chunk
+
+
+def es_cache_tipada(ruta_archivo):
+    """
+    Indica si un Parquet es una caché tipada (escrita por convertir_a_parquet con tipos)
+    """
+    _, pq = _importar_parquet()
+    metadatos = pq.read_schema(ruta_archivo).metadata or {}
+    return CLAVE_TIPOS_PARQUET in metadatos
+
+
+def _inferir_tipos(chunk, dtype):
+    """
+    Una caché Parquet sin tipos guarda el texto original del CSV. Al leerla se
+    infieren los números igual que lo hace read_csv en cada chunk, para que una
+    carga desde Parquet produzca exactamente las mismas filas que desde el CSV.
+    """
+    forzadas = set(dtype or ())
+    for columna in chunk.columns:
+        # Arrow entrega los nulos de texto como None; read_csv usa NaN
+        chunk[columna] = chunk[columna].where(chunk[columna].notna(), np.nan)
+        if columna in forzadas:
+            continue
+        presentes = chunk[columna].notna()
+        numeros = pd.to_numeric(chunk[columna], errors='coerce')
+        if int(numeros.notna().sum()) == int(presentes.sum()):
+            chunk[columna] = numeros
+    return chunk
+
+
+def _leer_parquet_por_chunks(ruta_archivo, chunksize, dtype=None, columnas=None):
+    """
+    Recorre un Parquet por lotes leyendo solo las columnas pedidas. Las cachés
+    tipadas se entregan tal como están guardadas; en las demás se infieren los
+    números de cada chunk (ver _inferir_tipos).
+    """
+    _, pq = _importar_parquet()
+    archivo = pq.ParquetFile(ruta_archivo)
+    tipada = CLAVE_TIPOS_PARQUET in (archivo.schema_arrow.metadata or {})
+
+    seleccion = None
+    if columnas is not None:
+        disponibles = set(archivo.schema_arrow.names)
+        seleccion = [columna for columna in dict.fromkeys(columnas) if columna in disponibles]
+
+    inicio = 0
+    for lote in archivo.iter_batches(batch_size=chunksize, columns=seleccion):
+        if tipada:
+            # Las fechas como datetime64 para que parsear_columna_fechas no las vuelva a parsear
+            chunk = lote.to_pandas(date_as_object=False)
+        else:
+            chunk = _inferir_tipos(lote.to_pandas(), dtype)
+        # Índice continuo entre chunks, como en read_csv
+        chunk.index = pd.RangeIndex(inicio, inicio + len(chunk))
+        inicio += len(chunk)
+        yield chunk
+
+
+def leer_por_chunks(ruta_archivo, chunksize, dtype=None, columnas=None, rango_bytes=None):
+    """
+    Lee un CSV (plano, .gz o .zst) o un Parquet en chunks de pandas.
+
+    Args:
+        ruta_archivo: Ruta al archivo
+        chunksize: Número de filas por chunk
+        dtype: Tipos a forzar al leer (ej. {'nunc': str})
+        columnas: Columnas a leer; las que no existan en el archivo se ignoran
+        rango_bytes: Tupla (inicio, fin) para leer solo una parte de un CSV sin comprimir
+
+    Returns:
+        Iterador de DataFrames
+    """
+    if tipo_archivo(ruta_archivo) == 'parquet':
+        if rango_bytes is not None:
+            raise ValueError("rango_bytes solo se puede usar con CSV sin comprimir")
+        return _leer_parquet_por_chunks(ruta_archivo, chunksize, dtype, columnas)
+
+    fuente = ruta_archivo
+    if rango_bytes is not None:
+        if not admite_rangos(ruta_archivo):
+            raise ValueError("rango_bytes solo se puede usar con CSV sin comprimir")
+        fuente = abrir_rango_csv(ruta_archivo, rango_bytes)
+
+    usecols = None
+    if columnas is not None:
+        seleccion = set(columnas)
+        usecols = lambda columna: columna in seleccion
+
+    return pd.read_csv(fuente, chunksize=chunksize, sep=SEPARADOR_CSV, dtype=dtype, usecols=usecols,
+                       compression='infer' if rango_bytes is None else None)
+
+
+def convertir_a_parquet(ruta_csv, ruta_destino=None, chunksize=100000, compresion='zstd', tipos=None):
+    """
+    Convierte un CSV (plano o comprimido) en una caché Parquet, chunk por chunk.
+
+    Con tipos, las columnas de fecha se guardan ya parseadas (date32) y las
+    numéricas y booleanas como float64; el resto, incluidos nunc y los números de
+    documento, como el texto original. El esquema es fijo, no depende de lo que
+    pandas infiera en cada chunk, y se marca en los metadatos para que al leer no
+    se vuelvan a inferir los números ni a parsear las fechas.
+
+    Sin tipos todas las columnas se guardan como texto y los números se infieren
+    en cada lectura. En ambos casos las cargas posteriores no vuelven a tokenizar
+    el texto y pueden leer solo las columnas que necesitan.
+
+    Args:
+        ruta_csv: Ruta al CSV de origen
+        ruta_destino: Ruta del Parquet (por defecto ruta_parquet(ruta_csv))
+        chunksize: Filas por chunk (y por grupo de filas del Parquet)
+        compresion: Códec de compresión del Parquet
+        tipos: Diccionario columna_csv -> tipo ('texto', 'fecha', 'numero', ...),
+               ver utils.tipos_columnas_archivo
+
+    Returns:
+        tuple: (ruta del Parquet, número de filas escritas)
+    """
+    pa, pq = _importar_parquet()
+    if tipo_archivo(ruta_csv) != 'csv':
+        raise ValueError(f"El archivo de origen debe ser CSV: {ruta_csv}")
+
+    ruta_destino = ruta_destino or ruta_parquet(ruta_csv)
+    temporal = ruta_destino + '.tmp'
+    escritor = None
+    filas = 0
+
+    try:
+        for chunk in pd.read_csv(ruta_csv, chunksize=chunksize, sep=SEPARADOR_CSV, dtype=str, compression='infer'):
+            if escritor is None:
+                esquema = pa.schema([(str(columna), pa.string()) for columna in chunk.columns])
+                if tipos is not None:
+                    tipos_arrow = _tipos_arrow(pa)
+                    esquema = pa.schema(
+                        [(str(columna), tipos_arrow.get(tipos.get(columna), pa.string())) for columna in chunk.columns],
+                        metadata={CLAVE_TIPOS_PARQUET: json.dumps(tipos).encode()},
+                    )
+                escritor = pq.ParquetWriter(temporal, esquema, compression=compresion)
+            if tipos is not None:
+                chunk = _tipar_chunk(chunk, tipos)
+            escritor.write_table(pa.Table.from_pandas(chunk, schema=esquema, preserve_index=False))
+            filas += len(chunk)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+    # La caché solo reemplaza a la anterior cuando está completa
+    os.replace(temporal, ruta_destino)
+    return ruta_destino, filas
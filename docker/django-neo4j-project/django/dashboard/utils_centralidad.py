@@ -0,0 +1,441 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from django.db import connections
+from .utils_grafo import etiquetar_componentes
+
+
+# Máximo de estados (fuente, nodo) de un lote de recorridos simultáneos: las
+# componentes pequeñas se recorren desde muchas fuentes a la vez
+LIMITE_ESTADOS = 1 << 21
+
+# Adyacencia de los procesos del pool (ver _inicializar_proceso)
+_ADYACENCIA = None
+
+
+def tamano_muestra(tamano, error=0.05, probabilidad_fallo=0.1):
+    """
+    Fuentes a muestrear en una componente para que la betweenness normalizada de
+    todos sus nodos quede a menos de error del valor exacto con probabilidad
+    1 - probabilidad_fallo (cota de Hoeffding con unión sobre los nodos). La
+    misma muestra estima la suma de distancias de la closeness.
+
+    Args:
+        tamano: Nodos de la componente
+        error: Error absoluto máximo de la betweenness normalizada
+        probabilidad_fallo: Probabilidad de superar el error
+
+    Returns:
+        int: Número de fuentes (el tamaño de la componente si no conviene muestrear)
+    """
+    if tamano <= 2:
+        return tamano
+    return min(tamano, math.ceil(math.log(2 * tamano / probabilidad_fallo) / (2 * error ** 2)))
+
+
+def adyacencia_por_componente(n, origen, destino, componente):
+    """
+    Reordena los nodos para que cada componente ocupe un rango contiguo y arma
+    la adyacencia CSR en ese orden: un recorrido desde una fuente solo usa
+    estados para los nodos de su componente.
+
+    Returns:
+        tuple: (posición de cada nodo en el nuevo orden, inicio de cada componente,
+                tamaño de cada componente, indptr, indices)
+    """
+    orden = np.argsort(componente, kind='stable')
+    posicion = np.empty(n, dtype=np.int64)
+    posicion[orden] = np.arange(n, dtype=np.int64)
+    tamanos = np.bincount(componente).astype(np.int64)
+    inicios = np.cumsum(tamanos) - tamanos
+
+    u = posicion[np.asarray(origen, dtype=np.int64)]
+    v = posicion[np.asarray(destino, dtype=np.int64)]
+    fuentes = np.concatenate([u, v])
+    vecinos = np.concatenate([v, u])
+    orden_enlaces = np.argsort(fuentes, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(fuentes, minlength=n), out=indptr[1:])
+    return posicion, inicios, tamanos, indptr, vecinos[orden_enlaces]
+
+
+def _expandir(indptr, indices, frontera, desplazamiento):
+    """
+    Enlaces que salen de los estados de la frontera: pares (estado padre, estado hijo)
+    """
+    nodos = frontera - desplazamiento[frontera]
+    inicio = indptr[nodos]
+    cantidad = indptr[nodos + 1] - inicio
+    enlaces = int(cantidad.sum())
+    # Vecinos de toda la frontera: posiciones inicio .. inicio + cantidad de cada nodo
+    padres = np.repeat(frontera, cantidad)
+    posiciones = np.arange(enlaces) + np.repeat(inicio - (np.cumsum(cantidad) - cantidad), cantidad)
+    return padres, indices[posiciones] + desplazamiento[padres]
+
+
+def _sin_repetidos(hijos, marca):
+    # Un hijo puede tener varios padres: queda la última aparición de cada uno
+    orden = np.arange(len(hijos))
+    marca[hijos] = orden
+    return hijos[marca[hijos] == orden]
+
+
+def _estados(inicios, tamanos):
+    """
+    Desplazamiento de cada fuente y de cada estado (estado = posición del nodo + desplazamiento)
+    """
+    desplazamiento_fuente = np.cumsum(tamanos) - tamanos - inicios
+    return desplazamiento_fuente, np.repeat(desplazamiento_fuente, tamanos)
+
+
+def _distancias_lote(indptr, indices, fuentes, inicios, tamanos):
+    """
+    BFS desde varias fuentes a la vez, con los mismos estados que _brandes_lote
+
+    Returns:
+        np.ndarray: Distancia de cada estado a su fuente, en bloques consecutivos de tamanos
+    """
+    total = int(tamanos.sum())
+    desplazamiento_fuente, desplazamiento = _estados(inicios, tamanos)
+    distancia = np.full(total, -1, dtype=np.int32)
+    marca = np.empty(total, dtype=np.int64)
+
+    frontera = fuentes + desplazamiento_fuente
+    distancia[frontera] = 0
+    nivel = 0
+    while len(frontera):
+        _, hijos = _expandir(indptr, indices, frontera, desplazamiento)
+        hijos = hijos[distancia[hijos] == -1]
+        nivel += 1
+        distancia[hijos] = nivel
+        frontera = _sin_repetidos(hijos, marca)
+    return distancia
+
+
+def _brandes_lote(indptr, indices, fuentes, inicios, tamanos):
+    """
+    Algoritmo de Brandes (grafo no ponderado) desde varias fuentes a la vez,
+    por niveles del BFS y con operaciones vectorizadas. Cada fuente tiene sus
+    propios estados, uno por nodo de su componente: el estado de un nodo es su
+    posición más el desplazamiento de la fuente.
+
+    Args:
+        indptr, indices: Adyacencia CSR con las componentes en rangos contiguos
+        fuentes: Posiciones de las fuentes
+        inicios, tamanos: Rango de la componente de cada fuente
+
+    Returns:
+        tuple: (nodo de cada estado, dependencia δ_s(v), distancia d(s, v), niveles recorridos)
+    """
+    total = int(tamanos.sum())
+    desplazamiento_fuente, desplazamiento = _estados(inicios, tamanos)
+    distancia = np.full(total, -1, dtype=np.int32)
+    sigma = np.zeros(total, dtype=np.float64)
+    dependencia = np.zeros(total, dtype=np.float64)
+    marca = np.empty(total, dtype=np.int64)
+
+    frontera = fuentes + desplazamiento_fuente
+    distancia[frontera] = 0
+    sigma[frontera] = 1.0
+    niveles = []
+    while len(frontera):
+        padres, hijos = _expandir(indptr, indices, frontera, desplazamiento)
+
+        # Los enlaces del DAG de caminos mínimos van a nodos no visitados: los
+        # del siguiente nivel solo se descubren desde este
+        nuevos = distancia[hijos] == -1
+        padres = padres[nuevos]
+        hijos = hijos[nuevos]
+        if not len(hijos):
+            break
+        distancia[hijos] = len(niveles) + 1
+        np.add.at(sigma, hijos, sigma[padres])
+        niveles.append((padres, hijos))
+        frontera = _sin_repetidos(hijos, marca)
+
+    for padres, hijos in reversed(niveles):
+        np.add.at(dependencia, padres, sigma[padres] / sigma[hijos] * (1.0 + dependencia[hijos]))
+    # La fuente no está en los caminos que empiezan en ella
+    dependencia[fuentes + desplazamiento_fuente] = 0.0
+    return np.arange(total) - desplazamiento, dependencia, distancia, len(niveles)
+
+
+def _inicializar_proceso(indptr, indices):
+    global _ADYACENCIA
+    _ADYACENCIA = (indptr, indices)
+
+
+def _acumular_fuentes(fuentes, inicios, tamanos, pesos):
+    """
+    Suma ponderada de dependencias y distancias desde un grupo de fuentes
+    consecutivas, recorridas en lotes de hasta LIMITE_ESTADOS estados.
+
+    Returns:
+        tuple: (primera posición del rango, betweenness sin normalizar, suma de
+                distancias, mayor profundidad de BFS) con los arreglos del rango
+                de posiciones que cubren las componentes de las fuentes
+    """
+    indptr, indices = _ADYACENCIA
+    primera = int(inicios[0])
+    ultima = int((inicios + tamanos).max())
+    betweenness = np.zeros(ultima - primera, dtype=np.float64)
+    distancias = np.zeros(ultima - primera, dtype=np.float64)
+    profundidad = 0
+
+    lotes = (np.cumsum(tamanos) - 1) // LIMITE_ESTADOS
+    cortes = np.flatnonzero(np.diff(lotes)) + 1
+    for seleccion in np.split(np.arange(len(fuentes)), cortes):
+        nodos, dependencia, distancia, niveles = _brandes_lote(
+            indptr, indices, fuentes[seleccion], inicios[seleccion], tamanos[seleccion]
+        )
+        peso = np.repeat(pesos[seleccion], tamanos[seleccion])
+        desde = int(inicios[seleccion].min())
+        hasta = int((inicios[seleccion] + tamanos[seleccion]).max())
+        relativos = nodos - desde
+        betweenness[desde - primera:hasta - primera] += np.bincount(
+            relativos, weights=peso * dependencia, minlength=hasta - desde)
+        distancias[desde - primera:hasta - primera] += np.bincount(
+            relativos, weights=peso * distancia, minlength=hasta - desde)
+        profundidad = max(profundidad, niveles)
+    return primera, betweenness, distancias, profundidad
+
+
+def _ejecutar_tramos(funcion, argumentos, indptr, indices, procesos):
+    """
+    Ejecuta funcion(*args) para cada tramo de argumentos, en un pool de procesos
+    que reciben la adyacencia una sola vez, o en el proceso actual si procesos es 1
+
+    Returns:
+        iterator: Resultados en el orden de los tramos
+    """
+    if procesos > 1 and len(argumentos) > 1:
+        # Las conexiones abiertas no se pueden compartir con los procesos del pool
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso,
+                                 initargs=(indptr, indices)) as pool:
+            yield from pool.map(funcion, *zip(*argumentos))
+    else:
+        _inicializar_proceso(indptr, indices)
+        for args in argumentos:
+            yield funcion(*args)
+
+
+def _repartir(costos, partes):
+    """
+    Corta una secuencia de costos en hasta partes tramos contiguos de costo similar
+    """
+    acumulado = np.cumsum(costos)
+    objetivos = acumulado[-1] * np.arange(1, partes) / partes
+    cortes = np.unique(np.searchsorted(acumulado, objetivos, side='right'))
+    return np.split(np.arange(len(costos)), cortes[(cortes > 0) & (cortes < len(costos))])
+
+
+def calcular_centralidad(n, origen, destino, componente=None, error=0.05, probabilidad_fallo=0.1,
+                         procesos=1, semilla=None):
+    """
+    Betweenness y closeness de todos los nodos, normalizadas como en networkx
+    (betweenness_centrality y closeness_centrality con wf_improved).
+
+    Cada componente se resuelve por separado: en las que tienen menos nodos que
+    tamano_muestra(tamaño, error, probabilidad_fallo) se usan todos los nodos
+    como fuentes y el resultado es exacto; en las demás se muestrean ese número
+    de fuentes (pivotes) al azar y las sumas se escalan por tamaño / fuentes.
+    La betweenness estimada queda a menos de error con probabilidad
+    1 - probabilidad_fallo; la closeness usa la suma de distancias estimada con
+    las mismas fuentes.
+
+    Las fuentes se reparten en tramos de costo similar entre procesos.
+
+    Args:
+        n: Número de nodos
+        origen, destino: Arreglos con los extremos de cada enlace
+        componente: Componente de cada nodo (se calcula si no se proporciona)
+        error: Error absoluto máximo de la betweenness normalizada
+        probabilidad_fallo: Probabilidad de superar el error
+        procesos: Número de procesos (1 para calcular en el proceso actual)
+        semilla: Semilla para la selección de fuentes
+
+    Returns:
+        dict: betweenness y closeness (arreglos por nodo), fuentes recorridas,
+              componentes muestreadas, si el resultado es aproximado y la mayor
+              profundidad de BFS (el diámetro si es exacto y el grafo es conexo)
+    """
+    start_time = time.time()
+    if n == 0:
+        return {'betweenness': np.zeros(0), 'closeness': np.zeros(0), 'fuentes': 0,
+                'componentes_muestreadas': 0, 'aproximado': False, 'profundidad_maxima': 0}
+    if componente is None:
+        componente, _ = etiquetar_componentes(n, origen, destino)
+    posicion, inicios, tamanos, indptr, indices = adyacencia_por_componente(n, origen, destino, componente)
+    rng = np.random.default_rng(semilla)
+
+    fuentes, inicios_fuente, tamanos_fuente, pesos = [], [], [], []
+    muestreadas = 0
+    for c in np.flatnonzero(tamanos > 1):
+        tamano = int(tamanos[c])
+        muestra = tamano_muestra(tamano, error, probabilidad_fallo)
+        if muestra < tamano:
+            elegidas = np.sort(rng.choice(tamano, muestra, replace=False))
+            muestreadas += 1
+        else:
+            elegidas = np.arange(tamano)
+        fuentes.append(inicios[c] + elegidas)
+        inicios_fuente.append(np.full(muestra, inicios[c], dtype=np.int64))
+        tamanos_fuente.append(np.full(muestra, tamano, dtype=np.int64))
+        pesos.append(np.full(muestra, tamano / muestra))
+
+    betweenness = np.zeros(n, dtype=np.float64)
+    distancias = np.zeros(n, dtype=np.float64)
+    profundidad = 0
+    total_fuentes = 0
+    if fuentes:
+        fuentes = np.concatenate(fuentes)
+        inicios_fuente = np.concatenate(inicios_fuente)
+        tamanos_fuente = np.concatenate(tamanos_fuente)
+        pesos = np.concatenate(pesos)
+        total_fuentes = len(fuentes)
+        # Varios tramos por proceso para equilibrar la carga
+        tramos = _repartir(tamanos_fuente, procesos * 4 if procesos > 1 else 1)
+        print(f"Recorriendo {total_fuentes} fuentes ({muestreadas} componentes muestreadas) "
+              f"en {len(tramos)} tramos con {procesos} procesos...")
+
+        argumentos = [(fuentes[t], inicios_fuente[t], tamanos_fuente[t], pesos[t]) for t in tramos]
+        for primera, parcial_b, parcial_d, niveles in _ejecutar_tramos(_acumular_fuentes, argumentos,
+                                                                       indptr, indices, procesos):
+            betweenness[primera:primera + len(parcial_b)] += parcial_b
+            distancias[primera:primera + len(parcial_d)] += parcial_d
+            profundidad = max(profundidad, niveles)
+
+    # Volver al orden original de los nodos
+    betweenness = betweenness[posicion]
+    distancias = distancias[posicion]
+    alcanzables = tamanos[componente] - 1
+
+    if n > 2:
+        betweenness /= (n - 1) * (n - 2)
+    closeness = np.zeros(n, dtype=np.float64)
+    conectados = distancias > 0
+    closeness[conectados] = (alcanzables[conectados] / distancias[conectados]
+                             * alcanzables[conectados] / (n - 1))
+
+    print(f"Centralidad calculada en {time.time() - start_time:.2f} segundos")
+    return {
+        'betweenness': betweenness,
+        'closeness': closeness,
+        'fuentes': total_fuentes,
+        'componentes_muestreadas': muestreadas,
+        'aproximado': muestreadas > 0,
+        'profundidad_maxima': profundidad,
+    }
+
+
+def _diametros_tramo(inicios, tamanos, enlaces, limite_exacto, barridos, semilla):
+    """
+    Diámetro de un grupo de componentes. Las de hasta limite_exacto nodos se
+    recorren desde todos sus nodos (en lotes de hasta LIMITE_ESTADOS estados);
+    en las demás se acota con barridos dobles (ver diametros_componentes).
+
+    Returns:
+        tuple: (diámetro de cada componente, True si es exacto)
+    """
+    indptr, indices = _ADYACENCIA
+    diametro = np.zeros(len(tamanos), dtype=np.int64)
+    exacto = np.ones(len(tamanos), dtype=bool)
+
+    pequenas = np.flatnonzero((tamanos > 1) & (tamanos <= limite_exacto))
+    if len(pequenas):
+        componente_fuente = np.repeat(pequenas, tamanos[pequenas])
+        tamanos_fuente = tamanos[componente_fuente]
+        inicios_fuente = inicios[componente_fuente]
+        fuentes = inicios_fuente + np.arange(len(componente_fuente)) - np.repeat(
+            np.cumsum(tamanos[pequenas]) - tamanos[pequenas], tamanos[pequenas])
+        lotes = (np.cumsum(tamanos_fuente) - 1) // LIMITE_ESTADOS
+        for seleccion in np.split(np.arange(len(fuentes)), np.flatnonzero(np.diff(lotes)) + 1):
+            distancia = _distancias_lote(indptr, indices, fuentes[seleccion], inicios_fuente[seleccion],
+                                         tamanos_fuente[seleccion])
+            # Excentricidad de cada fuente: la mayor distancia de su bloque de estados
+            bloques = np.cumsum(tamanos_fuente[seleccion]) - tamanos_fuente[seleccion]
+            np.maximum.at(diametro, componente_fuente[seleccion], np.maximum.reduceat(distancia, bloques))
+
+    rng = np.random.default_rng(semilla)
+    for c in np.flatnonzero(tamanos > limite_exacto):
+        inicio, tamano = inicios[c:c + 1], tamanos[c:c + 1]
+
+        def excentricidad(nodo):
+            distancia = _distancias_lote(indptr, indices, np.array([inicio[0] + nodo]), inicio, tamano)
+            return distancia, int(distancia.max())
+
+        # ecc(v) <= diámetro <= 2 ecc(v) para todo v. Cada barrido va del nodo
+        # actual al más lejano a y de a a su más lejano b; el siguiente parte
+        # del nodo a mitad de distancia de a, cerca del centro de la componente
+        inferior, superior = 0, np.inf
+        nodo = int(rng.integers(tamano[0]))
+        for _ in range(barridos):
+            distancia, ecc = excentricidad(nodo)
+            superior = min(superior, 2 * ecc)
+            distancia, ecc = excentricidad(int(np.argmax(distancia)))
+            inferior = max(inferior, ecc)
+            if inferior == superior:
+                break
+            nodo = int(np.flatnonzero(distancia == ecc // 2)[0])
+        _, ecc = excentricidad(nodo)
+        superior = min(superior, 2 * ecc)
+        diametro[c] = inferior
+        # En un árbol el barrido doble da el diámetro exacto
+        exacto[c] = inferior == superior or enlaces[c] == tamano[0] - 1
+    return diametro, exacto
+
+
+def diametros_componentes(n, origen, destino, componente, seleccion=None, limite_exacto=500, barridos=4,
+                          procesos=1, semilla=None):
+    """
+    Diámetro de cada componente conectada.
+
+    Las componentes de hasta limite_exacto nodos se recorren desde todos sus
+    nodos y el diámetro es exacto. En las más grandes se hacen barridos dobles
+    (BFS hasta el nodo más lejano y desde él): la mayor excentricidad encontrada
+    es una cota inferior del diámetro y el doble de la menor, una superior. Se
+    devuelve la cota inferior, marcada como exacta si coincide con la superior
+    (siempre en los árboles).
+
+    Args:
+        n: Número de nodos
+        origen, destino: Arreglos con los extremos de cada enlace
+        componente: Componente de cada nodo (ver etiquetar_componentes)
+        seleccion: Componentes a calcular (por defecto todas)
+        limite_exacto: Tamaño máximo de las componentes con diámetro exacto
+        barridos: Barridos dobles en las componentes grandes
+        procesos: Número de procesos
+        semilla: Semilla para el primer nodo de los barridos
+
+    Returns:
+        tuple: (diámetro de cada componente, True si es exacto); las no
+               seleccionadas quedan en -1 y False
+    """
+    start_time = time.time()
+    _, inicios, tamanos, indptr, indices = adyacencia_por_componente(n, origen, destino, componente)
+    enlaces = np.bincount(componente[np.asarray(origen, dtype=np.int64)], minlength=len(tamanos))
+    diametro = np.full(len(tamanos), -1, dtype=np.int64)
+    exacto = np.zeros(len(tamanos), dtype=bool)
+
+    seleccion = np.arange(len(tamanos)) if seleccion is None else np.unique(np.asarray(seleccion, dtype=np.int64))
+    diametro[seleccion[tamanos[seleccion] <= 1]] = 0
+    exacto[seleccion[tamanos[seleccion] <= 1]] = True
+    seleccion = seleccion[tamanos[seleccion] > 1]
+    if len(seleccion):
+        grandes = tamanos[seleccion] > limite_exacto
+        costos = np.where(grandes, 2 * (barridos + 1) * (tamanos[seleccion] + enlaces[seleccion]),
+                          tamanos[seleccion] * (tamanos[seleccion] + enlaces[seleccion]))
+        tramos = _repartir(costos, procesos * 4 if procesos > 1 else 1)
+        print(f"Calculando el diámetro de {len(seleccion)} componentes ({int(grandes.sum())} aproximadas) "
+              f"en {len(tramos)} tramos con {procesos} procesos...")
+        argumentos = [(inicios[seleccion[t]], tamanos[seleccion[t]], enlaces[seleccion[t]], limite_exacto,
+                       barridos, semilla) for t in tramos]
+        resultados = _ejecutar_tramos(_diametros_tramo, argumentos, indptr, indices, procesos)
+        for tramo, (parcial, parcial_exacto) in zip(tramos, resultados):
+            diametro[seleccion[tramo]] = parcial
+            exacto[seleccion[tramo]] = parcial_exacto
+
+    print(f"Diámetros calculados en {time.time() - start_time:.2f} segundos")
+    return diametro, exacto
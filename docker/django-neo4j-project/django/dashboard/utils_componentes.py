@@ -0,0 +1,206 @@
+import time
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from myproject.neo4j_driver import Neo4jConnection
+from .models import EstadisticaComponente
+from .utils_centralidad import diametros_componentes
+from .utils_grafo import GrafoCompacto
+
+
+# Columnas de la tabla de estadísticas (y de EstadisticaComponente)
+COLUMNAS_ESTADISTICAS = ['componente', 'componente_id', 'tamano', 'nodos_nunc', 'nodos_persona', 'enlaces',
+                         'densidad', 'diametro', 'diametro_exacto', 'top_nodos']
+
+
+def top_por_grupo(G, grupo, seleccionados, top_k):
+    """
+    Los top_k nodos de mayor grado de cada grupo seleccionado (componente,
+    comunidad, ...), a igual grado en orden de inserción
+
+    Args:
+        G: GrafoCompacto
+        grupo: Número de grupo de cada nodo
+        seleccionados: Máscara booleana por número de grupo
+        top_k: Nodos por grupo
+
+    Returns:
+        dict: grupo -> [{'id', 'tipo', 'grado'}, ...]
+    """
+    nodos = np.flatnonzero(seleccionados[grupo])
+    orden = nodos[np.lexsort((nodos, -G.grado[nodos], grupo[nodos]))]
+    grupos = grupo[orden]
+    inicio_grupo = np.r_[0, np.flatnonzero(np.diff(grupos)) + 1]
+    posicion = np.arange(len(orden)) - np.repeat(inicio_grupo, np.diff(np.r_[inicio_grupo, len(orden)]))
+    elegidos = orden[posicion < top_k]
+
+    tops = {}
+    for indice in elegidos.tolist():
+        tops.setdefault(int(grupo[indice]), []).append({
+            'id': G.ids[indice],
+            'tipo': G.tipo_de(indice),
+            'grado': int(G.grado[indice]),
+        })
+    return tops
+
+
+def estadisticas_componentes(G, componentes_id=None, top_k=5, limite_exacto=500, procesos=1):
+    """
+    Estadísticas de cada componente conectada: tamaño, nodos NUNC y persona,
+    enlaces, densidad, diámetro (exacto hasta limite_exacto nodos, si no una
+    cota inferior; ver utils_centralidad.diametros_componentes) y los top_k
+    nodos de mayor grado. Los diámetros se calculan en paralelo por componente.
+
+    Args:
+        G: GrafoCompacto (o grafo de networkx) con las componentes calculadas
+        componentes_id: componente_id de las componentes a calcular (por defecto todas)
+        top_k: Nodos de mayor grado a guardar por componente
+        limite_exacto: Tamaño máximo de las componentes con diámetro exacto
+        procesos: Número de procesos para los diámetros
+
+    Returns:
+        pd.DataFrame: Una fila por componente con COLUMNAS_ESTADISTICAS
+    """
+    start_time = time.time()
+    if not isinstance(G, GrafoCompacto):
+        G = GrafoCompacto.desde_networkx(G)
+    if len(G) and ((G.componente < 0).any() or (G.componente_id < 0).any()):
+        G.calcular_componentes()
+
+    componente = G.componente.astype(np.int64)
+    cantidad = int(componente.max()) + 1 if len(G) else 0
+    tamanos = np.bincount(componente, minlength=cantidad)
+    nunc = np.bincount(componente[G.mascara_tipo('nunc')], minlength=cantidad)
+    persona = np.bincount(componente[G.mascara_tipo('persona')], minlength=cantidad)
+    enlaces = np.bincount(componente[G.origen], minlength=cantidad)
+    identificadores = np.zeros(cantidad, dtype=np.int64)
+    identificadores[componente] = G.componente_id
+
+    # Las actualizaciones incrementales dejan números de componente sin nodos
+    seleccionadas = tamanos > 0
+    if componentes_id is not None:
+        seleccionadas &= np.isin(identificadores, np.asarray(list(componentes_id), dtype=np.int64))
+    etiquetas = np.flatnonzero(seleccionadas)
+
+    diametro, exacto = diametros_componentes(len(G), G.origen, G.destino, componente, seleccion=etiquetas,
+                                             limite_exacto=limite_exacto, procesos=procesos)
+    tops = top_por_grupo(G, componente, seleccionadas, top_k)
+
+    pares = tamanos[etiquetas] * (tamanos[etiquetas] - 1)
+    tabla = pd.DataFrame({
+        'componente': etiquetas,
+        'componente_id': identificadores[etiquetas],
+        'tamano': tamanos[etiquetas],
+        'nodos_nunc': nunc[etiquetas],
+        'nodos_persona': persona[etiquetas],
+        'enlaces': enlaces[etiquetas],
+        'densidad': np.divide(2 * enlaces[etiquetas], pares, out=np.zeros(len(etiquetas)), where=pares > 0),
+        'diametro': diametro[etiquetas],
+        'diametro_exacto': exacto[etiquetas],
+        'top_nodos': [tops.get(int(c), []) for c in etiquetas],
+    }, columns=COLUMNAS_ESTADISTICAS)
+
+    print(f"Estadísticas de {len(tabla)} componentes calculadas en {time.time() - start_time:.2f} segundos")
+    return tabla
+
+
+def guardar_estadisticas_componentes(tabla, ejecucion=None, eliminadas=(), completa=True, batch_size=5000):
+    """
+    Guarda la tabla de estadisticas_componentes en EstadisticaComponente.
+
+    Args:
+        tabla: Resultado de estadisticas_componentes
+        ejecucion: EjecucionCarga que calculó las estadísticas
+        eliminadas: componente_id de componentes que ya no existen (actualizaciones parciales)
+        completa: La tabla tiene todas las componentes y reemplaza las guardadas;
+                  si no, solo se reemplazan las de la tabla y las eliminadas
+        batch_size: Tamaño del lote para bulk_create
+
+    Returns:
+        int: Filas guardadas
+    """
+    registros = [
+        EstadisticaComponente(
+            ejecucion=ejecucion,
+            componente_id=int(fila.componente_id),
+            componente=int(fila.componente),
+            tamano=int(fila.tamano),
+            nodos_nunc=int(fila.nodos_nunc),
+            nodos_persona=int(fila.nodos_persona),
+            enlaces=int(fila.enlaces),
+            densidad=float(fila.densidad),
+            diametro=int(fila.diametro),
+            diametro_exacto=bool(fila.diametro_exacto),
+            top_nodos=fila.top_nodos,
+        )
+        for fila in tabla.itertuples(index=False)
+    ]
+    with transaction.atomic():
+        if completa:
+            EstadisticaComponente.objects.all().delete()
+        else:
+            reemplazadas = [int(valor) for valor in tabla['componente_id']] + [int(valor) for valor in eliminadas]
+            for i in range(0, len(reemplazadas), batch_size):
+                EstadisticaComponente.objects.filter(componente_id__in=reemplazadas[i:i+batch_size]).delete()
+        EstadisticaComponente.objects.bulk_create(registros, batch_size=batch_size)
+
+    print(f"Estadísticas de {len(registros)} componentes guardadas")
+    return len(registros)
+
+
+def guardar_componentes_en_neo4j(tabla, eliminadas=(), completa=True, batch_size=5000):
+    """
+    Guarda cada componente de la tabla de estadisticas_componentes como un nodo
+    :Componente de Neo4j con las mismas propiedades (top_nodos como lista de
+    ids). Los nodos de la red se relacionan con su componente por la propiedad
+    componente_id, que está indexada en ambos.
+
+    Args:
+        tabla: Resultado de estadisticas_componentes
+        eliminadas: componente_id de componentes que ya no existen (actualizaciones parciales)
+        completa: Borrar antes todos los nodos :Componente
+        batch_size: Tamaño del lote para las operaciones en Neo4j
+    """
+    start_time = time.time()
+    driver = Neo4jConnection.get_driver()
+    datos = [
+        {
+            'componente_id': int(fila.componente_id),
+            'componente': int(fila.componente),
+            'tamano': int(fila.tamano),
+            'nodos_nunc': int(fila.nodos_nunc),
+            'nodos_persona': int(fila.nodos_persona),
+            'enlaces': int(fila.enlaces),
+            'densidad': float(fila.densidad),
+            'diametro': int(fila.diametro),
+            'diametro_exacto': bool(fila.diametro_exacto),
+            'top_nodos': [nodo['id'] for nodo in fila.top_nodos],
+        }
+        for fila in tabla.itertuples(index=False)
+    ]
+    eliminadas = [int(valor) for valor in eliminadas]
+
+    with driver.session() as session:
+        session.run("CREATE INDEX IF NOT EXISTS FOR (c:Componente) ON (c.componente_id)")
+        if completa:
+            print("Eliminando nodos Componente existentes...")
+            session.run("""
+            MATCH (c:Componente)
+            CALL { WITH c DETACH DELETE c } IN TRANSACTIONS OF 10000 ROWS
+            """)
+        for i in range(0, len(eliminadas), batch_size):
+            session.run("""
+            UNWIND $data AS componente_id
+            MATCH (c:Componente {componente_id: componente_id})
+            DETACH DELETE c
+            """, {"data": eliminadas[i:i+batch_size]})
+
+        print(f"Guardando {len(datos)} nodos Componente...")
+        for i in range(0, len(datos), batch_size):
+            session.run("""
+            UNWIND $data AS row
+            MERGE (c:Componente {componente_id: row.componente_id})
+            SET c += row
+            """, {"data": datos[i:i+batch_size]})
+
+    print(f"Componentes guardadas en Neo4j en {time.time() - start_time:.2f} segundos")
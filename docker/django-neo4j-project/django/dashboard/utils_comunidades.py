@@ -0,0 +1,363 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+import networkx as nx
+import numpy as np
+import pandas as pd
+from django.db import connections, transaction
+from myproject.neo4j_driver import Neo4jConnection
+from .models import EstadisticaComunidad
+from .utils_centralidad import _repartir
+from .utils_componentes import top_por_grupo
+from .utils_grafo import GrafoCompacto
+from .utils_red_incremental import ETIQUETAS_NEO4J
+
+
+# Rondas de propagación de etiquetas como máximo (suele converger en menos de 10)
+MAX_ITERACIONES = 30
+
+# Métodos de detectar_comunidades: la propagación de etiquetas es vectorizada y
+# sirve para la red NUNC-Persona; en redes densas como la proyección de personas
+# tiende a juntar toda la componente y Louvain (networkx) separa mejor
+METODOS_COMUNIDADES = ('propagacion', 'louvain')
+
+# Columnas de la tabla de estadísticas (y de EstadisticaComunidad)
+COLUMNAS_COMUNIDADES = ['comunidad', 'componente_id', 'tamano', 'nodos_nunc', 'nodos_persona', 'enlaces_internos',
+                        'enlaces_externos', 'densidad', 'top_nodos']
+
+
+def _colorear(n, u, v, tipo, rng):
+    """
+    Colorea los nodos para que dos vecinos nunca tengan el mismo color.
+
+    Si todos los enlaces unen nodos de distinto tipo (la red NUNC-Persona es
+    bipartita) el color es el tipo. Si no, se usa Jones-Plassmann: en cada
+    ronda los nodos sin color con mayor prioridad aleatoria que todos sus
+    vecinos sin color forman un conjunto independiente y toman un color nuevo.
+
+    Args:
+        n: Número de nodos
+        u, v: Extremos de los enlaces en los dos sentidos
+        tipo: Código de tipo de cada nodo
+        rng: Generador de números aleatorios
+
+    Returns:
+        np.ndarray: Color de cada nodo, de 0 al número de colores - 1
+    """
+    if len(u) == 0 or (tipo[u] != tipo[v]).all():
+        return np.unique(tipo, return_inverse=True)[1].reshape(-1)
+
+    color = np.full(n, -1, dtype=np.int64)
+    prioridad = rng.permutation(n)
+    ronda = 0
+    while (color < 0).any():
+        sin_color = color < 0
+        activos = sin_color[u] & sin_color[v]
+        u, v = u[activos], v[activos]
+        maximo = np.full(n, -1, dtype=np.int64)
+        np.maximum.at(maximo, u, prioridad[v])
+        color[sin_color & (prioridad > maximo)] = ronda
+        ronda += 1
+    return color
+
+
+def _mayoritaria(n, u, v, pesos, etiqueta, rng=None):
+    """
+    Etiqueta de mayor peso entre los vecinos de cada nodo de u. A igual peso
+    se conserva la etiqueta actual del nodo; si no la tiene, se sortea (o se
+    toma la menor sin rng).
+
+    Returns:
+        tuple: (nodos, etiqueta elegida para cada uno)
+    """
+    if not len(u):
+        return u, u
+    clave = u * n + etiqueta[v]
+    unicas, inversa = np.unique(clave, return_inverse=True)
+    peso = np.bincount(inversa.reshape(-1), weights=pesos, minlength=len(unicas))
+    nodo = unicas // n
+    candidata = unicas % n
+    actual = candidata == etiqueta[nodo]
+    desempate = rng.random(len(unicas)) if rng is not None else candidata
+    orden = np.lexsort((desempate, ~actual, -peso, nodo))
+    primeros = orden[np.r_[True, nodo[orden[1:]] != nodo[orden[:-1]]]]
+    return nodo[primeros], candidata[primeros]
+
+
+def _louvain_tramo(n, origen, destino, pesos, semilla):
+    """
+    Louvain de networkx en un tramo de componentes (cada comunidad queda
+    dentro de una componente, así que el tramo se resuelve de una vez)
+
+    Returns:
+        tuple: (etiqueta local de cada nodo, 1)
+    """
+    grafo = nx.Graph()
+    grafo.add_nodes_from(range(n))
+    grafo.add_weighted_edges_from(zip(origen.tolist(), destino.tolist(),
+                                      pesos.tolist() if pesos is not None else [1.0] * len(origen)))
+    etiqueta = np.empty(n, dtype=np.int64)
+    for numero, miembros in enumerate(nx.community.louvain_communities(grafo, weight='weight', seed=semilla)):
+        etiqueta[list(miembros)] = numero
+    return etiqueta, 1
+
+
+def _comunidades_tramo(metodo, n, origen, destino, pesos, tipo, max_iteraciones, semilla):
+    """
+    Propagación de etiquetas semisíncrona (Cordasco y Gargano) en un tramo de
+    componentes: cada nodo empieza con su propia etiqueta y en cada iteración
+    los nodos de un mismo color (sin vecinos entre sí) toman a la vez la
+    etiqueta de mayor peso entre sus vecinos. A diferencia de la versión
+    síncrona no oscila en redes bipartitas, y a diferencia de la asíncrona
+    cada paso es una operación vectorizada.
+
+    Returns:
+        tuple: (etiqueta local de cada nodo, iteraciones hechas)
+    """
+    if metodo == 'louvain':
+        return _louvain_tramo(n, origen, destino, pesos, semilla)
+
+    rng = np.random.default_rng(semilla)
+    u = np.concatenate([origen, destino])
+    v = np.concatenate([destino, origen])
+    w = np.concatenate([pesos, pesos]) if pesos is not None else None
+    etiqueta = np.arange(n, dtype=np.int64)
+
+    color = _colorear(n, u, v, tipo, rng)
+    orden = np.argsort(color[u], kind='stable')
+    cortes = np.searchsorted(color[u][orden], np.arange(int(color.max()) + 2 if n else 1))
+    clases = [orden[cortes[c]:cortes[c + 1]] for c in range(len(cortes) - 1)]
+
+    iteracion = 0
+    for iteracion in range(1, max_iteraciones + 1):
+        cambios = 0
+        for enlaces in clases:
+            if not len(enlaces):
+                continue
+            nodos, nuevas = _mayoritaria(n, u[enlaces], v[enlaces], w[enlaces] if w is not None else None,
+                                         etiqueta, rng)
+            cambiados = nuevas != etiqueta[nodos]
+            etiqueta[nodos[cambiados]] = nuevas[cambiados]
+            cambios += int(cambiados.sum())
+        if cambios == 0:
+            break
+    return etiqueta, iteracion
+
+
+def _numerar_por_tamano(etiqueta):
+    """
+    Renumera las etiquetas de 0 en adelante por tamaño: 0 es la más grande
+    """
+    _, inversa = np.unique(etiqueta, return_inverse=True)
+    inversa = inversa.reshape(-1)
+    orden = np.argsort(-np.bincount(inversa), kind='stable')
+    rango = np.empty(len(orden), dtype=np.int64)
+    rango[orden] = np.arange(len(orden))
+    return rango[inversa]
+
+
+def detectar_comunidades(G, pesos=None, metodo='propagacion', max_iteraciones=MAX_ITERACIONES, procesos=1,
+                         semilla=None):
+    """
+    Comunidades de la red por propagación de etiquetas o Louvain. Una
+    comunidad nunca cruza componentes, así que las componentes se reparten en
+    tramos de costo similar que se resuelven en paralelo.
+
+    Args:
+        G: GrafoCompacto (o grafo de networkx), la red NUNC-Persona o la proyección de personas
+        pesos: Peso de cada enlace, alineado con G.origen (ej. el peso de la proyección)
+        metodo: 'propagacion' o 'louvain' (ver METODOS_COMUNIDADES)
+        max_iteraciones: Máximo de iteraciones por tramo
+        procesos: Número de procesos
+        semilla: Semilla de los desempates y del coloreo
+
+    Returns:
+        tuple: (comunidad de cada nodo, numeradas por tamaño; dict con el
+                número de comunidades y las iteraciones del tramo más lento)
+    """
+    if metodo not in METODOS_COMUNIDADES:
+        raise ValueError(f"Método de comunidades desconocido: {metodo} (use {', '.join(METODOS_COMUNIDADES)})")
+    start_time = time.time()
+    if not isinstance(G, GrafoCompacto):
+        G = GrafoCompacto.desde_networkx(G)
+    if len(G) and (G.componente < 0).any():
+        G.calcular_componentes()
+    n = len(G)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), {'comunidades': 0, 'iteraciones': 0}
+
+    # Nodos y enlaces ordenados por componente: cada tramo es un rango contiguo de ambos
+    componente = G.componente.astype(np.int64)
+    orden = np.argsort(componente, kind='stable')
+    posicion = np.empty(n, dtype=np.int64)
+    posicion[orden] = np.arange(n)
+    tamanos = np.bincount(componente)
+    inicios = np.cumsum(tamanos) - tamanos
+    origen = G.origen.astype(np.int64)
+    destino = G.destino.astype(np.int64)
+    orden_enlaces = np.argsort(componente[origen], kind='stable')
+    enlaces = np.bincount(componente[origen], minlength=len(tamanos))
+    inicios_enlaces = np.cumsum(enlaces) - enlaces
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=np.float64)
+
+    tramos = _repartir(tamanos + enlaces, procesos * 4 if procesos > 1 else 1)
+    argumentos = []
+    for numero, tramo in enumerate(tramos):
+        a, b = inicios[tramo[0]], inicios[tramo[-1]] + tamanos[tramo[-1]]
+        e = orden_enlaces[inicios_enlaces[tramo[0]]:inicios_enlaces[tramo[-1]] + enlaces[tramo[-1]]]
+        argumentos.append((metodo, b - a, posicion[origen[e]] - a, posicion[destino[e]] - a,
+                           pesos[e] if pesos is not None else None, G.tipo[orden[a:b]], max_iteraciones,
+                           None if semilla is None else semilla + numero))
+    print(f"Detectando comunidades ({metodo}) en {len(tamanos)} componentes "
+          f"({len(tramos)} tramos con {procesos} procesos)...")
+
+    if procesos > 1 and len(argumentos) > 1:
+        # Las conexiones abiertas no se pueden compartir con los procesos del pool
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(_comunidades_tramo, *zip(*argumentos)))
+    else:
+        resultados = [_comunidades_tramo(*args) for args in argumentos]
+
+    etiqueta = np.empty(n, dtype=np.int64)
+    iteraciones = 0
+    for tramo, (locales, hechas) in zip(tramos, resultados):
+        a = inicios[tramo[0]]
+        etiqueta[orden[a:a + len(locales)]] = locales + a
+        iteraciones = max(iteraciones, hechas)
+    comunidad = _numerar_por_tamano(etiqueta)
+
+    resumen = {'comunidades': int(comunidad.max()) + 1, 'iteraciones': iteraciones}
+    print(f"Se encontraron {resumen['comunidades']} comunidades en {iteraciones} iteraciones "
+          f"({time.time() - start_time:.2f} segundos)")
+    return comunidad, resumen
+
+
+def heredar_comunidades(G, H, comunidad_proyeccion):
+    """
+    Lleva las comunidades de la proyección de personas (ver utils_proyeccion)
+    a la red NUNC-Persona: las personas conservan la suya, cada NUNC toma la
+    más frecuente entre sus personas y los nodos que aún no tienen (personas
+    sin otra persona en sus NUNC) la de sus NUNC. Los que quedan sin ninguna
+    forman comunidades de un nodo.
+
+    Args:
+        G: GrafoCompacto de la red NUNC-Persona
+        H: GrafoCompacto de la proyección
+        comunidad_proyeccion: Comunidad de cada nodo de H (ver detectar_comunidades)
+
+    Returns:
+        np.ndarray: Comunidad de cada nodo de G, numeradas por tamaño
+    """
+    n = len(G)
+    etiqueta = np.full(n, -1, dtype=np.int64)
+    indices = G.indice_de(H.ids)
+    etiqueta[indices[indices >= 0]] = np.asarray(comunidad_proyeccion)[indices >= 0]
+
+    u = np.concatenate([G.origen, G.destino]).astype(np.int64)
+    v = np.concatenate([G.destino, G.origen]).astype(np.int64)
+    for _ in range(2):
+        # Las etiquetas -1 se desplazan para que la clave del par no sea negativa
+        seleccion = (etiqueta[u] < 0) & (etiqueta[v] >= 0)
+        nodos, elegidas = _mayoritaria(n + 1, u[seleccion], v[seleccion], None, etiqueta + 1)
+        etiqueta[nodos] = elegidas - 1
+
+    sin_comunidad = np.flatnonzero(etiqueta < 0)
+    etiqueta[sin_comunidad] = etiqueta.max() + 1 + np.arange(len(sin_comunidad))
+    return _numerar_por_tamano(etiqueta)
+
+
+def estadisticas_comunidades(G, comunidad, top_k=5):
+    """
+    Estadísticas de cada comunidad: tamaño, nodos NUNC y persona, enlaces
+    internos y hacia otras comunidades, densidad y los top_k nodos de mayor grado
+
+    Args:
+        G: GrafoCompacto con las componentes calculadas
+        comunidad: Comunidad de cada nodo de G
+        top_k: Nodos de mayor grado a guardar por comunidad
+
+    Returns:
+        pd.DataFrame: Una fila por comunidad con COLUMNAS_COMUNIDADES
+    """
+    comunidad = np.asarray(comunidad, dtype=np.int64)
+    cantidad = int(comunidad.max()) + 1 if len(comunidad) else 0
+    tamanos = np.bincount(comunidad, minlength=cantidad)
+    a, b = comunidad[G.origen], comunidad[G.destino]
+    internos = a == b
+    enlaces_internos = np.bincount(a[internos], minlength=cantidad)
+    enlaces_externos = np.bincount(np.concatenate([a[~internos], b[~internos]]), minlength=cantidad)
+    componentes_id = np.zeros(cantidad, dtype=np.int64)
+    componentes_id[comunidad] = G.componente_id
+    pares = tamanos * (tamanos - 1)
+    tops = top_por_grupo(G, comunidad, np.ones(cantidad, dtype=bool), top_k)
+
+    return pd.DataFrame({
+        'comunidad': np.arange(cantidad),
+        'componente_id': componentes_id,
+        'tamano': tamanos,
+        'nodos_nunc': np.bincount(comunidad[G.mascara_tipo('nunc')], minlength=cantidad),
+        'nodos_persona': np.bincount(comunidad[G.mascara_tipo('persona')], minlength=cantidad),
+        'enlaces_internos': enlaces_internos,
+        'enlaces_externos': enlaces_externos,
+        'densidad': np.divide(2 * enlaces_internos, pares, out=np.zeros(cantidad), where=pares > 0),
+        'top_nodos': [tops.get(c, []) for c in range(cantidad)],
+    }, columns=COLUMNAS_COMUNIDADES)
+
+
+def guardar_estadisticas_comunidades(tabla, ejecucion=None, batch_size=5000):
+    """
+    Reemplaza las filas de EstadisticaComunidad por las de la tabla de estadisticas_comunidades
+
+    Returns:
+        int: Filas guardadas
+    """
+    registros = [
+        EstadisticaComunidad(
+            ejecucion=ejecucion,
+            comunidad=int(fila.comunidad),
+            componente_id=int(fila.componente_id),
+            tamano=int(fila.tamano),
+            nodos_nunc=int(fila.nodos_nunc),
+            nodos_persona=int(fila.nodos_persona),
+            enlaces_internos=int(fila.enlaces_internos),
+            enlaces_externos=int(fila.enlaces_externos),
+            densidad=float(fila.densidad),
+            top_nodos=fila.top_nodos,
+        )
+        for fila in tabla.itertuples(index=False)
+    ]
+    with transaction.atomic():
+        EstadisticaComunidad.objects.all().delete()
+        EstadisticaComunidad.objects.bulk_create(registros, batch_size=batch_size)
+
+    print(f"Estadísticas de {len(registros)} comunidades guardadas")
+    return len(registros)
+
+
+def guardar_comunidades_en_neo4j(G, comunidad, batch_size=5000):
+    """
+    Guarda la propiedad comunidad (indexada) en los nodos NUNC y Persona de Neo4j
+
+    Args:
+        G: GrafoCompacto de la red guardada en Neo4j
+        comunidad: Comunidad de cada nodo de G
+        batch_size: Tamaño del lote para las operaciones en Neo4j
+    """
+    start_time = time.time()
+    driver = Neo4jConnection.get_driver()
+    with driver.session() as session:
+        for tipo, etiqueta in ETIQUETAS_NEO4J.items():
+            indices = np.flatnonzero(G.mascara_tipo(tipo))
+            datos = [{'id': nodo_id, 'comunidad': int(valor)}
+                     for nodo_id, valor in zip(G.ids[indices].tolist(), comunidad[indices].tolist())]
+            session.run(f"CREATE INDEX IF NOT EXISTS FOR (n:{etiqueta}) ON (n.comunidad)")
+            print(f"Guardando la comunidad de {len(datos)} nodos {etiqueta}...")
+            for i in range(0, len(datos), batch_size):
+                session.run(f"""
+                UNWIND $data AS row
+                MATCH (n:{etiqueta} {{id: row.id}})
+                SET n.comunidad = row.comunidad
+                """, {"data": datos[i:i+batch_size]})
+
+    print(f"Comunidades guardadas en Neo4j en {time.time() - start_time:.2f} segundos")
@@ -0,0 +1,86 @@
+import threading
+from django.db import connections
+from .models import ConsolidadoSpoa, DIMENSIONES_CONSOLIDADO
+
+
+# Modelos con campos normalizados en tablas de dimensión: modelo -> {campo: modelo de dimensión}
+DIMENSIONES = {
+    ConsolidadoSpoa: DIMENSIONES_CONSOLIDADO,
+}
+
+
+def ruta_consulta(modelo, campo):
+    """
+    Nombre a usar en filter()/values() para leer el texto de un campo,
+    sea una columna normal o una dimensión (ej. 'delito' -> 'delito_dim__nombre')
+    """
+    if campo in DIMENSIONES.get(modelo, {}):
+        return f"{campo}_dim__nombre"
+    return campo
+
+
+def _registrar_nombres(dimension, nombres, using):
+    """
+    Inserta los nombres nuevos en la tabla de dimensión y devuelve {nombre: id}.
+
+    Se ejecuta en un hilo con su propia conexión (autocommit) para que las
+    filas de dimensión queden confirmadas de inmediato: así no bloquean a otros
+    procesos que cargan en paralelo ni se pierden si el chunk se revierte.
+    """
+    resultado = {}
+
+    def registrar():
+        try:
+            dimension.objects.using(using).bulk_create(
+                [dimension(nombre=nombre) for nombre in nombres], batch_size=5000, ignore_conflicts=True
+            )
+            resultado.update(dimension.objects.using(using).filter(nombre__in=nombres).values_list('nombre', 'pk'))
+        except Exception as e:
+            resultado['__error__'] = e
+        finally:
+            connections[using].close()
+
+    hilo = threading.Thread(target=registrar)
+    hilo.start()
+    hilo.join()
+
+    if '__error__' in resultado:
+        raise resultado.pop('__error__')
+    return resultado
+
+
+def resolver_dimensiones(modelo, frame, cache, using='default'):
+    """
+    Reemplaza las columnas de texto normalizadas por las llaves de sus dimensiones.
+
+    Los nombres que aún no existen se crean. Los ids se guardan en cache para
+    que solo los valores nuevos de cada chunk vayan a la base de datos.
+
+    Args:
+        modelo: Clase del modelo de Django
+        frame: DataFrame devuelto por transformar_chunk
+        cache: Diccionario modelo de dimensión -> {nombre: id}, compartido entre chunks
+        using: Alias de la base de datos
+
+    Returns:
+        DataFrame: El frame con columnas <campo>_dim_id en lugar de <campo>
+    """
+    dimensiones = DIMENSIONES.get(modelo)
+    if not dimensiones:
+        return frame
+
+    frame = frame.copy()
+    for campo, dimension in dimensiones.items():
+        if campo not in frame.columns:
+            continue
+
+        ids = cache.setdefault(dimension, {})
+        serie = frame.pop(campo)
+        nuevos = [nombre for nombre in serie.dropna().unique() if nombre not in ids]
+        if nuevos:
+            ids.update(_registrar_nombres(dimension, nuevos, using))
+
+        llaves = serie.map(ids).astype('Int64')
+        frame[f"{campo}_dim_id"] = llaves.astype(object).where(llaves.notna(), None)
+
+    return frame
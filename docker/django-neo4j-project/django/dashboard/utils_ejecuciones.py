@@ -0,0 +1,139 @@
+import hashlib
+import os
+import platform
+import resource
+import time
+from contextlib import contextmanager
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from .models import EjecucionCarga
+
+
+# Intentos para asignar la versión de datos si otra ejecución toma el mismo número
+INTENTOS_VERSION = 5
+
+
+def checksum_archivo(ruta_archivo, tamano_bloque=8 * 1024 * 1024):
+    """
+    SHA-256 del archivo, leído por bloques para no cargarlo en memoria
+    """
+    sha = hashlib.sha256()
+    with open(ruta_archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def rss_pico_mb():
+    """
+    Memoria residente máxima del proceso actual en MB
+    (ru_maxrss está en KB en Linux y en bytes en macOS)
+    """
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if platform.system() == 'Darwin' else pico / 1024
+
+
+def version_datos_actual():
+    """
+    Versión de los datos cargados: la de la última ejecución completada que
+    modificó datos, o 0 si nunca se ha cargado nada. Las cachés y las APIs la
+    usan para saber si deben recalcular.
+    """
+    return EjecucionCarga.objects.aggregate(version=Max('version_datos'))['version'] or 0
+
+
+def _asignar_version(ejecucion):
+    """
+    Asigna a la ejecución la siguiente versión de datos. version_datos es única:
+    si dos ejecuciones terminan a la vez, la que pierde reintenta con el número siguiente.
+    """
+    for intento in range(INTENTOS_VERSION):
+        try:
+            with transaction.atomic():
+                ejecucion.version_datos = version_datos_actual() + 1
+                ejecucion.save(update_fields=['version_datos'])
+            return ejecucion.version_datos
+        except IntegrityError:
+            if intento == INTENTOS_VERSION - 1:
+                raise
+
+
+@contextmanager
+def medir_etapa(ejecucion, etapa):
+    """
+    Acumula en ejecucion.etapas[etapa] los segundos del bloque
+
+    Uso:
+        with medir_etapa(ejecucion, 'creacion'):
+            G = crear_red_desde_consolidado(archivo)
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        ejecucion.etapas[etapa] = round(ejecucion.etapas.get(etapa, 0.0) + time.perf_counter() - inicio, 3)
+
+
+@contextmanager
+def registrar_ejecucion(comando, conjunto, archivo=None, parametros=None, modifica_datos=True, checksum=True):
+    """
+    Registra una ejecución en EjecucionCarga. La fila se crea 'en_curso' al
+    entrar y al salir se completa con la duración, las filas por segundo, la
+    memoria pico y el estado; si el bloque lanza una excepción queda 'fallida'
+    con el error y la excepción se propaga.
+
+    Dentro del bloque se completan filas_leidas, filas_cargadas, filas_rechazadas,
+    etapas y resumen de la instancia devuelta. Si el bloque asigna error la
+    ejecución también queda 'fallida', y si asigna duracion o rss_pico_mb (ej.
+    medidos en otro proceso) se conservan esos valores.
+
+    Uso:
+        with registrar_ejecucion('cargar_datos', 'consolidado', ruta) as ejecucion:
+            ejecucion.filas_cargadas = cargar_consolidado_spoa(ruta)
+
+    Args:
+        comando: Nombre del comando que ejecuta la carga
+        conjunto: Conjunto de datos (consolidado, personas, red, ...)
+        archivo: Ruta del archivo de origen, si existe
+        parametros: Opciones de la ejecución (se guardan como JSON)
+        modifica_datos: Asignar una nueva version_datos al completar (salvo que
+                        filas_cargadas quede en 0)
+        checksum: Calcular el SHA-256 del archivo (etapa 'checksum')
+
+    Yields:
+        EjecucionCarga: La ejecución en curso
+    """
+    ejecucion = EjecucionCarga(comando=comando, conjunto=conjunto, archivo=archivo or '',
+                               parametros=parametros or {})
+    inicio = time.perf_counter()
+
+    if archivo and os.path.exists(archivo):
+        ejecucion.tamano_archivo = os.path.getsize(archivo)
+        if checksum:
+            with medir_etapa(ejecucion, 'checksum'):
+                ejecucion.checksum_archivo = checksum_archivo(archivo)
+    ejecucion.save()
+
+    try:
+        yield ejecucion
+    except BaseException as e:
+        ejecucion.estado = 'fallida'
+        ejecucion.error = str(e) or e.__class__.__name__
+        raise
+    else:
+        ejecucion.estado = 'fallida' if ejecucion.error else 'completada'
+    finally:
+        if ejecucion.duracion is None:
+            ejecucion.duracion = round(time.perf_counter() - inicio, 3)
+        filas = ejecucion.filas_leidas if ejecucion.filas_leidas is not None else ejecucion.filas_cargadas
+        if filas is not None and ejecucion.duracion:
+            ejecucion.filas_por_segundo = round(filas / ejecucion.duracion, 1)
+        if ejecucion.rss_pico_mb is None:
+            ejecucion.rss_pico_mb = round(rss_pico_mb(), 1)
+        ejecucion.fecha_fin = timezone.now()
+        ejecucion.save()
+
+        # Una ejecución que no cargó filas no cambia la versión de los datos
+        if ejecucion.estado == 'completada' and modifica_datos and ejecucion.filas_cargadas != 0:
+            _asignar_version(ejecucion)
@@ -0,0 +1,123 @@
+import pandas as pd
+from datetime import datetime
+
+
+# Formatos de fecha comunes en datos colombianos
+FORMATOS_FECHA = [
+    '%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y',
+    '%Y/%m/%d', '%d.%m.%Y', '%Y.%m.%d'
+]
+
+# Clave usada en los conteos para los valores que no coinciden con ningún formato
+SIN_FORMATO = 'sin_formato'
+
+# Clave usada en los conteos para las fechas que ya llegan tipadas (caché Parquet tipada)
+FORMATO_TIPADO = 'tipada'
+
+
+def _parsear_multiformato(date_str, formatos=FORMATOS_FECHA):
+    """
+    Intenta cada formato con strptime y devuelve (fecha, formato).
+    Si ninguno funciona devuelve (None, None).
+    """
+    if not date_str or pd.isna(date_str):
+        return None, None
+
+    for fmt in formatos:
+        try:
+            return datetime.strptime(date_str, fmt).date(), fmt
+        except (ValueError, TypeError):
+            continue
+
+    return None, None
+
+
+def parse_date(date_str):
+    """
+    Convierte una cadena de fecha en un objeto datetime
+    Intenta diferentes formatos de fecha
+    """
+    fecha, _ = _parsear_multiformato(date_str)
+    return fecha
+
+
+def detectar_formatos(serie, formatos=FORMATOS_FECHA, tam_muestra=1000):
+    """
+    Estima qué formatos aparecen en una columna a partir de una muestra.
+
+    Args:
+        serie: Serie de pandas con las fechas como texto (sin nulos)
+        formatos: Formatos candidatos
+        tam_muestra: Número de valores a evaluar
+
+    Returns:
+        list: Formatos con al menos una coincidencia, del más al menos frecuente
+    """
+    muestra = serie.iloc[:tam_muestra]
+    aciertos = {}
+
+    for fmt in formatos:
+        parseadas = pd.to_datetime(muestra, format=fmt, errors='coerce')
+        total = int(parseadas.notna().sum())
+        if total:
+            aciertos[fmt] = total
+
+    return sorted(aciertos, key=aciertos.get, reverse=True)
+
+
+def parsear_columna_fechas(serie, formatos=FORMATOS_FECHA, tam_muestra=1000):
+    """
+    Parsea una columna completa de fechas.
+
+    Detecta los formatos presentes en una muestra del chunk y los aplica de
+    forma vectorizada (empezando por el dominante). Solo las filas que quedan
+    sin fecha pasan por el camino multiformato de strptime.
+
+    Args:
+        serie: Serie de pandas con las fechas como texto, o datetime64 si ya vienen tipadas
+        formatos: Formatos candidatos
+        tam_muestra: Número de valores usados para detectar los formatos
+
+    Returns:
+        tuple: (Serie de objetos date o None, dict formato -> filas que coincidieron)
+    """
+    resultado = pd.Series([None] * len(serie), index=serie.index, dtype=object)
+    conteo = {}
+
+    # Columna ya tipada (ver utils_archivos.convertir_a_parquet): no hay texto que parsear
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        presentes = serie.notna()
+        if presentes.any():
+            resultado.loc[presentes] = serie[presentes].dt.date
+            conteo[FORMATO_TIPADO] = int(presentes.sum())
+        return resultado, conteo
+
+    # Solo se parsean cadenas no vacías, igual que parse_date
+    pendientes = serie[serie.notna()]
+    if pendientes.dtype != object:
+        return resultado, conteo
+    pendientes = pendientes[pendientes != '']
+    if pendientes.empty:
+        return resultado, conteo
+
+    # Camino vectorizado con los formatos detectados en la muestra
+    for fmt in detectar_formatos(pendientes, formatos, tam_muestra):
+        parseadas = pd.to_datetime(pendientes, format=fmt, errors='coerce')
+        aciertos = parseadas.notna()
+        if aciertos.any():
+            resultado.loc[aciertos[aciertos].index] = parseadas[aciertos].dt.date
+            conteo[fmt] = conteo.get(fmt, 0) + int(aciertos.sum())
+            pendientes = pendientes[~aciertos]
+        if pendientes.empty:
+            break
+
+    # Camino multiformato para las filas residuales (formatos poco frecuentes,
+    # años fuera del rango de pandas, etc.). Cada valor distinto se intenta una sola vez.
+    if not pendientes.empty:
+        parseo = {valor: _parsear_multiformato(valor, formatos) for valor in pendientes.unique()}
+        formatos_residuales = pendientes.map(lambda valor: parseo[valor][1] or SIN_FORMATO)
+        for fmt, total in formatos_residuales.value_counts().items():
+            conteo[fmt] = conteo.get(fmt, 0) + int(total)
+        resultado.loc[pendientes.index] = pendientes.map(lambda valor: parseo[valor][0])
+
+    return resultado, conteo
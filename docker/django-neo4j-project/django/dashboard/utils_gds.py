@@ -0,0 +1,143 @@
+import time
+from myproject.neo4j_driver import Neo4jConnection
+from .utils_centralidad import tamano_muestra
+from .utils_red_incremental import ETIQUETAS_NEO4J
+
+
+# Nombre del grafo proyectado en el catálogo de Graph Data Science
+GRAFO_GDS = 'red_nunc_persona'
+
+# Propiedad en la que cada algoritmo escribe su resultado. Son propiedades
+# propias para no pisar las del cálculo en Python: componente_id se mantiene
+# entre reconstrucciones, mientras que los ids de WCC cambian en cada ejecución,
+# y GDS no normaliza el grado ni la betweenness como networkx
+PROPIEDADES_GDS = {
+    'wcc': 'componente_gds',
+    'degree': 'grado_gds',
+    'pagerank': 'pagerank',
+    'betweenness': 'betweenness_gds',
+}
+
+
+def _ejecutar(session, consulta, parametros=None):
+    """
+    Ejecuta un procedimiento y devuelve su única fila como dict, con los
+    segundos medidos desde el cliente (incluyen la escritura en la base)
+    """
+    inicio = time.time()
+    fila = session.run(consulta, parametros or {}).single()
+    datos = dict(fila) if fila is not None else {}
+    datos['segundos'] = round(time.time() - inicio, 3)
+    return datos
+
+
+def eliminar_proyeccion_gds(session, nombre=GRAFO_GDS):
+    """
+    Elimina el grafo proyectado del catálogo de GDS, si existe, para liberar
+    la memoria del servidor
+    """
+    session.run("CALL gds.graph.drop($nombre, false) YIELD graphName RETURN graphName", {'nombre': nombre})
+
+
+def proyectar_en_gds(session, nombre=GRAFO_GDS):
+    """
+    Proyecta los nodos NUNC y Persona y las relaciones VINCULADO_A (no
+    dirigidas) en el catálogo de GDS, reemplazando una proyección anterior con
+    el mismo nombre. Quedan fuera los nodos :Componente y la proyección
+    COAPARECE_CON.
+
+    Returns:
+        dict: nodeCount, relationshipCount, projectMillis y segundos
+    """
+    eliminar_proyeccion_gds(session, nombre)
+    return _ejecutar(session, """
+    CALL gds.graph.project($nombre, $etiquetas, {VINCULADO_A: {orientation: 'UNDIRECTED'}})
+    YIELD nodeCount, relationshipCount, projectMillis
+    RETURN nodeCount, relationshipCount, projectMillis
+    """, {'nombre': nombre, 'etiquetas': list(ETIQUETAS_NEO4J.values())})
+
+
+def calcular_metricas_gds(error=0.05, probabilidad_fallo=0.1, concurrencia=4, semilla=None,
+                          max_iteraciones_pagerank=20, factor_amortiguacion=0.85, nombre=GRAFO_GDS):
+    """
+    Calcula componentes y centralidad dentro de Neo4j con Graph Data Science,
+    sin traer la red a Django: proyecta el grafo guardado, ejecuta WCC, grado,
+    PageRank y betweenness aproximada en modo write (cada algoritmo escribe su
+    propiedad de PROPIEDADES_GDS en los nodos) y elimina la proyección.
+
+    La betweenness se estima desde tamano_muestra(nodos, error) fuentes
+    elegidas al azar, la misma cota que usa calcular_centralidad en Python,
+    aunque GDS muestrea sobre toda la red y no por componente.
+
+    Args:
+        error: Error absoluto máximo de la betweenness normalizada (define el muestreo)
+        probabilidad_fallo: Probabilidad de superar el error
+        concurrencia: Hilos de GDS para calcular y escribir
+        semilla: Semilla del muestreo de la betweenness
+        max_iteraciones_pagerank: Iteraciones máximas de PageRank
+        factor_amortiguacion: Factor de amortiguación de PageRank
+        nombre: Nombre del grafo en el catálogo de GDS
+
+    Returns:
+        dict: Por etapa (proyeccion, wcc, degree, pagerank, betweenness) los
+              datos que devuelve GDS (computeMillis, writeMillis, ...) y los
+              segundos medidos desde Django
+    """
+    start_time = time.time()
+    driver = Neo4jConnection.get_driver()
+    resultados = {}
+
+    with driver.session() as session:
+        print("Proyectando la red en Graph Data Science...")
+        resultados['proyeccion'] = proyectar_en_gds(session, nombre)
+        nodos = resultados['proyeccion']['nodeCount']
+        print(f"Proyección con {nodos} nodos y {resultados['proyeccion']['relationshipCount']} relaciones "
+              f"en {resultados['proyeccion']['segundos']:.2f} segundos")
+
+        try:
+            configuracion = {'concurrency': concurrencia, 'writeConcurrency': concurrencia}
+
+            print("Calculando componentes (WCC)...")
+            resultados['wcc'] = _ejecutar(session, """
+            CALL gds.wcc.write($nombre, $configuracion)
+            YIELD componentCount, nodePropertiesWritten, computeMillis, writeMillis
+            RETURN componentCount, nodePropertiesWritten, computeMillis, writeMillis
+            """, {'nombre': nombre, 'configuracion': {**configuracion, 'writeProperty': PROPIEDADES_GDS['wcc']}})
+
+            print("Calculando grado...")
+            resultados['degree'] = _ejecutar(session, """
+            CALL gds.degree.write($nombre, $configuracion)
+            YIELD nodePropertiesWritten, computeMillis, writeMillis
+            RETURN nodePropertiesWritten, computeMillis, writeMillis
+            """, {'nombre': nombre, 'configuracion': {**configuracion, 'writeProperty': PROPIEDADES_GDS['degree']}})
+
+            print("Calculando PageRank...")
+            resultados['pagerank'] = _ejecutar(session, """
+            CALL gds.pageRank.write($nombre, $configuracion)
+            YIELD nodePropertiesWritten, ranIterations, didConverge, computeMillis, writeMillis
+            RETURN nodePropertiesWritten, ranIterations, didConverge, computeMillis, writeMillis
+            """, {'nombre': nombre, 'configuracion': {
+                **configuracion, 'writeProperty': PROPIEDADES_GDS['pagerank'],
+                'maxIterations': max_iteraciones_pagerank, 'dampingFactor': factor_amortiguacion,
+            }})
+
+            fuentes = tamano_muestra(nodos, error, probabilidad_fallo)
+            print(f"Calculando betweenness desde {fuentes} de {nodos} nodos...")
+            configuracion_betweenness = {**configuracion, 'writeProperty': PROPIEDADES_GDS['betweenness']}
+            if fuentes < nodos:
+                configuracion_betweenness['samplingSize'] = fuentes
+                if semilla is not None:
+                    configuracion_betweenness['samplingSeed'] = semilla
+            resultados['betweenness'] = _ejecutar(session, """
+            CALL gds.betweenness.write($nombre, $configuracion)
+            YIELD nodePropertiesWritten, computeMillis, writeMillis
+            RETURN nodePropertiesWritten, computeMillis, writeMillis
+            """, {'nombre': nombre, 'configuracion': configuracion_betweenness})
+            resultados['betweenness'].update({'fuentes': fuentes, 'aproximado': fuentes < nodos})
+        finally:
+            eliminar_proyeccion_gds(session, nombre)
+
+    for etapa, datos in resultados.items():
+        print(f"- {etapa}: {datos['segundos']:.2f} segundos")
+    print(f"Métricas calculadas en GDS en {time.time() - start_time:.2f} segundos")
+    return resultados
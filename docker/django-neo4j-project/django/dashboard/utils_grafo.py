@@ -0,0 +1,817 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+
+# Tipos de nodo conocidos; los que vengan de otras fuentes (ej. JSON de entidades)
+# se agregan a la lista de tipos del grafo a medida que aparecen
+TIPOS_NODO = ['nunc', 'persona', 'entidad']
+
+# Atributos de nodo que se guardan en arreglos propios y no en atributos
+ATRIBUTOS_PROPIOS = ('tipo', 'componente', 'componente_id', 'grado')
+
+
+def _columna_vacia(n):
+    return np.full(n, None, dtype=object)
+
+
+def _como_objeto(valores, n):
+    """
+    Arreglo de tipo object de largo n a partir de un escalar o una secuencia
+    """
+    if valores is None or np.isscalar(valores):
+        columna = np.empty(n, dtype=object)
+        columna[:] = valores
+        return columna
+    columna = np.asarray(valores, dtype=object)
+    if len(columna) != n:
+        raise ValueError(f"Se esperaban {n} valores y se recibieron {len(columna)}")
+    return columna
+
+
+def _importar_csgraph():
+    """
+    scipy es opcional: si no está instalado las componentes se calculan con union-find
+    """
+    try:
+        from scipy import sparse
+        from scipy.sparse import csgraph
+    except ImportError:
+        return None, None
+    return sparse, csgraph
+
+
+def _etiquetas_union_find(n, origen, destino):
+    """
+    Union-find sobre arreglos: cada ronda cuelga la raíz mayor de cada enlace de
+    la menor y comprime los caminos hasta que todos apuntan a su raíz.
+    La raíz de cada componente es su menor índice.
+    """
+    padre = np.arange(n, dtype=np.int64)
+    u = np.asarray(origen, dtype=np.int64)
+    v = np.asarray(destino, dtype=np.int64)
+    while True:
+        pu, pv = padre[u], padre[v]
+        distintos = pu != pv
+        if not distintos.any():
+            break
+        np.minimum.at(padre, np.maximum(pu, pv)[distintos], np.minimum(pu, pv)[distintos])
+        while True:
+            abuelo = padre[padre]
+            if np.array_equal(abuelo, padre):
+                break
+            padre = abuelo
+    # Etiquetas consecutivas en el orden de la raíz (el menor nodo de cada componente)
+    _, etiquetas = np.unique(padre, return_inverse=True)
+    return etiquetas
+
+
+def _etiquetas_csgraph(n, origen, destino, sparse, csgraph):
+    """
+    Componentes con el recorrido de scipy.sparse.csgraph sobre la matriz de
+    adyacencia. Las etiquetas quedan en el orden del menor nodo de cada componente.
+    """
+    adyacencia = sparse.csr_matrix(
+        (np.ones(len(origen), dtype=np.int8), (np.asarray(origen), np.asarray(destino))), shape=(n, n)
+    )
+    _, etiquetas = csgraph.connected_components(adyacencia, directed=False)
+    return etiquetas
+
+
+def etiquetar_componentes(n, origen, destino):
+    """
+    Componentes conectadas de un grafo con nodos 0..n-1, numeradas de mayor a
+    menor tamaño y, a igual tamaño, en el orden de su primer nodo (el mismo
+    orden que sorted(connected_components(G), key=len, reverse=True)).
+
+    Usa scipy.sparse.csgraph si está instalado y si no union-find sobre arreglos.
+
+    Args:
+        n: Número de nodos
+        origen, destino: Arreglos con los extremos de cada enlace
+
+    Returns:
+        tuple: (componente de cada nodo como int32, tamaño de cada componente)
+    """
+    if n == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+
+    sparse, csgraph = _importar_csgraph()
+    if csgraph is not None:
+        etiquetas = _etiquetas_csgraph(n, origen, destino, sparse, csgraph)
+    else:
+        etiquetas = _etiquetas_union_find(n, origen, destino)
+
+    tamanos = np.bincount(etiquetas)
+    orden = np.lexsort((np.arange(len(tamanos)), -tamanos))
+    rango = np.empty(len(tamanos), dtype=np.int32)
+    rango[orden] = np.arange(len(tamanos), dtype=np.int32)
+    return rango[etiquetas], tamanos[orden]
+
+
+def calcular_grados(n, origen, destino):
+    """
+    Grado de cada nodo 0..n-1 (un lazo cuenta dos veces, como en networkx)
+    """
+    return (np.bincount(origen, minlength=n) + np.bincount(destino, minlength=n)).astype(np.int32)
+
+
+def _hash_estable(texto):
+    """
+    Entero positivo de 63 bits derivado del texto; cabe en un BIGINT de
+    PostgreSQL y en los enteros de Neo4j, y no depende de PYTHONHASHSEED
+    """
+    return int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'big') >> 1
+
+
+def _menores_miembros(ids, componente):
+    """
+    Índice del menor miembro de cada componente (comparando los identificadores
+    como texto): el primero de cada componente al recorrer los nodos en orden de
+    texto. Ordenar una vez es mucho más rápido que groupby().min() sobre textos.
+
+    Returns:
+        np.ndarray: Por número de componente, el índice de su menor miembro (-1 si no hay nodos)
+    """
+    componente = np.asarray(componente)
+    asignados = np.flatnonzero(componente >= 0)
+    menores = np.full(int(componente.max()) + 1 if len(asignados) else 0, -1, dtype=np.int64)
+    if not len(asignados):
+        return menores
+
+    miembros = pd.Series(np.asarray(ids, dtype=object)[asignados]).astype(str).to_numpy()
+    orden = np.argsort(miembros, kind='stable')
+    etiquetas, primeros = np.unique(componente[asignados][orden], return_index=True)
+    menores[etiquetas] = asignados[orden[primeros]]
+    return menores
+
+
+def identificadores_componente(ids, componente, menores=None):
+    """
+    Identificador estable de la componente de cada nodo: el hash de su menor
+    miembro (comparando los identificadores como texto).
+
+    A diferencia del número de componente (su rango por tamaño), no cambia al
+    reconstruir la red mientras la componente conserve su menor miembro. Si dos
+    componentes se fusionan, el resultado conserva el identificador de la que
+    tenía el menor miembro; si una se divide, lo conserva la parte que se queda
+    con él. Los demás casos se resuelven con mapear_componentes.
+
+    Args:
+        ids: Identificador de cada nodo
+        componente: Número de componente de cada nodo (-1 si no tiene)
+        menores: Resultado de _menores_miembros, si ya se calculó
+
+    Returns:
+        np.ndarray: Identificador de componente de cada nodo como int64 (-1 si no tiene)
+    """
+    componente = np.asarray(componente)
+    if menores is None:
+        menores = _menores_miembros(ids, componente)
+    ids = np.asarray(ids, dtype=object)
+    tabla = np.fromiter((_hash_estable(str(ids[menor])) if menor >= 0 else -1 for menor in menores.tolist()),
+                        dtype=np.int64, count=len(menores))
+    resultado = np.full(len(componente), -1, dtype=np.int64)
+    asignados = componente >= 0
+    resultado[asignados] = tabla[componente[asignados]]
+    return resultado
+
+
+class UnionFind:
+    """
+    Union-find persistente sobre los índices de los nodos, para actualizar las
+    componentes al agregar enlaces sin recalcularlas sobre todo el grafo.
+
+    La raíz de cada componente es su menor miembro (comparando los
+    identificadores como texto), así que el componente_id de una componente es
+    siempre el hash del identificador de su raíz (ver identificadores_componente).
+    """
+
+    def __init__(self, n=0):
+        self.padre = np.arange(n, dtype=np.int64)
+        self.tamano = np.ones(n, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.padre)
+
+    @classmethod
+    def desde_componentes(cls, componente, menores):
+        """
+        Union-find con cada nodo colgando directamente del menor miembro de su
+        componente; los nodos sin componente (-1) quedan solos
+        """
+        componente = np.asarray(componente)
+        uf = cls(len(componente))
+        asignados = componente >= 0
+        uf.padre[asignados] = menores[componente[asignados]]
+        existentes = menores >= 0
+        uf.tamano[menores[existentes]] = np.bincount(componente[asignados], minlength=len(menores))[existentes]
+        return uf
+
+    def agregar(self, cantidad):
+        """
+        Agrega nodos nuevos, cada uno en su propia componente
+        """
+        n = len(self)
+        self.padre = np.concatenate([self.padre, np.arange(n, n + cantidad, dtype=np.int64)])
+        self.tamano = np.concatenate([self.tamano, np.ones(cantidad, dtype=np.int64)])
+
+    def encontrar(self, indices):
+        """
+        Raíz de cada índice; los índices consultados quedan colgando de su raíz
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        raices = self.padre[indices]
+        while True:
+            siguientes = self.padre[raices]
+            if np.array_equal(siguientes, raices):
+                break
+            raices = siguientes
+        self.padre[indices] = raices
+        return raices
+
+    def _raiz(self, indice):
+        padre = self.padre
+        while padre[indice] != indice:
+            padre[indice] = padre[padre[indice]]
+            indice = padre[indice]
+        return indice
+
+    def unir(self, origen, destino, ids):
+        """
+        Une las componentes de los extremos de cada enlace. La componente
+        resultante queda con la raíz de menor identificador.
+
+        Returns:
+            int: Número de fusiones
+        """
+        fusiones = 0
+        for u, v in zip(np.asarray(origen).tolist(), np.asarray(destino).tolist()):
+            raiz_u, raiz_v = self._raiz(u), self._raiz(v)
+            if raiz_u == raiz_v:
+                continue
+            if str(ids[raiz_v]) < str(ids[raiz_u]):
+                raiz_u, raiz_v = raiz_v, raiz_u
+            self.padre[raiz_v] = raiz_u
+            self.tamano[raiz_u] += self.tamano[raiz_v]
+            fusiones += 1
+        return fusiones
+
+
+def mapear_componentes(anterior, nueva):
+    """
+    Correspondencia entre las componentes de dos versiones de la red, a partir
+    de los nodos que comparten. Las componentes con exactamente los mismos
+    miembros y el mismo identificador no se incluyen.
+
+    Tipos de cambio:
+    - modificada: mismo identificador, con nodos agregados o quitados
+    - renombrada: una componente pasa a otra sin fusionarse ni dividirse, pero
+      con otro identificador (cambió su menor miembro)
+    - fusion: varias componentes anteriores quedan en la nueva (una fila por cada una)
+    - division: la anterior queda repartida en varias nuevas (una fila por cada una)
+    - reorganizada: fusión y división a la vez
+    - nueva / eliminada: sin nodos en común con la otra versión
+
+    Args:
+        anterior: DataFrame con columnas id y componente_id de la red anterior
+        nueva: DataFrame con columnas id y componente_id de la red nueva
+
+    Returns:
+        pd.DataFrame: componente_anterior, componente_nueva, tipo, nodos_compartidos,
+                      tamano_anterior y tamano_nuevo (identificadores Int64, <NA> si no aplica)
+    """
+    columnas = ['id', 'componente_id']
+    anterior = anterior[columnas].astype({'componente_id': 'Int64'})
+    nueva = nueva[columnas].astype({'componente_id': 'Int64'})
+    anterior = anterior[anterior['componente_id'] >= 0]
+    nueva = nueva[nueva['componente_id'] >= 0]
+
+    unidos = anterior.merge(nueva, on='id', how='outer', suffixes=('_anterior', '_nueva'))
+    unidos = unidos.rename(columns={'componente_id_anterior': 'componente_anterior',
+                                    'componente_id_nueva': 'componente_nueva'})
+    pares = (unidos.groupby(['componente_anterior', 'componente_nueva'], dropna=False).size()
+             .rename('nodos_compartidos').reset_index())
+
+    # Tamaño de cada componente y cuántas componentes de la otra versión toca.
+    # Se une con merge y no con Series.map, que pasa los Int64 con <NA> por float
+    # y pierde precisión en identificadores de 63 bits
+    comunes = pares.dropna(subset=['componente_anterior', 'componente_nueva'])
+    por_anterior = pd.DataFrame({
+        'tamano_anterior': anterior.groupby('componente_id').size(),
+        'destinos': comunes.groupby('componente_anterior').size(),
+    })
+    por_nueva = pd.DataFrame({
+        'tamano_nuevo': nueva.groupby('componente_id').size(),
+        'origenes': comunes.groupby('componente_nueva').size(),
+    })
+    pares = (pares.merge(por_anterior, left_on='componente_anterior', right_index=True, how='left')
+             .merge(por_nueva, left_on='componente_nueva', right_index=True, how='left'))
+    pares[['tamano_anterior', 'tamano_nuevo']] = pares[['tamano_anterior', 'tamano_nuevo']].astype('Int64')
+    destinos = pares['destinos'].fillna(0).astype(int)
+    origenes = pares['origenes'].fillna(0).astype(int)
+
+    division = destinos > 1
+    fusion = origenes > 1
+    con_anterior = pares['componente_anterior'].notna()
+    con_nueva = pares['componente_nueva'].notna()
+    mismo_id = (pares['componente_anterior'] == pares['componente_nueva']).fillna(False).astype(bool)
+
+    pares['tipo'] = np.select(
+        [fusion & division, fusion, division, mismo_id],
+        ['reorganizada', 'fusion', 'division', 'modificada'],
+        default='renombrada',
+    )
+    # Las filas con un solo lado son nodos agregados o quitados; solo cuentan como
+    # componente nueva o eliminada si esa componente no comparte nodos con la otra versión
+    nueva_sin_origen = ~con_anterior & (origenes == 0)
+    eliminada = ~con_nueva & (destinos == 0)
+    pares.loc[nueva_sin_origen, 'tipo'] = 'nueva'
+    pares.loc[eliminada, 'tipo'] = 'eliminada'
+
+    sin_cambios = (mismo_id & ~fusion & ~division
+                   & (pares['nodos_compartidos'] == pares['tamano_anterior']).fillna(False).astype(bool)
+                   & (pares['nodos_compartidos'] == pares['tamano_nuevo']).fillna(False).astype(bool))
+    conservar = (con_anterior & con_nueva & ~sin_cambios) | nueva_sin_origen | eliminada
+
+    return pares.loc[conservar, ['componente_anterior', 'componente_nueva', 'tipo', 'nodos_compartidos',
+                                 'tamano_anterior', 'tamano_nuevo']].reset_index(drop=True)
+
+
+def arreglos_desde_networkx(G):
+    """
+    Numera los nodos de un grafo de networkx en su orden de inserción
+
+    Returns:
+        tuple: (lista de nodos, arreglo origen, arreglo destino)
+    """
+    nodos = list(G.nodes())
+    posiciones = {nodo: indice for indice, nodo in enumerate(nodos)}
+    m = G.number_of_edges()
+    origen = np.fromiter((posiciones[u] for u, _ in G.edges()), dtype=np.int64, count=m)
+    destino = np.fromiter((posiciones[v] for _, v in G.edges()), dtype=np.int64, count=m)
+    return nodos, origen, destino
+
+
+class GrafoCompacto:
+    """
+    Grafo no dirigido con los identificadores internados como enteros.
+
+    - ids: arreglo con el identificador (texto) de cada nodo; la posición es su índice
+    - tipo, componente, grado: arreglos de enteros por nodo (tipo es un código de self.tipos)
+    - componente_id: identificador estable de la componente (ver identificadores_componente)
+    - union_find: UnionFind de las componentes, para actualizarlas al agregar
+      enlaces (ver actualizar_componentes); None hasta calcular las componentes
+    - atributos: columna por atributo de nodo (name, color, necropsia, ...), None si no aplica
+    - origen, destino: índices de los extremos de cada enlace (cada enlace una sola vez)
+    - atributos_enlace: columna por atributo de enlace (calidad_vinculo, ...)
+
+    La adyacencia en formato CSR (indptr, indices) se construye bajo demanda y se
+    descarta cuando se agregan nodos o enlaces. a_networkx() y desde_networkx()
+    convierten desde y hacia networkx para el código que todavía lo necesita.
+    """
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=object)
+        self.tipos = list(TIPOS_NODO)
+        self.tipo = np.empty(0, dtype=np.int8)
+        self.componente = np.empty(0, dtype=np.int32)
+        self.componente_id = np.empty(0, dtype=np.int64)
+        self.grado = np.empty(0, dtype=np.int32)
+        self.atributos = {}
+        self.origen = np.empty(0, dtype=np.int32)
+        self.destino = np.empty(0, dtype=np.int32)
+        self.atributos_enlace = {}
+        self.union_find = None
+        self._indice = None
+        self._csr = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, nodo_id):
+        return self.indice_de([nodo_id])[0] >= 0
+
+    def number_of_nodes(self):
+        return len(self.ids)
+
+    def number_of_edges(self):
+        return len(self.origen)
+
+    # ------------------------------------------------------------------
+    # Internado de identificadores
+    # ------------------------------------------------------------------
+
+    def indice_de(self, nodo_ids):
+        """
+        Índices de los identificadores dados (-1 para los que no están en el grafo)
+        """
+        if self._indice is None:
+            self._indice = pd.Index(self.ids)
+        return self._indice.get_indexer(pd.Index(np.asarray(nodo_ids, dtype=object))).astype(np.int64)
+
+    def codigo_tipo(self, tipo):
+        """
+        Código del tipo de nodo, agregándolo a self.tipos si es nuevo (None -> -1)
+        """
+        if tipo is None:
+            return -1
+        if tipo not in self.tipos:
+            self.tipos.append(tipo)
+        return self.tipos.index(tipo)
+
+    def tipo_de(self, indice):
+        codigo = self.tipo[indice]
+        return self.tipos[codigo] if codigo >= 0 else None
+
+    def mascara_tipo(self, tipo):
+        """
+        Máscara booleana de los nodos del tipo dado
+        """
+        if tipo not in self.tipos:
+            return np.zeros(len(self), dtype=bool)
+        return self.tipo == self.tipos.index(tipo)
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    def agregar_nodos(self, nodo_ids, tipo=None, atributos=None, sobrescribir=False):
+        """
+        Agrega nodos en bloque.
+
+        Args:
+            nodo_ids: Identificadores, sin repetidos
+            tipo: Tipo de todos los nodos (ej. 'nunc')
+            atributos: dict atributo -> escalar o secuencia alineada con nodo_ids
+            sobrescribir: Si un nodo ya existe, reemplazar su tipo y los atributos
+                          dados (como G.add_node en networkx); si no, se deja igual
+
+        Returns:
+            int: Número de nodos nuevos
+        """
+        nodo_ids = np.asarray(nodo_ids, dtype=object)
+        cantidad = len(nodo_ids)
+        atributos = {nombre: _como_objeto(valores, cantidad) for nombre, valores in (atributos or {}).items()}
+        codigo = self.codigo_tipo(tipo)
+
+        indices = self.indice_de(nodo_ids)
+        existentes = indices >= 0
+        nuevos = ~existentes
+
+        if sobrescribir and existentes.any():
+            posiciones = indices[existentes]
+            if tipo is not None:
+                self.tipo[posiciones] = codigo
+            for nombre, valores in atributos.items():
+                self._columna(nombre)[posiciones] = valores[existentes]
+
+        total_nuevos = int(nuevos.sum())
+        if total_nuevos:
+            n = len(self)
+            self.ids = np.concatenate([self.ids, nodo_ids[nuevos]])
+            self.tipo = np.concatenate([self.tipo, np.full(total_nuevos, codigo, dtype=np.int8)])
+            self.componente = np.concatenate([self.componente, np.full(total_nuevos, -1, dtype=np.int32)])
+            self.componente_id = np.concatenate([self.componente_id, np.full(total_nuevos, -1, dtype=np.int64)])
+            if self.union_find is not None:
+                self.union_find.agregar(total_nuevos)
+            self.grado = np.concatenate([self.grado, np.zeros(total_nuevos, dtype=np.int32)])
+            for nombre in set(self.atributos) | set(atributos):
+                columna = self.atributos.get(nombre, _columna_vacia(n))
+                agregados = atributos[nombre][nuevos] if nombre in atributos else _columna_vacia(total_nuevos)
+                self.atributos[nombre] = np.concatenate([columna, agregados])
+            self._indice = None
+            self._csr = None
+        return total_nuevos
+
+    def agregar_enlaces(self, origenes, destinos, atributos=None, sobrescribir=False):
+        """
+        Agrega enlaces en bloque entre nodos existentes. Los enlaces que ya están
+        en el grafo (en cualquier sentido) o repetidos en la entrada se omiten,
+        conservando los atributos de la primera aparición.
+
+        Args:
+            origenes, destinos: Identificadores de los extremos
+            atributos: dict atributo -> escalar o secuencia alineada con los enlaces
+            sobrescribir: Reemplazar los atributos dados de los enlaces que ya
+                          están en el grafo; si no, se dejan igual
+
+        Returns:
+            int: Número de enlaces nuevos
+        """
+        u = self.indice_de(origenes)
+        v = self.indice_de(destinos)
+        if (u < 0).any() or (v < 0).any():
+            faltantes = np.asarray(origenes, dtype=object)[u < 0].tolist() + np.asarray(destinos, dtype=object)[v < 0].tolist()
+            raise KeyError(f"Enlaces con nodos que no están en el grafo: {faltantes[:5]}")
+        cantidad = len(u)
+        atributos = {nombre: _como_objeto(valores, cantidad) for nombre, valores in (atributos or {}).items()}
+
+        # Clave del par sin orden, para no repetir un enlace en sentido inverso
+        n = np.int64(len(self))
+        claves = np.minimum(u, v) * n + np.maximum(u, v)
+        _, primeros = np.unique(claves, return_index=True)
+        seleccion = np.sort(primeros)
+        if len(self.origen):
+            existentes = np.minimum(self.origen, self.destino).astype(np.int64) * n + np.maximum(self.origen, self.destino)
+            posiciones = pd.Index(existentes).get_indexer(claves[seleccion])
+            if sobrescribir and (posiciones >= 0).any():
+                repetidos = posiciones >= 0
+                for nombre, valores in atributos.items():
+                    if nombre not in self.atributos_enlace:
+                        self.atributos_enlace[nombre] = _columna_vacia(len(existentes))
+                    self.atributos_enlace[nombre][posiciones[repetidos]] = valores[seleccion[repetidos]]
+            seleccion = seleccion[posiciones < 0]
+
+        total_nuevos = len(seleccion)
+        if total_nuevos:
+            m = self.number_of_edges()
+            self.origen = np.concatenate([self.origen, u[seleccion].astype(np.int32)])
+            self.destino = np.concatenate([self.destino, v[seleccion].astype(np.int32)])
+            for nombre in set(self.atributos_enlace) | set(atributos):
+                columna = self.atributos_enlace.get(nombre, _columna_vacia(m))
+                agregados = atributos[nombre][seleccion] if nombre in atributos else _columna_vacia(total_nuevos)
+                self.atributos_enlace[nombre] = np.concatenate([columna, agregados])
+            self._csr = None
+        return total_nuevos
+
+    def _columna(self, nombre):
+        if nombre not in self.atributos:
+            self.atributos[nombre] = _columna_vacia(len(self))
+        return self.atributos[nombre]
+
+    # ------------------------------------------------------------------
+    # Adyacencia, grado y componentes
+    # ------------------------------------------------------------------
+
+    def adyacencia(self):
+        """
+        Adyacencia en formato CSR: los vecinos del nodo i son indices[indptr[i]:indptr[i+1]]
+
+        Returns:
+            tuple: (indptr, indices)
+        """
+        if self._csr is None:
+            n = len(self)
+            fuentes = np.concatenate([self.origen, self.destino])
+            vecinos = np.concatenate([self.destino, self.origen])
+            orden = np.argsort(fuentes, kind='stable')
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(fuentes, minlength=n), out=indptr[1:])
+            self._csr = (indptr, vecinos[orden].astype(np.int32))
+        return self._csr
+
+    def vecinos(self, indice):
+        indptr, indices = self.adyacencia()
+        return indices[indptr[indice]:indptr[indice + 1]]
+
+    def calcular_grado(self):
+        """
+        Grado de cada nodo (un lazo cuenta dos veces, como en networkx)
+        """
+        self.grado = calcular_grados(len(self), self.origen, self.destino)
+        return self.grado
+
+    def calcular_componentes(self):
+        """
+        Numera las componentes conectadas de mayor a menor tamaño (ver etiquetar_componentes),
+        asigna su identificador estable (ver identificadores_componente) y
+        reinicia el union-find que usa actualizar_componentes
+
+        Returns:
+            int: Número de componentes
+        """
+        self.componente, tamanos = etiquetar_componentes(len(self), self.origen, self.destino)
+        menores = _menores_miembros(self.ids, self.componente)
+        self.componente_id = identificadores_componente(self.ids, self.componente, menores)
+        self.union_find = UnionFind.desde_componentes(self.componente, menores)
+        return len(tamanos)
+
+    def actualizar_componentes(self, origen, destino):
+        """
+        Actualiza componente y componente_id con enlaces ya agregados al grafo,
+        uniendo sus componentes en el union-find en lugar de recalcularlas. El
+        trabajo es proporcional a los enlaces nuevos salvo un par de pasadas
+        vectorizadas por los arreglos de nodos.
+
+        Los nodos sin componente (agregados después del último cálculo) se toman
+        como componentes nuevas. Una componente que absorbe otras toma el menor
+        número de componente (el de la más grande); las nuevas reciben números
+        a continuación del mayor. El orden exacto por tamaño se recupera con
+        calcular_componentes.
+
+        Args:
+            origen, destino: Índices de los extremos de los enlaces agregados
+
+        Returns:
+            tuple: (DataFrame de cambios con las columnas de mapear_componentes,
+                    DataFrame anterior, nueva, componente con cada componente_id
+                    reemplazado y su nuevo número de componente)
+        """
+        if self.union_find is None:
+            self.union_find = UnionFind.desde_componentes(self.componente,
+                                                          _menores_miembros(self.ids, self.componente))
+        uf = self.union_find
+        if len(uf) < len(self):
+            uf.agregar(len(self) - len(uf))
+
+        origen = np.asarray(origen, dtype=np.int64)
+        destino = np.asarray(destino, dtype=np.int64)
+        extremos = np.unique(np.concatenate([origen, destino, np.flatnonzero(self.componente_id < 0)]))
+        raiz_anterior = uf.encontrar(extremos)
+        tamano_anterior = uf.tamano[raiz_anterior]
+        uf.unir(origen, destino, self.ids)
+        raiz = uf.encontrar(extremos)
+
+        pares = pd.DataFrame({
+            'raiz': raiz,
+            'anterior': self.componente_id[raiz_anterior],
+            'rango_anterior': self.componente[raiz_anterior],
+            'tamano_anterior': tamano_anterior,
+        }).drop_duplicates(['raiz', 'anterior'])
+        raices = np.unique(raiz)
+        nuevas = pd.Series([_hash_estable(str(self.ids[r])) for r in raices.tolist()], index=raices, dtype=np.int64)
+        pares['nueva'] = nuevas.loc[pares['raiz']].to_numpy()
+        pares['tamano_nuevo'] = uf.tamano[pares['raiz'].to_numpy()]
+
+        # Número de componente: el menor entre las absorbidas, o uno nuevo
+        previas = pares[pares['anterior'] >= 0]
+        rangos = previas.groupby('raiz')['rango_anterior'].min()
+        sin_previa = raices[~np.isin(raices, rangos.index)]
+        siguiente = int(self.componente.max()) + 1 if len(self.componente) else 0
+        rangos = pd.Series(np.concatenate([rangos.to_numpy(), np.arange(siguiente, siguiente + len(sin_previa))]),
+                           index=np.concatenate([rangos.index.to_numpy(), sin_previa]))
+        pares['rango'] = rangos.loc[pares['raiz']].to_numpy()
+
+        origenes = previas.groupby('raiz').size()
+        pares['origenes'] = origenes.reindex(pares['raiz']).fillna(0).astype(int).to_numpy()
+        previas = pares[pares['anterior'] >= 0]
+        tipo = np.select(
+            [previas['origenes'] > 1, previas['anterior'] != previas['nueva']],
+            ['fusion', 'renombrada'],
+            default='modificada',
+        )
+        cambios = pd.DataFrame({
+            'componente_anterior': previas['anterior'].to_numpy(),
+            'componente_nueva': previas['nueva'].to_numpy(),
+            'tipo': tipo,
+            'nodos_compartidos': previas['tamano_anterior'].to_numpy(),
+            'tamano_anterior': previas['tamano_anterior'].to_numpy(),
+            'tamano_nuevo': previas['tamano_nuevo'].to_numpy(),
+        })
+        # Una componente que solo recibió enlaces internos no cambió
+        cambios = cambios[(cambios['tipo'] != 'modificada') | (cambios['tamano_anterior'] != cambios['tamano_nuevo'])]
+        creadas = pares.loc[pares['origenes'] == 0].drop_duplicates('raiz')
+        cambios = pd.concat([cambios, pd.DataFrame({
+            'componente_anterior': None,
+            'componente_nueva': creadas['nueva'].to_numpy(),
+            'tipo': 'nueva',
+            'nodos_compartidos': 0,
+            'tamano_anterior': None,
+            'tamano_nuevo': creadas['tamano_nuevo'].to_numpy(),
+        })], ignore_index=True).astype({'componente_anterior': 'Int64', 'componente_nueva': 'Int64',
+                                         'tamano_anterior': 'Int64', 'tamano_nuevo': 'Int64'})
+
+        # Reetiquetar los nodos de las componentes absorbidas o renombradas y los extremos
+        reetiquetas = previas.loc[(previas['anterior'] != previas['nueva']) | (previas['rango_anterior'] != previas['rango']),
+                                  ['anterior', 'nueva', 'rango']].rename(columns={'rango': 'componente'})
+        if len(reetiquetas):
+            posiciones = pd.Index(reetiquetas['anterior']).get_indexer(self.componente_id)
+            afectados = posiciones >= 0
+            self.componente_id[afectados] = reetiquetas['nueva'].to_numpy()[posiciones[afectados]]
+            self.componente[afectados] = reetiquetas['componente'].to_numpy()[posiciones[afectados]]
+        self.componente_id[extremos] = nuevas.loc[raiz].to_numpy()
+        self.componente[extremos] = rangos.loc[raiz].to_numpy()
+        return cambios.reset_index(drop=True), reetiquetas.reset_index(drop=True)
+
+    # ------------------------------------------------------------------
+    # Consultas y conversión
+    # ------------------------------------------------------------------
+
+    def atributos_nodo(self, indice):
+        """
+        Atributos del nodo como diccionario, sin los que están en None
+        """
+        datos = {nombre: columna[indice] for nombre, columna in self.atributos.items() if columna[indice] is not None}
+        tipo = self.tipo_de(indice)
+        if tipo is not None:
+            datos['tipo'] = tipo
+        if self.componente[indice] >= 0:
+            datos['componente'] = int(self.componente[indice])
+        if self.componente_id[indice] >= 0:
+            datos['componente_id'] = int(self.componente_id[indice])
+        datos['grado'] = int(self.grado[indice])
+        return datos
+
+    def nodos(self, data=False):
+        """
+        Itera los identificadores de los nodos, o pares (id, atributos) con data=True
+        """
+        for indice, nodo_id in enumerate(self.ids):
+            yield (nodo_id, self.atributos_nodo(indice)) if data else nodo_id
+
+    def enlaces(self, data=False):
+        """
+        Itera pares (origen, destino), o tripletas con sus atributos con data=True
+        """
+        columnas = list(self.atributos_enlace.items())
+        for posicion, (u, v) in enumerate(zip(self.origen, self.destino)):
+            if data:
+                atributos = {nombre: columna[posicion] for nombre, columna in columnas if columna[posicion] is not None}
+                yield self.ids[u], self.ids[v], atributos
+            else:
+                yield self.ids[u], self.ids[v]
+
+    def subgrafo(self, nodo_ids):
+        """
+        Subgrafo inducido por los nodos dados, conservando atributos, grado y componente
+        """
+        seleccion = np.zeros(len(self), dtype=bool)
+        indices = self.indice_de(nodo_ids)
+        seleccion[indices[indices >= 0]] = True
+        nuevo_indice = np.cumsum(seleccion) - 1
+
+        H = GrafoCompacto()
+        H.tipos = list(self.tipos)
+        H.ids = self.ids[seleccion]
+        H.tipo = self.tipo[seleccion]
+        H.componente = self.componente[seleccion]
+        H.componente_id = self.componente_id[seleccion]
+        # Las componentes del subgrafo no son las del grafo: sin union-find hasta calcularlas
+        H.grado = self.grado[seleccion]
+        H.atributos = {nombre: columna[seleccion] for nombre, columna in self.atributos.items()}
+        enlaces = seleccion[self.origen] & seleccion[self.destino]
+        H.origen = nuevo_indice[self.origen[enlaces]].astype(np.int32)
+        H.destino = nuevo_indice[self.destino[enlaces]].astype(np.int32)
+        H.atributos_enlace = {nombre: columna[enlaces] for nombre, columna in self.atributos_enlace.items()}
+        return H
+
+    def a_networkx(self):
+        """
+        Convierte el grafo a networkx.Graph con los mismos atributos
+        """
+        G = nx.Graph()
+        G.add_nodes_from(self.nodos(data=True))
+        G.add_edges_from(self.enlaces(data=True))
+        return G
+
+    @classmethod
+    def desde_networkx(cls, G):
+        """
+        Crea un GrafoCompacto a partir de un networkx.Graph. tipo, componente,
+        componente_id y grado pasan a sus arreglos; los demás atributos a columnas.
+        """
+        H = cls()
+        n = G.number_of_nodes()
+        H.ids = np.empty(n, dtype=object)
+        H.ids[:] = list(G.nodes())
+        H.tipo = np.fromiter((H.codigo_tipo(datos.get('tipo')) for _, datos in G.nodes(data=True)),
+                             dtype=np.int8, count=n)
+        H.componente = np.fromiter((datos.get('componente', -1) for _, datos in G.nodes(data=True)),
+                                   dtype=np.int32, count=n)
+        H.componente_id = np.fromiter((datos.get('componente_id', -1) for _, datos in G.nodes(data=True)),
+                                      dtype=np.int64, count=n)
+        H.atributos = {}
+        for indice, (_, datos) in enumerate(G.nodes(data=True)):
+            for nombre, valor in datos.items():
+                if nombre not in ATRIBUTOS_PROPIOS:
+                    H._columna(nombre)[indice] = valor
+
+        posiciones = {nodo_id: indice for indice, nodo_id in enumerate(G.nodes())}
+        m = G.number_of_edges()
+        H.origen = np.empty(m, dtype=np.int32)
+        H.destino = np.empty(m, dtype=np.int32)
+        for posicion, (u, v, datos) in enumerate(G.edges(data=True)):
+            H.origen[posicion] = posiciones[u]
+            H.destino[posicion] = posiciones[v]
+            for nombre, valor in datos.items():
+                if nombre not in H.atributos_enlace:
+                    H.atributos_enlace[nombre] = _columna_vacia(m)
+                H.atributos_enlace[nombre][posicion] = valor
+        H.calcular_grado()
+        return H
+
+    def tabla_nodos(self):
+        """
+        DataFrame con una fila por nodo: id, tipo, componente, componente_id, grado y los atributos
+        """
+        tipos = np.array(self.tipos + [None], dtype=object)
+        return pd.DataFrame({
+            'id': self.ids,
+            'tipo': tipos[self.tipo],
+            'componente': self.componente,
+            'componente_id': self.componente_id,
+            'grado': self.grado,
+            **self.atributos,
+        })
+
+    def tabla_enlaces(self):
+        """
+        DataFrame con una fila por enlace: origen, destino (identificadores) y los atributos
+        """
+        return pd.DataFrame({
+            'origen': self.ids[self.origen],
+            'destino': self.ids[self.destino],
+            **self.atributos_enlace,
+        })
@@ -0,0 +1,120 @@
+import json
+
+
+# Caracteres que el estándar JSON considera espacio en blanco
+ESPACIOS_JSON = ' \t\n\r'
+
+# Caracteres que pueden continuar un número JSON (ej. '1' seguido de '.5' o 'e3')
+CARACTERES_NUMERO = set('0123456789+-.eE')
+
+
+class _LectorIncremental:
+    """
+    Buffer de texto sobre un archivo que se rellena por bloques a medida
+    que el decodificador lo necesita. Solo conserva el texto aún no consumido.
+    """
+
+    def __init__(self, archivo, tamano_bloque):
+        self._archivo = archivo
+        self._tamano_bloque = tamano_bloque
+        self._decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.fin_archivo = False
+
+    def _leer_bloque(self):
+        bloque = self._archivo.read(self._tamano_bloque)
+        if not bloque:
+            self.fin_archivo = True
+            return False
+        # Descartar lo ya consumido para que el buffer no crezca con el archivo
+        self.buffer = self.buffer[self.pos:] + bloque
+        self.pos = 0
+        return True
+
+    def siguiente_caracter(self):
+        """
+        Salta los espacios y devuelve el siguiente carácter significativo
+        (sin consumirlo), o None al final del archivo
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ESPACIOS_JSON:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._leer_bloque():
+                return None
+
+    def consumir(self, esperado):
+        caracter = self.siguiente_caracter()
+        if caracter != esperado:
+            raise ValueError(f"JSON inválido: se esperaba '{esperado}' y se encontró {caracter!r}")
+        self.pos += 1
+
+    def verificar_fin(self):
+        caracter = self.siguiente_caracter()
+        if caracter is not None:
+            raise ValueError(f"JSON inválido: contenido después del objeto, se encontró {caracter!r}")
+
+    def _numero_cortado(self, valor, fin):
+        """
+        Indica si un número decodificado podría continuar en el siguiente bloque:
+        raw_decode lee '1.' como 1, así que mientras el resto del buffer solo tenga
+        caracteres de número no se sabe dónde termina
+        """
+        if not isinstance(valor, (int, float)) or isinstance(valor, bool):
+            return False
+        return all(caracter in CARACTERES_NUMERO for caracter in self.buffer[fin:])
+
+    def decodificar_valor(self):
+        """
+        Decodifica el siguiente valor JSON completo, leyendo más bloques
+        mientras el valor esté cortado al final del buffer
+        """
+        self.siguiente_caracter()
+        while True:
+            try:
+                valor, fin = self._decoder.raw_decode(self.buffer, self.pos)
+                if self.fin_archivo or (fin < len(self.buffer) and not self._numero_cortado(valor, fin)):
+                    self.pos = fin
+                    return valor
+            except json.JSONDecodeError:
+                if self.fin_archivo:
+                    raise
+            self._leer_bloque()
+
+
+def iterar_objeto_json(ruta_archivo, tamano_bloque=1024 * 1024):
+    """
+    Recorre un archivo JSON cuyo nivel superior es un objeto sin cargarlo
+    completo en memoria.
+
+    En memoria solo se mantiene el bloque actual y el valor que se está
+    decodificando, por lo que el consumo no depende del tamaño del archivo.
+
+    Args:
+        ruta_archivo: Ruta al archivo JSON
+        tamano_bloque: Número de caracteres leídos en cada lectura
+
+    Yields:
+        tuple: (clave, valor) de cada entrada del objeto, en el orden del archivo
+    """
+    with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
+        lector = _LectorIncremental(archivo, tamano_bloque)
+        lector.consumir('{')
+
+        if lector.siguiente_caracter() != '}':
+            while True:
+                clave = lector.decodificar_valor()
+                if not isinstance(clave, str):
+                    raise ValueError(f"JSON inválido: clave no textual {clave!r}")
+                lector.consumir(':')
+                yield clave, lector.decodificar_valor()
+
+                if lector.siguiente_caracter() == '}':
+                    break
+                lector.consumir(',')
+
+        lector.consumir('}')
+        # Como json.load, no se acepta texto después del objeto
+        lector.verificar_fin()
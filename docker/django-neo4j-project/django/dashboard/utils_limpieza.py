@@ -0,0 +1,136 @@
+import pandas as pd
+from django.db import models, transaction
+from django.db.models import Case, F, Q, When
+
+
+# Texto que producía str(valor) sobre un nulo de pandas en las cargas anteriores
+TEXTO_NULO = 'nan'
+
+
+def limpiar_valor(valor, recortar=True):
+    """
+    Normaliza un valor leído de un CSV: NaN, vacío o solo espacios -> None.
+
+    Args:
+        valor: Valor de una celda (cualquier tipo)
+        recortar: Quitar espacios al inicio y al final del texto
+
+    Returns:
+        str o None
+    """
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    texto = str(valor)
+    if not texto.strip():
+        return None
+    return texto.strip() if recortar else texto
+
+
+def limpiar_texto(serie, recortar=True):
+    """
+    Versión vectorizada de limpiar_valor para una columna completa.
+
+    Args:
+        serie: Serie de pandas
+        recortar: Quitar espacios al inicio y al final del texto
+
+    Returns:
+        Series: Serie de tipo object con texto o None
+    """
+    presentes = serie.notna()
+    texto = serie.astype(str)
+    recortado = texto.str.strip()
+    if recortar:
+        texto = recortado
+    return texto.astype(object).where(presentes & (recortado != ''), None)
+
+
+def campos_texto(modelo):
+    """
+    Campos CharField/TextField del modelo que no son llave primaria
+    """
+    return [field for field in modelo._meta.concrete_fields
+            if isinstance(field, (models.CharField, models.TextField)) and not field.primary_key]
+
+
+def rellenar_obligatorios(modelo, frame):
+    """
+    Los campos de texto NOT NULL del modelo no admiten None: se guardan como ''.
+
+    Args:
+        modelo: Clase del modelo de Django
+        frame: DataFrame con columnas nombradas como los campos del modelo
+
+    Returns:
+        DataFrame: El mismo frame con los nulos reemplazados en esas columnas
+    """
+    for field in campos_texto(modelo):
+        if not field.null and field.name in frame.columns:
+            frame[field.name] = frame[field.name].where(frame[field.name].notna(), '')
+    return frame
+
+
+def _es_nulo_textual(campo):
+    """
+    Condición para los valores que deberían ser nulos: 'nan', vacío o solo espacios
+    """
+    return Q(**{campo: TEXTO_NULO}) | Q(**{f"{campo}__regex": r'^\s*$'})
+
+
+def normalizar_nulos_existentes(modelo):
+    """
+    Reescribe los 'nan' y textos vacíos ya guardados por cargas anteriores:
+    NULL en los campos que lo admiten y '' en los obligatorios.
+
+    Se ejecuta un único UPDATE por tabla que solo toca las filas afectadas.
+
+    Args:
+        modelo: Clase del modelo de Django
+
+    Returns:
+        int: Número de filas modificadas
+    """
+    cambios = {}
+    filtro = Q()
+
+    for field in campos_texto(modelo):
+        condicion = _es_nulo_textual(field.name)
+        if not field.null:
+            # En los obligatorios solo sobra el texto 'nan'; '' ya es el valor vacío
+            condicion = Q(**{field.name: TEXTO_NULO})
+        cambios[field.name] = Case(
+            When(condicion, then=None if field.null else models.Value('')),
+            default=F(field.name),
+            output_field=field,
+        )
+        filtro |= condicion
+
+    if not cambios:
+        return 0
+
+    return modelo.objects.filter(filtro).update(**cambios)
+
+
+def normalizar_nulos_dimensiones(modelo, dimensiones):
+    """
+    Pone en NULL las llaves que apuntan a dimensiones 'nan' o vacías y elimina
+    esas filas de dimensión.
+
+    Args:
+        modelo: Clase del modelo con llaves <campo>_dim
+        dimensiones: Diccionario campo -> modelo de dimensión
+
+    Returns:
+        int: Número de llaves puestas en NULL (una fila puede contar varias veces)
+    """
+    modificadas = 0
+
+    with transaction.atomic():
+        for campo, dimension in dimensiones.items():
+            nulas = list(dimension.objects.filter(_es_nulo_textual('nombre')).values_list('pk', flat=True))
+            if not nulas:
+                continue
+            modificadas += modelo.objects.filter(**{f"{campo}_dim__in": nulas}).update(**{f"{campo}_dim": None})
+            dimension.objects.filter(pk__in=nulas).delete()
+
+    return modificadas
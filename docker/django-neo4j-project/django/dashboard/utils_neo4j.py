@@ -1,33 +1,184 @@
 import os
+import numpy as np
 import pandas as pd
 import networkx as nx
 import time
-from networkx.algorithms.components import connected_components
 from neo4j import GraphDatabase
 from django.conf import settings
-from .models import ConsolidadoSpoa, PersonasDf
+from .models import ConsolidadoSpoa, PersonasDf, CambioComponente
+from .utils_limpieza import limpiar_texto
+from .utils_archivos import leer_por_chunks
+from .utils_grafo import (GrafoCompacto, arreglos_desde_networkx, calcular_grados, etiquetar_componentes,
+                          identificadores_componente, mapear_componentes)
+from .utils_centralidad import calcular_centralidad
 from myproject.neo4j_driver import Neo4jConnection
 
 
-def crear_red_desde_consolidado(ruta_archivo=None, chunksize=50000, grafo_existente=None):
+# Columnas del consolidado que usa la red y las que forman los atributos de un nodo NUNC
+COLUMNAS_NODO_NUNC = ['nunc', 'necropsia', 'seccional', 'unidad', 'despacho', 'fuente']
+COLUMNAS_RED = COLUMNAS_NODO_NUNC + ['numero_documento', 'nombre_completo', 'calidad_vinculado']
+DTYPE_RED = {'nunc': str, 'numero_documento': str}
+
+COLOR_NUNC = "#e63946"
+COLOR_PERSONA = "#26C6DA"
+
+
+def _limpiar_columnas(chunk, columnas):
+    """
+    Aplica limpiar_texto a cada columna del chunk; las que no vienen en el
+    archivo quedan en None, como row.get() sobre una columna inexistente
+    """
+    return pd.DataFrame({
+        columna: limpiar_texto(chunk[columna]) if columna in chunk.columns
+        else pd.Series(None, index=chunk.index, dtype=object)
+        for columna in columnas
+    })
+
+
+def _concatenar_unicos(frames, columnas, claves):
+    """
+    Une los frames de cada chunk conservando la primera aparición de cada clave.
+    concat convierte a NaN los None de columnas vacías; se vuelven a None.
+    """
+    if not frames:
+        return pd.DataFrame(columns=columnas)
+    unidos = pd.concat(frames, ignore_index=True).drop_duplicates(claves).astype(object)
+    return unidos.where(unidos.notna(), None)
+
+
+def _agregar_a_networkx(G, nuncs, personas, enlaces):
+    """
+    Agrega al grafo de networkx los NUNC, personas y enlaces únicos leídos del consolidado
+    """
+    # Agregar nodos NUNC (los que ya están en el grafo se conservan)
+    nodos_antes = G.number_of_nodes()
+    G.add_nodes_from(
+        (nunc, {'name': nunc, 'tipo': 'nunc', 'necropsia': necropsia, 'seccional': seccional,
+                'unidad': unidad, 'despacho': despacho, 'fuente': fuente, 'color': COLOR_NUNC})
+        for nunc, necropsia, seccional, unidad, despacho, fuente in nuncs.itertuples(index=False, name=None)
+        if nunc not in G
+    )
+    print(f"Total de nodos NUNC: {G.number_of_nodes() - nodos_antes}")
+    
+    # Agregar nodos PERSONA con el nombre de su primera aparición
+    G.add_nodes_from(
+        (numero_documento, {'name': nombre_completo, 'tipo': 'persona', 'color': COLOR_PERSONA})
+        for numero_documento, nombre_completo in personas.itertuples(index=False, name=None)
+    )
+    print(f"Total de nodos PERSONA: {len(personas)}")
+    
+    # Crear enlaces entre NUNC y PERSONA (los existentes conservan su calidad de vínculo)
+    G.add_edges_from(
+        (nunc, numero_documento, {'calidad_vinculo': calidad_vinculado})
+        for nunc, numero_documento, calidad_vinculado in enlaces.itertuples(index=False, name=None)
+        if not G.has_edge(nunc, numero_documento)
+    )
+
+
+def _agregar_a_grafo_compacto(G, nuncs, personas, enlaces):
+    """
+    Agrega al GrafoCompacto los NUNC, personas y enlaces únicos leídos del
+    consolidado, con las mismas reglas que la construcción con networkx
+    """
+    nuevos = G.agregar_nodos(nuncs['nunc'].to_numpy(), tipo='nunc', atributos={
+        'name': nuncs['nunc'].to_numpy(),
+        'necropsia': nuncs['necropsia'].to_numpy(),
+        'seccional': nuncs['seccional'].to_numpy(),
+        'unidad': nuncs['unidad'].to_numpy(),
+        'despacho': nuncs['despacho'].to_numpy(),
+        'fuente': nuncs['fuente'].to_numpy(),
+        'color': COLOR_NUNC,
+    })
+    print(f"Total de nodos NUNC: {nuevos}")
+    
+    # Como G.add_node, una persona que ya existe toma el nombre, tipo y color nuevos
+    G.agregar_nodos(personas['numero_documento'].to_numpy(), tipo='persona', atributos={
+        'name': personas['nombre_completo'].to_numpy(),
+        'color': COLOR_PERSONA,
+    }, sobrescribir=True)
+    print(f"Total de nodos PERSONA: {len(personas)}")
+    
+    G.agregar_enlaces(enlaces['nunc'].to_numpy(), enlaces['numero_documento'].to_numpy(),
+                      atributos={'calidad_vinculo': enlaces['calidad_vinculado'].to_numpy()})
+
+
+def leer_red_de_archivo(ruta_archivo, chunksize=50000):
+    """
+    Lee del consolidado los NUNC, personas y enlaces únicos de la red.
+
+    Una sola pasada por el archivo leyendo solo las columnas de la red. Cada
+    chunk se limpia por columnas y se reduce a sus NUNC, personas y enlaces
+    únicos, conservando la primera aparición de cada uno.
+
+    Args:
+        ruta_archivo: Archivo CSV (plano, .gz o .zst) o Parquet
+        chunksize: Tamaño del chunk para procesar el archivo por lotes
+
+    Returns:
+        tuple: (DataFrame de NUNC, DataFrame de personas, DataFrame de enlaces, filas leídas)
+    """
+    start_time = time.time()
+    frames_nunc = []
+    frames_persona = []
+    frames_enlace = []
+    processed_rows = 0
+    
+    for chunk_idx, chunk in enumerate(leer_por_chunks(ruta_archivo, chunksize, dtype=DTYPE_RED,
+                                                      columnas=COLUMNAS_RED)):
+        datos = _limpiar_columnas(chunk, COLUMNAS_RED)
+        
+        nuncs = datos.loc[datos['nunc'].notna(), COLUMNAS_NODO_NUNC].drop_duplicates('nunc')
+        frames_nunc.append(nuncs)
+        
+        vinculos = datos[datos['nunc'].notna() & datos['numero_documento'].notna()]
+        frames_persona.append(
+            vinculos[['numero_documento', 'nombre_completo']].drop_duplicates('numero_documento')
+        )
+        frames_enlace.append(
+            vinculos[['nunc', 'numero_documento', 'calidad_vinculado']].drop_duplicates(['nunc', 'numero_documento'])
+        )
+        
+        processed_rows += len(chunk)
+        print(f"Chunk {chunk_idx+1}: Procesados {processed_rows} registros, {len(nuncs)} NUNC y "
+              f"{len(vinculos)} vínculos con persona")
+    
+    print(f"Tiempo hasta ahora: {time.time() - start_time:.2f} segundos")
+    
+    nuncs = _concatenar_unicos(frames_nunc, COLUMNAS_NODO_NUNC, ['nunc'])
+    personas = _concatenar_unicos(frames_persona, ['numero_documento', 'nombre_completo'], ['numero_documento'])
+    enlaces = _concatenar_unicos(frames_enlace, ['nunc', 'numero_documento', 'calidad_vinculado'],
+                                 ['nunc', 'numero_documento'])
+    return nuncs, personas, enlaces, processed_rows
+
+
+def crear_red_desde_consolidado(ruta_archivo=None, chunksize=50000, grafo_existente=None, compacto=False):
     """
     Crea una red no dirigida a partir de los datos del consolidado SPOA.
     Optimizada para archivos grandes de más de un millón de registros.
     
     Args:
-        ruta_archivo: Ruta al archivo CSV opcional. Si no se proporciona, 
-                      se usarán los datos ya cargados en los modelos.
+        ruta_archivo: Ruta opcional al archivo CSV (plano, .gz o .zst) o Parquet.
+                      Si no se proporciona, se usarán los datos ya cargados en los modelos.
         chunksize: Tamaño del chunk para procesar el CSV por lotes.
+        grafo_existente: Grafo (networkx o GrafoCompacto) al que se agregan los nodos y enlaces
+        compacto: Construir un GrafoCompacto (ids internados, arreglos NumPy) en
+                  lugar de un networkx.Graph. Desde la base de datos la red se arma
+                  con networkx y se convierte al final.
     
     Returns:
-        G: El grafo de networkx creado
+        G: El grafo de networkx creado, o el GrafoCompacto si compacto=True
     """
     start_time = time.time()
     
     # Crear un grafo no dirigido o usar el existente
     if grafo_existente is not None:
         G = grafo_existente
+        if compacto and not isinstance(G, GrafoCompacto):
+            G = GrafoCompacto.desde_networkx(G)
         print(f"Usando grafo existente con {G.number_of_nodes()} nodos y {G.number_of_edges()} enlaces")
+    elif compacto:
+        G = GrafoCompacto()
+        print("Creando un nuevo grafo compacto")
     else:
         G = nx.Graph()
         print("Creando un nuevo grafo")
@@ -40,79 +191,21 @@ def crear_red_desde_consolidado(ruta_archivo=None, chunksize=50000, grafo_existe
         print(f"Cargando datos desde el archivo: {ruta_archivo}")
         print(f"Usando chunksize de {chunksize} registros")
         
-        # Primera pasada: agregar todos los nodos NUNC
-        # Si solo se usa nunc se puede usar enumerate(pd.read_csv(ruta_archivo, chunksize=chunksize, usecols=['nunc'], sep="|"))
-        # En caso contrario quitar la opción usecols
-        print("Primera pasada: Agregando nodos NUNC...")
-        for chunk_idx, chunk in enumerate(pd.read_csv(ruta_archivo, chunksize=chunksize, sep="|", dtype={'nunc': str})):
-            nunc_counter = 0
-            for _, row in chunk.iterrows():
-                nunc = str(row.get('nunc', '')).strip()
-                necropsia = str(row.get('necropsia', '')).strip()
-                seccional = str(row.get('seccional', '')).strip()
-                unidad = str(row.get('unidad', '')).strip()
-                despacho = str(row.get('despacho', '')).strip()
-                fuente = str(row.get('fuente', '')).strip()
-                color = "#e63946"
-                if nunc and nunc not in G:
-                    G.add_node(nunc, 
-                                name=nunc, 
-                                tipo='nunc', 
-                                necropsia=necropsia,
-                                seccional=seccional,
-                                unidad=unidad,
-                                despacho=despacho,
-                                fuente=fuente,
-                                color=color
-                            )
-                    nunc_counter += 1
-            
-            processed_rows += len(chunk)
-            print(f"Chunk {chunk_idx+1}: Procesados {processed_rows} registros, {nunc_counter} nodos NUNC agregados")
-        
-        print(f"Tiempo hasta ahora: {time.time() - start_time:.2f} segundos")
-        print(f"Total de nodos NUNC: {sum(1 for n, d in G.nodes(data=True) if d.get('tipo') == 'nunc')}")
-        
-        # Segunda pasada: agregar nodos PERSONA y enlaces
-        print("Segunda pasada: Agregando nodos PERSONA y enlaces...")
-        processed_rows = 0
-        persona_counter = 0
-        edge_counter = 0
-        
-        # Diccionario para almacenar el nombre de las personas (evita duplicados)
-        personas_nombres = {}
+        nuncs, personas, enlaces, processed_rows = leer_red_de_archivo(ruta_archivo, chunksize)
         
-        for chunk_idx, chunk in enumerate(pd.read_csv(ruta_archivo, chunksize=chunksize, sep="|", dtype={'nunc': str, 'numero_documento': str})):
-            # Procesar el chunk
-            for _, row in chunk.iterrows():
-                nunc = str(row.get('nunc', '')).strip()
-                numero_documento = str(row.get('numero_documento', '')).strip()
-                nombre_completo = str(row.get('nombre_completo', '')).strip()
-                color = "#26C6DA"
-                calidad_vinculado = str(row.get('calidad_vinculado', '')).strip()
-                
-                if nunc and numero_documento:
-                    # Guardar el nombre de la persona si no existe
-                    if numero_documento not in personas_nombres:
-                        personas_nombres[numero_documento] = nombre_completo
-                        G.add_node(numero_documento, name=nombre_completo, tipo='persona', color=color)
-                        persona_counter += 1
-                    
-                    # Crear enlace entre NUNC y PERSONA
-                    if not G.has_edge(nunc, numero_documento):
-                        G.add_edge(nunc, numero_documento, calidad_vinculo=calidad_vinculado)
-                        edge_counter += 1
-            
-            processed_rows += len(chunk)
-            print(f"Chunk {chunk_idx+1}: Procesados {processed_rows} registros, {persona_counter} nodos PERSONA, {edge_counter} enlaces")
+        if isinstance(G, GrafoCompacto):
+            _agregar_a_grafo_compacto(G, nuncs, personas, enlaces)
+        else:
+            _agregar_a_networkx(G, nuncs, personas, enlaces)
         
         print(f"Tiempo hasta ahora: {time.time() - start_time:.2f} segundos")
-        print(f"Total de nodos PERSONA: {sum(1 for n, d in G.nodes(data=True) if d.get('tipo') == 'persona')}")
-        print(f"Total de enlaces: {len(G.edges())}")
+        print(f"Total de enlaces: {G.number_of_edges()}")
         
     else:
         print("Cargando datos desde los modelos de Django")
         # Cargar datos desde los modelos de Django
+        if isinstance(G, GrafoCompacto):
+            G = G.a_networkx()
         
         # Agregar nodos tipo NUNC
         total_nuncs = ConsolidadoSpoa.objects.count()
@@ -122,7 +215,7 @@ def crear_red_desde_consolidado(ruta_archivo=None, chunksize=50000, grafo_existe
         
         # Usar el método no_cache para evitar cargar todo en memoria
         for i in range(0, total_nuncs, batch_size):
-            for spoa in ConsolidadoSpoa.objects.all()[i:i+batch_size]:
+            for spoa in ConsolidadoSpoa.objects.con_dimensiones().order_by('pk')[i:i+batch_size]:
                 G.add_node(spoa.nunc, 
                             name=spoa.nunc, 
                             tipo='nunc',
@@ -131,7 +224,7 @@ def crear_red_desde_consolidado(ruta_archivo=None, chunksize=50000, grafo_existe
                             unidad=spoa.unidad,
                             despacho=spoa.despacho,
                             fuente=spoa.fuente,
-                            color = "#e63946"
+                            color=COLOR_NUNC
                         )
                 count += 1
                 if count % 10000 == 0:
@@ -147,7 +240,7 @@ def crear_red_desde_consolidado(ruta_archivo=None, chunksize=50000, grafo_existe
                 G.add_node(persona.numero_identificacion, 
                            name=persona.nombre_completo,
                            tipo='persona',
-                           color="#26C6DA")
+                           color=COLOR_PERSONA)
                 count += 1
                 if count % 10000 == 0:
                     print(f"Procesados {count} nodos PERSONA")
@@ -169,81 +262,62 @@ def crear_red_desde_consolidado(ruta_archivo=None, chunksize=50000, grafo_existe
                     print(f"Procesados {count} registros, {edge_count} enlaces creados")
     
     
-    print("Calculando componentes conectadas...")
-    # Calcular componentes conectadas y asignarlas como atributo
-    # Para grafos grandes, usamos una aproximación por lotes
-
-    print("Creando diccionario para mapear componentes...")
-    nodo_a_componente = {}
-
-    # Para grafos muy grandes, podemos calcular componentes por lotes
-    print("Calculando componentes...")
-    if len(G) > 1000000:  # Para grafos extremadamente grandes
-        # Paso 1: Obtener todas las componentes
-        print("Grafo muy grande: calculando componentes progresivamente...")
-        componentes = []
-        for comp in connected_components(G):
-            componentes.append(list(comp))
-            if len(componentes) % 1000 == 0:
-                print(f"Descubiertas {len(componentes)} componentes...")
-        
-        # Paso 2: Ordenar componentes por tamaño (de mayor a menor)
-        print("Ordenando componentes por tamaño...")
-        componentes_ordenadas = sorted(componentes, key=len, reverse=True)
-        
-        # Paso 3: Asignar índices a los nodos según el tamaño de su componente
-        print("Asignando índices ordenados a los nodos...")
-        for i, comp in enumerate(componentes_ordenadas):
-            for nodo in comp:
-                nodo_a_componente[nodo] = i
-            
-            if i % 1000 == 0 and i > 0:
-                print(f"Procesadas {i} componentes ordenadas...")
+    if compacto and not isinstance(G, GrafoCompacto):
+        G = GrafoCompacto.desde_networkx(G)
+    
+    # Componentes ordenadas por tamaño, su identificador estable y grado, calculados
+    # sobre arreglos de enteros (ver utils_grafo.etiquetar_componentes)
+    print("Calculando componentes conectadas y grado...")
+    if isinstance(G, GrafoCompacto):
+        num_componentes = G.calcular_componentes()
+        G.calcular_grado()
+        tamano_mayor = int(np.sum(G.componente == 0))
     else:
-        # Método estándar para grafos de tamaño moderado
-        print("Calculando y ordenando componentes...")
-        componentes = list(connected_components(G))
+        nodos, origen, destino = arreglos_desde_networkx(G)
+        componente, tamanos = etiquetar_componentes(len(nodos), origen, destino)
+        componente_id = identificadores_componente(nodos, componente)
+        grado = calcular_grados(len(nodos), origen, destino)
         
-        # Ordenar componentes por tamaño (de mayor a menor)
-        componentes_ordenadas = sorted(componentes, key=len, reverse=True)
-        
-        print(f"Se encontraron {len(componentes_ordenadas)} componentes")
-        print(f"La componente más grande tiene {len(componentes_ordenadas[0])} nodos")
-        
-        for i, comp in enumerate(componentes_ordenadas):
-            for nodo in comp:
-                nodo_a_componente[nodo] = i
+        print("Asignando componentes y grado a los nodos...")
+        nx.set_node_attributes(G, dict(zip(nodos, componente.tolist())), 'componente')
+        nx.set_node_attributes(G, dict(zip(nodos, componente_id.tolist())), 'componente_id')
+        nx.set_node_attributes(G, dict(zip(nodos, grado.tolist())), 'grado')
+        num_componentes = len(tamanos)
+        tamano_mayor = int(tamanos[0]) if num_componentes else 0
     
-    print("Asignando componentes a los nodos...")
-    # Asignar el número de componente como atributo a cada nodo
-    nx.set_node_attributes(G, nodo_a_componente, 'componente')
-    
-    print("Calcular la centralidad de grado y el grado...")
-    # Calcular diferentes métricas de centralidad
-    # degree_centrality = nx.degree_centrality(G)
-    degree = dict(nx.degree(G))
-    
-    # Asociar las métricas a los nodos como atributos
-    # nx.set_node_attributes(G, degree_centrality, 'centralidad_grado')
-    nx.set_node_attributes(G, degree, 'grado')
+    print(f"Se encontraron {num_componentes} componentes")
+    print(f"La componente más grande tiene {tamano_mayor} nodos")
     
     # Calcular estadísticas finales
-    num_componentes = len(set(nodo_a_componente.values()))
     tiempo_total = time.time() - start_time
     
-    print(f"Red creada con {len(G.nodes)} nodos y {len(G.edges)} enlaces")
+    print(f"Red creada con {G.number_of_nodes()} nodos y {G.number_of_edges()} enlaces")
     print(f"Se identificaron {num_componentes} componentes conectadas")
     print(f"Tiempo total: {tiempo_total:.2f} segundos")
     
     return G
 
 
+def _nodos_con_atributos(G):
+    """
+    Pares (id, atributos) de un grafo de networkx o de un GrafoCompacto
+    """
+    return G.nodos(data=True) if isinstance(G, GrafoCompacto) else G.nodes(data=True)
+
+
+def _enlaces_con_atributos(G):
+    """
+    Tripletas (origen, destino, atributos) de un grafo de networkx o de un GrafoCompacto
+    """
+    return G.enlaces(data=True) if isinstance(G, GrafoCompacto) else G.edges(data=True)
+
+
 def guardar_red_en_neo4j(G, batch_size=5000, usar_transacciones=True):
     """
     Guarda la red de networkx en Neo4j de manera optimizada para grandes volúmenes.
     
     Args:
-        G: Grafo de networkx a guardar
+        G: Grafo de networkx (o GrafoCompacto) a guardar
         batch_size: Tamaño del lote para las operaciones en Neo4j
         usar_transacciones: Si se deben usar transacciones explícitas (recomendado para grandes volúmenes)
     """
@@ -254,8 +328,8 @@ def guardar_red_en_neo4j(G, batch_size=5000, usar_transacciones=True):
     driver = Neo4jConnection.get_driver()
     
     # Preparar nodos por tipo para procesamiento en lotes
-    nodos_nunc = [(nid, attrs) for nid, attrs in G.nodes(data=True) if attrs.get('tipo') == 'nunc']
-    nodos_persona = [(nid, attrs) for nid, attrs in G.nodes(data=True) if attrs.get('tipo') == 'persona']
+    nodos_nunc = [(nid, attrs) for nid, attrs in _nodos_con_atributos(G) if attrs.get('tipo') == 'nunc']
+    nodos_persona = [(nid, attrs) for nid, attrs in _nodos_con_atributos(G) if attrs.get('tipo') == 'persona']
     
     try:
         with driver.session() as session:
@@ -267,6 +341,8 @@ def guardar_red_en_neo4j(G, batch_size=5000, usar_transacciones=True):
             print("Creando índices...")
             session.run("CREATE INDEX IF NOT EXISTS FOR (n:NUNC) ON (n.id)")
             session.run("CREATE INDEX IF NOT EXISTS FOR (n:Persona) ON (n.id)")
+            session.run("CREATE INDEX IF NOT EXISTS FOR (n:NUNC) ON (n.componente_id)")
+            session.run("CREATE INDEX IF NOT EXISTS FOR (n:Persona) ON (n.componente_id)")
             
             # Usar Apoc si está disponible para cargas masivas
             apoc_disponible = False
@@ -286,13 +362,14 @@ def guardar_red_en_neo4j(G, batch_size=5000, usar_transacciones=True):
                     
                     # Preparar datos para inserción masiva
                     data = [{"id": nid, "name": attrs.get('name', ''), 
-                            "componente": attrs.get('componente', -1)} 
+                            "componente": attrs.get('componente', -1),
+                            "componente_id": attrs.get('componente_id', -1)} 
                            for nid, attrs in batch]
                     
                     # Inserción masiva con APOC
                     session.run("""
                     UNWIND $data AS row
-                    CREATE (n:NUNC {id: row.id, name: row.name, componente: row.componente})
+                    CREATE (n:NUNC {id: row.id, name: row.name, componente: row.componente, componente_id: row.componente_id})
                     """, {"data": data})
                     
                     print(f"Procesados {min(i+batch_size, len(nodos_nunc))} de {len(nodos_nunc)} nodos NUNC")
@@ -304,20 +381,21 @@ def guardar_red_en_neo4j(G, batch_size=5000, usar_transacciones=True):
                     
                     # Preparar datos para inserción masiva
                     data = [{"id": nid, "name": attrs.get('name', ''), 
-                            "componente": attrs.get('componente', -1)} 
+                            "componente": attrs.get('componente', -1),
+                            "componente_id": attrs.get('componente_id', -1)} 
                            for nid, attrs in batch]
                     
                     # Inserción masiva con APOC
                     session.run("""
                     UNWIND $data AS row
-                    CREATE (n:Persona {id: row.id, name: row.name, componente: row.componente})
+                    CREATE (n:Persona {id: row.id, name: row.name, componente: row.componente, componente_id: row.componente_id})
                     """, {"data": data})
                     
                     print(f"Procesados {min(i+batch_size, len(nodos_persona))} de {len(nodos_persona)} nodos PERSONA")
                 
                 # Crear relaciones
-                print(f"Creando {len(G.edges())} relaciones usando APOC...")
-                enlaces = list(G.edges(data=True))
+                print(f"Creando {G.number_of_edges()} relaciones usando APOC...")
+                enlaces = list(_enlaces_con_atributos(G))
                 
                 for i in range(0, len(enlaces), batch_size):
                     batch = enlaces[i:i+batch_size]
@@ -346,19 +424,22 @@ def guardar_red_en_neo4j(G, batch_size=5000, usar_transacciones=True):
                             cypher = """
                             MERGE (n:NUNC {id: $id})
                             SET n.name = $name,
-                                n.componente = $componente
+                                n.componente = $componente,
+                                n.componente_id = $componente_id
                             """
                         else:  # tipo 'persona'
                             cypher = """
                             MERGE (n:Persona {id: $id})
                             SET n.name = $name,
-                                n.componente = $componente
+                                n.componente = $componente,
+                                n.componente_id = $componente_id
                             """
                         
                         params = {
                             'id': nodo_id,
                             'name': attrs.get('name', ''),
-                            'componente': attrs.get('componente', -1)
+                            'componente': attrs.get('componente', -1),
+                            'componente_id': attrs.get('componente_id', -1)
                         }
                         
                         if tx:
@@ -413,8 +494,8 @@ def guardar_red_en_neo4j(G, batch_size=5000, usar_transacciones=True):
                             session.run(cypher, params)
                 
                 # Crear relaciones
-                print(f"Creando {len(G.edges())} relaciones...")
-                enlaces = list(G.edges(data=True))
+                print(f"Creando {G.number_of_edges()} relaciones...")
+                enlaces = list(_enlaces_con_atributos(G))
                 
                 for i in range(0, len(enlaces), batch_size):
                     batch = enlaces[i:i+batch_size]
@@ -428,30 +509,92 @@ def guardar_red_en_neo4j(G, batch_size=5000, usar_transacciones=True):
                     print(f"Procesados {min(i+batch_size, len(enlaces))} de {len(enlaces)} relaciones")
         
         tiempo_total = time.time() - start_time
-        print(f"Red guardada en Neo4j con {len(G.nodes)} nodos y {len(G.edges)} enlaces")
+        print(f"Red guardada en Neo4j con {G.number_of_nodes()} nodos y {G.number_of_edges()} enlaces")
         print(f"Tiempo total: {tiempo_total:.2f} segundos")
     
     except Exception as e:
         print(f"Error al guardar la red en Neo4j: {str(e)}")
         raise
 
-def calcular_metricas_centralidad(G):
+def _metricas_centralidad_compacto(G, error, probabilidad_fallo, procesos):
+    """
+    calcular_metricas_centralidad sobre un GrafoCompacto: todo se calcula sobre
+    los arreglos, sin convertir la red a networkx. Las métricas quedan como
+    columnas en G.atributos.
+    """
+    n = len(G)
+    m = G.number_of_edges()
+    grado = G.calcular_grado()
+    degree_centrality = grado * (1.0 / (n - 1)) if n > 1 else np.ones(n)
+    num_componentes = G.calcular_componentes()
+    
+    centralidad = calcular_centralidad(n, G.origen, G.destino, G.componente, error=error,
+                                       probabilidad_fallo=probabilidad_fallo, procesos=procesos)
+    betweenness_centrality = centralidad['betweenness']
+    closeness_centrality = centralidad['closeness']
+    
+    G.atributos['degree_centrality'] = degree_centrality
+    G.atributos['betweenness_centrality'] = betweenness_centrality
+    G.atributos['closeness_centrality'] = closeness_centrality
+    
+    def top(valores, k=10):
+        # Orden estable para desempatar por orden de inserción, como sorted()
+        orden = np.argsort(-valores, kind='stable')[:k]
+        return [(G.ids[i], float(valores[i])) for i in orden]
+    
+    return {
+        'num_nodos': n,
+        'num_enlaces': m,
+        'num_componentes': num_componentes,
+        'densidad': 2 * m / (n * (n - 1)) if n > 1 else 0,
+        'diametro': _diametro(centralidad, num_componentes),
+        'aproximado': centralidad['aproximado'],
+        'fuentes': centralidad['fuentes'],
+        'top_degree': top(degree_centrality),
+        'top_betweenness': top(betweenness_centrality),
+        'top_closeness': top(closeness_centrality),
+    }
+
+
+def _diametro(centralidad, num_componentes):
+    # La mayor profundidad de BFS es el diámetro solo si se recorrió desde todos los nodos
+    if num_componentes != 1 or centralidad['aproximado']:
+        return None
+    return centralidad['profundidad_maxima']
+
+
+def calcular_metricas_centralidad(G, error=0.05, probabilidad_fallo=0.1, procesos=1):
     """
     Calcula métricas de centralidad para el grafo y devuelve un diccionario
     con los resultados.
     
+    Betweenness y closeness se calculan con calcular_centralidad: exactas en
+    las componentes pequeñas y con muestreo de fuentes (pivotes) en las grandes,
+    con la betweenness a menos de error del valor exacto con probabilidad
+    1 - probabilidad_fallo.
+    
     Args:
-        G: Grafo de networkx
+        G: Grafo de networkx o GrafoCompacto
+        error: Error absoluto máximo de la betweenness normalizada
+        probabilidad_fallo: Probabilidad de superar el error
+        procesos: Número de procesos para recorrer las fuentes
         
     Returns:
         dict: Diccionario con métricas de centralidad
     """
     print("Calculando métricas de centralidad...")
     
+    if isinstance(G, GrafoCompacto):
+        return _metricas_centralidad_compacto(G, error, probabilidad_fallo, procesos)
+    
     # Calcular diferentes métricas de centralidad
+    nodos, origen, destino = arreglos_desde_networkx(G)
+    componente, tamanos = etiquetar_componentes(len(nodos), origen, destino)
+    centralidad = calcular_centralidad(len(nodos), origen, destino, componente, error=error,
+                                       probabilidad_fallo=probabilidad_fallo, procesos=procesos)
     degree_centrality = nx.degree_centrality(G)
-    betweenness_centrality = nx.betweenness_centrality(G)
-    closeness_centrality = nx.closeness_centrality(G)
+    betweenness_centrality = dict(zip(nodos, centralidad['betweenness'].tolist()))
+    closeness_centrality = dict(zip(nodos, centralidad['closeness'].tolist()))
     
     # Asociar las métricas a los nodos como atributos
     nx.set_node_attributes(G, degree_centrality, 'degree_centrality')
@@ -467,9 +610,11 @@ def calcular_metricas_centralidad(G):
     stats = {
         'num_nodos': len(G.nodes),
         'num_enlaces': len(G.edges),
-        'num_componentes': len(list(connected_components(G))),
+        'num_componentes': len(tamanos),
         'densidad': nx.density(G),
-        'diametro': nx.diameter(G) if nx.is_connected(G) else None,
+        'diametro': _diametro(centralidad, len(tamanos)),
+        'aproximado': centralidad['aproximado'],
+        'fuentes': centralidad['fuentes'],
         'top_degree': top_degree,
         'top_betweenness': top_betweenness,
         'top_closeness': top_closeness
@@ -483,7 +628,7 @@ def actualizar_metricas_en_neo4j(G):
     Actualiza las métricas de centralidad en la base de datos Neo4j.
     
     Args:
-        G: Grafo de networkx con métricas calculadas
+        G: Grafo de networkx (o GrafoCompacto) con métricas calculadas
     """
     # Obtener el driver de Neo4j
     driver = Neo4jConnection.get_driver()
@@ -493,7 +638,7 @@ def actualizar_metricas_en_neo4j(G):
             print("Actualizando métricas en Neo4j...")
             
             # Actualizar métricas para cada nodo
-            for nodo_id, attrs in G.nodes(data=True):
+            for nodo_id, attrs in _nodos_con_atributos(G):
                 cypher = """
                 MATCH (n)
                 WHERE n.id = $id
@@ -516,6 +661,92 @@ def actualizar_metricas_en_neo4j(G):
             raise
 
 
+def tabla_componentes(G):
+    """
+    DataFrame con el id y el componente_id de cada nodo de un grafo de networkx o de un GrafoCompacto
+    """
+    if isinstance(G, GrafoCompacto):
+        return pd.DataFrame({'id': G.ids, 'componente_id': G.componente_id})
+    return pd.DataFrame(
+        [(nodo_id, attrs.get('componente_id', -1)) for nodo_id, attrs in G.nodes(data=True)],
+        columns=['id', 'componente_id'],
+    )
+
+
+def leer_componentes_en_neo4j():
+    """
+    id y componente_id de los nodos guardados en Neo4j. Queda vacío si la red
+    se guardó antes de que existieran los identificadores estables.
+    (Con neo4j-admin import las propiedades quedan como texto, por eso se convierten a int)
+    """
+    driver = Neo4jConnection.get_driver()
+    ids, componentes = [], []
+    with driver.session() as session:
+        result = session.run("""
+        MATCH (n)
+        WHERE n.componente_id IS NOT NULL AND NOT n:Componente
+        RETURN n.id AS id, n.componente_id AS componente_id
+        """)
+        for record in result:
+            ids.append(record['id'])
+            componentes.append(int(record['componente_id']))
+    return pd.DataFrame({'id': ids, 'componente_id': componentes}, columns=['id', 'componente_id'])
+
+
+def guardar_cambios_componentes(cambios, ejecucion=None, batch_size=5000):
+    """
+    Guarda en CambioComponente los cambios de componentes (ver utils_grafo.mapear_componentes)
+
+    Args:
+        cambios: DataFrame con componente_anterior, componente_nueva, tipo,
+                 nodos_compartidos, tamano_anterior y tamano_nuevo
+        ejecucion: EjecucionCarga a la que se asocian los cambios
+        batch_size: Tamaño del lote para bulk_create
+
+    Returns:
+        dict: Número de cambios por tipo
+    """
+    def entero(valor):
+        return None if pd.isna(valor) else int(valor)
+
+    registros = [
+        CambioComponente(
+            ejecucion=ejecucion,
+            componente_anterior=entero(fila.componente_anterior),
+            componente_nueva=entero(fila.componente_nueva),
+            tipo=fila.tipo,
+            nodos_compartidos=int(fila.nodos_compartidos),
+            tamano_anterior=entero(fila.tamano_anterior),
+            tamano_nuevo=entero(fila.tamano_nuevo),
+        )
+        for fila in cambios.itertuples(index=False)
+    ]
+    CambioComponente.objects.bulk_create(registros, batch_size=batch_size)
+
+    resumen = cambios['tipo'].value_counts().to_dict()
+    print(f"Componentes que cambiaron respecto a la red anterior: {len(cambios)} {resumen}")
+    return resumen
+
+
+def registrar_cambios_componentes(G, anterior, ejecucion=None, batch_size=5000):
+    """
+    Compara las componentes de la red reconstruida con las de la versión
+    anterior y guarda en CambioComponente las que cambiaron (ver
+    utils_grafo.mapear_componentes).
+
+    Args:
+        G: Grafo de networkx (o GrafoCompacto) con componente_id calculado
+        anterior: DataFrame id, componente_id de la red anterior (ej. leer_componentes_en_neo4j())
+        ejecucion: EjecucionCarga a la que se asocian los cambios
+        batch_size: Tamaño del lote para bulk_create
+
+    Returns:
+        dict: Número de cambios por tipo
+    """
+    cambios = mapear_componentes(anterior, tabla_componentes(G))
+    return guardar_cambios_componentes(cambios, ejecucion, batch_size)
+
+
 def ejecutar_flujo_completo(ruta_archivo=None, calcular_metricas=True):
     """
     Ejecuta el flujo completo: crear red, calcular métricas y guardar en Neo4j.
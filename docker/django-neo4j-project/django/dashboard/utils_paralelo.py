@@ -0,0 +1,152 @@
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.db import connections
+from .utils_ejecuciones import rss_pico_mb
+
+
+class _LectorRango(io.RawIOBase):
+    """
+    Lector binario que expone el encabezado del CSV seguido únicamente
+    de los bytes [inicio, fin) del archivo.
+    """
+
+    def __init__(self, ruta_archivo, inicio, fin, encabezado):
+        self._archivo = open(ruta_archivo, 'rb')
+        self._archivo.seek(inicio)
+        self._pendiente = fin - inicio
+        self._encabezado = encabezado
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._encabezado:
+            n = min(len(buffer), len(self._encabezado))
+            buffer[:n] = self._encabezado[:n]
+            self._encabezado = self._encabezado[n:]
+            return n
+
+        if self._pendiente <= 0:
+            return 0
+
+        datos = self._archivo.read(min(len(buffer), self._pendiente))
+        n = len(datos)
+        buffer[:n] = datos
+        self._pendiente -= n
+        return n
+
+    def close(self):
+        self._archivo.close()
+        super().close()
+
+
+def leer_encabezado(ruta_archivo):
+    """
+    Devuelve la primera línea del archivo (en bytes) y la posición donde empiezan los datos
+    """
+    with open(ruta_archivo, 'rb') as f:
+        encabezado = f.readline()
+        return encabezado, f.tell()
+
+
+def abrir_rango_csv(ruta_archivo, rango_bytes):
+    """
+    Abre un rango de bytes de un CSV como un archivo independiente con su encabezado,
+    listo para pasarlo a pd.read_csv.
+
+    Args:
+        ruta_archivo: Ruta al archivo CSV
+        rango_bytes: Tupla (inicio, fin) devuelta por dividir_csv_en_rangos
+
+    Returns:
+        io.BufferedReader: Archivo binario de solo lectura
+    """
+    encabezado, _ = leer_encabezado(ruta_archivo)
+    inicio, fin = rango_bytes
+    return io.BufferedReader(_LectorRango(ruta_archivo, inicio, fin, encabezado))
+
+
+def dividir_csv_en_rangos(ruta_archivo, partes):
+    """
+    Divide un CSV en rangos de bytes de tamaño similar alineados al inicio de línea.
+
+    Los cortes se hacen en saltos de línea, por lo que el archivo no debe tener
+    saltos de línea dentro de campos entre comillas.
+
+    Args:
+        ruta_archivo: Ruta al archivo CSV
+        partes: Número de rangos deseados
+
+    Returns:
+        list: Tuplas (inicio, fin) que cubren todas las filas de datos
+    """
+    tamano = os.path.getsize(ruta_archivo)
+    _, inicio_datos = leer_encabezado(ruta_archivo)
+    cortes = [inicio_datos]
+
+    with open(ruta_archivo, 'rb') as f:
+        for i in range(1, partes):
+            objetivo = inicio_datos + (tamano - inicio_datos) * i // partes
+            if objetivo <= cortes[-1]:
+                continue
+            # Avanzar hasta el inicio de la siguiente línea
+            f.seek(objetivo)
+            f.readline()
+            posicion = f.tell()
+            if cortes[-1] < posicion < tamano:
+                cortes.append(posicion)
+
+    cortes.append(tamano)
+    return list(zip(cortes[:-1], cortes[1:]))
+
+
+def _ejecutar_tarea(etiqueta, funcion, args, kwargs):
+    """
+    Ejecuta una tarea de carga dentro de un proceso del pool.
+    Cada proceso abre su propia conexión a la base de datos la primera vez que la usa.
+    Si la tarea recibe un diccionario 'metricas', se devuelve la copia que llenó
+    el proceso junto con su memoria pico.
+    """
+    inicio = time.time()
+    print(f"[{etiqueta}] Iniciando en el proceso {os.getpid()}")
+    resultado = funcion(*args, **kwargs)
+    duracion = time.time() - inicio
+    print(f"[{etiqueta}] Terminado en {duracion:.2f} segundos")
+    metricas = kwargs.get('metricas')
+    if metricas is not None:
+        metricas['rss_pico_mb'] = rss_pico_mb()
+    return resultado, duracion, metricas
+
+
+def cargar_en_paralelo(tareas, procesos):
+    """
+    Ejecuta tareas de carga independientes en un pool de procesos.
+
+    Args:
+        tareas: Lista de tuplas (etiqueta, funcion, args, kwargs). Las funciones
+                deben ser importables a nivel de módulo (ej. dashboard.utils.cargar_rud)
+        procesos: Número máximo de procesos simultáneos
+
+    Returns:
+        dict: etiqueta -> (resultado, duracion, metricas) o la excepción que se produjo
+    """
+    # Las conexiones abiertas no se pueden compartir entre procesos: se cierran
+    # antes de crear el pool para que cada proceso abra la suya
+    connections.close_all()
+
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {
+            pool.submit(_ejecutar_tarea, etiqueta, funcion, args, kwargs): etiqueta
+            for etiqueta, funcion, args, kwargs in tareas
+        }
+        for futuro in as_completed(futuros):
+            etiqueta = futuros[futuro]
+            try:
+                resultados[etiqueta] = futuro.result()
+            except Exception as e:
+                resultados[etiqueta] = e
+
+    return resultados
@@ -0,0 +1,202 @@
+import unicodedata
+from django.db import connections, transaction
+from .models import ConsolidadoSpoa, PersonasDf, RegistroUnicoDesaparecidos, Funcionario, GrupoDelito
+from .utils_postgres import _verificar_postgres
+
+
+# Bandera de PersonasDf -> texto que debe contener el grupo de delito
+# (sin tildes ni mayúsculas, mismo criterio que ApiNoticiasCriminalesPorPersona)
+PATRONES_GRUPO_DELITO = {
+    'desaparcion_forzada': 'desaparicion',
+    'homicidio': 'homicidio',
+    'secuestro': 'secuestro',
+    'reclutamiento_ilicito': 'reclut',
+}
+
+# Bandera de PersonasDf -> valor de RegistroUnicoDesaparecidos.estado_desaparicion
+ESTADOS_RUD = {
+    'rud_desaparecido': '1.0',
+    'rud_vivo': '2.0',
+    'rud_muerto': '3.0',
+}
+
+# Valores de documento que no identifican a una persona
+DOCUMENTOS_INVALIDOS = ('', 'nan')
+
+BANDERAS = [*PATRONES_GRUPO_DELITO, 'rud', *ESTADOS_RUD, 'funcionario_FGN']
+
+
+def _normalizar(texto):
+    """
+    Minúsculas y sin tildes, para comparar nombres de grupos de delito
+    """
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def _grupos_por_bandera():
+    """
+    Ids de GrupoDelito que activan cada bandera. La comparación de texto se
+    hace aquí, sobre la tabla de dimensión, y no fila por fila en ConsolidadoSpoa.
+    """
+    grupos = {bandera: [] for bandera in PATRONES_GRUPO_DELITO}
+    for pk, nombre in GrupoDelito.objects.values_list('pk', 'nombre'):
+        normalizado = _normalizar(nombre)
+        for bandera, patron in PATRONES_GRUPO_DELITO.items():
+            if patron in normalizado:
+                grupos[bandera].append(pk)
+    return grupos
+
+
+def _filtro_documentos(columna, documentos, params):
+    """
+    Condición SQL opcional para limitar una consulta a ciertos documentos
+    """
+    if documentos is None:
+        return ''
+    params.append(documentos)
+    return f" AND {columna} = ANY(%s)"
+
+
+def crear_personas_faltantes(documentos=None, using='default'):
+    """
+    Crea en PersonasDf los documentos que aparecen en ConsolidadoSpoa y aún no
+    existen, con todas las banderas en False (recalcular_banderas_personas las completa).
+
+    Args:
+        documentos: Lista opcional de documentos a considerar
+        using: Alias de la base de datos
+
+    Returns:
+        int: Número de personas creadas
+    """
+    connection = connections[using]
+    _verificar_postgres(connection)
+    qn = connection.ops.quote_name
+
+    columnas = []
+    valores = []
+    for field in PersonasDf._meta.concrete_fields:
+        if field.name == 'numero_identificacion':
+            valores.append('c.numero_documento')
+        elif field.name == 'nombre_completo':
+            valores.append(f"COALESCE(MAX(c.{qn('nombre_completo')}), '')")
+        elif field.get_internal_type() == 'BooleanField':
+            valores.append('FALSE')
+        else:
+            valores.append('NULL')
+        columnas.append(qn(field.column))
+
+    params = [list(DOCUMENTOS_INVALIDOS)]
+    sql = (
+        f"INSERT INTO {qn(PersonasDf._meta.db_table)} ({', '.join(columnas)}) "
+        f"SELECT {', '.join(valores)} FROM {qn(ConsolidadoSpoa._meta.db_table)} c "
+        f"WHERE c.numero_documento IS NOT NULL AND NOT (c.numero_documento = ANY(%s))"
+        f"{_filtro_documentos('c.numero_documento', documentos, params)} "
+        f"GROUP BY c.numero_documento "
+        f"ON CONFLICT DO NOTHING"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def recalcular_banderas_personas(documentos=None, crear_faltantes=True, tamano_lote=50000, using='default'):
+    """
+    Recalcula las banderas de PersonasDf a partir de los datos cargados:
+
+    - desaparcion_forzada, homicidio, secuestro, reclutamiento_ilicito: la persona
+      tiene al menos un registro en ConsolidadoSpoa con ese grupo de delito
+    - rud y rud_desaparecido/rud_vivo/rud_muerto: la persona está en el RUD
+      (con ese estado de desaparición)
+    - funcionario_FGN: la persona está en Funcionario
+
+    Cada tabla se agrega una sola vez por documento (GROUP BY) y el resultado se
+    aplica con un único UPDATE ... FROM que solo escribe las filas que cambian.
+
+    Args:
+        documentos: Lista opcional de documentos a recalcular (ej. los afectados
+                    por una carga --delta). Si no se indica se recalculan todos.
+        crear_faltantes: Crear primero las personas de ConsolidadoSpoa que no existen
+        tamano_lote: Número de documentos por sentencia cuando se indica la lista
+        using: Alias de la base de datos
+
+    Returns:
+        dict: Número de personas 'creadas' y 'actualizadas'
+    """
+    connection = connections[using]
+    _verificar_postgres(connection)
+
+    resumen = {'creadas': 0, 'actualizadas': 0}
+    if documentos is not None:
+        documentos = sorted({str(documento) for documento in documentos} - set(DOCUMENTOS_INVALIDOS))
+        lotes = [documentos[i:i + tamano_lote] for i in range(0, len(documentos), tamano_lote)]
+    else:
+        lotes = [None]
+
+    grupos = _grupos_por_bandera()
+
+    with transaction.atomic(using=using):
+        for lote in lotes:
+            if crear_faltantes:
+                resumen['creadas'] += crear_personas_faltantes(lote, using)
+            resumen['actualizadas'] += _actualizar_banderas(connection, grupos, lote)
+
+    return resumen
+
+
+def _actualizar_banderas(connection, grupos, documentos):
+    """
+    Ejecuta el UPDATE de banderas para todos los documentos o para una lista de ellos
+    """
+    qn = connection.ops.quote_name
+    params = []
+
+    # Banderas por grupo de delito en ConsolidadoSpoa
+    columnas_spoa = []
+    for bandera in PATRONES_GRUPO_DELITO:
+        params.append(grupos[bandera])
+        columnas_spoa.append(f"BOOL_OR(grupo_delito_dim_id = ANY(%s::bigint[])) AS {qn(bandera)}")
+    spoa = (
+        f"SELECT numero_documento AS documento, {', '.join(columnas_spoa)} "
+        f"FROM {qn(ConsolidadoSpoa._meta.db_table)} "
+        f"WHERE numero_documento IS NOT NULL{_filtro_documentos('numero_documento', documentos, params)} "
+        f"GROUP BY numero_documento"
+    )
+
+    # Presencia y estado en el RUD
+    columnas_rud = []
+    for bandera, estado in ESTADOS_RUD.items():
+        params.append(estado)
+        columnas_rud.append(f"BOOL_OR(estado_desaparicion = %s) AS {qn(bandera)}")
+    rud = (
+        f"SELECT numero_documento AS documento, {', '.join(columnas_rud)} "
+        f"FROM {qn(RegistroUnicoDesaparecidos._meta.db_table)} "
+        f"WHERE numero_documento IS NOT NULL{_filtro_documentos('numero_documento', documentos, params)} "
+        f"GROUP BY numero_documento"
+    )
+
+    nuevos = {bandera: f"COALESCE(s.{qn(bandera)}, FALSE)" for bandera in PATRONES_GRUPO_DELITO}
+    nuevos['rud'] = "(r.documento IS NOT NULL)"
+    nuevos.update({bandera: f"COALESCE(r.{qn(bandera)}, FALSE)" for bandera in ESTADOS_RUD})
+    nuevos['funcionario_FGN'] = "(f.numero_documento IS NOT NULL)"
+
+    tabla = qn(PersonasDf._meta.db_table)
+    asignaciones = ', '.join(f"{qn(bandera)} = {expresion}" for bandera, expresion in nuevos.items())
+    cambios = ' OR '.join(f"p.{qn(bandera)} IS DISTINCT FROM {expresion}" for bandera, expresion in nuevos.items())
+
+    sql = (
+        f"UPDATE {tabla} p SET {asignaciones} "
+        f"FROM {tabla} base "
+        f"LEFT JOIN ({spoa}) s ON s.documento = base.numero_identificacion "
+        f"LEFT JOIN ({rud}) r ON r.documento = base.numero_identificacion "
+        f"LEFT JOIN {qn(Funcionario._meta.db_table)} f ON f.numero_documento = base.numero_identificacion "
+        f"WHERE p.numero_identificacion = base.numero_identificacion"
+        f"{_filtro_documentos('base.numero_identificacion', documentos, params)} "
+        f"AND ({cambios})"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
@@ -0,0 +1,227 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from django.db import connections
+from django.utils import timezone
+
+
+# Marcador de NULL usado en el CSV que se envía por COPY
+NULO_COPY = '\\N'
+
+TIPOS_ENTEROS = ('IntegerField', 'BigIntegerField', 'SmallIntegerField',
+                 'PositiveIntegerField', 'PositiveSmallIntegerField', 'PositiveBigIntegerField')
+
+
+def _verificar_postgres(connection):
+    """
+    COPY FROM STDIN solo existe en PostgreSQL
+    """
+    if connection.vendor != 'postgresql':
+        raise ValueError(f"El modo copy requiere PostgreSQL, la conexión usa {connection.vendor}")
+
+
+def _completar_columnas(modelo, frame):
+    """
+    Agrega al frame los campos del modelo que no vienen en el archivo
+    (valores por defecto, auto_now_add, etc.) y ajusta los tipos para COPY.
+
+    Los campos AutoField se omiten para que la secuencia de la tabla asigne el id.
+    Las llaves foráneas se esperan con su attname (ej. seccional_dim_id).
+
+    Args:
+        modelo: Clase del modelo de Django
+        frame: DataFrame con columnas nombradas como los campos del modelo (attname)
+
+    Returns:
+        tuple: (DataFrame listo para COPY, lista de columnas de la tabla)
+    """
+    frame = frame.copy()
+    ahora = timezone.now()
+    campos = []
+
+    for field in modelo._meta.concrete_fields:
+        if field.get_internal_type() in ('AutoField', 'BigAutoField', 'SmallAutoField'):
+            continue
+
+        if field.attname not in frame.columns:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                frame[field.attname] = ahora
+            elif field.has_default():
+                frame[field.attname] = field.get_default()
+            elif field.null:
+                frame[field.attname] = None
+            else:
+                raise ValueError(f"Falta la columna obligatoria {field.attname} para {modelo.__name__}")
+
+        # Los enteros llegan como float desde pandas (ej. 34.0) y COPY no los acepta
+        if field.get_internal_type() in TIPOS_ENTEROS:
+            numeros = pd.to_numeric(frame[field.attname], errors='coerce')
+            frame[field.attname] = np.trunc(numeros).astype('Int64')
+
+        campos.append(field)
+
+    frame = frame[[field.attname for field in campos]]
+    return frame, [field.column for field in campos]
+
+
+def copiar_frame(modelo, frame, using='default'):
+    """
+    Inserta un chunk ya transformado usando COPY FROM STDIN sobre una tabla
+    temporal de staging y luego INSERT ... ON CONFLICT DO NOTHING hacia la tabla final.
+
+    Es el equivalente a bulk_create(..., ignore_conflicts=True) pero sin construir
+    objetos del ORM ni sentencias INSERT gigantes.
+
+    Args:
+        modelo: Clase del modelo de Django
+        frame: DataFrame con columnas nombradas como los campos del modelo
+        using: Alias de la base de datos
+
+    Returns:
+        int: Número de registros insertados (sin contar duplicados)
+    """
+    connection = connections[using]
+    _verificar_postgres(connection)
+
+    if frame.empty:
+        return 0
+
+    frame, columnas = _completar_columnas(modelo, frame)
+
+    qn = connection.ops.quote_name
+    tabla = qn(modelo._meta.db_table)
+    staging = qn(f"staging_{modelo._meta.db_table}")
+    lista_columnas = ', '.join(qn(c) for c in columnas)
+
+    # Serializar el chunk como CSV en memoria
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, na_rep=NULO_COPY)
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        # La tabla temporal vive durante la sesión y se reutiliza entre chunks
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} AS "
+            f"SELECT {lista_columnas} FROM {tabla} WITH NO DATA"
+        )
+        cursor.execute(f"TRUNCATE {staging}")
+        cursor.copy_expert(
+            f"COPY {staging} ({lista_columnas}) FROM STDIN WITH (FORMAT csv, NULL '{NULO_COPY}')",
+            buffer
+        )
+        cursor.execute(
+            f"INSERT INTO {tabla} ({lista_columnas}) "
+            f"SELECT {lista_columnas} FROM {staging} "
+            f"ON CONFLICT DO NOTHING"
+        )
+        insertados = cursor.rowcount
+        cursor.execute(f"TRUNCATE {staging}")
+
+    return insertados
+
+
+def eliminar_indices(modelo, using='default'):
+    """
+    Elimina los índices secundarios declarados en Meta.indexes del modelo.
+    Las restricciones (clave primaria, unique) se conservan.
+
+    Args:
+        modelo: Clase del modelo de Django
+        using: Alias de la base de datos
+
+    Returns:
+        list: Nombres de los índices eliminados
+    """
+    connection = connections[using]
+    _verificar_postgres(connection)
+    qn = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        for index in modelo._meta.indexes:
+            cursor.execute(f"DROP INDEX IF EXISTS {qn(index.name)}")
+
+    return [index.name for index in modelo._meta.indexes]
+
+
+def _crear_indice(modelo, index, using):
+    """
+    Crea un índice desde un hilo con su propia conexión
+    """
+    connection = connections[using]
+    try:
+        inicio = time.time()
+        with connection.schema_editor(atomic=False) as schema_editor:
+            # IF NOT EXISTS permite reintentar una reconstrucción interrumpida
+            sql = str(index.create_sql(modelo, schema_editor))
+            schema_editor.execute(sql.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1))
+        return index.name, time.time() - inicio
+    finally:
+        connection.close()
+
+
+def reconstruir_indices(modelo, using='default', hilos=None):
+    """
+    Crea los índices de Meta.indexes del modelo y actualiza las estadísticas de la tabla.
+
+    Cada índice se construye en su propio hilo y conexión. CREATE INDEX toma un
+    bloqueo SHARE, compatible consigo mismo, por lo que todos los índices de la
+    tabla se construyen a la vez.
+
+    Args:
+        modelo: Clase del modelo de Django
+        using: Alias de la base de datos
+        hilos: Número máximo de índices construidos a la vez (por defecto todos)
+
+    Returns:
+        dict: nombre del índice -> segundos que tardó su construcción
+    """
+    connection = connections[using]
+    _verificar_postgres(connection)
+
+    indices = modelo._meta.indexes
+    duraciones = {}
+    if indices:
+        with ThreadPoolExecutor(max_workers=hilos or len(indices)) as pool:
+            for nombre, duracion in pool.map(lambda index: _crear_indice(modelo, index, using), indices):
+                duraciones[nombre] = duracion
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {connection.ops.quote_name(modelo._meta.db_table)}")
+
+    return duraciones
+
+
+@contextmanager
+def indices_diferidos(modelo, using='default'):
+    """
+    Elimina los índices secundarios del modelo durante una carga masiva y los
+    reconstruye al salir, incluso si la carga falla.
+
+    Uso:
+        with indices_diferidos(ConsolidadoSpoa) as tiempos:
+            cargar_consolidado_spoa(ruta)
+        tiempos['carga'], tiempos['indices']
+
+    La carga no debe ejecutarse dentro de una transacción abierta en la misma
+    conexión: los índices se reconstruyen desde otras conexiones.
+
+    Yields:
+        dict: Se completa al salir con los segundos de 'carga' e 'indices'
+              y la duración de cada índice en 'por_indice'
+    """
+    if connections[using].in_atomic_block:
+        raise ValueError("indices_diferidos no puede usarse dentro de transaction.atomic")
+
+    tiempos = {}
+    eliminar_indices(modelo, using)
+    inicio = time.time()
+    try:
+        yield tiempos
+    finally:
+        tiempos['carga'] = time.time() - inicio
+        inicio = time.time()
+        tiempos['por_indice'] = reconstruir_indices(modelo, using)
+        tiempos['indices'] = time.time() - inicio
@@ -0,0 +1,168 @@
+import time
+import numpy as np
+import pandas as pd
+from myproject.neo4j_driver import Neo4jConnection
+from .utils_grafo import GrafoCompacto
+
+
+# Snapshot y tipo de relación de Neo4j de la proyección Persona-Persona
+SNAPSHOT_PROYECCION = 'proyeccion_personas'
+RELACION_PROYECCION = 'COAPARECE_CON'
+
+# NUNC con más personas que esto se omiten de la proyección (cada una aportaría k(k-1)/2 pares)
+MAX_PERSONAS_NUNC = 50
+
+# Peso de cada calidad de vínculo al ponderar la proyección: el peso de un par
+# en una NUNC es el producto de los pesos de las dos personas
+PESOS_CALIDAD_VINCULO = {
+    'INDICIADO': 1.0,
+    'IMPUTADO': 1.0,
+    'VICTIMA': 0.5,
+    'DENUNCIANTE': 0.25,
+    'TESTIGO': 0.25,
+}
+PESO_CALIDAD_DESCONOCIDA = 0.5
+
+
+def _importar_sparse():
+    """
+    scipy es opcional: solo se necesita para la proyección
+    """
+    try:
+        from scipy import sparse
+    except ImportError:
+        raise ImportError("Para proyectar la red de personas instale scipy (pip install scipy)")
+    return sparse
+
+
+def _pesos_calidad(calidades, pesos_calidad):
+    """
+    Peso de cada enlace según su calidad de vínculo (sin espacios y en mayúsculas)
+    """
+    normalizadas = pd.Series(calidades, dtype=object).fillna('').astype(str).str.strip().str.upper()
+    return normalizadas.map(pesos_calidad).fillna(PESO_CALIDAD_DESCONOCIDA).to_numpy(dtype=np.float64)
+
+
+def proyectar_personas(G, max_personas_nunc=MAX_PERSONAS_NUNC, pesos_calidad=None, minimo_nuncs=1):
+    """
+    Proyecta la red bipartita NUNC-Persona sobre las personas: dos personas
+    quedan enlazadas si aparecen en alguna NUNC en común.
+
+    Con B la matriz dispersa NUNC x Persona de los enlaces VINCULADO_A, la
+    parte triangular superior de B^T B da el número de NUNC compartidas por
+    cada par. Con pesos_calidad, la misma multiplicación con los pesos de la
+    calidad de vínculo como valores da el peso del par. Las NUNC con más de
+    max_personas_nunc personas se omiten para que el número de pares no crezca
+    con el cuadrado de su tamaño.
+
+    Args:
+        G: GrafoCompacto (o grafo de networkx) de la red NUNC-Persona
+        max_personas_nunc: Máximo de personas de una NUNC para tenerla en cuenta (0: sin límite)
+        pesos_calidad: dict calidad de vínculo -> peso (ej. PESOS_CALIDAD_VINCULO);
+                       sin él el peso es el número de NUNC compartidas
+        minimo_nuncs: Mínimo de NUNC compartidas para enlazar un par
+
+    Returns:
+        tuple: (GrafoCompacto de personas con los enlaces nuncs y peso,
+                dict con el resumen de la proyección)
+    """
+    sparse = _importar_sparse()
+    start_time = time.time()
+    if not isinstance(G, GrafoCompacto):
+        G = GrafoCompacto.desde_networkx(G)
+
+    # Orientar cada enlace como NUNC -> Persona (los de networkx no tienen un orden fijo)
+    es_nunc = G.mascara_tipo('nunc')
+    es_persona = G.mascara_tipo('persona')
+    origen = G.origen.astype(np.int64)
+    destino = G.destino.astype(np.int64)
+    invertidos = es_persona[origen] & es_nunc[destino]
+    nunc = np.where(invertidos, destino, origen)
+    persona = np.where(invertidos, origen, destino)
+    enlaces = np.flatnonzero(es_nunc[nunc] & es_persona[persona])
+    nunc, persona = nunc[enlaces], persona[enlaces]
+
+    personas_por_nunc = np.bincount(nunc, minlength=len(G))
+    hubs = (personas_por_nunc > max_personas_nunc) if max_personas_nunc else np.zeros(len(G), dtype=bool)
+    omitidos = hubs[nunc]
+    tamanos_hub = personas_por_nunc[hubs].astype(np.int64)
+    resumen = {
+        'nuncs_hub': int(hubs.sum()),
+        'pares_omitidos': int((tamanos_hub * (tamanos_hub - 1) // 2).sum()),
+    }
+    enlaces, nunc, persona = enlaces[~omitidos], nunc[~omitidos], persona[~omitidos]
+    print(f"Proyectando {len(enlaces)} enlaces NUNC-Persona ({resumen['nuncs_hub']} NUNC con más de "
+          f"{max_personas_nunc} personas omitidas)...")
+
+    nuncs, fila = np.unique(nunc, return_inverse=True)
+    personas, columna = np.unique(persona, return_inverse=True)
+    forma = (len(nuncs), len(personas))
+    B = sparse.csr_matrix((np.ones(len(enlaces), dtype=np.int64), (fila, columna)), shape=forma)
+    conteo = sparse.triu(B.T @ B, k=1).tocoo()
+    seleccion = conteo.data >= minimo_nuncs
+    a, b, compartidas = conteo.row[seleccion], conteo.col[seleccion], conteo.data[seleccion]
+
+    if pesos_calidad:
+        calidades = G.atributos_enlace.get('calidad_vinculo')
+        valores = (_pesos_calidad(calidades[enlaces], pesos_calidad) if calidades is not None
+                   else np.full(len(enlaces), PESO_CALIDAD_DESCONOCIDA))
+        W = sparse.csr_matrix((valores, (fila, columna)), shape=forma)
+        # Con a y b vacíos (ninguna NUNC con dos personas) la indexación devolvería un valor
+        peso = np.asarray((W.T @ W).tocsr()[a, b]).ravel() if len(a) else np.zeros(0)
+    else:
+        peso = compartidas.astype(np.float64)
+
+    # Solo las personas con al menos un enlace en la proyección
+    indices = personas[np.unique(np.concatenate([a, b]))]
+    nombres = G.atributos.get('name')
+    H = GrafoCompacto()
+    H.agregar_nodos(G.ids[indices], tipo='persona',
+                    atributos={'name': nombres[indices]} if nombres is not None else None)
+    H.agregar_enlaces(G.ids[personas[a]], G.ids[personas[b]],
+                      atributos={'nuncs': compartidas.astype(np.int64), 'peso': peso})
+    H.calcular_grado()
+    H.calcular_componentes()
+
+    resumen.update({'personas': H.number_of_nodes(), 'enlaces': H.number_of_edges(),
+                    'ponderada': bool(pesos_calidad)})
+    print(f"Proyección con {H.number_of_nodes()} personas y {H.number_of_edges()} enlaces "
+          f"en {time.time() - start_time:.2f} segundos")
+    return H, resumen
+
+
+def guardar_proyeccion_en_neo4j(H, batch_size=5000):
+    """
+    Reemplaza las relaciones COAPARECE_CON de Neo4j por las de la proyección,
+    entre los nodos Persona ya guardados (ver guardar_red_en_neo4j)
+
+    Args:
+        H: GrafoCompacto de proyectar_personas
+        batch_size: Tamaño del lote para las operaciones en Neo4j
+    """
+    start_time = time.time()
+    driver = Neo4jConnection.get_driver()
+    nuncs = H.atributos_enlace.get('nuncs')
+    pesos = H.atributos_enlace.get('peso')
+    datos = [
+        {'source': H.ids[u], 'target': H.ids[v], 'nuncs': int(nuncs[posicion]), 'peso': float(pesos[posicion])}
+        for posicion, (u, v) in enumerate(zip(H.origen.tolist(), H.destino.tolist()))
+    ]
+
+    with driver.session() as session:
+        session.run("CREATE INDEX IF NOT EXISTS FOR (n:Persona) ON (n.id)")
+        print(f"Eliminando relaciones {RELACION_PROYECCION} existentes...")
+        session.run(f"""
+        MATCH ()-[r:{RELACION_PROYECCION}]->()
+        CALL {{ WITH r DELETE r }} IN TRANSACTIONS OF 10000 ROWS
+        """)
+
+        print(f"Guardando {len(datos)} relaciones {RELACION_PROYECCION}...")
+        for i in range(0, len(datos), batch_size):
+            session.run(f"""
+            UNWIND $data AS row
+            MATCH (a:Persona {{id: row.source}})
+            MATCH (b:Persona {{id: row.target}})
+            CREATE (a)-[:{RELACION_PROYECCION} {{nuncs: row.nuncs, peso: row.peso}}]->(b)
+            """, {"data": datos[i:i+batch_size]})
+
+    print(f"Proyección guardada en Neo4j en {time.time() - start_time:.2f} segundos")
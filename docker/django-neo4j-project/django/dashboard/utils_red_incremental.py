@@ -0,0 +1,145 @@
+import time
+import numpy as np
+from myproject.neo4j_driver import Neo4jConnection
+from .utils_neo4j import COLOR_NUNC, COLOR_PERSONA, leer_red_de_archivo
+
+
+# Etiqueta de Neo4j de los nodos que agrega el consolidado
+ETIQUETAS_NEO4J = {'nunc': 'NUNC', 'persona': 'Persona'}
+
+
+def actualizar_red_incremental(G, ruta_archivo, chunksize=50000):
+    """
+    Agrega a un GrafoCompacto existente solo las filas nuevas o modificadas
+    del consolidado, sin reconstruir la red.
+
+    Los NUNC y las personas del archivo se agregan o actualizan (sus atributos
+    reemplazan a los anteriores), los enlaces nuevos se agregan y los existentes
+    toman la calidad de vínculo nueva. Las componentes se actualizan con el
+    union-find del grafo (ver GrafoCompacto.actualizar_componentes) y el grado
+    solo en los extremos de los enlaces nuevos.
+
+    Quitar filas no es incremental: un enlace eliminado puede dividir una
+    componente, lo que requiere reconstruir la red con crear_red_neo4j.
+
+    Args:
+        G: GrafoCompacto con las componentes calculadas
+        ruta_archivo: Archivo con las filas nuevas o modificadas, en el formato del consolidado
+        chunksize: Tamaño del chunk para procesar el archivo por lotes
+
+    Returns:
+        dict: Filas leídas, nodos y enlaces tocados (para guardar_delta_en_neo4j),
+              conteos de nuevos, cambios de componentes y reetiquetas
+    """
+    start_time = time.time()
+    nuncs, personas, enlaces, filas = leer_red_de_archivo(ruta_archivo, chunksize)
+
+    nodos_antes = G.number_of_nodes()
+    enlaces_antes = G.number_of_edges()
+
+    G.agregar_nodos(nuncs['nunc'].to_numpy(), tipo='nunc', atributos={
+        'name': nuncs['nunc'].to_numpy(),
+        'necropsia': nuncs['necropsia'].to_numpy(),
+        'seccional': nuncs['seccional'].to_numpy(),
+        'unidad': nuncs['unidad'].to_numpy(),
+        'despacho': nuncs['despacho'].to_numpy(),
+        'fuente': nuncs['fuente'].to_numpy(),
+        'color': COLOR_NUNC,
+    }, sobrescribir=True)
+    G.agregar_nodos(personas['numero_documento'].to_numpy(), tipo='persona', atributos={
+        'name': personas['nombre_completo'].to_numpy(),
+        'color': COLOR_PERSONA,
+    }, sobrescribir=True)
+    G.agregar_enlaces(enlaces['nunc'].to_numpy(), enlaces['numero_documento'].to_numpy(),
+                      atributos={'calidad_vinculo': enlaces['calidad_vinculado'].to_numpy()}, sobrescribir=True)
+
+    # Grado y componentes solo con los enlaces agregados
+    origen = G.origen[enlaces_antes:]
+    destino = G.destino[enlaces_antes:]
+    if len(G.grado) < len(G):
+        G.grado = np.concatenate([G.grado, np.zeros(len(G) - len(G.grado), dtype=np.int32)])
+    np.add.at(G.grado, origen, 1)
+    np.add.at(G.grado, destino, 1)
+    cambios, reetiquetas = G.actualizar_componentes(origen, destino)
+
+    nodos = np.unique(G.indice_de(np.concatenate([nuncs['nunc'].to_numpy(), personas['numero_documento'].to_numpy()])))
+    resultado = {
+        'filas': filas,
+        'nodos': nodos,
+        'enlaces': enlaces,
+        'nodos_nuevos': G.number_of_nodes() - nodos_antes,
+        'enlaces_nuevos': G.number_of_edges() - enlaces_antes,
+        'cambios': cambios,
+        'reetiquetas': reetiquetas,
+    }
+    print(f"Red actualizada con {filas} filas: {resultado['nodos_nuevos']} nodos y "
+          f"{resultado['enlaces_nuevos']} enlaces nuevos, {len(cambios)} componentes cambiaron")
+    print(f"Tiempo total: {time.time() - start_time:.2f} segundos")
+    return resultado
+
+
+def guardar_delta_en_neo4j(G, delta, batch_size=5000):
+    """
+    Aplica en Neo4j solo lo que cambió en actualizar_red_incremental, sin
+    borrar la base de datos: reetiqueta las componentes absorbidas o renombradas
+    y hace MERGE de los nodos y enlaces del archivo.
+
+    Args:
+        G: GrafoCompacto actualizado
+        delta: Resultado de actualizar_red_incremental
+        batch_size: Tamaño del lote para las operaciones en Neo4j
+    """
+    start_time = time.time()
+    driver = Neo4jConnection.get_driver()
+
+    reetiquetas = [
+        {'anterior': int(anterior), 'nueva': int(nueva), 'componente': int(componente)}
+        for anterior, nueva, componente in delta['reetiquetas'].itertuples(index=False, name=None)
+    ]
+    nodos = {etiqueta: [] for etiqueta in ETIQUETAS_NEO4J.values()}
+    for indice in delta['nodos'].tolist():
+        etiqueta = ETIQUETAS_NEO4J.get(G.tipo_de(indice))
+        if etiqueta:
+            nodos[etiqueta].append({
+                'id': G.ids[indice],
+                'name': G.atributos['name'][indice] or '',
+                'componente': int(G.componente[indice]),
+                'componente_id': int(G.componente_id[indice]),
+            })
+    enlaces = [
+        {'source': nunc, 'target': numero_documento, 'calidad_vinculo': calidad or ''}
+        for nunc, numero_documento, calidad in delta['enlaces'].itertuples(index=False, name=None)
+    ]
+
+    with driver.session() as session:
+        # Primero las componentes, para que los nodos del archivo queden con su etiqueta final
+        print(f"Reetiquetando {len(reetiquetas)} componentes en Neo4j...")
+        for etiqueta in nodos:
+            session.run(f"CREATE INDEX IF NOT EXISTS FOR (n:{etiqueta}) ON (n.componente_id)")
+            for i in range(0, len(reetiquetas), batch_size):
+                session.run(f"""
+                UNWIND $data AS row
+                MATCH (n:{etiqueta} {{componente_id: row.anterior}})
+                SET n.componente_id = row.nueva, n.componente = row.componente
+                """, {"data": reetiquetas[i:i+batch_size]})
+
+        for etiqueta, datos in nodos.items():
+            print(f"Actualizando {len(datos)} nodos {etiqueta}...")
+            for i in range(0, len(datos), batch_size):
+                session.run(f"""
+                UNWIND $data AS row
+                MERGE (n:{etiqueta} {{id: row.id}})
+                SET n.name = row.name, n.componente = row.componente, n.componente_id = row.componente_id
+                """, {"data": datos[i:i+batch_size]})
+
+        print(f"Actualizando {len(enlaces)} relaciones...")
+        for i in range(0, len(enlaces), batch_size):
+            session.run("""
+            UNWIND $data AS row
+            MATCH (a:NUNC {id: row.source})
+            MATCH (b:Persona {id: row.target})
+            MERGE (a)-[r:VINCULADO_A]->(b)
+            SET r.calidad_vinculo = row.calidad_vinculo
+            """, {"data": enlaces[i:i+batch_size]})
+
+    print(f"Cambios guardados en Neo4j en {time.time() - start_time:.2f} segundos")
@@ -0,0 +1,402 @@
+import json
+import os
+import re
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+from .utils_ejecuciones import checksum_archivo, version_datos_actual
+from .utils_grafo import GrafoCompacto, UnionFind
+
+
+# Versión del formato de los snapshots; cargar_snapshot rechaza formatos más nuevos
+FORMATO_SNAPSHOT = 1
+
+ARCHIVO_NODOS = 'nodos.arrow'
+ARCHIVO_ENLACES = 'enlaces.arrow'
+ARCHIVO_MANIFIESTO = 'manifest.json'
+
+# Tipos de infer_dtype que Arrow guarda directamente; el resto se guarda como JSON
+TIPOS_ARROW = ('string', 'integer', 'floating', 'boolean', 'bytes', 'empty')
+
+# Intentos para asignar el número de versión si otro proceso toma el mismo
+INTENTOS_VERSION = 5
+
+PATRON_VERSION = re.compile(r'^v(\d+)$')
+
+
+def _importar_arrow():
+    """
+    pyarrow es opcional: solo se necesita para guardar o cargar snapshots
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("Para usar snapshots de la red instale pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def _carpeta_snapshots(nombre):
+    return os.path.join(settings.SNAPSHOTS_RED_DIR, nombre)
+
+
+def _versiones(nombre):
+    """
+    Números de versión guardados para el snapshot, de menor a mayor
+    """
+    carpeta = _carpeta_snapshots(nombre)
+    if not os.path.isdir(carpeta):
+        return []
+    versiones = []
+    for entrada in os.listdir(carpeta):
+        coincidencia = PATRON_VERSION.match(entrada)
+        if coincidencia and os.path.exists(os.path.join(carpeta, entrada, ARCHIVO_MANIFIESTO)):
+            versiones.append(int(coincidencia.group(1)))
+    return sorted(versiones)
+
+
+def _valor_json(valor):
+    # Escalares de NumPy (np.int64, np.float32, ...) a su equivalente de Python
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    raise TypeError(f"Valor no serializable: {type(valor).__name__}")
+
+
+def _columna_a_arrow(pa, columna, diccionario=True):
+    """
+    Convierte una columna de tipo object del grafo a un arreglo de Arrow.
+
+    Los textos con pocos valores distintos (color, fuente, calidad_vinculo, ...)
+    se guardan como diccionario. Las columnas con tipos que Arrow no guarda
+    directamente (listas, valores mezclados, ...) se guardan como texto JSON.
+
+    Returns:
+        tuple: (arreglo de Arrow, True si la columna quedó como JSON)
+    """
+    tipo = pd.api.types.infer_dtype(columna, skipna=True)
+    if tipo in TIPOS_ARROW:
+        # from_pandas=False: None es nulo pero NaN se conserva como NaN
+        arreglo = pa.array(columna, from_pandas=False)
+        if diccionario and tipo == 'string' and len(arreglo):
+            codificado = arreglo.dictionary_encode()
+            if len(codificado.dictionary) * 2 <= len(arreglo):
+                arreglo = codificado
+        return arreglo, False
+
+    textos = np.empty(len(columna), dtype=object)
+    for posicion, valor in enumerate(columna):
+        if valor is not None:
+            textos[posicion] = json.dumps(valor, ensure_ascii=False, default=_valor_json)
+    return pa.array(textos, type=pa.string(), from_pandas=False), True
+
+
+def _columna_desde_arrow(pa, arreglo, es_json=False):
+    """
+    Columna de tipo object (con None para los nulos) a partir de un arreglo de Arrow
+    """
+    if pa.types.is_dictionary(arreglo.type):
+        # Un solo objeto por valor distinto: los nulos apuntan al None agregado al final
+        valores = np.empty(len(arreglo.dictionary) + 1, dtype=object)
+        valores[:-1] = arreglo.dictionary.to_numpy(zero_copy_only=False)
+        indices = pa.compute.fill_null(arreglo.indices, len(arreglo.dictionary))
+        columna = valores[indices.to_numpy()]
+    elif arreglo.null_count == 0 or pa.types.is_string(arreglo.type) or pa.types.is_large_string(arreglo.type):
+        columna = np.asarray(arreglo.to_numpy(zero_copy_only=False), dtype=object)
+    else:
+        # Enteros o booleanos con nulos: to_numpy los pasaría a float
+        columna = np.empty(len(arreglo), dtype=object)
+        columna[:] = arreglo.to_pylist()
+
+    if es_json:
+        # Llenado por posición: np.array con listas como valores crearía un arreglo 2D
+        valores = np.empty(len(columna), dtype=object)
+        for posicion, valor in enumerate(columna):
+            if valor is not None:
+                valores[posicion] = json.loads(valor)
+        columna = valores
+    return columna
+
+
+def _numerico_desde_arrow(arreglo, dtype, mmap):
+    """
+    Arreglo numérico sin copia: con mmap es una vista de solo lectura sobre el archivo
+    """
+    valores = arreglo.to_numpy(zero_copy_only=True)
+    if valores.dtype != dtype:
+        raise ValueError(f"Tipo inesperado en el snapshot: {valores.dtype} (se esperaba {np.dtype(dtype)})")
+    return valores if mmap else valores.copy()
+
+
+def _escribir_tabla(pa, ruta, columnas):
+    """
+    Escribe las columnas como archivo IPC de Arrow sin comprimir y en un solo
+    bloque, para que al cargarlo con memory_map los arreglos numéricos se lean
+    directamente del archivo
+    """
+    tabla = pa.table(columnas)
+    with pa.OSFile(ruta, 'wb') as sink:
+        with pa.ipc.new_file(sink, tabla.schema) as writer:
+            writer.write_table(tabla, max_chunksize=max(tabla.num_rows, 1))
+
+
+def _leer_tabla(pa, ruta, mmap):
+    if mmap:
+        # El mapeo queda abierto mientras existan arreglos que lo referencian
+        fuente = pa.memory_map(ruta, 'r')
+    else:
+        with open(ruta, 'rb') as f:
+            fuente = pa.BufferReader(f.read())
+    tabla = pa.ipc.open_file(fuente).read_all()
+    return {nombre: (tabla.column(nombre).chunk(0) if tabla.column(nombre).num_chunks
+                     else pa.array([], type=tabla.schema.field(nombre).type))
+            for nombre in tabla.column_names}
+
+
+def guardar_snapshot(G, nombre='consolidado', ejecucion=None):
+    """
+    Guarda la red como una nueva versión del snapshot en SNAPSHOTS_RED_DIR/<nombre>/vNNNNNN:
+
+    - nodos.arrow: id, tipo (código de manifest['tipos']), componente, componente_id,
+      grado, el union-find de las componentes (uf_padre, uf_tamano) y una columna por atributo
+    - enlaces.arrow: origen, destino (índices de nodo) y una columna por atributo de enlace
+    - manifest.json: formato, versión, conteos, SHA-256 y tamaño de cada archivo y la
+      ejecución de carga que generó la red
+
+    Los archivos se escriben en una carpeta temporal que se renombra al final,
+    así que una versión a medio escribir nunca es visible para cargar_snapshot.
+
+    Args:
+        G: GrafoCompacto o grafo de networkx (se convierte a GrafoCompacto)
+        nombre: Nombre del snapshot (ej. 'consolidado', 'entidades')
+        ejecucion: EjecucionCarga que generó la red, si existe
+
+    Returns:
+        dict: Manifiesto de la versión guardada, con su ruta en 'ruta'
+    """
+    pa = _importar_arrow()
+    start_time = time.time()
+    if not isinstance(G, GrafoCompacto):
+        G = GrafoCompacto.desde_networkx(G)
+
+    carpeta = _carpeta_snapshots(nombre)
+    os.makedirs(carpeta, exist_ok=True)
+    temporal = os.path.join(carpeta, f'.tmp-{os.getpid()}-{time.time_ns()}')
+    os.makedirs(temporal)
+
+    try:
+        columnas_json = {'nodos': [], 'enlaces': []}
+
+        ids, es_json = _columna_a_arrow(pa, G.ids, diccionario=False)
+        if es_json:
+            columnas_json['nodos'].append('id')
+        nodos = {
+            'id': ids,
+            'tipo': pa.array(G.tipo, type=pa.int8()),
+            'componente': pa.array(G.componente, type=pa.int32()),
+            'componente_id': pa.array(G.componente_id, type=pa.int64()),
+            'grado': pa.array(G.grado, type=pa.int32()),
+        }
+        if G.union_find is not None:
+            nodos['uf_padre'] = pa.array(G.union_find.padre, type=pa.int64())
+            nodos['uf_tamano'] = pa.array(G.union_find.tamano, type=pa.int64())
+        for atributo, columna in G.atributos.items():
+            nodos[f'a_{atributo}'], es_json = _columna_a_arrow(pa, columna)
+            if es_json:
+                columnas_json['nodos'].append(atributo)
+
+        enlaces = {
+            'origen': pa.array(G.origen, type=pa.int32()),
+            'destino': pa.array(G.destino, type=pa.int32()),
+        }
+        for atributo, columna in G.atributos_enlace.items():
+            enlaces[f'a_{atributo}'], es_json = _columna_a_arrow(pa, columna)
+            if es_json:
+                columnas_json['enlaces'].append(atributo)
+
+        _escribir_tabla(pa, os.path.join(temporal, ARCHIVO_NODOS), nodos)
+        _escribir_tabla(pa, os.path.join(temporal, ARCHIVO_ENLACES), enlaces)
+
+        manifiesto = {
+            'formato': FORMATO_SNAPSHOT,
+            'nombre': nombre,
+            'version': None,
+            'creado': timezone.now().isoformat(),
+            'nodos': G.number_of_nodes(),
+            'enlaces': G.number_of_edges(),
+            'tipos': list(G.tipos),
+            'atributos_nodo': list(G.atributos),
+            'atributos_enlace': list(G.atributos_enlace),
+            'columnas_json': columnas_json,
+            'union_find': G.union_find is not None,
+            'archivos': {
+                archivo: {
+                    'sha256': checksum_archivo(os.path.join(temporal, archivo)),
+                    'bytes': os.path.getsize(os.path.join(temporal, archivo)),
+                }
+                for archivo in (ARCHIVO_NODOS, ARCHIVO_ENLACES)
+            },
+            'origen': {
+                'ejecucion': ejecucion.pk if ejecucion is not None else None,
+                'comando': ejecucion.comando if ejecucion is not None else None,
+                'archivo': (ejecucion.archivo or None) if ejecucion is not None else None,
+                'checksum_archivo': ejecucion.checksum_archivo if ejecucion is not None else None,
+                'version_datos': version_datos_actual(),
+            },
+        }
+
+        # rename falla si otro proceso ya creó la misma versión: se reintenta con la siguiente
+        for intento in range(INTENTOS_VERSION):
+            versiones = _versiones(nombre)
+            manifiesto['version'] = (versiones[-1] if versiones else 0) + 1
+            with open(os.path.join(temporal, ARCHIVO_MANIFIESTO), 'w', encoding='utf-8') as f:
+                json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+            destino = os.path.join(carpeta, f"v{manifiesto['version']:06d}")
+            try:
+                os.rename(temporal, destino)
+                break
+            except OSError:
+                if intento == INTENTOS_VERSION - 1:
+                    raise
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+
+    manifiesto['ruta'] = destino
+    print(f"Snapshot {nombre} v{manifiesto['version']} guardado en {destino} "
+          f"({G.number_of_nodes()} nodos, {G.number_of_edges()} enlaces) en {time.time() - start_time:.2f} segundos")
+    return manifiesto
+
+
+def listar_snapshots(nombre=None):
+    """
+    Manifiestos de las versiones guardadas, de la más antigua a la más reciente.
+
+    Args:
+        nombre: Nombre del snapshot; None para todos los de SNAPSHOTS_RED_DIR
+
+    Returns:
+        list: Manifiestos, cada uno con su carpeta en 'ruta'
+    """
+    if nombre is None:
+        if not os.path.isdir(settings.SNAPSHOTS_RED_DIR):
+            return []
+        nombres = sorted(entrada for entrada in os.listdir(settings.SNAPSHOTS_RED_DIR)
+                         if os.path.isdir(os.path.join(settings.SNAPSHOTS_RED_DIR, entrada)))
+    else:
+        nombres = [nombre]
+
+    manifiestos = []
+    for nombre_snapshot in nombres:
+        for version in _versiones(nombre_snapshot):
+            ruta = os.path.join(_carpeta_snapshots(nombre_snapshot), f'v{version:06d}')
+            with open(os.path.join(ruta, ARCHIVO_MANIFIESTO), encoding='utf-8') as f:
+                manifiesto = json.load(f)
+            manifiesto['ruta'] = ruta
+            manifiestos.append(manifiesto)
+    return manifiestos
+
+
+def _leer_manifiesto(nombre, version=None):
+    versiones = _versiones(nombre)
+    if not versiones:
+        raise FileNotFoundError(f"No hay snapshots guardados de '{nombre}' en {settings.SNAPSHOTS_RED_DIR}")
+    version = versiones[-1] if version is None else int(version)
+    ruta = os.path.join(_carpeta_snapshots(nombre), f'v{version:06d}')
+    if version not in versiones:
+        raise FileNotFoundError(f"No existe la versión {version} del snapshot '{nombre}'")
+    with open(os.path.join(ruta, ARCHIVO_MANIFIESTO), encoding='utf-8') as f:
+        manifiesto = json.load(f)
+    manifiesto['ruta'] = ruta
+    return manifiesto
+
+
+def verificar_snapshot(nombre='consolidado', version=None):
+    """
+    Compara el SHA-256 y el tamaño de cada archivo con los del manifiesto.
+
+    Args:
+        nombre: Nombre del snapshot
+        version: Versión a verificar (None para la más reciente)
+
+    Returns:
+        list: Archivos que no coinciden (vacía si el snapshot está íntegro)
+    """
+    manifiesto = _leer_manifiesto(nombre, version)
+    errores = []
+    for archivo, esperado in manifiesto['archivos'].items():
+        ruta = os.path.join(manifiesto['ruta'], archivo)
+        if not os.path.exists(ruta):
+            errores.append(f'{archivo}: no existe')
+        elif os.path.getsize(ruta) != esperado['bytes']:
+            errores.append(f"{archivo}: tamaño {os.path.getsize(ruta)} (se esperaba {esperado['bytes']})")
+        elif checksum_archivo(ruta) != esperado['sha256']:
+            errores.append(f'{archivo}: el SHA-256 no coincide')
+    return errores
+
+
+def cargar_snapshot(nombre='consolidado', version=None, mmap=True, verificar=False):
+    """
+    Carga una versión del snapshot como GrafoCompacto.
+
+    Con mmap los arreglos numéricos (tipo, componente, componente_id, grado,
+    origen, destino y el union-find) son vistas de solo lectura sobre los
+    archivos, sin copiarlos a memoria: sirve para consultar o enviar la red a
+    Neo4j. Para modificar la red (ej. actualizar_red_incremental) cargar con
+    mmap=False, que copia los arreglos. Los ids y atributos de texto se
+    convierten a arreglos de tipo object en ambos casos.
+
+    Args:
+        nombre: Nombre del snapshot
+        version: Versión a cargar (None para la más reciente)
+        mmap: Mapear los archivos en memoria en lugar de leerlos
+        verificar: Comprobar el SHA-256 de los archivos antes de cargarlos
+
+    Returns:
+        tuple: (GrafoCompacto, manifiesto)
+    """
+    pa = _importar_arrow()
+    start_time = time.time()
+    manifiesto = _leer_manifiesto(nombre, version)
+    if manifiesto['formato'] > FORMATO_SNAPSHOT:
+        raise ValueError(f"El snapshot usa el formato {manifiesto['formato']}, "
+                         f"este código solo lee hasta el formato {FORMATO_SNAPSHOT}")
+    if verificar:
+        errores = verificar_snapshot(nombre, manifiesto['version'])
+        if errores:
+            raise ValueError(f"Snapshot '{nombre}' v{manifiesto['version']} dañado: {'; '.join(errores)}")
+
+    nodos = _leer_tabla(pa, os.path.join(manifiesto['ruta'], ARCHIVO_NODOS), mmap)
+    enlaces = _leer_tabla(pa, os.path.join(manifiesto['ruta'], ARCHIVO_ENLACES), mmap)
+    columnas_json = manifiesto['columnas_json']
+
+    G = GrafoCompacto()
+    G.tipos = list(manifiesto['tipos'])
+    G.ids = _columna_desde_arrow(pa, nodos['id'], 'id' in columnas_json['nodos'])
+    G.tipo = _numerico_desde_arrow(nodos['tipo'], np.int8, mmap)
+    G.componente = _numerico_desde_arrow(nodos['componente'], np.int32, mmap)
+    G.componente_id = _numerico_desde_arrow(nodos['componente_id'], np.int64, mmap)
+    G.grado = _numerico_desde_arrow(nodos['grado'], np.int32, mmap)
+    if manifiesto['union_find']:
+        G.union_find = UnionFind()
+        G.union_find.padre = _numerico_desde_arrow(nodos['uf_padre'], np.int64, mmap)
+        G.union_find.tamano = _numerico_desde_arrow(nodos['uf_tamano'], np.int64, mmap)
+    G.atributos = {
+        atributo: _columna_desde_arrow(pa, nodos[f'a_{atributo}'], atributo in columnas_json['nodos'])
+        for atributo in manifiesto['atributos_nodo']
+    }
+    G.origen = _numerico_desde_arrow(enlaces['origen'], np.int32, mmap)
+    G.destino = _numerico_desde_arrow(enlaces['destino'], np.int32, mmap)
+    G.atributos_enlace = {
+        atributo: _columna_desde_arrow(pa, enlaces[f'a_{atributo}'], atributo in columnas_json['enlaces'])
+        for atributo in manifiesto['atributos_enlace']
+    }
+
+    print(f"Snapshot {nombre} v{manifiesto['version']} cargado ({G.number_of_nodes()} nodos, "
+          f"{G.number_of_edges()} enlaces) en {time.time() - start_time:.2f} segundos")
+    return G, manifiesto
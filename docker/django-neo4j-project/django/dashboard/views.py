@@ -1,7 +1,6 @@
 from django.views.generic import TemplateView, View
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Count
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -23,6 +22,7 @@ from .models import (
     Funcionario
 )
 from .utils import obtener_distribucion_por_fuente, obtener_distribucion_por_unidad
+from .utils_ejecuciones import version_datos_actual
 
 class DashboardView(LoginRequiredMixin, TemplateView):
     """
@@ -49,19 +49,11 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         context['unidades_data'] = json.dumps([u['cantidad'] for u in unidades])
         
         # Obtener distribución por seccional
-        seccionales = list(ConsolidadoSpoa.objects.values('seccional')
-                        .annotate(cantidad=Count('seccional'))
-                        .filter(seccional__isnull=False)
-                        .exclude(seccional='')
-                        .order_by('-cantidad'))
+        seccionales = ConsolidadoSpoa.objects.distribucion('seccional', excluir_vacios=True)
         context['seccionales_data'] = json.dumps(seccionales)
         
         # Obtener distribución por necropsia
-        necropsias = list(ConsolidadoSpoa.objects.values('necropsia')
-                        .annotate(cantidad=Count('necropsia'))
-                        .filter(necropsia__isnull=False)
-                        .exclude(necropsia='')
-                        .order_by('-cantidad'))
+        necropsias = ConsolidadoSpoa.objects.distribucion('necropsia', excluir_vacios=True)
         context['necropsias_labels'] = json.dumps([n['necropsia'] for n in necropsias])
         context['necropsias_data'] = json.dumps([n['cantidad'] for n in necropsias])
         
@@ -162,7 +154,8 @@ class ApiRegistrosPorFuenteView(LoginRequiredMixin, View):
             return JsonResponse({'error': 'Parámetro fuente es requerido'}, status=400)
         
         # Obtener registros filtrados
-        registros = ConsolidadoSpoa.objects.filter(fuente=fuente).order_by('-fecha_hechos')
+        registros = (ConsolidadoSpoa.objects.filtrar_dimension('fuente', fuente)
+                     .con_dimensiones().order_by('-fecha_hechos'))
         
         # Paginar resultados
         paginator = Paginator(registros, registros_por_pagina)
@@ -200,7 +193,8 @@ class ApiRegistrosPorSeccionalView(LoginRequiredMixin, View):
             return JsonResponse({'error': 'Parámetro seccional es requerido'}, status=400)
         
         # Obtener registros filtrados
-        registros = ConsolidadoSpoa.objects.filter(seccional=seccional).order_by('-fecha_hechos')
+        registros = (ConsolidadoSpoa.objects.filtrar_dimension('seccional', seccional)
+                     .con_dimensiones().order_by('-fecha_hechos'))
         
         # Paginar resultados
         paginator = Paginator(registros, registros_por_pagina)
@@ -236,14 +230,10 @@ class ApiUnidadesPorSeccionalView(LoginRequiredMixin, View):
             return JsonResponse({'error': 'Parámetro seccional es requerido'}, status=400)
         
         # Obtener unidades filtradas
-        unidades = (ConsolidadoSpoa.objects.filter(seccional=seccional)
-                    .values('unidad')
-                    .annotate(cantidad=Count('unidad'))
-                    .filter(unidad__isnull=False)
-                    .exclude(unidad='')
-                    .order_by('-cantidad'))
-        
-        return JsonResponse(list(unidades), safe=False)
+        unidades = (ConsolidadoSpoa.objects.filtrar_dimension('seccional', seccional)
+                    .distribucion('unidad', excluir_vacios=True))
+        
+        return JsonResponse(unidades, safe=False)
 
 
 class ApiDespachosPorSeccionalView(LoginRequiredMixin, View):
@@ -257,14 +247,10 @@ class ApiDespachosPorSeccionalView(LoginRequiredMixin, View):
             return JsonResponse({'error': 'Parámetro seccional es requerido'}, status=400)
         
         # Obtener despachos filtrados
-        despachos = (ConsolidadoSpoa.objects.filter(seccional=seccional)
-                    .values('despacho')
-                    .annotate(cantidad=Count('despacho'))
-                    .filter(despacho__isnull=False)
-                    .exclude(despacho='')
-                    .order_by('-cantidad'))
-        
-        return JsonResponse(list(despachos), safe=False)
+        despachos = (ConsolidadoSpoa.objects.filtrar_dimension('seccional', seccional)
+                     .distribucion('despacho', excluir_vacios=True))
+        
+        return JsonResponse(despachos, safe=False)
 
 
 class ApiRegistrosPorNecropsiaView(LoginRequiredMixin, View):
@@ -280,7 +266,8 @@ class ApiRegistrosPorNecropsiaView(LoginRequiredMixin, View):
             return JsonResponse({'error': 'Parámetro necropsia es requerido'}, status=400)
         
         # Obtener registros filtrados
-        registros = ConsolidadoSpoa.objects.filter(necropsia=necropsia).order_by('-fecha_hechos')
+        registros = (ConsolidadoSpoa.objects.filtrar_dimension('necropsia', necropsia)
+                     .con_dimensiones().order_by('-fecha_hechos'))
         
         # Paginar resultados
         paginator = Paginator(registros, registros_por_pagina)
@@ -316,7 +303,7 @@ class ApiDetalleRegistroView(LoginRequiredMixin, View):
             return JsonResponse({'error': 'Parámetro nunc es requerido'}, status=400)
         
         try:
-            registro = ConsolidadoSpoa.objects.get(nunc=nunc)
+            registro = ConsolidadoSpoa.objects.con_dimensiones().get(nunc=nunc)
             
             detalle = {
                 'nunc': registro.nunc,
@@ -418,18 +405,10 @@ class ApiDashboardDataView(LoginRequiredMixin, View):
         unidades_data = [u['cantidad'] for u in unidades]
         
         # Obtener distribución por seccional
-        seccionales = list(ConsolidadoSpoa.objects.values('seccional')
-                        .annotate(cantidad=Count('seccional'))
-                        .filter(seccional__isnull=False)
-                        .exclude(seccional='')
-                        .order_by('-cantidad'))
+        seccionales = ConsolidadoSpoa.objects.distribucion('seccional', excluir_vacios=True)
         
         # Obtener distribución por necropsia
-        necropsias = list(ConsolidadoSpoa.objects.values('necropsia')
-                        .annotate(cantidad=Count('necropsia'))
-                        .filter(necropsia__isnull=False)
-                        .exclude(necropsia='')
-                        .order_by('-cantidad'))
+        necropsias = ConsolidadoSpoa.objects.distribucion('necropsia', excluir_vacios=True)
         necropsias_labels = [n['necropsia'] for n in necropsias]
         necropsias_data = [n['cantidad'] for n in necropsias]
         
@@ -460,14 +439,20 @@ class ApiDashboardDataView(LoginRequiredMixin, View):
 
 class ApiCheckUpdatesView(LoginRequiredMixin, View):
     """
-    API para verificar si hay actualizaciones disponibles
+    API para verificar si hay actualizaciones disponibles.
+    El cliente envía la versión de datos que ya tiene (?version=N) y recibe la
+    versión actual, que aumenta con cada carga registrada en EjecucionCarga.
     """
     def get(self, request):
-        # En un entorno real, aquí verificarías si hay cambios en la base de datos
-        # desde la última consulta, usando timestamps o alguna otra técnica
+        version_actual = version_datos_actual()
+        
+        try:
+            version_cliente = int(request.GET['version'])
+        except (KeyError, ValueError):
+            # Sin versión previa el cliente solo necesita conocer la actual
+            return JsonResponse({'hasUpdates': False, 'version': version_actual})
         
-        # Para el ejemplo, simplemente devuelve falso
-        return JsonResponse({'hasUpdates': False})
+        return JsonResponse({'hasUpdates': version_actual > version_cliente, 'version': version_actual})
 
 class PersonasView(LoginRequiredMixin, TemplateView):
     """
@@ -714,18 +699,19 @@ class ApiNoticiasCriminalesPorPersona(LoginRequiredMixin, View):
                 })
         else:
             # Base query para otros tipos de delitos
-            noticias = ConsolidadoSpoa.objects.filter(numero_documento=numero_documento).order_by('-fecha_hechos')
+            noticias = (ConsolidadoSpoa.objects.filter(numero_documento=numero_documento)
+                        .con_dimensiones().order_by('-fecha_hechos'))
             
             # Filtrar por delito específico si se proporciona
             if delito:
                 if delito == 'desaparicion':
-                    noticias = noticias.filter(grupo_delito__icontains='desaparicion')
+                    noticias = noticias.filter(grupo_delito_dim__nombre__icontains='desaparicion')
                 elif delito == 'homicidio':
-                    noticias = noticias.filter(grupo_delito__icontains='homicidio')
+                    noticias = noticias.filter(grupo_delito_dim__nombre__icontains='homicidio')
                 elif delito == 'secuestro':
-                    noticias = noticias.filter(grupo_delito__icontains='secuestro')
+                    noticias = noticias.filter(grupo_delito_dim__nombre__icontains='secuestro')
                 elif delito == 'reclutamiento':
-                    noticias = noticias.filter(grupo_delito__icontains='reclut')
+                    noticias = noticias.filter(grupo_delito_dim__nombre__icontains='reclut')
             
             # Formatear resultados
             resultados = []
@@ -761,7 +747,7 @@ class ApiLineaTiempoPorPersona(LoginRequiredMixin, View):
             return JsonResponse({'error': 'Parámetro documento es requerido'}, status=400)
         
         # Obtener todas las noticias ordenadas por fecha
-        noticias = ConsolidadoSpoa.objects.filter(numero_documento=numero_documento)
+        noticias = ConsolidadoSpoa.objects.filter(numero_documento=numero_documento).con_dimensiones()
         
         # Crear línea de tiempo combinando fechas de hechos y denuncias
         timeline = []
@@ -131,6 +131,9 @@ NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD', '')
 
 NEO4J_URI = f"{NEO4J_SCHEME}://{NEO4J_HOST}:{NEO4J_PORT}"
 
+# Snapshots versionados de la red (ver dashboard.utils_snapshots)
+SNAPSHOTS_RED_DIR = os.getenv('SNAPSHOTS_RED_DIR', os.path.join(BASE_DIR, 'snapshots_red'))
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
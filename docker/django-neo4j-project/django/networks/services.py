@@ -1,24 +1,27 @@
 import time
 from myproject.neo4j_driver import get_neo4j_session, execute_query
+from dashboard.models import EstadisticaComponente, EstadisticaComunidad
 
 
-def get_component_info(node_id, limit=1000):
+def get_component_info(node_id, limit=1000, nivel=None):
     """
     Obtiene información sobre la componente a la que pertenece un nodo
     
     Args:
         node_id: ID del nodo a consultar
         limit: Límite de nodos a devolver
+        nivel: 'componente' o 'comunidad'. Por defecto se muestra la comunidad
+               del nodo cuando su componente tiene más nodos que el límite
         
     Returns:
-        dict: Información de la componente
+        dict: Información de la componente (o de la comunidad)
     """
     start_time = time.time()
     
     # Obtener componente del nodo
     componente_query = """
     MATCH (n {id: $node_id})
-    RETURN n.componente as componente
+    RETURN n.componente as componente, n.componente_id as componente_id, n.comunidad as comunidad
     """
     
     componente_result = execute_query(componente_query, {'node_id': node_id})
@@ -30,6 +33,30 @@ def get_component_info(node_id, limit=1000):
         }
     
     componente = componente_result[0].get('componente')
+    componente_id = componente_result[0].get('componente_id')
+    comunidad = componente_result[0].get('comunidad')
+    
+    # Estadísticas de la componente calculadas al crear o actualizar la red
+    resumen = None
+    if componente_id is not None:
+        resumen = EstadisticaComponente.objects.filter(componente_id=int(componente_id)).values(
+            'tamano', 'nodos_nunc', 'nodos_persona', 'enlaces', 'densidad', 'diametro', 'diametro_exacto', 'top_nodos'
+        ).first()
+    
+    # Una componente más grande que el límite se truncaría: se muestra la comunidad del nodo
+    if nivel is None:
+        nivel = 'comunidad' if comunidad is not None and resumen and resumen['tamano'] > limit else 'componente'
+    if nivel == 'comunidad' and comunidad is None:
+        nivel = 'componente'
+    
+    # componente_id se mantiene entre reconstrucciones de la red; las redes
+    # guardadas antes de que existiera solo tienen el número de componente
+    if nivel == 'comunidad':
+        propiedad, valor = 'comunidad', comunidad
+    elif componente_id is not None:
+        propiedad, valor = 'componente_id', componente_id
+    else:
+        propiedad, valor = 'componente', componente
     
     # # Consultar nodos de la misma componente
     # nodes_query = """
@@ -40,27 +67,28 @@ def get_component_info(node_id, limit=1000):
     # """
     
     # Consultar nodos de la misma componente
-    nodes_query = """
+    nodes_query = f"""
     MATCH (n)
-    WHERE n.componente = $componente
+    WHERE n.{propiedad} = $componente AND NOT n:Componente
     RETURN n.id as id, n.name as name, n.tipo as type, n.componente as componente, n.color as color
     LIMIT $limit
     """
     
-    nodes_result = execute_query(nodes_query, {'componente': componente, 'limit': limit})
+    nodes_result = execute_query(nodes_query, {'componente': valor, 'limit': limit})
     
     # Obtener las relaciones entre estos nodos
     # Consulta modificada para evitar duplicados
-    relationships_query = """
+    relationships_query = f"""
     MATCH (n)-[r]-(m)
-    WHERE n.componente = $componente AND m.componente = $componente
+    WHERE n.{propiedad} = $componente AND m.{propiedad} = $componente
+    AND type(r) <> 'COAPARECE_CON'  // La proyección de personas no es parte de la red NUNC-Persona
     AND id(n) < id(m)  // Esta condición asegura que cada relación se cuente una sola vez
     RETURN n.id as source, m.id as target, type(r) as type, 
         CASE WHEN r.calidad_vinculo IS NOT NULL THEN r.calidad_vinculo ELSE '' END as calidad_vinculo
     LIMIT $limit
     """
     
-    relationships_result = execute_query(relationships_query, {'componente': componente, 'limit': limit*2})
+    relationships_result = execute_query(relationships_query, {'componente': valor, 'limit': limit*2})
     
     # Formatear resultados para visualización
     nodes = []
@@ -95,15 +123,27 @@ def get_component_info(node_id, limit=1000):
             })
             edge_keys.add(edge_key)
     
+    resumen_comunidad = None
+    if nivel == 'comunidad':
+        resumen_comunidad = EstadisticaComunidad.objects.filter(comunidad=int(comunidad)).values(
+            'tamano', 'nodos_nunc', 'nodos_persona', 'enlaces_internos', 'enlaces_externos', 'densidad', 'top_nodos'
+        ).first()
+    
     # Guardar registro de la consulta
     execution_time = time.time() - start_time
     
     return {
         'componente': componente,
+        # Como texto: un entero de 63 bits pierde precisión en los números de JavaScript
+        'componente_id': str(componente_id) if componente_id is not None else None,
         'nodes': nodes,
         'edges': edges,
         'node_count': len(nodes),
         'edge_count': len(edges),
+        'nivel': nivel,
+        'comunidad': comunidad,
+        'resumen': resumen,
+        'resumen_comunidad': resumen_comunidad,
         'execution_time': execution_time,
         'limit_reached': len(nodes) >= limit
     }
@@ -200,4 +240,65 @@ def get_neighbors(node_id, depth=1, limit=100):
         'edge_count': len(edges),
         'execution_time': execution_time,
         'limit_reached': len(result) >= limit
-    }
\ No newline at end of file
+    }
+
+
+def get_cooccurrences(node_id, limit=50):
+    """
+    Personas que aparecen junto a una persona en alguna NUNC, según la
+    proyección Persona-Persona (relaciones COAPARECE_CON de proyectar_personas)
+    
+    Args:
+        node_id: ID (número de documento) de la persona
+        limit: Límite de personas a devolver, las de mayor peso primero
+        
+    Returns:
+        dict: La persona, las personas relacionadas y los enlaces con nuncs y peso
+    """
+    start_time = time.time()
+    
+    query = """
+    MATCH (p:Persona {id: $node_id})-[r:COAPARECE_CON]-(otra:Persona)
+    RETURN p.name as source_name, otra.id as id, otra.name as name, r.nuncs as nuncs, r.peso as peso
+    ORDER BY r.peso DESC, r.nuncs DESC
+    LIMIT $limit
+    """
+    
+    result = execute_query(query, {'node_id': node_id, 'limit': limit})
+    
+    nodes = []
+    edges = []
+    if result:
+        nodes.append({
+            'id': node_id,
+            'label': result[0]['source_name'],
+            'color': '#ff0000',  # Rojo para el nodo central
+            'size': 8,
+            'type': 'Persona'
+        })
+    for record in result:
+        nodes.append({
+            'id': record['id'],
+            'label': record['name'],
+            'color': '#1f77b4',
+            'size': 5,
+            'type': 'Persona'
+        })
+        edges.append({
+            'from': node_id,
+            'to': record['id'],
+            'label': str(record['nuncs']),
+            'nuncs': record['nuncs'],
+            'peso': record['peso']
+        })
+    
+    execution_time = time.time() - start_time
+    
+    return {
+        'nodes': nodes,
+        'edges': edges,
+        'node_count': len(nodes),
+        'edge_count': len(edges),
+        'execution_time': execution_time,
+        'limit_reached': len(result) >= limit
+    }
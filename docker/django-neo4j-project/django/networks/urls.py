@@ -6,4 +6,5 @@ app_name = 'networks'
 urlpatterns = [
     path('visualization/<str:node_id>/', views.NetworkVisualizationView.as_view(), name='visualization'),
     path('api/component/', views.ApiComponentInfoView.as_view(), name='api_component'),
+    path('api/cooccurrences/', views.ApiCooccurrencesView.as_view(), name='api_cooccurrences'),
 ]
\ No newline at end of file
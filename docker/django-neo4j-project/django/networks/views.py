@@ -4,7 +4,7 @@ from django.http import JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 import json
 
-from .services import get_component_info, get_neighbors
+from .services import get_component_info, get_neighbors, get_cooccurrences
 
 # Create your views here.
 
@@ -35,12 +35,15 @@ class ApiComponentInfoView(LoginRequiredMixin, View):
     def get(self, request):
         node_id = request.GET.get('node_id', '')
         limit = int(request.GET.get('limit', 1000))
+        nivel = request.GET.get('nivel') or None
         
         if not node_id:
             return JsonResponse({'error': 'Se requiere un ID de nodo'}, status=400)
+        if nivel not in (None, 'componente', 'comunidad'):
+            return JsonResponse({'error': "nivel debe ser 'componente' o 'comunidad'"}, status=400)
         
         # Obtener información de la componente
-        component_info = get_component_info(node_id, limit)
+        component_info = get_component_info(node_id, limit, nivel)
         print(component_info)
         
         return JsonResponse(component_info)
@@ -61,4 +64,18 @@ class ApiNeighborsView(LoginRequiredMixin, View):
         # Obtener vecinos
         neighbors_info = get_neighbors(node_id, depth, limit)
         
-        return JsonResponse(neighbors_info)
\ No newline at end of file
+        return JsonResponse(neighbors_info)
+
+
+class ApiCooccurrencesView(LoginRequiredMixin, View):
+    """
+    API para obtener las personas que aparecen junto a una persona en alguna NUNC
+    """
+    def get(self, request):
+        node_id = request.GET.get('node_id', '')
+        limit = int(request.GET.get('limit', 50))
+        
+        if not node_id:
+            return JsonResponse({'error': 'Se requiere un ID de nodo'}, status=400)
+        
+        return JsonResponse(get_cooccurrences(node_id, limit))
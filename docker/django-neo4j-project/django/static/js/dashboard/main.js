@@ -94,12 +94,30 @@ function configurarBotonesExportacion() {
  * En una aplicación real, esto se conectaría a un WebSocket o haría polling al servidor
  */
 function configurarActualizacionDatos() {
+    // Versión de los datos mostrados; el servidor la incrementa con cada carga
+    let versionDatos = null;
+    
+    function verificarActualizaciones() {
+        const url = versionDatos === null
+            ? '/dashboard/api/check-updates/'
+            : `/dashboard/api/check-updates/?version=${versionDatos}`;
+        return fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                versionDatos = data.version;
+                return data;
+            });
+    }
+    
+    // Obtener la versión inicial al cargar la página
+    verificarActualizaciones().catch(error => {
+        console.error('Error verificando actualizaciones:', error);
+    });
+    
     // Configurar intervalo para actualizar datos cada cierto tiempo (ej: cada 5 minutos)
-    // Esta función simularía una actualización en tiempo real de los datos
     setInterval(function() {
         // Verificar si hay actualizaciones disponibles
-        fetch('/dashboard/api/check-updates/')
-            .then(response => response.json())
+        verificarActualizaciones()
             .then(data => {
                 if (data.hasUpdates) {
                     console.log('Hay actualizaciones disponibles');